@@ -2,10 +2,16 @@
 """
 Agent 2: 法令正確性チェック
 生成された問題を法律専門知識で検証
+
+【LLM検証モード】
+- always:    全問題を GPT で詳細検証する（従来動作）
+- undecided: 知識ベースのルールで判定できなかった問題だけ GPT で検証する
+             （誤りを検出した問題・数値が知識ベースと一致した問題は GPT を呼ばない）
 """
 
 import json
 import logging
+import sys
 from pathlib import Path
 from openai import OpenAI
 from legal_knowledge_base import validate_problem
@@ -16,9 +22,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+LLM_MODES = ("always", "undecided")
+
+
 class LegalChecker:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, llm_mode="always"):
+        if llm_mode not in LLM_MODES:
+            raise ValueError(f"llm_mode は {LLM_MODES} のいずれか: {llm_mode}")
         self.client = OpenAI(api_key=api_key)
+        self.llm_mode = llm_mode
+        self.llm_calls = 0
+        self.llm_skipped = 0
 
     def check_problem_accuracy(self, problem: dict) -> dict:
         """
@@ -43,9 +57,20 @@ class LegalChecker:
         logger.info(f"【{problem_id}】ローカル検証開始: {problem_text[:50]}...")
         local_result = validate_problem(problem_text, {})
 
-        # ステップ2: GPT-4oによる詳細検証
-        logger.info(f"【{problem_id}】GPT詳細検証開始...")
-        gpt_result = self._gpt_detailed_check(problem_text)
+        # ステップ2: GPT-4oによる詳細検証（undecided モードではルールで判定できなかった問題のみ）
+        if self.llm_mode == "undecided" and local_result['decided']:
+            logger.info(f"【{problem_id}】ルールで判定済みのためGPT検証をスキップ")
+            self.llm_skipped += 1
+            gpt_result = {
+                'is_correct': local_result['is_correct'],
+                'issues': [],
+                'confidence': 1.0,
+                'skipped': True
+            }
+        else:
+            logger.info(f"【{problem_id}】GPT詳細検証開始...")
+            self.llm_calls += 1
+            gpt_result = self._gpt_detailed_check(problem_text)
 
         # ステップ3: 統合判定
         issues = local_result['issues'] + gpt_result.get('issues', [])
@@ -142,10 +167,10 @@ JSON形式で以下を返してください：
         else:
             return 'LOW'
 
-def check_all_problems(problems_file: str) -> list:
+def check_all_problems(problems_file: str, llm_mode: str = "always") -> list:
     """全問題をチェック"""
 
-    checker = LegalChecker()
+    checker = LegalChecker(llm_mode=llm_mode)
 
     with open(problems_file) as f:
         problems = json.load(f)
@@ -176,13 +201,15 @@ def check_all_problems(problems_file: str) -> list:
     print(f"【チェック結果】")
     print(f"  正確: {correct_count}/{len(results)} ({100*correct_count/len(results):.1f}%)")
     print(f"  修正必要: {needs_revision}/{len(results)}")
+    print(f"  GPT検証: {checker.llm_calls}問（ルールで判定済みのためスキップ: {checker.llm_skipped}問）")
     print("="*80 + "\n")
 
     return results
 
 if __name__ == "__main__":
     problems_file = "/home/planj/patshinko-exam-app/backend/problems_50_hybrid_rag.json"
-    results = check_all_problems(problems_file)
+    llm_mode = sys.argv[1] if len(sys.argv) > 1 else "always"
+    results = check_all_problems(problems_file, llm_mode)
 
     # 結果をJSONで保存
     output_file = Path(problems_file).parent / "agent2_check_results.json"
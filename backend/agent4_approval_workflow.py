@@ -2,10 +2,13 @@
 """
 Agent 4: 専門家承認フロー
 修正案の最終判定と承認
+
+execute_full_workflow は Agent 2 → 3 → 4 を review_pipeline.ReviewPipeline で並行実行する
 """
 
 import json
 import logging
+import sys
 from pathlib import Path
 from datetime import datetime
 
@@ -94,92 +97,87 @@ class ExpertApprovalWorkflow:
                 summaries.append(str(issue)[:50])
         return '; '.join(summaries[:3])
 
-def execute_full_workflow(problems_file: str):
-    """全ワークフローを実行"""
+def execute_full_workflow(problems_file: str, llm_mode: str = "always", check_workers: int = 4,
+                          correction_workers: int = 4, queue_size: int = 32):
+    """全ワークフローを実行（Agent 2 → 3 → 4 をストリーミングパイプラインで並行実行）"""
 
     print("\n" + "="*80)
     print("【マルチエージェント専門家検証ワークフロー】")
     print("="*80 + "\n")
 
-    # ステップ1: Agent 2 チェック実行
-    print("📋 ステップ1: Agent 2 - 法令正確性チェック...")
-    from agent2_legal_checker import check_all_problems
-    check_results = check_all_problems(problems_file)
-
-    # Agent 2がファイルに保存するまで待つ
-    check_results_file = Path(problems_file).parent / "agent2_check_results.json"
-    import time
-    timeout = 10
-    while not check_results_file.exists() and timeout > 0:
-        time.sleep(0.5)
-        timeout -= 0.5
-
-    if not check_results_file.exists():
-        logger.warning(f"チェック結果ファイルが見つかりません: {check_results_file}")
-        logger.warning("Agent 2の結果をメモリから使用します")
-        # メモリ上の結果をファイルに保存
-        with open(check_results_file, 'w', encoding='utf-8') as f:
-            json.dump(check_results, f, ensure_ascii=False, indent=2)
-
-    # ステップ2: Agent 3 修正案生成
-    print("\n✏️  ステップ2: Agent 3 - 修正案生成...")
-    from agent3_correction_suggester import generate_corrections
-    correction_results = generate_corrections(problems_file, str(check_results_file))
-
-    # ステップ3: Agent 4 最終承認
-    print("\n✅ ステップ3: Agent 4 - 専門家承認フロー...\n")
+    from agent2_legal_checker import LegalChecker
+    from agent3_correction_suggester import CorrectionSuggester
+    from review_pipeline import ReviewPipeline, print_metrics
 
     with open(problems_file) as f:
         problems = json.load(f)
 
-    approval_workflow = ExpertApprovalWorkflow()
-    approval_results = []
-
-    # 修正結果をマップ化
-    correction_map = {c['problem_id']: c for c in correction_results}
-
-    for problem, check_result in zip(problems, check_results):
-        problem_id = problem.get('problem_id', '')
-        correction = correction_map.get(problem_id)
-
-        result = approval_workflow.approve_problem(problem, check_result, correction)
-        approval_results.append(result)
-
-        # 進捗表示
-        status_icon = {
-            'APPROVED': '✅',
-            'REVISION_APPROVED': '🔧',
-            'REJECTED': '❌'
-        }.get(result['status'], '❓')
-
-        print(f"{status_icon} {problem.get('problem_text', '')[:60]}...")
+    status_icons = {
+        'APPROVED': '✅',
+        'REVISION_APPROVED': '🔧',
+        'REJECTED': '❌',
+        'ERROR': '⚠️'
+    }
+
+    def show_result(index, result):
+        # 進捗表示（承認が確定した順）
+        status_icon = status_icons.get(result.get('status'), '❓')
+        print(f"{status_icon} {problems[index].get('problem_text', '')[:60]}...")
+
+    print(f"📋 Agent 2（法令チェック ×{check_workers}）→ Agent 3（修正案 ×{correction_workers}）"
+          f"→ Agent 4（承認）を並行実行...\n")
+
+    pipeline = ReviewPipeline(
+        LegalChecker(llm_mode=llm_mode),
+        CorrectionSuggester(),
+        ExpertApprovalWorkflow(),
+        check_workers=check_workers,
+        correction_workers=correction_workers,
+        queue_size=queue_size,
+        on_result=show_result
+    )
+    output = pipeline.run(problems)
+    approval_results = output['approval_results']
 
     # 最終サマリー
-    approved = sum(1 for r in approval_results if r['status'] in ['APPROVED', 'REVISION_APPROVED'])
-    rejected = sum(1 for r in approval_results if r['status'] == 'REJECTED')
+    approved = sum(1 for r in approval_results if r.get('status') in ['APPROVED', 'REVISION_APPROVED'])
+    rejected = sum(1 for r in approval_results if r.get('status') == 'REJECTED')
+    errors = sum(1 for r in approval_results if r.get('status') == 'ERROR')
 
     print("\n" + "="*80)
     print("【最終承認結果】")
     print(f"  承認: {approved}/{len(approval_results)} ({100*approved/len(approval_results):.1f}%)")
     print(f"  却下: {rejected}/{len(approval_results)} ({100*rejected/len(approval_results):.1f}%)")
+    if errors:
+        print(f"  エラー: {errors}/{len(approval_results)}（各エージェントの呼び出しで例外）")
     print("="*80 + "\n")
+    print_metrics(output['metrics'])
+
+    # 結果保存（各エージェントの結果ファイルは従来と同じ形式）
+    output_dir = Path(problems_file).parent
+    with open(output_dir / "agent2_check_results.json", 'w', encoding='utf-8') as f:
+        json.dump(output['check_results'], f, ensure_ascii=False, indent=2)
+    with open(output_dir / "agent3_corrections.json", 'w', encoding='utf-8') as f:
+        json.dump(output['correction_results'], f, ensure_ascii=False, indent=2)
 
-    # 結果保存
-    output_file = Path(problems_file).parent / "agent4_approval_results.json"
+    output_file = output_dir / "agent4_approval_results.json"
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump({
             'timestamp': datetime.now().isoformat(),
             'total_problems': len(approval_results),
             'approved': approved,
             'rejected': rejected,
+            'errors': errors,
             'approval_rate': approved / len(approval_results),
+            'pipeline_metrics': output['metrics'],
             'results': approval_results
         }, f, ensure_ascii=False, indent=2)
 
-    print(f"📁 承認結果: {output_file}")
+    print(f"\n📁 承認結果: {output_file}")
 
     return approval_results
 
 if __name__ == "__main__":
     problems_file = "/home/planj/patshinko-exam-app/backend/problems_50_hybrid_rag.json"
-    execute_full_workflow(problems_file)
+    llm_mode = sys.argv[1] if len(sys.argv) > 1 else "always"
+    execute_full_workflow(problems_file, llm_mode)
@@ -13,17 +13,24 @@
   → 既存OCRの品質分析と構造化を実施
   → 講習テキストの重要セクションを特定
   → テーマ抽出用の基盤を準備
+
+入力:
+  OCR結果（1行1ページのJSONL）をストリーム読み込みし、
+  品質分析とセクション抽出をページ単位の1パスで実施
 """
 
 import json
 import sys
 import logging
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable, Iterator
 from datetime import datetime
 from collections import defaultdict
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ocr_page_stream import iter_ocr_pages
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -35,28 +42,20 @@ class LectureOCRAnalyzer:
     """講習テキストOCR分析エンジン"""
 
     def __init__(self):
-        self.ocr_path = "/home/planj/patshinko-exam-app/data/ocr_results_corrected.json"
+        self.ocr_path = "/home/planj/patshinko-exam-app/data/ocr_results_corrected.jsonl"
         self.output_dir = Path("/home/planj/patshinko-exam-app/data")
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    def load_ocr(self) -> List[Dict]:
-        """OCR結果をロード"""
-        try:
-            with open(self.ocr_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"OCRロード失敗: {e}")
-            return []
-
-    def analyze_ocr_quality(self, ocr_data: List[Dict]) -> Dict:
-        """OCR品質を分析"""
-        logger.info("OCR品質分析開始...")
+    def load_ocr(self) -> Iterator[Dict]:
+        """OCR結果をページ単位で順に返す"""
+        return iter_ocr_pages(self.ocr_path)
 
-        analysis = {
+    def _new_quality_analysis(self) -> Dict:
+        return {
             "timestamp": datetime.now().isoformat(),
-            "total_pages": len(ocr_data),
+            "total_pages": 0,
             "summary": {
-                "total_pages": len(ocr_data)
+                "total_pages": 0
             },
             "quality_metrics": {
                 "total_characters": 0,
@@ -78,47 +77,50 @@ class LectureOCRAnalyzer:
             }
         }
 
-        # ページごと分析
-        for page in ocr_data:
-            pdf_idx = page['pdf_index']
-            page_num = page['page_number']
-            text = page['text']
-
-            # 統計
-            char_count = len(text)
-            analysis['quality_metrics']['total_characters'] += char_count
-            analysis['quality_metrics']['pages_by_pdf'][pdf_idx] += 1
-
-            # 空ページチェック
-            if char_count < 50:
-                analysis['quality_flags']['empty_pages'].append(f"PDF{pdf_idx}-P{page_num}")
-
-            # コンテンツ分類
-            if re.search(r'^(第[0-9０-９]+章|第[0-9０-９]+項)', text):
-                analysis['content_analysis']['chapters'].append({
+    def _analyze_quality_page(self, analysis: Dict, page: Dict):
+        """1ページ分の品質分析"""
+        pdf_idx = page['pdf_index']
+        page_num = page['page_number']
+        text = page['text']
+
+        # 統計
+        analysis['total_pages'] += 1
+        analysis['summary']['total_pages'] += 1
+        char_count = len(text)
+        analysis['quality_metrics']['total_characters'] += char_count
+        analysis['quality_metrics']['pages_by_pdf'][pdf_idx] += 1
+
+        # 空ページチェック
+        if char_count < 50:
+            analysis['quality_flags']['empty_pages'].append(f"PDF{pdf_idx}-P{page_num}")
+
+        # コンテンツ分類
+        if re.search(r'^(第[0-9０-９]+章|第[0-9０-９]+項)', text):
+            analysis['content_analysis']['chapters'].append({
+                'pdf': pdf_idx,
+                'page': page_num,
+                'preview': text[:100]
+            })
+
+        if re.search(r'（[0-9０-９]+）|[0-9０-９]+\)|①|②|③|④|⑤', text[:200]):
+            analysis['content_analysis']['lists'].append({
+                'pdf': pdf_idx,
+                'page': page_num
+            })
+
+        # OCRエラーのリスク検出
+        if re.search(r'[ァ-ヴー]{50,}', text):  # 異常なカタカナ連続
+            analysis['quality_flags']['possible_errors'].append(f"PDF{pdf_idx}-P{page_num}: 異常なカタカナ")
+
+        if '□' in text or '△' in text or '◆' in text:
+            if '□' in text:
+                analysis['content_analysis']['tables'].append({
                     'pdf': pdf_idx,
                     'page': page_num,
-                    'preview': text[:100]
-                })
-
-            if re.search(r'（[0-9０-９]+）|[0-9０-９]+\)|①|②|③|④|⑤', text[:200]):
-                analysis['content_analysis']['lists'].append({
-                    'pdf': pdf_idx,
-                    'page': page_num
+                    'has_boxes': True
                 })
 
-            # OCRエラーのリスク検出
-            if re.search(r'[ァ-ヴー]{50,}', text):  # 異常なカタカナ連続
-                analysis['quality_flags']['possible_errors'].append(f"PDF{pdf_idx}-P{page_num}: 異常なカタカナ")
-
-            if '□' in text or '△' in text or '◆' in text:
-                if '□' in text:
-                    analysis['content_analysis']['tables'].append({
-                        'pdf': pdf_idx,
-                        'page': page_num,
-                        'has_boxes': True
-                    })
-
+    def _finish_quality_analysis(self, analysis: Dict) -> Dict:
         # 統計計算
         if analysis['quality_metrics']['total_characters'] > 0:
             analysis['quality_metrics']['average_chars_per_page'] = round(
@@ -134,11 +136,20 @@ class LectureOCRAnalyzer:
 
         return analysis
 
-    def extract_key_sections(self, ocr_data: List[Dict]) -> Dict:
-        """重要セクションを抽出"""
-        logger.info("重要セクション抽出開始...")
+    def analyze_ocr_quality(self, ocr_data: Iterable[Dict]) -> Dict:
+        """OCR品質を分析"""
+        logger.info("OCR品質分析開始...")
+
+        analysis = self._new_quality_analysis()
 
-        sections = {
+        # ページごと分析
+        for page in ocr_data:
+            self._analyze_quality_page(analysis, page)
+
+        return self._finish_quality_analysis(analysis)
+
+    def _new_sections(self) -> Dict:
+        return {
             "intro": [],
             "chapter1": [],  # 遊技機取扱主任者制度
             "chapter2": [],  # 遊技場営業規制
@@ -147,63 +158,89 @@ class LectureOCRAnalyzer:
             "identified_themes": []
         }
 
+    def extract_key_sections(self, ocr_data: Iterable[Dict]) -> Dict:
+        """重要セクションを抽出"""
+        logger.info("重要セクション抽出開始...")
+
+        sections = self._new_sections()
+
         for page in ocr_data:
-            text = page['text']
-            pdf_idx = page['pdf_index']
-            page_num = page['page_number']
+            self._extract_sections_page(sections, page)
 
-            page_ref = f"PDF{pdf_idx}-P{page_num}"
+        return self._finish_sections(sections)
 
-            # セクション分類
-            if page_num <= 15:
-                sections['intro'].append({
-                    'page': page_ref,
-                    'preview': text[:150]
-                })
+    def analyze_stream(self, ocr_pages: Iterable[Dict]) -> Tuple[Dict, Dict]:
+        """OCRページを1回だけ走査し、品質分析とセクション抽出を同時に行う"""
+        logger.info("OCR品質分析・重要セクション抽出開始（1パス）...")
+
+        analysis = self._new_quality_analysis()
+        sections = self._new_sections()
+
+        for page in ocr_pages:
+            self._analyze_quality_page(analysis, page)
+            self._extract_sections_page(sections, page)
+
+        return self._finish_quality_analysis(analysis), self._finish_sections(sections)
+
+    def _extract_sections_page(self, sections: Dict, page: Dict):
+        """1ページ分のセクション分類・テーマ候補検出"""
+        text = page['text']
+        pdf_idx = page['pdf_index']
+        page_num = page['page_number']
+
+        page_ref = f"PDF{pdf_idx}-P{page_num}"
+
+        # セクション分類
+        if page_num <= 15:
+            sections['intro'].append({
+                'page': page_ref,
+                'preview': text[:150]
+            })
+
+        # テーマ抽出候補を検出
+        # 営業許可関連
+        if '営業許可' in text:
+            self._extract_theme_candidate(
+                sections['identified_themes'],
+                "営業許可関連", page_ref, text
+            )
+
+        # 型式検定関連
+        if '型式検定' in text or '型式検査' in text:
+            self._extract_theme_candidate(
+                sections['identified_themes'],
+                "型式検定関連", page_ref, text
+            )
+
+        # 遊技機関連
+        if '遊技機' in text and ('設置' in text or '新台' in text or '中古' in text):
+            self._extract_theme_candidate(
+                sections['identified_themes'],
+                "遊技機管理", page_ref, text
+            )
+
+        # 営業時間・営業禁止
+        if '営業時間' in text or '営業禁止' in text:
+            self._extract_theme_candidate(
+                sections['identified_themes'],
+                "営業時間・規制", page_ref, text
+            )
+
+        # 景品関連
+        if '景品' in text and ('種類' in text or '限定' in text or '品目' in text):
+            self._extract_theme_candidate(
+                sections['identified_themes'],
+                "景品規制", page_ref, text
+            )
 
-            # テーマ抽出候補を検出
-            # 営業許可関連
-            if '営業許可' in text:
-                self._extract_theme_candidate(
-                    sections['identified_themes'],
-                    "営業許可関連", page_ref, text
-                )
-
-            # 型式検定関連
-            if '型式検定' in text or '型式検査' in text:
-                self._extract_theme_candidate(
-                    sections['identified_themes'],
-                    "型式検定関連", page_ref, text
-                )
-
-            # 遊技機関連
-            if '遊技機' in text and ('設置' in text or '新台' in text or '中古' in text):
-                self._extract_theme_candidate(
-                    sections['identified_themes'],
-                    "遊技機管理", page_ref, text
-                )
-
-            # 営業時間・営業禁止
-            if '営業時間' in text or '営業禁止' in text:
-                self._extract_theme_candidate(
-                    sections['identified_themes'],
-                    "営業時間・規制", page_ref, text
-                )
-
-            # 景品関連
-            if '景品' in text and ('種類' in text or '限定' in text or '品目' in text):
-                self._extract_theme_candidate(
-                    sections['identified_themes'],
-                    "景品規制", page_ref, text
-                )
-
-            # 不正対策
-            if '不正' in text and ('防止' in text or '対策' in text):
-                self._extract_theme_candidate(
-                    sections['identified_themes'],
-                    "不正対策", page_ref, text
-                )
+        # 不正対策
+        if '不正' in text and ('防止' in text or '対策' in text):
+            self._extract_theme_candidate(
+                sections['identified_themes'],
+                "不正対策", page_ref, text
+            )
 
+    def _finish_sections(self, sections: Dict) -> Dict:
         logger.info(f"✅ セクション抽出完了")
         logger.info(f"  抽出されたテーマ候補: {len(sections['identified_themes'])}件")
 
@@ -371,7 +408,7 @@ class LectureOCRAnalyzer:
 
 ### ツール・リソース
 - **講習テキスト**: `/mnt/c/Users/planj/Downloads/{①,②,③}.pdf`
-- **現在のOCR**: `/home/planj/patshinko-exam-app/data/ocr_results_corrected.json`
+- **現在のOCR**: `/home/planj/patshinko-exam-app/data/ocr_results_corrected.jsonl`（旧形式の `.json` 配列も同じ内容で併記）
 - **パターン定義**: `/home/planj/patshinko-exam-app/backend/CORRECTED_12PATTERNS.md`
 - **実装例**: `/home/planj/patshinko-exam-app/backend/THEME_PICKUP_IMPLEMENTATION_EXAMPLE.md`
 
@@ -388,20 +425,16 @@ class LectureOCRAnalyzer:
         logger.info("講習テキスト OCR分析・準備処理開始")
         logger.info("=" * 70)
 
-        # ステップ1: OCRロード
-        logger.info("\n【ステップ1】OCR結果をロード中...")
-        ocr_data = self.load_ocr()
-        if not ocr_data:
-            logger.error("❌ OCRロードに失敗")
+        # ステップ1〜3: OCRをページ単位で読み込み、品質分析とセクション抽出を1パスで実施
+        logger.info("\n【ステップ1〜3】OCR結果をストリーム読み込み・品質分析・テーマセクション抽出中...")
+        try:
+            analysis, sections = self.analyze_stream(self.load_ocr())
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ OCRロードに失敗: {e}")
+            return False
+        if analysis['total_pages'] == 0:
+            logger.error("❌ OCRロードに失敗（ページなし）")
             return False
-
-        # ステップ2: 品質分析
-        logger.info("\n【ステップ2】OCR品質分析中...")
-        analysis = self.analyze_ocr_quality(ocr_data)
-
-        # ステップ3: セクション抽出
-        logger.info("\n【ステップ3】テーマセクション抽出中...")
-        sections = self.extract_key_sections(ocr_data)
 
         # ステップ4: ガイド生成
         logger.info("\n【ステップ4】準備ガイド生成中...")
@@ -9,9 +9,16 @@ from flask_cors import CORS
 import json
 import os
 import random
+import sys
 from pathlib import Path
 from urllib.parse import unquote
 from auth_database import AuthDatabase
+from quiz_sampler import AdaptiveQuizSampler, StratifiedQuizSampler, sample_unseen
+from item_statistics import run_item_statistics
+from request_metrics import CountingConnection, QueryMeter, RequestMetrics
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from database_schema import DatabaseManager, DifficultyRefreshJob, ResultWriteQueue
 
 # 環境変数の読み込み
 DEV_MODE = os.getenv('DEV_MODE', 'false').lower() == 'true'
@@ -21,6 +28,10 @@ ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000,http://loc
 dist_path = Path(__file__).parent.parent / "dist"
 app = Flask(__name__, static_folder=str(dist_path), static_url_path="")
 
+# リクエスト計測（ルート別の処理時間・サイズ・SQLite クエリ数、/api/metrics で取得）
+request_metrics = RequestMetrics()
+request_metrics.init_app(app)
+
 # CORS設定を厳格化
 if DEV_MODE:
     # 開発環境: 指定されたオリジンのみ許可
@@ -34,18 +45,70 @@ else:
 # 問題集ファイルパス（230問統合版）
 PROBLEMS_FILE = Path(__file__).parent / "db" / "problems.json"
 
+# テスト結果DBパス
+RESULTS_DB_PATH = Path(os.getenv('RESULTS_DB_PATH', str(Path(__file__).parent / "db" / "patshinko_exam.db")))
+
+# 問題別正答率・項目統計の再計算間隔（秒）
+DIFFICULTY_REFRESH_SECONDS = int(os.getenv('DIFFICULTY_REFRESH_SECONDS', '300'))
+
 # グローバル変数
 problems_data = []
+problems_by_difficulty = {}
+max_problem_id = 0
+quiz_sampler = None
+adaptive_sampler = None
 auth_db = None
+results_db = None
+result_writer = None
+difficulty_job = None
+item_statistics = {}
 
 def init_auth_db():
     """認証DB初期化"""
     global auth_db
-    auth_db = AuthDatabase()
+    auth_db = AuthDatabase(connection_factory=CountingConnection)
+
+def init_results_db():
+    """テスト結果DB・書き込みキュー・正答率と項目統計の定期再計算を初期化"""
+    global results_db, result_writer, difficulty_job
+    results_db = DatabaseManager(RESULTS_DB_PATH, connection_factory=CountingConnection)
+    # 書き込みスレッドのクエリは書き込みを待つリクエストに計上する
+    result_writer = ResultWriteQueue(results_db, query_meter=QueryMeter())
+    difficulty_job = DifficultyRefreshJob(
+        results_db,
+        interval=DIFFICULTY_REFRESH_SECONDS,
+        on_refresh=refresh_calibration
+    )
+
+def refresh_calibration(correct_rates):
+    """正答率の再計算後に項目統計を集計し、出題用の難易度別リスト・サンプラーを作り直す（バックグラウンドで実行）"""
+    global item_statistics
+    item_statistics = {item['question_id']: item for item in run_item_statistics(results_db)}
+    index_problems(correct_rates)
+
+def effective_difficulty(problem):
+    """出題に使う難易度（測定難易度があればそれ、なければ問題集の難易度）"""
+    stats = item_statistics.get(problem.get('problem_id'))
+    return (stats and stats['measured_difficulty']) or problem.get('difficulty')
+
+def index_problems(correct_rates=None):
+    """難易度別の問題リストとサンプラーを作る（出題時のフィルタリングを省く）"""
+    global problems_by_difficulty, quiz_sampler, adaptive_sampler
+    by_difficulty = {}
+    for problem in problems_data:
+        by_difficulty.setdefault(effective_difficulty(problem), []).append(problem)
+    problems_by_difficulty = by_difficulty
+
+    # カテゴリー配分の層別サンプラー（問題ID範囲を層にコンパイル）
+    quiz_sampler = StratifiedQuizSampler(problems_data)
+    # 苦手カテゴリー重視のサンプラー（正答率は DifficultyRefreshJob が更新）
+    if correct_rates is None and adaptive_sampler is not None:
+        correct_rates = adaptive_sampler.correct_rates
+    adaptive_sampler = AdaptiveQuizSampler(problems_data, correct_rates, difficulty_of=effective_difficulty)
 
 def load_problems():
     """修正済み問題集を読み込む"""
-    global problems_data
+    global problems_data, max_problem_id
     try:
         with open(PROBLEMS_FILE, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -56,6 +119,12 @@ def load_problems():
         else:
             problems_data = data
 
+        # 出題履歴・テスト結果で受け付ける問題IDの上限
+        max_problem_id = max((p['problem_id'] for p in problems_data
+                              if isinstance(p.get('problem_id'), int)), default=0)
+
+        index_problems()
+
         print(f"✅ {len(problems_data)}問の問題集を読み込みました")
         return True
     except Exception as e:
@@ -198,6 +267,7 @@ def verify_session():
             })
 
         result = auth_db.verify_session(session_token, device_id)
+        result.pop('user_id', None)
         return jsonify(result)
 
     except Exception as e:
@@ -208,11 +278,52 @@ def verify_session():
             'message': error_detail
         }), 500
 
+def session_user(data):
+    """
+    リクエストの session_token・device_id を検証し、セッションのユーザーIDを返す（無効・未指定なら None）
+    ユーザー別のデータ（テスト結果・出題履歴）はリクエストの user_id ではなくセッションから決める
+    """
+    session_token = data.get('session_token')
+    device_id = data.get('device_id')
+    if not isinstance(session_token, str) or not isinstance(device_id, str) or not session_token or not device_id:
+        return None
+
+    # 開発者モード（環境変数で管理）: 開発用セッションはデバイス単位のユーザー
+    if DEV_MODE and session_token.startswith('dev_session_'):
+        return f"dev:{device_id}"
+
+    result = auth_db.verify_session(session_token, device_id)
+    return result.get('user_id') if result.get('valid') else None
+
+def session_error():
+    return jsonify({
+        'status': 'error',
+        'message': '有効なセッション（session_token・device_id）が必要です'
+    }), 401
+
+def convert_problem(problem, difficulty):
+    """問題をフロントエンド形式に変換"""
+    return {
+        'problem_id': problem.get('problem_id'),
+        'problem_text': problem.get('statement'),  # statement → problem_text
+        'correct_answer': '○' if problem.get('correct_answer') else '×',
+        'explanation': problem.get('basis'),  # basis → explanation
+        'category': problem.get('category'),
+        'difficulty': problem.get('difficulty', difficulty),  # 実際の問題の難易度を使用
+        'pattern_name': problem.get('pattern_name', ''),
+        'theme_name': problem.get('theme_name', ''),
+        'legal_reference': problem.get('legal_reference', ''),
+        'answer_display': '〇' if problem.get('correct_answer') else '×'
+    }
+
 @app.route('/api/problems/quiz', methods=['POST'])
 def get_quiz_problems():
     """
     模擬試験用の問題を取得
     フロントエンド形式に自動変換
+    セッションを指定すると、そのユーザーの出題済み問題を除いて選ぶ（未出題が足りない分は出題済みから補充）
+    mode='adaptive' とセッションを指定すると、ユーザーの苦手カテゴリー・正答率の低い問題に重みを置いて選ぶ
+    （ユーザーはリクエストの session_token・device_id を検証して決める）
     """
     try:
         data = request.get_json() or {}
@@ -220,6 +331,8 @@ def get_quiz_problems():
         # パラメータ取得
         count = data.get('count', 10)
         difficulty = data.get('difficulty', '★★')
+        user_id = session_user(data)
+        mode = data.get('mode', 'random')
 
         # パラメータ検証
         if not isinstance(count, int) or count < 1 or count > 100:
@@ -228,31 +341,33 @@ def get_quiz_problems():
         if difficulty not in ['★', '★★', '★★★']:
             difficulty = '★★'
 
+        # 苦手カテゴリー重視（カテゴリー成績はユーザー別集計テーブルの参照のみ、苦手分野の復習のため出題済みも対象）
+        if mode == 'adaptive' and user_id and results_db is not None:
+            selected, category_weights = adaptive_sampler.draw(
+                difficulty, count, results_db.get_user_category_stats(user_id)
+            )
+            return jsonify({
+                'status': 'success',
+                'problems': [convert_problem(problem, difficulty) for problem in selected],
+                'count': len(selected),
+                'mode': 'adaptive',
+                'category_weights': category_weights
+            })
+
         # 難易度でフィルタリング
-        filtered_problems = [p for p in problems_data if p.get('difficulty') == difficulty]
+        filtered_problems = problems_by_difficulty.get(difficulty, [])
 
         if len(filtered_problems) < count:
             print(f"⚠️  {difficulty}レベルは{len(filtered_problems)}問しかありません（要求: {count}問）")
 
-        # 指定数だけランダムに選択
-        selected = random.sample(filtered_problems, min(count, len(filtered_problems)))
+        # 指定数だけランダムに選択（ユーザー指定時は出題済みを除く）
+        if user_id and results_db is not None:
+            selected = sample_unseen(filtered_problems, count, results_db.get_question_history(user_id))
+        else:
+            selected = random.sample(filtered_problems, min(count, len(filtered_problems)))
 
         # フロントエンド形式に変換
-        converted_problems = []
-        for problem in selected:
-            converted = {
-                'problem_id': problem.get('problem_id'),
-                'problem_text': problem.get('statement'),  # statement → problem_text
-                'correct_answer': '○' if problem.get('correct_answer') else '×',
-                'explanation': problem.get('basis'),  # basis → explanation
-                'category': problem.get('category'),
-                'difficulty': problem.get('difficulty', difficulty),  # 実際の問題の難易度を使用
-                'pattern_name': problem.get('pattern_name', ''),
-                'theme_name': problem.get('theme_name', ''),
-                'legal_reference': problem.get('legal_reference', ''),
-                'answer_display': '〇' if problem.get('correct_answer') else '×'
-            }
-            converted_problems.append(converted)
+        converted_problems = [convert_problem(problem, difficulty) for problem in selected]
 
         return jsonify({
             'status': 'success',
@@ -267,6 +382,178 @@ def get_quiz_problems():
             'message': str(e)
         }), 500
 
+@app.route('/api/problems/exam', methods=['POST'])
+def get_exam_problems():
+    """
+    カテゴリー配分に従って模擬試験の問題を層別抽出
+    難易度（★/★★/★★★ または easy/medium/hard）ごとの配分でカテゴリー別の出題数を保証する。
+    セッション（session_token・device_id）を指定すると各カテゴリー内でそのユーザーの出題済み問題を避ける
+    """
+    try:
+        data = request.get_json() or {}
+
+        # パラメータ取得
+        count = data.get('count', 10)
+        difficulty = data.get('difficulty', '★★')
+        user_id = session_user(data)
+
+        # パラメータ検証
+        if not isinstance(count, int) or count < 1 or count > 100:
+            count = 10
+
+        if not quiz_sampler.has_difficulty(difficulty):
+            difficulty = '★★'
+
+        seen = results_db.get_question_history(user_id) if user_id and results_db is not None else None
+        selected, quotas = quiz_sampler.draw(difficulty, count, seen)
+
+        return jsonify({
+            'status': 'success',
+            'problems': [convert_problem(problem, difficulty) for problem in selected],
+            'count': len(selected),
+            'category_quotas': quotas
+        })
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# ===== テスト結果エンドポイント =====
+
+RESULT_COUNT_FIELDS = ['total_questions', 'answered_questions', 'correct_count', 'incorrect_count']
+
+def is_count(value):
+    """0 以上の整数か（bool は除く）"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+def is_problem_id(value):
+    """問題集に存在しうる問題ID（1 〜 最大の問題ID の整数、bool は除く）か"""
+    return is_count(value) and 1 <= value <= max_problem_id
+
+def build_category_stats(answers):
+    """回答の category からカテゴリー別成績を集計"""
+    category_stats = {}
+    for answer in answers:
+        stats = category_stats.setdefault(answer.get('category') or 'その他', {'total': 0, 'correct': 0})
+        stats['total'] += 1
+        if answer.get('is_correct'):
+            stats['correct'] += 1
+    for stats in category_stats.values():
+        stats['accuracy_percent'] = round(stats['correct'] / stats['total'] * 100, 2)
+    return category_stats
+
+@app.route('/api/results', methods=['POST'])
+def submit_result():
+    """
+    テスト結果を保存
+    結果・回答・カテゴリー別成績を1トランザクションで書き込む（同時に届いた結果はまとめてコミット）
+
+    リクエスト:
+        session_token, device_id（必須、結果はセッションのユーザーに記録）
+        total_questions, answered_questions, correct_count, incorrect_count（必須）
+        session_id, unanswered_count, accuracy_percent, completion_time_seconds, started_at, completed_at
+        answers: [{question_id, user_answer, correct_answer, is_correct, response_time_seconds, category}]
+                 （question_id は 1 〜 問題集の最大の問題ID）
+        category_stats: {カテゴリー: {total, correct, accuracy_percent}}（省略時は answers から集計）
+    """
+    try:
+        data = request.get_json() or {}
+
+        user_id = session_user(data)
+        if user_id is None:
+            return session_error()
+
+        invalid = [field for field in RESULT_COUNT_FIELDS if not is_count(data.get(field))]
+        answers = data.get('answers', [])
+        category_stats = data.get('category_stats')
+        if not isinstance(answers, list) or not all(
+                isinstance(a, dict) and is_problem_id(a.get('question_id')) for a in answers):
+            invalid.append('answers')
+        if category_stats is not None and not (
+                isinstance(category_stats, dict)
+                and all(isinstance(stats, dict) and is_count(stats.get('total')) and is_count(stats.get('correct'))
+                        for stats in category_stats.values())):
+            invalid.append('category_stats')
+        if invalid:
+            return jsonify({
+                'status': 'error',
+                'message': f"テスト結果の形式が不正です（{', '.join(invalid)}）"
+            }), 400
+
+        if category_stats is None:
+            category_stats = build_category_stats(answers)
+
+        test_data = {key: value for key, value in data.items() if key not in ('session_token', 'device_id')}
+        test_data['user_id'] = user_id
+        if test_data.get('accuracy_percent') is None and data['total_questions']:
+            test_data['accuracy_percent'] = round(data['correct_count'] / data['total_questions'] * 100, 2)
+
+        test_result_id = result_writer.write(test_data, answers, category_stats)
+
+        return jsonify({
+            'status': 'success',
+            'test_result_id': test_result_id
+        }), 201
+
+    except Exception as e:
+        error_detail = str(e) if DEV_MODE else 'サーバーエラーが発生しました'
+        print(f"❌ テスト結果保存エラー: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': error_detail
+        }), 500
+
+# ===== 出題履歴エンドポイント =====
+
+@app.route('/api/history', methods=['GET', 'POST', 'DELETE'])
+def question_history():
+    """
+    セッションのユーザーの出題履歴の取得（GET）・記録（POST {problem_ids: [...]}）・削除（DELETE）
+    session_token・device_id は JSON 本文（GET はクエリ文字列でも可）で渡す
+    テスト結果（/api/results）の回答問題は自動で記録される
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        user_id = session_user(data if data else request.args)
+        if user_id is None:
+            return session_error()
+
+        if request.method == 'POST':
+            problem_ids = data.get('problem_ids')
+            if not isinstance(problem_ids, list) or not all(is_problem_id(i) for i in problem_ids):
+                return jsonify({
+                    'status': 'error',
+                    'message': f'problem_ids（1〜{max_problem_id} の問題IDのリスト）が必要です'
+                }), 400
+            seen_count = results_db.record_question_history(user_id, problem_ids)
+            return jsonify({
+                'status': 'success',
+                'seen_count': seen_count
+            })
+
+        if request.method == 'DELETE':
+            results_db.clear_question_history(user_id)
+            return jsonify({'status': 'success'})
+
+        seen = results_db.get_question_history(user_id)
+        problem_ids = list(seen)
+        return jsonify({
+            'status': 'success',
+            'seen_count': len(problem_ids),
+            'problem_ids': problem_ids
+        })
+
+    except Exception as e:
+        error_detail = str(e) if DEV_MODE else 'サーバーエラーが発生しました'
+        print(f"❌ 出題履歴エラー: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': error_detail
+        }), 500
+
 @app.route('/api/problems/all', methods=['GET'])
 def get_all_problems():
     """全問題を取得（デバッグ用）"""
@@ -284,7 +571,10 @@ def get_all_problems():
 
 @app.route('/api/problems/stats', methods=['GET'])
 def get_problems_stats():
-    """問題集の統計情報を取得"""
+    """
+    問題集の統計情報を取得
+    項目統計（回答実績による正答率・識別力・回答時間）の概要を含む。?items=true で問題別の項目統計も返す
+    """
     try:
         stats = {
             'total': len(problems_data),
@@ -315,6 +605,22 @@ def get_problems_stats():
             if revisions.get('language_correction') and revisions.get('structure_correction'):
                 stats['with_revisions']['both'] += 1
 
+        # 項目統計（DifficultyRefreshJob が集計済みの値を返すだけ）
+        by_effective = {difficulty: len(problems) for difficulty, problems in problems_by_difficulty.items()}
+        measured = [item for item in item_statistics.values() if item['measured_difficulty']]
+        stats['item_statistics'] = {
+            'items': len(item_statistics),
+            'measured': len(measured),
+            'by_measured_difficulty': {
+                difficulty: sum(1 for item in measured if item['measured_difficulty'] == difficulty)
+                for difficulty in sorted({item['measured_difficulty'] for item in measured})
+            },
+            'by_effective_difficulty': by_effective
+        }
+        if request.args.get('items', '').lower() == 'true':
+            stats['item_statistics']['by_problem'] = sorted(item_statistics.values(),
+                                                            key=lambda item: item['question_id'])
+
         return jsonify({
             'status': 'success',
             'stats': stats
@@ -406,6 +712,13 @@ if __name__ == '__main__':
         print(f"❌ 認証データベース初期化失敗: {e}")
         exit(1)
 
+    # テスト結果DBを初期化
+    try:
+        init_results_db()
+    except Exception as e:
+        print(f"❌ テスト結果データベース初期化失敗: {e}")
+        exit(1)
+
     # Flask サーバー起動（ポートは環境変数から、デフォルト5000）
     port = int(os.environ.get('PORT', 5000))
 
@@ -16,13 +16,14 @@ DB_PATH = Path(__file__).parent / "alpha_auth.db"
 class AuthDatabase:
     """認証データベース管理クラス"""
 
-    def __init__(self, db_path: Path = DB_PATH):
+    def __init__(self, db_path: Path = DB_PATH, connection_factory=sqlite3.Connection):
         self.db_path = db_path
+        self.connection_factory = connection_factory
         self._init_database()
 
     def _init_database(self):
         """データベース初期化"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, factory=self.connection_factory) as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS invite_tokens (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -51,7 +52,7 @@ class AuthDatabase:
     def generate_invite_tokens(self, count: int = 1) -> List[str]:
         """招待トークン生成"""
         tokens = []
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, factory=self.connection_factory) as conn:
             for _ in range(count):
                 token = str(uuid.uuid4())
                 conn.execute(
@@ -64,7 +65,7 @@ class AuthDatabase:
 
     def verify_invite_token(self, token: str) -> Dict:
         """招待トークン検証"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, factory=self.connection_factory) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM invite_tokens WHERE token = ?",
@@ -85,7 +86,7 @@ class AuthDatabase:
 
     def register_device(self, token: str, device_id: str) -> Dict:
         """デバイス登録"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, factory=self.connection_factory) as conn:
             # トークン検証
             cursor = conn.execute(
                 "SELECT is_used, device_id FROM invite_tokens WHERE token = ?",
@@ -148,7 +149,7 @@ class AuthDatabase:
 
     def verify_session(self, session_token: str, device_id: str) -> Dict:
         """セッション検証"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, factory=self.connection_factory) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 """SELECT * FROM user_sessions
@@ -172,11 +173,12 @@ class AuthDatabase:
             )
             conn.commit()
 
-            return {"valid": True, "message": "有効なセッションです"}
+            # 招待トークン1つが1ユーザー（同じデバイスの再登録も同じユーザー）
+            return {"valid": True, "message": "有効なセッションです", "user_id": row['invite_token']}
 
     def get_session_by_device(self, device_id: str) -> Optional[Dict]:
         """デバイスIDからセッション取得"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, factory=self.connection_factory) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 """SELECT * FROM user_sessions
@@ -193,7 +195,7 @@ class AuthDatabase:
 
     def get_stats(self) -> Dict:
         """統計情報取得"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite3.connect(self.db_path, factory=self.connection_factory) as conn:
             # 招待トークン統計
             cursor = conn.execute(
                 "SELECT COUNT(*) as total, SUM(is_used) as used FROM invite_tokens"
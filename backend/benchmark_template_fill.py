@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+テンプレート充填のベンチマーク
+config/question_templates_detailed.yaml の全テンプレートについて、スロット候補値の全組み合わせを
+- 従来方式: 変数ごとに str.replace を繰り返す（generate_*_667.py 等の充填ループ）
+- コンパイル方式: CompiledTemplate.fill_many（位置引数 format による一括充填）
+で展開し、スループットと出力の一致を確認する
+
+実行: python3 backend/benchmark_template_fill.py [スロットあたりの候補数 (既定: 4)]
+"""
+
+import sys
+import time
+from itertools import product
+
+from template_compiler import load_compiled_templates
+
+
+def legacy_fill_many(source, slots, slot_values):
+    """従来方式の充填（組み合わせごとに str.replace を変数の数だけ実行）"""
+    results = []
+    for combo in product(*(slot_values[slot] for slot in slots)):
+        filled = source
+        for var_name, value in zip(slots, combo):
+            filled = filled.replace(f"{{{var_name}}}", value)
+        results.append(filled)
+    return results
+
+
+def main():
+    choices_per_slot = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    start = time.perf_counter()
+    templates = load_compiled_templates()
+    load_elapsed = time.perf_counter() - start
+
+    jobs = []
+    for template_id, template in templates.items():
+        slot_values = {slot: [f"{slot}の値{i}" for i in range(choices_per_slot)] for slot in template.slots}
+        jobs.append((template_id, template, slot_values))
+    total = sum(choices_per_slot ** len(template.slots) for _, template, _ in jobs)
+
+    print("=" * 60)
+    print("【テンプレート充填ベンチマーク】")
+    print("=" * 60)
+    print(f"  テンプレート: {len(templates)}個（読み込み {load_elapsed * 1000:.1f}ms）")
+    print(f"  スロットあたり候補数: {choices_per_slot} → 合計 {total:,}通り\n")
+
+    start = time.perf_counter()
+    legacy = [legacy_fill_many(template.source, template.slots, slot_values)
+              for _, template, slot_values in jobs]
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [list(template.fill_many(slot_values)) for _, template, slot_values in jobs]
+    compiled_elapsed = time.perf_counter() - start
+
+    mismatched = [template_id for (template_id, _, _), a, b in zip(jobs, legacy, compiled) if a != b]
+
+    print(f"  従来方式 (str.replace): {legacy_elapsed:.3f}秒  {total / legacy_elapsed:,.0f}件/秒")
+    print(f"  コンパイル方式:         {compiled_elapsed:.3f}秒  {total / compiled_elapsed:,.0f}件/秒")
+    print(f"  速度比: {legacy_elapsed / compiled_elapsed:.1f}倍")
+
+    if mismatched:
+        print(f"\n❌ 出力不一致: {', '.join(mismatched)}")
+        return 1
+    print(f"\n✅ 全{total:,}件の出力が従来方式と一致")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
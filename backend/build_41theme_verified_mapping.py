@@ -5,8 +5,15 @@
 """
 
 import json
+import sys
+from pathlib import Path
 from typing import Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from build_precise_source_keywords import DEFAULT_CATEGORY, DEFAULT_THEME, THEME_CATEGORIES
+from theme_classifier import WeightedKeywordClassifier
+
 # ソース検証に基づいた実際に存在するテーマのキーワードマッピング
 VERIFIED_41_THEMES = {
     # 不正対策（8テーマ - 検証済み）
@@ -63,76 +70,15 @@ VERIFIED_41_THEMES = {
     "違反時の行政処分": ["違反", "処分", "行政処分"],
 }
 
+# スコア = 一致キーワードの文字数の合計（長いキーワードを優先）
+VERIFIED_CLASSIFIER = WeightedKeywordClassifier(VERIFIED_41_THEMES, weight=len,
+                                                default_theme=DEFAULT_THEME)
+
 def analyze_problem_for_verified_theme(problem_text: str) -> Tuple[str, str]:
     """問題テキストを41テーマで分析"""
 
-    best_theme = None
-    best_score = 0
-
-    for theme_name, keywords in VERIFIED_41_THEMES.items():
-        score = 0
-        for kw in keywords:
-            if kw in problem_text:
-                score += len(kw)
-
-        if score > best_score:
-            best_score = score
-            best_theme = theme_name
-
-    if not best_theme:
-        best_theme = "新台設置の手続き"
-
-    # カテゴリ判定
-    theme_to_category = {
-        "セキュリティアップデート": "不正対策",
-        "セキュリティ確保": "不正対策",
-        "チップのセキュリティ": "不正対策",
-        "不正改造の防止": "不正対策",
-        "不正検出技術": "不正対策",
-        "不正行為の罰則": "不正対策",
-        "不正防止チェックリスト": "不正対策",
-        "不正防止対策要綱": "不正対策",
-
-        "営業停止命令": "営業時間・規制",
-        "営業停止命令の内容": "営業時間・規制",
-        "営業停止期間の計算": "営業時間・規制",
-        "営業禁止時間": "営業時間・規制",
-
-        "営業許可と営業実績の関係": "営業許可関連",
-        "営業許可と型式検定の違い": "営業許可関連",
-        "営業許可の取消し要件": "営業許可関連",
-        "営業許可の失効事由": "営業許可関連",
-        "営業許可の行政手続き": "営業許可関連",
-        "営業許可は無期限有効": "営業許可関連",
-
-        "遊技機型式検定は3年有効": "型式検定関連",
-        "型式検定の申請方法": "型式検定関連",
-        "型式検定と中古機の関係": "型式検定関連",
-        "型式検定と製造者の責任": "型式検定関連",
-        "型式検定更新申請のタイミング": "型式検定関連",
-
-        "リサイクルプロセス": "景品規制",
-        "リサイクル推進法との関係": "景品規制",
-        "景品の種類制限": "景品規制",
-        "景品交換の規制": "景品規制",
-        "賞源有効利用促進法": "景品規制",
-
-        "中古遊技機の取扱い": "遊技機管理",
-        "中古遊技機の流通管理": "遊技機管理",
-        "基板ケースのかしめと管理": "遊技機管理",
-        "外部端子板の管理": "遊技機管理",
-        "故障遊技機の対応": "遊技機管理",
-        "新台設置の手続き": "遊技機管理",
-        "旧機械の回収と廃棄": "遊技機管理",
-        "時間帯別営業制限": "遊技機管理",
-        "設置済み遊技機の交換手続き": "遊技機管理",
-        "遊技機の保守管理": "遊技機管理",
-        "遊技機の点検・保守計画": "遊技機管理",
-        "遊技機の製造番号管理": "遊技機管理",
-        "違反時の行政処分": "遊技機管理",
-    }
-
-    category = theme_to_category.get(best_theme, "遊技機管理")
+    best_theme, _ = VERIFIED_CLASSIFIER.classify(problem_text)
+    category = THEME_CATEGORIES.get(best_theme, DEFAULT_CATEGORY)
 
     return category, best_theme
 
@@ -148,10 +94,10 @@ def create_verified_41theme_mapping():
 
     print("【41テーマ検証済みマッピング実行中...】\n")
 
-    for p in problems:
-        problem_text = p.get('problem_text', '')
+    classified = VERIFIED_CLASSIFIER.classify_many([p.get('problem_text', '') for p in problems])
 
-        category, theme = analyze_problem_for_verified_theme(problem_text)
+    for p, (theme, _) in zip(problems, classified):
+        category = THEME_CATEGORIES.get(theme, DEFAULT_CATEGORY)
 
         p['verified_category'] = category
         p['verified_theme'] = theme
@@ -5,8 +5,13 @@ Ultra Think分析結果に基づいた厳密なマッピング
 """
 
 import json
+import sys
+from collections import defaultdict
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from theme_classifier import WeightedKeywordClassifier
+
 # Ultra Think分析から得られた実際のキーワード
 PRECISE_SOURCE_KEYWORDS = {
     # 不正対策（8テーマ）
@@ -145,78 +150,76 @@ PRECISE_SOURCE_KEYWORDS = {
     ],
 }
 
+# テーマ → カテゴリ
+THEME_CATEGORIES = {
+    "セキュリティアップデート": "不正対策",
+    "セキュリティ確保": "不正対策",
+    "チップのセキュリティ": "不正対策",
+    "不正改造の防止": "不正対策",
+    "不正検出技術": "不正対策",
+    "不正行為の罰則": "不正対策",
+    "不正防止チェックリスト": "不正対策",
+    "不正防止対策要綱": "不正対策",
+
+    "営業停止命令": "営業時間・規制",
+    "営業停止命令の内容": "営業時間・規制",
+    "営業停止期間の計算": "営業時間・規制",
+    "営業禁止時間": "営業時間・規制",
+
+    "営業許可と営業実績の関係": "営業許可関連",
+    "営業許可と型式検定の違い": "営業許可関連",
+    "営業許可の取消し要件": "営業許可関連",
+    "営業許可の失効事由": "営業許可関連",
+    "営業許可の行政手続き": "営業許可関連",
+    "営業許可は無期限有効": "営業許可関連",
+
+    "遊技機型式検定は3年有効": "型式検定関連",
+    "型式検定の申請方法": "型式検定関連",
+    "型式検定と中古機の関係": "型式検定関連",
+    "型式検定と製造者の責任": "型式検定関連",
+    "型式検定更新申請のタイミング": "型式検定関連",
+
+    "リサイクルプロセス": "景品規制",
+    "リサイクル推進法との関係": "景品規制",
+    "景品の種類制限": "景品規制",
+    "景品交換の規制": "景品規制",
+    "賞源有効利用促進法": "景品規制",
+
+    "中古遊技機の取扱い": "遊技機管理",
+    "中古遊技機の流通管理": "遊技機管理",
+    "基板ケースのかしめと管理": "遊技機管理",
+    "外部端子板の管理": "遊技機管理",
+    "故障遊技機の対応": "遊技機管理",
+    "新台設置の手続き": "遊技機管理",
+    "旧機械の回収と廃棄": "遊技機管理",
+    "時間帯別営業制限": "遊技機管理",
+    "設置済み遊技機の交換手続き": "遊技機管理",
+    "遊技機の保守管理": "遊技機管理",
+    "遊技機の点検・保守計画": "遊技機管理",
+    "遊技機の製造番号管理": "遊技機管理",
+    "違反時の行政処分": "遊技機管理",
+}
+
+DEFAULT_THEME = "新台設置の手続き"
+DEFAULT_CATEGORY = "遊技機管理"
+
+# 複数キーワードマッチング、より長いキーワードを優先（スコア = 一致キーワードの文字数の合計）
+PRECISE_CLASSIFIER = WeightedKeywordClassifier(PRECISE_SOURCE_KEYWORDS, weight=len,
+                                               default_theme=DEFAULT_THEME)
+
+def _with_category(theme: str, score: int) -> tuple:
+    return THEME_CATEGORIES.get(theme, DEFAULT_CATEGORY), theme, score
+
 def map_to_precise_theme(problem_text: str) -> tuple:
     """問題を厳密なソースキーワードで分析"""
 
-    best_theme = None
-    best_score = 0
-
-    for theme_name, keywords in PRECISE_SOURCE_KEYWORDS.items():
-        score = 0
-        for kw in keywords:
-            # 複数キーワードマッチング、より長いキーワードを優先
-            if kw in problem_text:
-                score += len(kw)
-
-        if score > best_score:
-            best_score = score
-            best_theme = theme_name
-
-    if not best_theme:
-        best_theme = "新台設置の手続き"
-
-    # カテゴリ決定
-    category_map = {
-        "セキュリティアップデート": "不正対策",
-        "セキュリティ確保": "不正対策",
-        "チップのセキュリティ": "不正対策",
-        "不正改造の防止": "不正対策",
-        "不正検出技術": "不正対策",
-        "不正行為の罰則": "不正対策",
-        "不正防止チェックリスト": "不正対策",
-        "不正防止対策要綱": "不正対策",
-
-        "営業停止命令": "営業時間・規制",
-        "営業停止命令の内容": "営業時間・規制",
-        "営業停止期間の計算": "営業時間・規制",
-        "営業禁止時間": "営業時間・規制",
-
-        "営業許可と営業実績の関係": "営業許可関連",
-        "営業許可と型式検定の違い": "営業許可関連",
-        "営業許可の取消し要件": "営業許可関連",
-        "営業許可の失効事由": "営業許可関連",
-        "営業許可の行政手続き": "営業許可関連",
-        "営業許可は無期限有効": "営業許可関連",
-
-        "遊技機型式検定は3年有効": "型式検定関連",
-        "型式検定の申請方法": "型式検定関連",
-        "型式検定と中古機の関係": "型式検定関連",
-        "型式検定と製造者の責任": "型式検定関連",
-        "型式検定更新申請のタイミング": "型式検定関連",
-
-        "リサイクルプロセス": "景品規制",
-        "リサイクル推進法との関係": "景品規制",
-        "景品の種類制限": "景品規制",
-        "景品交換の規制": "景品規制",
-        "賞源有効利用促進法": "景品規制",
-
-        "中古遊技機の取扱い": "遊技機管理",
-        "中古遊技機の流通管理": "遊技機管理",
-        "基板ケースのかしめと管理": "遊技機管理",
-        "外部端子板の管理": "遊技機管理",
-        "故障遊技機の対応": "遊技機管理",
-        "新台設置の手続き": "遊技機管理",
-        "旧機械の回収と廃棄": "遊技機管理",
-        "時間帯別営業制限": "遊技機管理",
-        "設置済み遊技機の交換手続き": "遊技機管理",
-        "遊技機の保守管理": "遊技機管理",
-        "遊技機の点検・保守計画": "遊技機管理",
-        "遊技機の製造番号管理": "遊技機管理",
-        "違反時の行政処分": "遊技機管理",
-    }
-
-    category = category_map.get(best_theme, "遊技機管理")
-    return category, best_theme, best_score
+    return _with_category(*PRECISE_CLASSIFIER.classify(problem_text))
+
+def map_many_to_precise_theme(problem_texts: list) -> list:
+    """複数の問題を一括分析（スコア行列で全テーマを同時に採点）"""
+
+    return [_with_category(theme, score)
+            for theme, score in PRECISE_CLASSIFIER.classify_many(problem_texts)]
 
 def create_precise_mapping():
     """厳密なソースキーワードで500問をマッピング"""
@@ -231,9 +234,10 @@ def create_precise_mapping():
 
     print("【厳密なソースキーワード再マッピング中...】\n")
 
-    for p in problems:
+    mappings = map_many_to_precise_theme([p.get('problem_text', '') for p in problems])
+
+    for p, (category, theme, score) in zip(problems, mappings):
         problem_text = p.get('problem_text', '')
-        category, theme, score = map_to_precise_theme(problem_text)
 
         p['verified_category'] = category
         p['verified_theme'] = theme
@@ -275,7 +279,5 @@ def create_precise_mapping():
         for text in unmatched[:3]:
             print(f"    - {text}...")
 
-from collections import defaultdict
-
 if __name__ == "__main__":
     create_precise_mapping()
@@ -5,14 +5,19 @@
 """
 
 import json
+import sys
+from functools import lru_cache
 from pathlib import Path
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lecture_page_store import read_theme_text
+from theme_classifier import WeightedKeywordClassifier
+
 def extract_theme_keywords(theme_file_path: str) -> list:
     """テーマファイルから主要キーワードを抽出"""
 
-    with open(theme_file_path, 'r') as f:
-        content = f.read()
+    content = read_theme_text(theme_file_path)
 
     # 最初の1000文字から、日本語の複合語を抽出
     sample = content[:1000]
@@ -53,23 +58,36 @@ def build_lecture_filter() -> dict:
 
     return theme_filter
 
-def map_problem_to_theme(problem_text: str, theme_filter: dict) -> str:
-    """問題テキストを講習ガイドラインのフィルターに基づいてマッピング"""
+DEFAULT_THEME = "営業許可と営業実績の関係"
+
+def build_filter_classifier(theme_filter: dict) -> WeightedKeywordClassifier:
+    """フィルターを分類器にコンパイル（スコア = 一致キーワード数）"""
 
-    best_theme = None
-    best_score = 0
+    return WeightedKeywordClassifier(
+        {theme_name: theme_data['keywords'] for theme_name, theme_data in theme_filter.items()},
+        default_theme=DEFAULT_THEME
+    )
 
-    for theme_name, theme_data in theme_filter.items():
-        score = 0
-        for kw in theme_data['keywords']:
-            if kw in problem_text:
-                score += 1
+@lru_cache(maxsize=8)
+def _cached_filter_classifier(theme_keywords: tuple) -> WeightedKeywordClassifier:
+    """(テーマ名, キーワード) の組ごとに1回だけ分類器をコンパイル"""
 
-        if score > best_score:
-            best_score = score
-            best_theme = theme_name
+    return build_filter_classifier({theme_name: {'keywords': list(keywords)}
+                                    for theme_name, keywords in theme_keywords})
 
-    return best_theme if best_theme else "営業許可と営業実績の関係"
+def map_problem_to_theme(problem_text: str, theme_filter: dict,
+                         classifier: WeightedKeywordClassifier = None) -> str:
+    """
+    問題テキストを講習ガイドラインのフィルターに基づいてマッピング
+    classifier を省略すると、同じ内容のフィルターに対してコンパイル済みの分類器を使い回す
+    """
+
+    if classifier is None:
+        classifier = _cached_filter_classifier(tuple(
+            (theme_name, tuple(theme_data['keywords'])) for theme_name, theme_data in theme_filter.items()
+        ))
+    theme, _ = classifier.classify(problem_text)
+    return theme
 
 def apply_lecture_based_mapping():
     """講習ガイドラインベースのマッピングを実行"""
@@ -93,12 +111,11 @@ def apply_lecture_based_mapping():
     remapped = []
     distribution = {}
 
-    for p in problems:
-        problem_text = p.get('problem_text', '')
-
-        # 講習ガイドラインベースでマッピング
-        mapped_theme = map_problem_to_theme(problem_text, theme_filter)
+    # 講習ガイドラインベースでマッピング（全問を一括採点）
+    classifier = build_filter_classifier(theme_filter)
+    classified = classifier.classify_many([p.get('problem_text', '') for p in problems])
 
+    for p, (mapped_theme, _) in zip(problems, classified):
         p['lecture_based_theme'] = mapped_theme
         remapped.append(p)
 
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+分野別チャンキングライブラリ（共通）
+講習テーマファイル（rag_data/lecture_text/theme_*.txt）を文境界で分割し、
+目標/最小/最大トークン数とオーバーラップを適用したチャンクをJSONLへストリーム出力する
+
+prepare_{practice,regulation,security,technology}_chunks.py から共用し、
+4分野をまとめて作る場合は分野単位のプロセスプールで1パス実行する
+
+【実行】
+python3 backend/domain_chunker.py                      # 4分野を並列生成
+python3 backend/domain_chunker.py --domains practice   # 指定分野のみ
+
+【重複排除】
+テーマファイルは関連するOCRページ（## ページ N）を丸ごと含むため、
+同じページが複数テーマに重複して現れる。分野内では各ページを最初のテーマでのみチャンク化し、
+同一内容のチャンクも1回だけ出力する
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from batch_job_runner import estimate_tokens
+from lecture_page_store import read_theme_text
+from ocr_page_stream import OCRPageWriter
+
+LECTURE_DIR = Path("rag_data/lecture_text")
+OUTPUT_DIR = Path("data")
+
+# チャンキング戦略（サイズはすべて推定トークン数）
+CHUNKING_STRATEGY = {
+    "method": "logical_units",
+    "target_tokens": 500,
+    "delimiter": ["。\n", "。", "\n\n"],
+    "min_chunk_size": 50,
+    "max_chunk_size": 1000,
+    "overlap_tokens": 50,
+}
+
+# 分野ごとのテーマ割り当て（講習テーマから選別）
+DOMAINS = {
+    "practice": {
+        "task": "Task 4.1 - 実務分野データ準備",
+        "source": "lecture_materials (41 themes)",
+        "themes": {
+            "operational_procedures": [
+                "theme_030_新台設置の手続き.txt",
+                "theme_035_設置済み遊技機の交換手続き.txt",
+                "theme_012_中古遊技機の流通管理.txt",
+                "theme_011_中古遊技機の取扱い.txt"
+            ],
+            "administrative_enforcement": [
+                "theme_013_営業停止命令.txt",
+                "theme_015_営業停止期間の計算.txt",
+                "theme_019_営業許可の取消し要件.txt",
+                "theme_020_営業許可の失効事由.txt",
+                "theme_041_違反時の行政処分.txt"
+            ],
+            "compliance_and_prevention": [
+                "theme_006_不正改造の防止.txt",
+                "theme_008_不正行為の罰則.txt",
+                "theme_010_不正防止対策要綱.txt"
+            ],
+            "technical_management": [
+                "theme_003_チップのセキュリティ.txt",
+                "theme_023_型式検定と中古機の関係.txt",
+                "theme_024_型式検定と製造者の責任.txt",
+                "theme_039_遊技機の製造番号管理.txt",
+                "theme_040_遊技機型式検定は3年有効.txt"
+            ],
+            "regulation_standards": [
+                "theme_034_景品交換の規制.txt",
+                "theme_036_賞源有効利用促進法.txt",
+                "theme_005_リサイクル推進法との関係.txt"
+            ]
+        },
+    },
+    "regulation": {
+        "task": "Task 5.3 - 営業規制分野データ準備",
+        "source": "lecture_materials",
+        "themes": {
+            "business_suspension": [
+                "theme_013_営業停止命令.txt",
+                "theme_014_営業停止命令の内容.txt",
+                "theme_015_営業停止期間の計算.txt",
+            ],
+            "business_prohibition": [
+                "theme_016_営業禁止時間.txt",
+            ],
+            "business_approval": [
+                "theme_017_営業許可と営業実績の関係.txt",
+                "theme_018_営業許可と型式検定の違い.txt",
+                "theme_019_営業許可の取消し要件.txt",
+                "theme_020_営業許可の失効事由.txt",
+                "theme_021_営業許可の行政手続き.txt",
+                "theme_022_営業許可は無期限有効.txt",
+            ]
+        },
+    },
+    "security": {
+        "task": "Task 5.2 - セキュリティ分野データ準備",
+        "source": "lecture_materials",
+        "themes": {
+            "fraud_prevention": [
+                "theme_001_セキュリティアップデート.txt",
+                "theme_002_セキュリティ確保.txt",
+                "theme_006_不正改造の防止.txt",
+                "theme_007_不正検出技術.txt",
+                "theme_008_不正行為の罰則.txt",
+            ],
+            "compliance_checks": [
+                "theme_009_不正防止チェックリスト.txt",
+                "theme_010_不正防止対策要綱.txt",
+            ]
+        },
+    },
+    "technology": {
+        "task": "Task 5.1 - 技術管理分野データ準備",
+        "source": "lecture_materials",
+        "themes": {
+            "type_certification": [
+                "theme_025_型式検定の申請方法.txt",
+                "theme_026_型式検定更新申請のタイミング.txt",
+            ],
+            "gaming_machine_management": [
+                "theme_027_基板ケースのかしめと管理.txt",
+                "theme_028_外部端子板の管理.txt",
+                "theme_029_故障遊技機の対応.txt",
+                "theme_031_旧機械の回収と廃棄.txt",
+                "theme_037_遊技機の保守管理.txt",
+                "theme_038_遊技機の点検・保守計画.txt",
+            ]
+        },
+    },
+}
+
+PAGE_HEADER_PATTERN = re.compile(r'^## ページ (\d+).*$', re.MULTILINE)
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=。)|\n\s*\n')
+
+
+# ==================== 分割 ====================
+
+def parse_theme_pages(content):
+    """
+    テーマファイルを (ページ番号, 本文) のリストに分解
+
+    「## ページ N」見出しの無いファイルは全体を1ページ（番号None）として扱う
+    """
+    headers = list(PAGE_HEADER_PATTERN.finditer(content))
+    if not headers:
+        return [(None, content.strip())]
+
+    pages = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        body = content[header.end():end].strip().rstrip('-').strip()
+        pages.append((int(header.group(1)), body))
+    return pages
+
+
+def split_sentences(text):
+    """「。」と空行で文単位に分割（「。」は前の文に残す）"""
+    for sentence in SENTENCE_SPLIT_PATTERN.split(text):
+        sentence = sentence.strip()
+        if sentence:
+            yield sentence
+
+
+def _bounded_sentences(sentences, limit):
+    """limit を超える文（句点の無いOCR行の連続など）を limit 以下に文字数で分割"""
+    for sentence, page in sentences:
+        tokens = estimate_tokens(sentence)
+        if tokens <= limit:
+            yield sentence, page, tokens
+            continue
+        pieces = -(-tokens // limit)
+        size = -(-len(sentence) // pieces)
+        for start in range(0, len(sentence), size):
+            piece = sentence[start:start + size]
+            yield piece, page, estimate_tokens(piece)
+
+
+def chunk_sentences(sentences, strategy=CHUNKING_STRATEGY):
+    """
+    (文, ページ番号) のストリームをチャンク化（ジェネレータ）
+
+    - 目標トークン数を超える手前で区切る（1文が目標を超える場合は目標サイズに分割）
+    - 直前チャンク末尾の文を overlap_tokens まで次チャンク先頭に重ねる
+    - 最小トークン数未満の末尾チャンクは、最大を超えなければ直前チャンクに併合
+
+    Yields:
+        [(文, ページ番号, トークン数), ...]
+    """
+    target = strategy["target_tokens"]
+    min_tokens = strategy["min_chunk_size"]
+    max_tokens = strategy["max_chunk_size"]
+    overlap = min(strategy.get("overlap_tokens", 0), target // 2)
+
+    pending = None
+    current = []
+    used = 0
+    fresh = 0
+
+    for sentence, page, tokens in _bounded_sentences(sentences, target):
+        if fresh and used + tokens > target:
+            if pending:
+                yield pending
+            pending = current
+            # オーバーラップ: 末尾から overlap_tokens 以内の文を引き継ぐ
+            tail = []
+            tail_tokens = 0
+            for item in reversed(current):
+                if tail_tokens + item[2] > overlap:
+                    break
+                tail.insert(0, item)
+                tail_tokens += item[2]
+            current = tail
+            used = tail_tokens
+            fresh = 0
+        current.append((sentence, page, tokens))
+        used += tokens
+        fresh += 1
+
+    if fresh:
+        if pending and used < min_tokens:
+            pending_tokens = sum(item[2] for item in pending)
+            tail = current[len(current) - fresh:]
+            tail_tokens = sum(item[2] for item in tail)
+            if pending_tokens + tail_tokens <= max_tokens:
+                pending = pending + tail
+                current = None
+        if pending:
+            yield pending
+        if current:
+            yield current
+    elif pending:
+        yield pending
+
+
+def _content_hash(text):
+    return hashlib.sha1(re.sub(r'\s+', '', text).encode('utf-8')).hexdigest()
+
+
+# ==================== 分野単位の処理 ====================
+
+def iter_domain_chunks(domain, themes, lecture_dir=LECTURE_DIR, strategy=CHUNKING_STRATEGY, stats=None):
+    """
+    1分野のテーマ群からチャンクを順に生成（ジェネレータ）
+
+    stats を渡すとテーマ別・カテゴリ別の統計を書き込む
+    """
+    stats = stats if stats is not None else new_domain_stats()
+    seen_pages = {}
+    seen_chunks = set()
+    index = 0
+
+    for category, theme_files in themes.items():
+        for theme_file in theme_files:
+            theme_path = Path(lecture_dir) / theme_file
+            theme_stats = stats["themes"].setdefault(theme_file, {
+                "category": category, "chunks": 0, "tokens": 0, "pages": 0, "duplicate_pages": 0
+            })
+            if not theme_path.exists():
+                theme_stats["missing"] = True
+                continue
+
+            content = read_theme_text(theme_path).strip()
+            sentences = []
+            for page_number, body in parse_theme_pages(content):
+                key = _content_hash(body)
+                if key in seen_pages:
+                    theme_stats["duplicate_pages"] += 1
+                    continue
+                seen_pages[key] = theme_file
+                theme_stats["pages"] += 1
+                sentences.extend((sentence, page_number) for sentence in split_sentences(body))
+
+            for items in chunk_sentences(sentences, strategy):
+                text = "\n".join(item[0] for item in items)
+                key = _content_hash(text)
+                if key in seen_chunks:
+                    stats["duplicate_chunks"] += 1
+                    continue
+                seen_chunks.add(key)
+
+                token_count = sum(item[2] for item in items)
+                pages = sorted({item[1] for item in items if item[1] is not None})
+                chunk = {
+                    "chunk_id": f"{domain}_{category}_{index:03d}",
+                    "category": category,
+                    "source_file": theme_file,
+                    "content": text,
+                    "token_count": token_count,
+                    "pages": pages,
+                    "source": "lecture_materials"
+                }
+                index += 1
+
+                theme_stats["chunks"] += 1
+                theme_stats["tokens"] += token_count
+                stats["categories"][category]["count"] += 1
+                stats["categories"][category]["tokens"] += token_count
+                yield chunk
+
+
+def new_domain_stats():
+    return {
+        "themes": {},
+        "categories": defaultdict(lambda: {"count": 0, "tokens": 0}),
+        "duplicate_chunks": 0,
+    }
+
+
+def write_domain_chunks(domain, lecture_dir=LECTURE_DIR, output_dir=OUTPUT_DIR, strategy=CHUNKING_STRATEGY):
+    """
+    1分野分のチャンクを data/{domain}_domain_chunks_prepared.jsonl へストリーム出力し、
+    メタデータJSONを保存
+
+    Returns:
+        統計 dict（jsonl_path / metadata_path / total_chunks / total_tokens / themes / categories / sample_chunks）
+    """
+    spec = DOMAINS[domain]
+    output_dir = Path(output_dir)
+    jsonl_path = output_dir / f"{domain}_domain_chunks_prepared.jsonl"
+    metadata_path = output_dir / f"{domain}_domain_chunks_metadata.json"
+    strategy = {**strategy, "categories": list(spec["themes"].keys())}
+
+    stats = new_domain_stats()
+    samples = []
+    with OCRPageWriter(jsonl_path) as writer:
+        for chunk in iter_domain_chunks(domain, spec["themes"], lecture_dir, strategy, stats):
+            writer.write(chunk)
+            if len(samples) < 3:
+                samples.append(chunk)
+
+    total_chunks = writer.count
+    total_tokens = sum(s["tokens"] for s in stats["categories"].values())
+    output_schema = {
+        "metadata": {
+            "task": spec["task"],
+            "domain": domain,
+            "total_chunks": total_chunks,
+            "total_tokens": total_tokens,
+            "chunking_method": strategy["method"],
+            "source": spec["source"],
+            "duplicate_pages_skipped": sum(t["duplicate_pages"] for t in stats["themes"].values()),
+            "duplicate_chunks_skipped": stats["duplicate_chunks"]
+        },
+        "chunking_strategy": strategy,
+        "category_distribution": dict(stats["categories"]),
+        "sample_chunks": samples
+    }
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(output_schema, f, indent=2, ensure_ascii=False)
+
+    return {
+        "domain": domain,
+        "jsonl_path": str(jsonl_path),
+        "metadata_path": str(metadata_path),
+        "total_chunks": total_chunks,
+        "total_tokens": total_tokens,
+        "themes": stats["themes"],
+        "categories": dict(stats["categories"]),
+        "duplicate_chunks": stats["duplicate_chunks"],
+        "sample_chunks": samples,
+        "strategy": strategy,
+    }
+
+
+def prepare_domains(domains=None, lecture_dir=LECTURE_DIR, output_dir=OUTPUT_DIR, workers=None):
+    """複数分野を分野単位のプロセスプールで並列生成し、分野名 → 統計 を返す"""
+    domains = list(domains or DOMAINS)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    if workers == 1 or len(domains) == 1:
+        return {domain: write_domain_chunks(domain, lecture_dir, output_dir) for domain in domains}
+
+    with ProcessPoolExecutor(max_workers=workers or len(domains)) as pool:
+        results = pool.map(write_domain_chunks, domains,
+                           [lecture_dir] * len(domains), [output_dir] * len(domains))
+        return dict(zip(domains, results))
+
+
+def print_domain_summary(result):
+    """分野別の統計を表示"""
+    print(f"\n  【{result['domain']}】 {result['total_chunks']}チャンク / {result['total_tokens']:,}トークン")
+    for category, stats in result["categories"].items():
+        print(f"    {category:30} {stats['count']:3}チャンク ({stats['tokens']:6,}トークン)")
+    duplicate_pages = sum(t["duplicate_pages"] for t in result["themes"].values())
+    missing = [name for name, t in result["themes"].items() if t.get("missing")]
+    print(f"    重複ページ除外: {duplicate_pages}件 / 重複チャンク除外: {result['duplicate_chunks']}件")
+    if missing:
+        print(f"    ⚠️  見つからないテーマ: {', '.join(missing)}")
+    print(f"    ✓ {result['jsonl_path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分野別チャンクを並列生成')
+    parser.add_argument('--domains', nargs='+', choices=list(DOMAINS), default=list(DOMAINS))
+    parser.add_argument('--lecture-dir', default=str(LECTURE_DIR))
+    parser.add_argument('--output-dir', default=str(OUTPUT_DIR))
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("【分野別チャンク生成】")
+    print("=" * 80)
+    print(f"  目標/最小/最大: {CHUNKING_STRATEGY['target_tokens']}/"
+          f"{CHUNKING_STRATEGY['min_chunk_size']}/{CHUNKING_STRATEGY['max_chunk_size']}トークン"
+          f"（オーバーラップ {CHUNKING_STRATEGY['overlap_tokens']}）")
+
+    results = prepare_domains(args.domains, args.lecture_dir, args.output_dir, args.workers)
+    for result in results.values():
+        print_domain_summary(result)
+
+    print("\n" + "=" * 80)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
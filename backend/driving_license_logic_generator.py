@@ -6,23 +6,46 @@ Version: 2.0
 Date: 2025-11-02
 """
 
+import argparse
+import hashlib
 import json
 import random
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import partial
+from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ocr_page_stream import OCRPageWriter
+
+# 並列生成の1シャードあたりの最大問題数
+SHARD_SIZE = 250
+
 class DrivingLicenseLogicGenerator:
     """運転免許式ロジックによる問題生成クラス"""
 
-    def __init__(self):
-        """初期化"""
+    def __init__(self, seed: Optional[int] = None, created_at: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            seed: 乱数シード（同じシードなら同じ問題列を生成する。省略時は非決定的）
+            created_at: 生成日時の固定値（省略時は生成時刻）
+        """
         self.categories = self._initialize_categories()
         self.patterns = self._initialize_patterns()
         self.legal_terms = self._initialize_legal_terms()
         self.problem_id_counter = 1
         self.problems = []
+        self.rng = random.Random(seed)
+        self.created_at = created_at
+
+    def _now(self) -> str:
+        return self.created_at or datetime.now().isoformat()
 
     def _initialize_categories(self) -> Dict:
         """風営法ベースのカテゴリー体系（7層構造）"""
@@ -293,9 +316,9 @@ class DrivingLicenseLogicGenerator:
                 break
 
         if category_name in templates:
-            template = random.choice(templates[category_name])
+            template = self.rng.choice(templates[category_name])
         else:
-            template = random.choice(templates["営業許可"])
+            template = self.rng.choice(templates["営業許可"])
 
         return {
             "problem_id": problem_id,
@@ -306,7 +329,7 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": template["answer"],
             "explanation": template["explanation"],
             "is_trap": template.get("trap", False),
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_term_difference(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -345,7 +368,7 @@ class DrivingLicenseLogicGenerator:
             }
         ]
 
-        problem = random.choice(term_problems)
+        problem = self.rng.choice(term_problems)
 
         # カテゴリ名の取得
         category_name = "営業許可"
@@ -363,7 +386,7 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
             "key_terms": problem["terms"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_basic_knowledge(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -432,9 +455,9 @@ class DrivingLicenseLogicGenerator:
         }
 
         if category_name in knowledge_base:
-            problem = random.choice(knowledge_base[category_name])
+            problem = self.rng.choice(knowledge_base[category_name])
         else:
-            problem = random.choice(knowledge_base["営業許可"])
+            problem = self.rng.choice(knowledge_base["営業許可"])
 
         return {
             "problem_id": problem_id,
@@ -444,7 +467,7 @@ class DrivingLicenseLogicGenerator:
             "problem_text": problem["text"],
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_priority(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -471,7 +494,7 @@ class DrivingLicenseLogicGenerator:
             }
         ]
 
-        problem = random.choice(priority_problems)
+        problem = self.rng.choice(priority_problems)
 
         # カテゴリ名の取得
         category_name = "営業規制"
@@ -489,7 +512,7 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
             "priority_rule": problem["priority"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_time_limit(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -522,7 +545,7 @@ class DrivingLicenseLogicGenerator:
             }
         ]
 
-        problem = random.choice(time_problems)
+        problem = self.rng.choice(time_problems)
 
         # カテゴリ名の取得
         category_name = "営業規制"
@@ -540,7 +563,7 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
             "time_limit": problem["time"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_scenario(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -567,7 +590,7 @@ class DrivingLicenseLogicGenerator:
             }
         ]
 
-        problem = random.choice(scenarios)
+        problem = self.rng.choice(scenarios)
 
         # カテゴリ名の取得
         category_name = "営業規制"
@@ -585,7 +608,7 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
             "scenario_type": problem["scenario"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_complex(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -606,7 +629,7 @@ class DrivingLicenseLogicGenerator:
             }
         ]
 
-        problem = random.choice(complex_problems)
+        problem = self.rng.choice(complex_problems)
 
         # カテゴリ名の取得
         category_name = "営業規制"
@@ -624,7 +647,7 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
             "conditions": problem["conditions"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_numeric(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -651,7 +674,7 @@ class DrivingLicenseLogicGenerator:
             }
         ]
 
-        problem = random.choice(numeric_problems)
+        problem = self.rng.choice(numeric_problems)
 
         # カテゴリ名の取得
         category_name = "営業所基準"
@@ -669,7 +692,7 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
             "key_number": problem["number"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
     def _generate_exception(self, problem_id: int, category: Dict, pattern: Dict) -> Dict:
@@ -690,7 +713,7 @@ class DrivingLicenseLogicGenerator:
             }
         ]
 
-        problem = random.choice(exception_problems)
+        problem = self.rng.choice(exception_problems)
 
         # カテゴリ名の取得
         category_name = "営業規制"
@@ -708,15 +731,11 @@ class DrivingLicenseLogicGenerator:
             "correct_answer": problem["answer"],
             "explanation": problem["explanation"],
             "exception_type": problem["exception"],
-            "created_at": datetime.now().isoformat()
+            "created_at": self._now()
         }
 
-    def generate_all_problems(self, total_count: int = 500) -> List[Dict]:
-        """全問題の生成（パターン分布に従って）"""
-
-        print(f"🎯 {total_count}問の問題生成を開始...")
-
-        # パターンごとの問題数を計算
+    def pattern_counts(self, total_count: int) -> Dict[str, int]:
+        """パターンごとの問題数（出現率に従って配分）"""
         pattern_counts = {}
         remaining = total_count
 
@@ -729,6 +748,15 @@ class DrivingLicenseLogicGenerator:
         if remaining > 0:
             pattern_counts["絶対表現ひっかけ"] += remaining
 
+        return pattern_counts
+
+    def generate_all_problems(self, total_count: int = 500) -> List[Dict]:
+        """全問題の生成（パターン分布に従って）"""
+
+        print(f"🎯 {total_count}問の問題生成を開始...")
+
+        pattern_counts = self.pattern_counts(total_count)
+
         # カテゴリごとに均等に分配
         categories_list = list(self.categories.keys())
 
@@ -743,40 +771,42 @@ class DrivingLicenseLogicGenerator:
         print(f"✅ {len(self.problems)}問の生成完了！")
         return self.problems
 
+    def format_problem(self, p: Dict) -> Dict:
+        """生成した問題を既存の problems.json フォーマットに変換"""
+        formatted_problem = {
+            "problem_id": p["problem_id"],
+            "theme_id": self.categories.get(p["category"], {}).get("id", 1000),
+            "theme_name": p["category"],
+            "category": p["category"],
+            "problem_type": "true_false",
+            "format": "○×",
+            "pattern_name": p["pattern"],
+            "difficulty": p["difficulty"],
+            "problem_text": p["problem_text"],
+            "correct_answer": p["correct_answer"],
+            "explanation": p["explanation"],
+            "generated_at": p["created_at"],
+            "legal_reference": {
+                "law": "風営法",
+                "article": self.categories.get(p["category"], {}).get("articles", ""),
+                "section": "",
+                "detail": p["explanation"]
+            }
+        }
+
+        # 追加メタデータ
+        for key in ["is_trap", "key_terms", "priority_rule", "time_limit", "scenario_type", "conditions", "key_number", "exception_type"]:
+            if key in p:
+                formatted_problem[key] = p[key]
+
+        return formatted_problem
+
     def save_to_json(self, filename: str = "problems_driving_logic.json"):
         """JSON形式で保存"""
         output_path = f"/home/planj/patshinko-exam-app/backend/{filename}"
 
         # 既存のproblems.jsonフォーマットに変換
-        formatted_problems = []
-        for p in self.problems:
-            formatted_problem = {
-                "problem_id": p["problem_id"],
-                "theme_id": self.categories.get(p["category"], {}).get("id", 1000),
-                "theme_name": p["category"],
-                "category": p["category"],
-                "problem_type": "true_false",
-                "format": "○×",
-                "pattern_name": p["pattern"],
-                "difficulty": p["difficulty"],
-                "problem_text": p["problem_text"],
-                "correct_answer": p["correct_answer"],
-                "explanation": p["explanation"],
-                "generated_at": p["created_at"],
-                "legal_reference": {
-                    "law": "風営法",
-                    "article": self.categories.get(p["category"], {}).get("articles", ""),
-                    "section": "",
-                    "detail": p["explanation"]
-                }
-            }
-
-            # 追加メタデータ
-            for key in ["is_trap", "key_terms", "priority_rule", "time_limit", "scenario_type", "conditions", "key_number", "exception_type"]:
-                if key in p:
-                    formatted_problem[key] = p[key]
-
-            formatted_problems.append(formatted_problem)
+        formatted_problems = [self.format_problem(p) for p in self.problems]
 
         # JSON保存
         output_data = {
@@ -850,17 +880,110 @@ class DrivingLicenseLogicGenerator:
         print("\n" + "="*60)
 
 
+def shard_seed(seed: int, pattern: str, category: str, part: int) -> int:
+    """シャードの乱数シード（プロセス・ハッシュランダム化に依存せず、基準シードと作業単位だけで決まる）"""
+    digest = hashlib.sha256(f"{seed}:{pattern}:{category}:{part}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def plan_shards(total_count: int, seed: int, shard_size: int = SHARD_SIZE) -> List[Dict]:
+    """
+    (パターン, カテゴリ) 単位の作業を決定的な順序でシャードに分け、開始IDとシードを割り当てる
+
+    パターンごとの問題数は generate_all_problems() と同じ配分で、
+    カテゴリへのローテーション配分と同じ件数を各カテゴリに割り当てる
+    """
+    generator = DrivingLicenseLogicGenerator()
+    categories = list(generator.categories)
+    shards = []
+    next_id = 1
+
+    for pattern, count in generator.pattern_counts(total_count).items():
+        for index, category in enumerate(categories):
+            category_count = count // len(categories) + (1 if index < count % len(categories) else 0)
+            for part, start in enumerate(range(0, category_count, shard_size)):
+                size = min(shard_size, category_count - start)
+                shards.append({
+                    "pattern": pattern,
+                    "category": category,
+                    "part": part,
+                    "count": size,
+                    "start_id": next_id,
+                    "seed": shard_seed(seed, pattern, category, part)
+                })
+                next_id += size
+
+    return shards
+
+
+def generate_shard(shard: Dict, created_at: str) -> List[Dict]:
+    """1シャード分の問題を生成（problems.json フォーマット、IDは start_id からの連番）"""
+    generator = DrivingLicenseLogicGenerator(seed=shard["seed"], created_at=created_at)
+    generator.problem_id_counter = shard["start_id"]
+    return [generator.format_problem(generator.generate_problem(shard["category"], shard["pattern"]))
+            for _ in range(shard["count"])]
+
+
+def generate_to_jsonl(output_path, total_count: int, seed: int = 0, workers: Optional[int] = None,
+                      shard_size: int = SHARD_SIZE, created_at: Optional[str] = None) -> int:
+    """
+    シャードをプロセスプールで並列生成し、計画順に1行1問のJSONLへ書き出す
+
+    同じ seed・total_count・shard_size・created_at なら、ワーカー数によらず同一バイト列の出力になる
+    （created_at 省略時は実行時刻を全問共通で使う）
+
+    Returns:
+        書き出した問題数
+    """
+    shards = plan_shards(total_count, seed, shard_size)
+    worker = partial(generate_shard, created_at=created_at or datetime.now().isoformat())
+
+    with OCRPageWriter(output_path) as writer:
+        if workers == 1:
+            for problems in map(worker, shards):
+                for problem in problems:
+                    writer.write(problem)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # map は投入順に結果を返すため、完了順によらず計画順で書き出せる
+                for problems in executor.map(worker, shards):
+                    for problem in problems:
+                        writer.write(problem)
+
+    return writer.count
+
+
 def main():
     """メイン処理"""
+    parser = argparse.ArgumentParser(description="運転免許式ロジックによる問題生成")
+    parser.add_argument("--count", type=int, default=500, help="生成する問題数")
+    parser.add_argument("--seed", type=int, default=None, help="乱数シード（指定すると再現可能）")
+    parser.add_argument("--jsonl", help="シャード並列生成して指定パスへJSONL出力")
+    parser.add_argument("--workers", type=int, default=None, help="並列生成のワーカー数（1で逐次）")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="1シャードあたりの最大問題数")
+    parser.add_argument("--created-at", default=None, help="生成日時の固定値（バイト単位で再現する場合に指定）")
+    args = parser.parse_args()
+
     print("🚀 遊技機取扱主任者試験問題生成システム起動")
     print("   運転免許学科試験ロジック適用版 v2.0")
     print("="*60)
 
+    if args.jsonl:
+        seed = args.seed if args.seed is not None else 0
+        start = datetime.now()
+        count = generate_to_jsonl(args.jsonl, args.count, seed=seed, workers=args.workers,
+                                  shard_size=args.shard_size, created_at=args.created_at)
+        elapsed = (datetime.now() - start).total_seconds()
+        print("\n✅ 全処理完了！")
+        print(f"   生成問題数: {count}問 (seed={seed}, {elapsed:.2f}秒)")
+        print(f"   保存先: {args.jsonl}")
+        return
+
     # ジェネレータ初期化
-    generator = DrivingLicenseLogicGenerator()
+    generator = DrivingLicenseLogicGenerator(seed=args.seed, created_at=args.created_at)
 
-    # 500問生成
-    problems = generator.generate_all_problems(total_count=500)
+    # 問題生成
+    problems = generator.generate_all_problems(total_count=args.count)
 
     # JSON保存
     json_path = generator.save_to_json()
@@ -874,4 +997,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -16,7 +16,7 @@
 import json
 import random
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import Dict, Iterator, List, Tuple
 import logging
 
 # ロギング設定
@@ -373,6 +373,15 @@ class ExamProblemGenerator:
 
     def generate_problems(self) -> List[Dict]:
         """1491問を生成"""
+        for problem in self.iter_problems():
+            self.problems.append(problem)
+            self.problem_count += 1
+
+        logger.info(f"✅ {len(self.problems)}問を生成完了")
+        return self.problems
+
+    def iter_problems(self) -> Iterator[Dict]:
+        """問題を1問ずつ生成して返す（フィルタパイプラインへ直接流すためのストリーム）"""
         logger.info("🚀 1491問の自動生成を開始...")
 
         self.setup_categories()
@@ -385,12 +394,9 @@ class ExamProblemGenerator:
 
         # カテゴリごとに問題を生成
         for category in self.categories:
-            self._generate_problems_for_category(category)
+            yield from self._iter_problems_for_category(category)
 
-        logger.info(f"✅ {len(self.problems)}問を生成完了")
-        return self.problems
-
-    def _generate_problems_for_category(self, category: Dict):
+    def _iter_problems_for_category(self, category: Dict) -> Iterator[Dict]:
         """カテゴリ内の問題を生成"""
         target = category["target_problems"]
         subtopics = category["subtopics"]
@@ -407,13 +413,13 @@ class ExamProblemGenerator:
 
             # テーマごとに複数パターンで問題を生成
             for theme in themes:
-                self._generate_problems_for_theme(
+                yield from self._iter_problems_for_theme(
                     category, subtopic, theme,
                     patterns_per_theme=int(problems_per_subtopic / len(themes)) or 1
                 )
 
-    def _generate_problems_for_theme(self, category: Dict, subtopic: Dict,
-                                     theme: str, patterns_per_theme: int = 1):
+    def _iter_problems_for_theme(self, category: Dict, subtopic: Dict,
+                                 theme: str, patterns_per_theme: int = 1) -> Iterator[Dict]:
         """テーマに対して複数パターンの問題を生成"""
         patterns = self._get_patterns()
 
@@ -422,7 +428,7 @@ class ExamProblemGenerator:
                                          min(patterns_per_theme, len(patterns)))
 
         for pattern in selected_patterns:
-            problem = {
+            yield {
                 "category_id": category["id"],
                 "category_name": category["name"],
                 "subtopic_id": subtopic["id"],
@@ -437,9 +443,6 @@ class ExamProblemGenerator:
                 "generated_at": datetime.now().isoformat()
             }
 
-            self.problems.append(problem)
-            self.problem_count += 1
-
     def _get_patterns(self) -> List[Dict]:
         """12パターンを定義"""
         return [
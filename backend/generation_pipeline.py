@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+生成 → フィルタのストリーミングパイプライン
+生成した候補を1問ずつ検証ステージに流し、軽いチェックから順に評価して最初の不合格で即棄却する。
+全ステージを通過した問題だけが後段の重い検証（類似度・ひっかけ強度・法令知識ベース）の対象になり、
+生成から検証・出力までを1プロセスで行う
+
+【ステージ（評価順）】
+1. 文字数          問題文の長さ
+2. 重複            正規化した問題文の完全一致
+3. 複合語          複合語辞書の語が分割されていないか（validate_compound_words.py と同じ判定）
+4. 類似問題        採用済み問題との類似度（SequenceMatcher、generate_*_667.py と同じ 0.90 基準）
+5. ひっかけ強度    選択肢（distractors）を持つ問題のみ（validate_distractor_strength.py と同じエンジン）
+6. 法令知識ベース  legal_knowledge_base.validate_problem
+
+【実行例】
+python3 backend/generation_pipeline.py --source driving --count 10000 --seed 1 --output output/pipeline_survivors.jsonl
+python3 backend/generation_pipeline.py --source data/problems.json --output output/pipeline_survivors.jsonl
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from keyword_automaton import KeywordAutomaton
+from legal_knowledge_base import validate_problem
+from ocr_page_stream import OCRPageWriter, iter_ocr_pages
+
+COMPOUND_WORDS_PATH = Path("data/compound_words/compound_words_dictionary.json")
+CONFIG_DIR = Path(__file__).resolve().parent.parent / 'config'
+
+MIN_TEXT_LENGTH = 10
+MAX_TEXT_LENGTH = 500
+SIMILARITY_THRESHOLD = 0.90
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class FilterStage:
+    """検証ステージ（check が理由文字列を返したら棄却）"""
+
+    name = ""
+
+    def check(self, problem: Dict) -> Optional[str]:
+        raise NotImplementedError
+
+    def accept(self, problem: Dict):
+        """全ステージを通過して採用された問題を受け取る（重複・類似判定の状態更新用）"""
+
+
+class LengthStage(FilterStage):
+    name = "文字数"
+
+    def __init__(self, min_length: int = MIN_TEXT_LENGTH, max_length: int = MAX_TEXT_LENGTH):
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def check(self, problem):
+        length = len(problem.get('problem_text', ''))
+        if length < self.min_length:
+            return f"問題文が短すぎる（{length}文字）"
+        if length > self.max_length:
+            return f"問題文が長すぎる（{length}文字）"
+        return None
+
+
+class DuplicateStage(FilterStage):
+    name = "重複"
+
+    def __init__(self):
+        self.seen = set()
+
+    @staticmethod
+    def _key(problem):
+        return WHITESPACE_PATTERN.sub('', problem.get('problem_text', ''))
+
+    def check(self, problem):
+        return "同一の問題文が採用済み" if self._key(problem) in self.seen else None
+
+    def accept(self, problem):
+        self.seen.add(self._key(problem))
+
+
+class CompoundWordStage(FilterStage):
+    name = "複合語"
+
+    def __init__(self, compound_words: Iterable[str]):
+        self.compound_words = list(compound_words)
+        self.automaton = KeywordAutomaton(self.compound_words)
+
+    @classmethod
+    def from_dictionary(cls, path: Path = COMPOUND_WORDS_PATH) -> 'CompoundWordStage':
+        with open(path, 'r', encoding='utf-8') as f:
+            compound_dict = json.load(f)
+        return cls(cw['word'] for cw in compound_dict.get('compound_words', []))
+
+    def check(self, problem):
+        text = problem.get('problem_text', '')
+        for compound in sorted(self.automaton.find(text)):
+            split_pattern = " ".join(list(compound))
+            if split_pattern in text:
+                return f"複合語分割エラー: {compound} → {split_pattern}"
+        return None
+
+
+class SimilarityStage(FilterStage):
+    name = "類似問題"
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.accepted: List[str] = []
+
+    def check(self, problem):
+        text = problem.get('problem_text', '')
+        matcher = SequenceMatcher(None, autojunk=False)
+        matcher.set_seq2(text)
+        for other in self.accepted:
+            # 長さの比だけで類似度の上限が閾値未満になる組は比較しない
+            if 2 * min(len(text), len(other)) < self.threshold * (len(text) + len(other)):
+                continue
+            matcher.set_seq1(other)
+            if (matcher.real_quick_ratio() >= self.threshold
+                    and matcher.quick_ratio() >= self.threshold
+                    and matcher.ratio() >= self.threshold):
+                return f"採用済み問題と類似（{matcher.ratio():.2f}）: {other[:30]}"
+        return None
+
+    def accept(self, problem):
+        self.accepted.append(problem.get('problem_text', ''))
+
+
+class DistractorStage(FilterStage):
+    name = "ひっかけ強度"
+
+    def __init__(self, min_quality: float = 0.65):
+        self.min_quality = min_quality
+        self.engine = None
+        try:
+            sys.path.insert(0, str(CONFIG_DIR))
+            from distractor_control_logic import DistractorControlEngine, DifficultyLevel
+            self.engine = DistractorControlEngine(use_bert=False)
+            self.difficulty_levels = {level.value: level for level in DifficultyLevel}
+            self.default_difficulty = DifficultyLevel.STANDARD
+        except ImportError as e:
+            print(f"⚠️  ひっかけ強度検証を無効化しました（{e}）")
+
+    def check(self, problem):
+        distractors = problem.get('distractors')
+        if self.engine is None or not distractors:
+            return None
+
+        quality = self.engine.analyze_question(
+            problem_id=str(problem.get('problem_id', '')),
+            problem_text=problem.get('problem_text', ''),
+            correct_answer=problem.get('correct_answer_text', problem.get('correct_answer', '')),
+            distractors=distractors,
+            difficulty=self.difficulty_levels.get(problem.get('difficulty_level'), self.default_difficulty)
+        )
+        if not quality.is_quality_approved(self.min_quality):
+            return f"品質スコア不足（{quality.overall_quality_score:.2f}）"
+        return None
+
+
+class LegalKnowledgeStage(FilterStage):
+    name = "法令知識ベース"
+
+    def check(self, problem):
+        result = validate_problem(problem.get('problem_text', ''), {})
+        if not result['is_correct']:
+            return result['issues'][0]['message']
+        return None
+
+
+def default_stages(min_length: int = MIN_TEXT_LENGTH, max_length: int = MAX_TEXT_LENGTH,
+                   similarity: float = SIMILARITY_THRESHOLD) -> List[FilterStage]:
+    """軽い順に並べた標準ステージ"""
+    return [
+        LengthStage(min_length, max_length),
+        DuplicateStage(),
+        CompoundWordStage.from_dictionary(),
+        SimilarityStage(similarity),
+        DistractorStage(),
+        LegalKnowledgeStage()
+    ]
+
+
+class GenerateFilterPipeline:
+    """候補のストリームをステージに通し、採用された問題だけを返す"""
+
+    def __init__(self, stages: List[FilterStage], samples_per_stage: int = 3):
+        self.stages = stages
+        self.samples_per_stage = samples_per_stage
+        self.candidates = 0
+        self.survivors = 0
+        self.stats = {stage.name: {"checked": 0, "rejected": 0, "seconds": 0.0, "samples": []}
+                      for stage in stages}
+
+    def run(self, candidates: Iterable[Dict]) -> Iterator[Dict]:
+        for problem in candidates:
+            self.candidates += 1
+            for stage in self.stages:
+                stats = self.stats[stage.name]
+                start = time.perf_counter()
+                reason = stage.check(problem)
+                stats["seconds"] += time.perf_counter() - start
+                stats["checked"] += 1
+                if reason:
+                    stats["rejected"] += 1
+                    if len(stats["samples"]) < self.samples_per_stage:
+                        stats["samples"].append(f"{problem.get('problem_text', '')[:30]} … {reason}")
+                    break
+            else:
+                for stage in self.stages:
+                    stage.accept(problem)
+                self.survivors += 1
+                yield problem
+
+    def print_report(self):
+        print("\n" + "=" * 60)
+        print("【生成 → フィルタ パイプライン結果】")
+        print("=" * 60)
+        print(f"  候補: {self.candidates}問 → 採用: {self.survivors}問\n")
+        for stage in self.stages:
+            stats = self.stats[stage.name]
+            print(f"  {stage.name:10} 検証 {stats['checked']:6}問  棄却 {stats['rejected']:6}問  "
+                  f"{stats['seconds'] * 1000:9.1f}ms")
+            for sample in stats["samples"]:
+                print(f"      - {sample}")
+
+
+def iter_source(source: str, count: int, seed: int) -> Iterator[Dict]:
+    """候補のストリーム（driving / exam1491 / JSON・JSONLファイル）"""
+    if source == "driving":
+        from driving_license_logic_generator import generate_shard, plan_shards
+        for shard in plan_shards(count, seed):
+            yield from generate_shard(shard, created_at=None)
+    elif source == "exam1491":
+        import random
+        from generate_1491_problems import ExamProblemGenerator
+        random.seed(seed)
+        yield from ExamProblemGenerator().iter_problems()
+    elif source.endswith('.jsonl'):
+        yield from iter_ocr_pages(source)
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        yield from (data['problems'] if isinstance(data, dict) else data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 → フィルタのストリーミングパイプライン")
+    parser.add_argument("--source", default="driving",
+                        help="候補の供給元: driving / exam1491 / 問題JSON・JSONLのパス")
+    parser.add_argument("--count", type=int, default=1000, help="driving で生成する候補数")
+    parser.add_argument("--seed", type=int, default=0, help="生成の乱数シード")
+    parser.add_argument("--output", default="output/pipeline_survivors.jsonl", help="採用問題のJSONL出力先")
+    parser.add_argument("--min-length", type=int, default=MIN_TEXT_LENGTH)
+    parser.add_argument("--max-length", type=int, default=MAX_TEXT_LENGTH)
+    parser.add_argument("--similarity", type=float, default=SIMILARITY_THRESHOLD, help="類似問題とみなす類似度")
+    args = parser.parse_args()
+
+    pipeline = GenerateFilterPipeline(default_stages(args.min_length, args.max_length, args.similarity))
+
+    start = time.perf_counter()
+    with OCRPageWriter(args.output) as writer:
+        for problem in pipeline.run(iter_source(args.source, args.count, args.seed)):
+            writer.write(problem)
+    elapsed = time.perf_counter() - start
+
+    pipeline.print_report()
+    print(f"\n✅ {writer.count}問を {args.output} に保存（{elapsed:.2f}秒）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
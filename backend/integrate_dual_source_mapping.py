@@ -5,15 +5,18 @@
 """
 
 import json
+import sys
 from pathlib import Path
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lecture_page_store import read_theme_text
+
 def extract_keywords_from_file(file_path: str, sample_length: int = 2000) -> list:
     """ファイルからキーワードを抽出"""
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()[:sample_length]
+        content = read_theme_text(file_path)[:sample_length]
     except:
         return []
 
@@ -2,358 +2,16 @@
 """
 Task 4.5: 実務分野品質メトリクス統合評価
 
-複合語検証 + ひっかけ強度検証 + 明確性 + 根拠性
-をすべて統合し、総合品質スコア（0.0-1.0）を計算
+実務分野デモ問題（output/practice_domain_50_demo.json）の総合品質スコア（0.0-1.0）を計算
+config/quality_metrics_definition.yaml の定義で quality_metrics_engine が全問題を評価し、
+output/integrated_quality_report_practice.json に統合レポートを保存する
 """
 
-import json
+import sys
 from pathlib import Path
 
-print("=" * 80)
-print("【Task 4.5: 実務分野品質メトリクス統合評価】")
-print("=" * 80)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from quality_metrics_engine import run_integration
 
-# 1. 各検証結果を読み込む
-print("\n✅ ステップ1: 各検証結果を読み込む")
-
-try:
-    with open("output/validation_report_practice_compound_words.json", 'r', encoding='utf-8') as f:
-        compound_report = json.load(f)
-    print("  ✓ 複合語検証レポート読み込み完了")
-except:
-    compound_report = None
-    print("  ✗ 複合語検証レポート見つかりません")
-
-try:
-    with open("output/validation_report_practice_distractor_strength.json", 'r', encoding='utf-8') as f:
-        distractor_report = json.load(f)
-    print("  ✓ ひっかけ強度検証レポート読み込み完了")
-except:
-    distractor_report = None
-    print("  ✗ ひっかけ強度検証レポート見つかりません")
-
-try:
-    with open("output/practice_domain_50_demo.json", 'r', encoding='utf-8') as f:
-        demo_problems = json.load(f)
-    print("  ✓ デモ問題データ読み込み完了")
-except:
-    demo_problems = None
-    print("  ✗ デモ問題データ見つかりません")
-
-# 2. 品質メトリクスの重み付けを定義
-print("\n✅ ステップ2: 品質メトリクスの重み付けを定義")
-
-quality_metrics_weights = {
-    "clarity": {
-        "weight": 0.30,
-        "description": "問題文の明確性",
-        "sub_items": {
-            "compound_word_accuracy": 0.40,
-            "text_consistency": 0.30,
-            "ambiguity_elimination": 0.30
-        }
-    },
-    "distractor": {
-        "weight": 0.30,
-        "description": "ディストラクタの適切性",
-        "sub_items": {
-            "distractor_strength_fit": 0.50,
-            "option_diversity": 0.30,
-            "viability_of_errors": 0.20
-        }
-    },
-    "explanation": {
-        "weight": 0.20,
-        "description": "説明文の根拠性",
-        "sub_items": {
-            "legal_basis_clarity": 0.50,
-            "content_accuracy": 0.30,
-            "explanation_detail": 0.20
-        }
-    },
-    "intensity": {
-        "weight": 0.20,
-        "description": "ひっかけ度の適切性",
-        "sub_items": {
-            "difficulty_fit": 0.50,
-            "distractor_naturalness": 0.30,
-            "level_consistency": 0.20
-        }
-    }
-}
-
-print(f"""
-  【統合品質スコア計算式】
-  総合 = 0.30 × 明確性 + 0.30 × ディストラクタ + 0.20 × 根拠性 + 0.20 × ひっかけ度
-
-  詳細項目:
-""")
-
-for key, config in quality_metrics_weights.items():
-    print(f"    {key:20} ({config['weight']:.0%}): {config['description']}")
-
-# 3. 複合語検証からのスコア抽出
-print("\n✅ ステップ3: 複合語検証からスコアを抽出")
-
-compound_scores = {}
-if compound_report:
-    summary = compound_report.get('summary', {})
-    pass_rate = float(summary.get('pass_rate', '0%').rstrip('%')) / 100
-    coverage = float(summary.get('complex_word_coverage', '0/46').split('/')[0]) / 46
-
-    compound_scores = {
-        "compound_word_accuracy": pass_rate,
-        "text_consistency": 0.95,  # サンプルでは高い一貫性
-        "ambiguity_elimination": 0.90  # 複合語使用による曖昧性排除
-    }
-
-    print(f"""
-    複合語検証結果:
-      - 合格率: {pass_rate*100:.1f}%
-      - キーワードカバー率: {coverage*100:.1f}%
-      - テキスト一貫性: 0.95
-      - 曖昧性排除度: 0.90
-    """)
-
-    clarity_score = sum(
-        compound_scores.get(k, 0.5) * v
-        for k, v in quality_metrics_weights["clarity"]["sub_items"].items()
-    )
-    print(f"    → 明確性スコア: {clarity_score:.2f}")
-else:
-    clarity_score = 0.5
-
-# 4. ひっかけ強度検証からのスコア抽出
-print("\n✅ ステップ4: ひっかけ強度検証からスコアを抽出")
-
-distractor_scores = {}
-intensity_score = 0.0
-
-if distractor_report:
-    summary = distractor_report.get('summary', {})
-    pass_rate = float(summary.get('pass_rate', '0%').rstrip('%')) / 100
-
-    distractor_scores = {
-        "distractor_strength_fit": min(pass_rate + 0.5, 1.0),  # 調整係数
-        "option_diversity": 0.85,
-        "viability_of_errors": 0.80
-    }
-
-    print(f"""
-    ひっかけ強度検証結果:
-      - 合格率: {pass_rate*100:.1f}%
-      - ディストラクタ多様性: 0.85
-      - 誤答妥当性: 0.80
-      - 調整後強度適合度: {distractor_scores['distractor_strength_fit']:.2f}
-    """)
-
-    distractor_quality = sum(
-        distractor_scores.get(k, 0.5) * v
-        for k, v in quality_metrics_weights["distractor"]["sub_items"].items()
-    )
-
-    intensity_score = sum(
-        distractor_scores.get(k, 0.5) * v
-        for k, v in quality_metrics_weights["intensity"]["sub_items"].items()
-    )
-
-    print(f"""
-    → ディストラクタ適切性スコア: {distractor_quality:.2f}
-    → ひっかけ度適切性スコア: {intensity_score:.2f}
-    """)
-else:
-    distractor_quality = 0.5
-    intensity_score = 0.5
-
-# 5. 説明文品質の推定スコア
-print("\n✅ ステップ5: 説明文品質スコアを推定")
-
-if demo_problems:
-    sample_problems = demo_problems.get('sample_problems', [])
-
-    explanation_scores = {
-        "legal_basis_clarity": 0.90,  # 条文を明記
-        "content_accuracy": 0.95,      # 法律的正確性
-        "explanation_detail": 0.75     # 詳細度
-    }
-
-    explanation_score = sum(
-        explanation_scores.get(k, 0.5) * v
-        for k, v in quality_metrics_weights["explanation"]["sub_items"].items()
-    )
-
-    print(f"""
-    説明文品質推定:
-      - 法律根拠明確性: 0.90
-      - コンテンツ正確性: 0.95
-      - 詳細度: 0.75
-
-    → 根拠性スコア: {explanation_score:.2f}
-    """)
-else:
-    explanation_score = 0.5
-
-# 6. 総合品質スコアを計算
-print("\n✅ ステップ6: 総合品質スコアを計算")
-
-overall_score = (
-    clarity_score * quality_metrics_weights["clarity"]["weight"] +
-    distractor_quality * quality_metrics_weights["distractor"]["weight"] +
-    explanation_score * quality_metrics_weights["explanation"]["weight"] +
-    intensity_score * quality_metrics_weights["intensity"]["weight"]
-)
-
-print(f"""
-  【総合品質スコア計算】
-
-  = 0.30 × {clarity_score:.2f}
-  + 0.30 × {distractor_quality:.2f}
-  + 0.20 × {explanation_score:.2f}
-  + 0.20 × {intensity_score:.2f}
-  ───────────────────
-  = {overall_score:.2f}
-""")
-
-# 7. 品質レベル判定
-print("\n✅ ステップ7: 品質レベル判定")
-
-if overall_score >= 0.85:
-    quality_level = "優秀"
-    recommendation = "そのまま採用可（微調整不要）"
-elif overall_score >= 0.70:
-    quality_level = "良好"
-    recommendation = "採用可（軽微な調整推奨）"
-elif overall_score >= 0.50:
-    quality_level = "要改善"
-    recommendation = "改善後に再評価"
-else:
-    quality_level = "不合格"
-    recommendation = "再生成推奨"
-
-print(f"""
-  【品質レベル判定】
-
-  スコア: {overall_score:.2f}
-  レベル: {quality_level}
-  推奨: {recommendation}
-""")
-
-# 8. 統合レポートを生成
-print("\n✅ ステップ8: 統合レポートを生成")
-
-integrated_report = {
-    "metadata": {
-        "task": "Task 4.5 - 実務分野品質メトリクス統合評価",
-        "completion_date": "2025-11-06",
-        "phase": "Phase 2 Week 4 (実務分野)",
-        "domain": "practice"
-    },
-    "quality_metrics_weights": quality_metrics_weights,
-    "score_breakdown": {
-        "clarity": {
-            "score": clarity_score,
-            "weight": 0.30,
-            "weighted_score": clarity_score * 0.30
-        },
-        "distractor": {
-            "score": distractor_quality,
-            "weight": 0.30,
-            "weighted_score": distractor_quality * 0.30
-        },
-        "explanation": {
-            "score": explanation_score,
-            "weight": 0.20,
-            "weighted_score": explanation_score * 0.20
-        },
-        "intensity": {
-            "score": intensity_score,
-            "weight": 0.20,
-            "weighted_score": intensity_score * 0.20
-        }
-    },
-    "overall_quality": {
-        "score": overall_score,
-        "level": quality_level,
-        "recommendation": recommendation
-    },
-    "next_steps": [
-        "✅ Week 4 - 実務分野プロトタイプ生成：完了予定",
-        "→ Week 5: 物理・化学・生物分野50問生成",
-        "→ Phase 3: スケールアップ（Week 6-12）"
-    ]
-}
-
-report_path = "output/integrated_quality_report_practice.json"
-with open(report_path, 'w', encoding='utf-8') as f:
-    json.dump(integrated_report, f, indent=2, ensure_ascii=False)
-
-print(f"  保存完了: {report_path}")
-
-# 9. Phase 2完了レポート（Week 4）
-print("\n" + "=" * 80)
-print("【Task 4.5 完了 - Week 4 実務分野プロトタイプ検証完了】")
-print("=" * 80)
-
-print(f"""
-✅ Week 4 完了：実務分野プロトタイプ生成フェーズ
-
-【実施内容】
-  Task 4.1: ✓ データ準備（20チャンク、188k tokens）
-  Task 4.2: ✓ 問題生成準備（5問デモ）
-  Task 4.3: ✓ 複合語検証（100%合格）
-  Task 4.4: ✓ ひっかけ強度検証（制御エンジン確認）
-  Task 4.5: ✓ 品質メトリクス統合（スコア計算）
-
-【統合品質スコア結果】
-  総合スコア: {overall_score:.2f} ({quality_level})
-  → {recommendation}
-
-【スコア内訳】
-  - 問題文の明確性（30%）: {clarity_score:.2f}
-  - ディストラクタ適切性（30%）: {distractor_quality:.2f}
-  - 説明文の根拠性（20%）: {explanation_score:.2f}
-  - ひっかけ度適切性（20%）: {intensity_score:.2f}
-
-【複合語対応確認】
-  ✓ 複合語辞書（46個）完全統合
-  ✓ 複合語分割エラー: 0件
-  ✓ キーワード自動抽出機能: 動作確認
-  ✓ 本フェーズ結果: 100%合格
-
-【ひっかけ強度制御確認】
-  ✓ distractor_control_logic.py 連携
-  ✓ 難易度別スコア範囲設定: 機能確認
-  ✓ 改善提案自動生成: 動作確認
-
-【デモンストレーション実績】
-  - 実務分野サンプル問題: 5個生成
-  - 複合語検証: 5/5合格
-  - ひっかけ強度検証: 制御ロジック確認
-  - 品質スコア統合: {overall_score:.2f}
-
-【本実装への遺産】
-  ✓ 複合語対応プロンプト（実装待ち）
-  ✓ ひっかけ制御ロジック（動作確認済み）
-  ✓ 品質メトリクス定義（完全定義済み）
-  ✓ 検証スクリプト群（全4個）
-
-📊 プロジェクト全体統計：
-  - 総コミット数: 20個（Phase 1-2 Week 4）
-  - 実装スクリプト: 24個
-  - テンプレート: 15個
-  - 複合語辞書: 46個
-  - テスト問題生成: 10個（法令5 + 実務5）
-  - 成果物ファイル: 16個
-
-🎯 次フェーズ（Week 5）：
-  - 物理分野50問生成
-  - 化学分野50問生成
-  - 生物分野50問生成予定
-
-🔄 最終統合（Phase 3, Week 6-12）：
-  - 250問全体の最終品質検証
-  - データベース構築
-  - 本番データセット完成
-""")
-
-print("=" * 80)
+if __name__ == "__main__":
+    sys.exit(run_integration("practice"))
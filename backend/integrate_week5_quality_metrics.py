@@ -2,357 +2,16 @@
 """
 Task 5.6: Week 5 品質メトリクス統合評価
 
-複合語検証 + ひっかけ強度 + 明確性 + 根拠性
-をすべて統合し、総合品質スコアを計算
+複合分野デモ問題（output/week5_domain_generation_prepared.json）の総合品質スコア（0.0-1.0）を計算
+config/quality_metrics_definition.yaml の定義で quality_metrics_engine が全問題を評価し、
+output/integrated_quality_report_week5.json に統合レポートを保存する
 """
 
-import json
+import sys
 from pathlib import Path
 
-print("=" * 80)
-print("【Task 5.6: Week 5 品質メトリクス統合評価】")
-print("=" * 80)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from quality_metrics_engine import run_integration
 
-# 1. 各検証結果を読み込む
-print("\n✅ ステップ1: 各検証結果を読み込む")
-
-compound_report = None
-try:
-    with open("output/validation_report_week5_compound_words.json", 'r', encoding='utf-8') as f:
-        compound_report = json.load(f)
-    print("  ✓ 複合語検証レポート読み込み完了")
-except:
-    print("  ✗ 複合語検証レポート見つかりません")
-
-demo_problems = None
-try:
-    with open("output/week5_domain_generation_prepared.json", 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        demo_problems = data
-    print("  ✓ デモ問題データ読み込み完了")
-except:
-    print("  ✗ デモ問題データ見つかりません")
-
-# 2. 品質メトリクスの重み付けを定義
-print("\n✅ ステップ2: 品質メトリクスの重み付けを定義")
-
-quality_metrics_weights = {
-    "clarity": {
-        "weight": 0.30,
-        "description": "問題文の明確性",
-        "sub_items": {
-            "compound_word_accuracy": 0.40,
-            "text_consistency": 0.30,
-            "ambiguity_elimination": 0.30
-        }
-    },
-    "distractor": {
-        "weight": 0.30,
-        "description": "ディストラクタの適切性",
-        "sub_items": {
-            "distractor_strength_fit": 0.50,
-            "option_diversity": 0.30,
-            "viability_of_errors": 0.20
-        }
-    },
-    "explanation": {
-        "weight": 0.20,
-        "description": "説明文の根拠性",
-        "sub_items": {
-            "legal_basis_clarity": 0.50,
-            "content_accuracy": 0.30,
-            "explanation_detail": 0.20
-        }
-    },
-    "intensity": {
-        "weight": 0.20,
-        "description": "ひっかけ度の適切性",
-        "sub_items": {
-            "difficulty_fit": 0.50,
-            "distractor_naturalness": 0.30,
-            "level_consistency": 0.20
-        }
-    }
-}
-
-print(f"""
-  【統合品質スコア計算式】
-  総合 = 0.30 × 明確性 + 0.30 × ディストラクタ + 0.20 × 根拠性 + 0.20 × ひっかけ度
-
-  詳細項目:
-""")
-
-for key, config in quality_metrics_weights.items():
-    print(f"    {key:20} ({config['weight']:.0%}): {config['description']}")
-
-# 3. 複合語検証からのスコア抽出
-print("\n✅ ステップ3: 複合語検証からスコアを抽出")
-
-compound_scores = {}
-clarity_score = 0.5
-
-if compound_report:
-    summary = compound_report.get('summary', {})
-    pass_rate = float(summary.get('pass_rate', '0%').rstrip('%')) / 100
-
-    compound_scores = {
-        "compound_word_accuracy": pass_rate,
-        "text_consistency": 0.90,  # デモ6問では中程度
-        "ambiguity_elimination": 0.85  # 複合語使用による曖昧性排除
-    }
-
-    print(f"""
-    複合語検証結果:
-      - 合格率: {pass_rate*100:.1f}%
-      - テキスト一貫性: 0.90
-      - 曖昧性排除度: 0.85
-    """)
-
-    clarity_score = sum(
-        compound_scores.get(k, 0.5) * v
-        for k, v in quality_metrics_weights["clarity"]["sub_items"].items()
-    )
-    print(f"    → 明確性スコア: {clarity_score:.2f}")
-else:
-    clarity_score = 0.5
-
-# 4. ひっかけ強度検証（推定スコア）
-print("\n✅ ステップ4: ひっかけ強度の推定スコアを計算")
-
-distractor_scores = {
-    "distractor_strength_fit": 0.65,      # デモ問では標準
-    "option_diversity": 0.80,             # 4択の多様性
-    "viability_of_errors": 0.75          # 誤答の妥当性
-}
-
-print(f"""
-    ひっかけ強度推定:
-      - 強度適合度: 0.65
-      - オプション多様性: 0.80
-      - 誤答妥当性: 0.75
-    """)
-
-distractor_quality = sum(
-    distractor_scores.get(k, 0.5) * v
-    for k, v in quality_metrics_weights["distractor"]["sub_items"].items()
-)
-
-intensity_score = sum(
-    distractor_scores.get(k, 0.5) * v
-    for k, v in quality_metrics_weights["intensity"]["sub_items"].items()
-)
-
-print(f"""
-    → ディストラクタ適切性スコア: {distractor_quality:.2f}
-    → ひっかけ度適切性スコア: {intensity_score:.2f}
-""")
-
-# 5. 説明文品質の推定スコア
-print("\n✅ ステップ5: 説明文品質スコアを推定")
-
-explanation_scores = {
-    "legal_basis_clarity": 0.88,  # デモ問では条文明記
-    "content_accuracy": 0.92,      # 法律的正確性
-    "explanation_detail": 0.80     # 詳細度
-}
-
-explanation_score = sum(
-    explanation_scores.get(k, 0.5) * v
-    for k, v in quality_metrics_weights["explanation"]["sub_items"].items()
-)
-
-print(f"""
-    説明文品質推定:
-      - 法律根拠明確性: 0.88
-      - コンテンツ正確性: 0.92
-      - 詳細度: 0.80
-
-    → 根拠性スコア: {explanation_score:.2f}
-    """)
-
-# 6. 総合品質スコアを計算
-print("\n✅ ステップ6: 総合品質スコアを計算")
-
-overall_score = (
-    clarity_score * quality_metrics_weights["clarity"]["weight"] +
-    distractor_quality * quality_metrics_weights["distractor"]["weight"] +
-    explanation_score * quality_metrics_weights["explanation"]["weight"] +
-    intensity_score * quality_metrics_weights["intensity"]["weight"]
-)
-
-print(f"""
-  【総合品質スコア計算】
-
-  = 0.30 × {clarity_score:.2f}
-  + 0.30 × {distractor_quality:.2f}
-  + 0.20 × {explanation_score:.2f}
-  + 0.20 × {intensity_score:.2f}
-  ───────────────────
-  = {overall_score:.2f}
-""")
-
-# 7. 品質レベル判定
-print("\n✅ ステップ7: 品質レベル判定")
-
-if overall_score >= 0.85:
-    quality_level = "優秀"
-    recommendation = "そのまま採用可（微調整不要）"
-elif overall_score >= 0.70:
-    quality_level = "良好"
-    recommendation = "採用可（軽微な調整推奨）"
-elif overall_score >= 0.50:
-    quality_level = "要改善"
-    recommendation = "改善後に再評価"
-else:
-    quality_level = "不合格"
-    recommendation = "再生成推奨"
-
-print(f"""
-  【品質レベル判定】
-
-  スコア: {overall_score:.2f}
-  レベル: {quality_level}
-  推奨: {recommendation}
-""")
-
-# 8. Week 3-4との比較
-print("\n✅ ステップ8: Week 3-4との品質比較")
-
-week3_score = 0.75  # Law domain (Week 3)
-week4_score = 0.76  # Practice domain (Week 4)
-week5_score = overall_score
-
-print(f"""
-  【品質スコア推移】
-    Week 3 (法令分野): 0.75 (良好)
-    Week 4 (実務分野): 0.76 (良好)
-    Week 5 (複数分野): {week5_score:.2f} ({quality_level})
-
-  【分析】
-    - Week 5は Week 3-4と同等品質を維持
-    - 複数ドメイン統合による品質安定性を確認
-    - 150問生成への準備完了
-""")
-
-# 9. 統合レポートを生成
-print("\n✅ ステップ9: 統合レポートを生成")
-
-integrated_report = {
-    "metadata": {
-        "task": "Task 5.6 - Week 5 品質メトリクス統合評価",
-        "completion_date": "2025-11-06",
-        "phase": "Phase 2 Week 5 (複数ドメイン)",
-        "domains": 3
-    },
-    "quality_metrics_weights": quality_metrics_weights,
-    "score_breakdown": {
-        "clarity": {
-            "score": clarity_score,
-            "weight": 0.30,
-            "weighted_score": clarity_score * 0.30
-        },
-        "distractor": {
-            "score": distractor_quality,
-            "weight": 0.30,
-            "weighted_score": distractor_quality * 0.30
-        },
-        "explanation": {
-            "score": explanation_score,
-            "weight": 0.20,
-            "weighted_score": explanation_score * 0.20
-        },
-        "intensity": {
-            "score": intensity_score,
-            "weight": 0.20,
-            "weighted_score": intensity_score * 0.20
-        }
-    },
-    "overall_quality": {
-        "score": overall_score,
-        "level": quality_level,
-        "recommendation": recommendation
-    },
-    "week_comparison": {
-        "week3_law_domain": 0.75,
-        "week4_practice_domain": 0.76,
-        "week5_multi_domain": overall_score,
-        "consistency": "stable"
-    },
-    "next_steps": [
-        "✅ Week 5 - 複数ドメイン問題生成準備：完了",
-        "→ 150問本生成フェーズ開始",
-        "→ Phase 3: 最終統合・データベース構築"
-    ]
-}
-
-report_path = "output/integrated_quality_report_week5.json"
-with open(report_path, 'w', encoding='utf-8') as f:
-    json.dump(integrated_report, f, indent=2, ensure_ascii=False)
-
-print(f"  保存完了: {report_path}")
-
-# 10. 完了メッセージ
-print("\n" + "=" * 80)
-print("【Task 5.6 完了 - Week 5 品質メトリクス統合評価完了】")
-print("=" * 80)
-
-print(f"""
-✅ Week 5 完了：複数ドメイン問題生成準備フェーズ
-
-【実施内容】
-  Task 5.1: ✓ データ準備（技術管理、セキュリティ、営業規制）
-  Task 5.2: ✓ 問題生成準備（システムプロンプト、テンプレート）
-  Task 5.3: ✓ 複合語検証（4/6問合格）
-  Task 5.4: ✓ 品質メトリクス統合（スコア計算）
-
-【統合品質スコア結果】
-  総合スコア: {overall_score:.2f} ({quality_level})
-  → {recommendation}
-
-【スコア内訳】
-  - 問題文の明確性（30%）: {clarity_score:.2f}
-  - ディストラクタ適切性（30%）: {distractor_quality:.2f}
-  - 説明文の根拠性（20%）: {explanation_score:.2f}
-  - ひっかけ度適切性（20%）: {intensity_score:.2f}
-
-【複合語対応確認】
-  ✓ 複合語辞書（46個）完全統合
-  ✓ デモ検証: 4問合格（66.7%）
-  ✓ 複合語分割エラー: 2問（本生成で改善予定）
-
-【Week 3-4との品質比較】
-  Week 3 (法令分野): 0.75
-  Week 4 (実務分野): 0.76
-  Week 5 (複合分野): {overall_score:.2f}
-  → 一貫性確保、安定品質を実現
-
-【デモンストレーション実績】
-  - Week 5 3ドメイン統合: 6問生成
-  - 複合語検証: 4問合格
-  - ひっかけ強度制御: 確認済み
-  - 品質スコア: {overall_score:.2f}
-
-【本実装への遺産】
-  ✓ 複合語対応プロンプト（実装待ち）
-  ✓ ひっかけ制御ロジック（動作確認済み）
-  ✓ 品質メトリクス定義（完全定義済み）
-  ✓ 検証スクリプト群（全6個）
-
-📊 プロジェクト全体統計：
-  - Week 1-5総コミット数: 30個
-  - 実装スクリプト: 30個
-  - テンプレート: 15個
-  - 複合語辞書: 46個
-  - テスト問題生成: 21問（法令5 + 実務5 + 複数6）
-  - 成果物ファイル: 25+個
-
-🎯 次フェーズ（Week 6-12）：
-  - 150問本生成
-  - 複合品質検証
-  - データベース構築
-  - Phase 3最終統合
-
-🚀 準備完了：150問生成可能な環境を整備完了！
-""")
-
-print("=" * 80)
+if __name__ == "__main__":
+    sys.exit(run_integration("week5"))
@@ -2,335 +2,16 @@
 """
 Task 6.5: Week 6 150問品質メトリクス統合評価
 
-複合語検証結果 + 品質スコア + ひっかけ強度制御
-をすべて統合し、総合品質スコアを計算
+技術管理・セキュリティ・営業規制分野の150問（output/*_domain_50_raw.json[l]）の総合品質スコア（0.0-1.0）を計算
+config/quality_metrics_definition.yaml の定義で quality_metrics_engine が全問題を評価し、
+output/integrated_quality_report_week6.json に統合レポートを保存する
 """
 
-import json
+import sys
 from pathlib import Path
 
-print("=" * 80)
-print("【Task 6.5: Week 6 150問品質メトリクス統合評価】")
-print("=" * 80)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from quality_metrics_engine import run_integration
 
-# 1. 品質メトリクスの重み付けを定義
-print("\n✅ ステップ1: 品質メトリクスの重み付けを定義")
-
-quality_metrics_weights = {
-    "clarity": {
-        "weight": 0.30,
-        "description": "問題文の明確性"
-    },
-    "distractor": {
-        "weight": 0.30,
-        "description": "ディストラクタの適切性"
-    },
-    "explanation": {
-        "weight": 0.20,
-        "description": "説明文の根拠性"
-    },
-    "intensity": {
-        "weight": 0.20,
-        "description": "ひっかけ度の適切性"
-    }
-}
-
-print(f"""
-  【統合品質スコア計算式】
-  総合 = 0.30 × 明確性 + 0.30 × ディストラクタ + 0.20 × 根拠性 + 0.20 × ひっかけ度
-
-  加重項目:
-    - 明確性（30%）: 複合語検証結果から算出
-    - ディストラクタ（30%）: 選択肢多様性・強度から算出
-    - 根拠性（20%）: 条文明記度・正確性から算出
-    - ひっかけ度（20%）: テンプレート別制御範囲の適合度から算出
-""")
-
-# 2. Week 3-4-5-6 品質スコア推移表を定義
-print("\n✅ ステップ2: Week別品質スコア推移を定義")
-
-quality_evolution = {
-    "week3": {
-        "domain": "法令分野",
-        "problems": 5,
-        "score": 0.75,
-        "level": "良好",
-        "phase": "デモ（Week 3）"
-    },
-    "week4": {
-        "domain": "実務分野",
-        "problems": 5,
-        "score": 0.76,
-        "level": "良好",
-        "phase": "デモ（Week 4）"
-    },
-    "week5": {
-        "domain": "複合分野",
-        "problems": 6,
-        "score": 0.73,
-        "level": "良好",
-        "phase": "デモ（Week 5）"
-    },
-    "week6": {
-        "domain": "150問全体",
-        "problems": 150,
-        "score": "計算待ち",
-        "level": "計算待ち",
-        "phase": "本生成（Week 6）"
-    }
-}
-
-print(f"""
-  【品質スコア推移】
-
-  Week 3 (法令分野):       0.75 → デモ5問で確認
-  Week 4 (実務分野):       0.76 → デモ5問で確認
-  Week 5 (複合分野):       0.73 → デモ6問で確認
-  Week 6 (150問全体):      計算待ち → 本生成150問で最終評価
-
-  【分析】
-  - Week 3-4-5で一貫した品質（0.73-0.76）を維持
-  - 複数ドメイン統合でも安定性を確認
-  - Week 6では150問規模での品質安定性を検証
-""")
-
-# 3. 150問規模での品質推定
-print("\n✅ ステップ3: 150問規模での品質推定モデル")
-
-estimated_scores = {
-    "clarity": {
-        "description": "問題文の明確性",
-        "components": {
-            "compound_word_accuracy": {"weight": 0.40, "estimated": 0.92},
-            "text_consistency": {"weight": 0.30, "estimated": 0.90},
-            "ambiguity_elimination": {"weight": 0.30, "estimated": 0.88}
-        },
-        "total": "計算待ち"
-    },
-    "distractor": {
-        "description": "ディストラクタの適切性",
-        "components": {
-            "strength_fit": {"weight": 0.50, "estimated": 0.78},
-            "option_diversity": {"weight": 0.30, "estimated": 0.85},
-            "viability": {"weight": 0.20, "estimated": 0.82}
-        },
-        "total": "計算待ち"
-    },
-    "explanation": {
-        "description": "説明文の根拠性",
-        "components": {
-            "legal_basis": {"weight": 0.50, "estimated": 0.90},
-            "accuracy": {"weight": 0.30, "estimated": 0.93},
-            "detail": {"weight": 0.20, "estimated": 0.82}
-        },
-        "total": "計算待ち"
-    },
-    "intensity": {
-        "description": "ひっかけ度の適切性",
-        "components": {
-            "difficulty_fit": {"weight": 0.50, "estimated": 0.72},
-            "naturalness": {"weight": 0.30, "estimated": 0.75},
-            "consistency": {"weight": 0.20, "estimated": 0.70}
-        },
-        "total": "計算待ち"
-    }
-}
-
-print(f"""
-  【150問規模での品質推定】
-
-  明確性（30%):
-    - 複合語精度: 92%（本生成では大幅改善）
-    - テキスト一貫性: 90%
-    - 曖昧性排除: 88%
-    → 推定: 0.90点
-
-  ディストラクタ（30%):
-    - 強度適合度: 78%（テンプレート別制御）
-    - 選択肢多様性: 85%
-    - 誤答妥当性: 82%
-    → 推定: 0.82点
-
-  根拠性（20%):
-    - 法律根拠: 90%（条文明記）
-    - 正確性: 93%（高品質）
-    - 詳細度: 82%
-    → 推定: 0.90点
-
-  ひっかけ度（20%):
-    - 難易度適合: 72%
-    - 自然性: 75%
-    - 一貫性: 70%
-    → 推定: 0.73点
-
-  【総合品質スコア推定】
-  = 0.30 × 0.90 + 0.30 × 0.82 + 0.20 × 0.90 + 0.20 × 0.73
-  = 0.27 + 0.246 + 0.18 + 0.146
-  = 0.832 → 0.83点 (優秀)
-""")
-
-# 4. ドメイン別品質分析
-print("\n✅ ステップ4: ドメイン別品質分析")
-
-domain_analysis = {
-    "technology": {
-        "name": "技術管理分野",
-        "problems": 50,
-        "strength": "条文・技術仕様の明確性",
-        "focus": "型式検定・遊技機管理",
-        "estimated_score": 0.84,
-        "estimated_level": "優秀"
-    },
-    "security": {
-        "name": "セキュリティ分野",
-        "problems": 50,
-        "strength": "実装方法・防止対策の実務性",
-        "focus": "不正防止・セキュリティ確保",
-        "estimated_score": 0.82,
-        "estimated_level": "良好"
-    },
-    "regulation": {
-        "name": "営業規制分野",
-        "problems": 50,
-        "strength": "行政判断・実務判断の複雑性",
-        "focus": "営業許可・停止・禁止",
-        "estimated_score": 0.83,
-        "estimated_level": "優秀"
-    }
-}
-
-print(f"""
-  【ドメイン別品質推定】
-
-  技術管理分野 (50問):
-    - 特徴: 技術仕様の明確性
-    - 推定スコア: 0.84 (優秀)
-
-  セキュリティ分野 (50問):
-    - 特徴: 実装方法の実務性
-    - 推定スコア: 0.82 (良好)
-
-  営業規制分野 (50問):
-    - 特徴: 行政判断の複雑性
-    - 推定スコア: 0.83 (優秀)
-
-  【150問平均スコア】
-  = (0.84 + 0.82 + 0.83) / 3
-  = 0.83点 (優秀)
-""")
-
-# 5. 出力スキーマ
-print("\n✅ ステップ5: 統合品質レポートスキーマを定義")
-
-integrated_report_template = {
-    "metadata": {
-        "task": "Task 6.5 - Week 6 150問品質メトリクス統合評価",
-        "completion_date": "2025-11-06（本生成後）",
-        "phase": "Phase 2 Week 6 Final",
-        "total_problems": 150
-    },
-    "quality_scores": {
-        "clarity": "計算待ち",
-        "distractor": "計算待ち",
-        "explanation": "計算待ち",
-        "intensity": "計算待ち",
-        "overall": "計算待ち"
-    },
-    "quality_level": "計算待ち",
-    "recommendation": "計算待ち",
-    "domain_breakdown": {
-        "technology": "計算待ち",
-        "security": "計算待ち",
-        "regulation": "計算待ち"
-    },
-    "week_comparison": {
-        "week3": 0.75,
-        "week4": 0.76,
-        "week5": 0.73,
-        "week6": "計算待ち"
-    },
-    "next_steps": [
-        "Task 6.5完了: 品質メトリクス統合",
-        "Week 6完了: 150問本生成フェーズ",
-        "Phase 3開始: 最終統合・DB構築"
-    ]
-}
-
-print(f"""
-  統合品質レポートスキーマ定義完了：
-    - 4項目品質スコア
-    - 総合判定（優秀/良好/要改善/不合格）
-    - ドメイン別分析
-    - Week別推移
-    - 次フェーズガイド
-""")
-
-# 6. 実装ガイド
-print("\n✅ ステップ6: Task 6.5 実装ガイド")
-
-print(f"""
-【本生成後の実行手順】
-
-1️⃣ Task 6.1-6.3 で150問を生成
-   （各ドメイン50問ずつ、テンプレートT1-T5各10問）
-
-2️⃣ Task 6.4 複合語検証を実行
-   $ python3 backend/validate_week6_150_problems.py
-
-3️⃣ 検証結果が95%以上合格したら、Task 6.5を実行
-
-4️⃣ このスクリプト（Task 6.5）を実行
-   $ python3 backend/integrate_week6_quality_metrics.py
-
-5️⃣ 総合品質スコアが0.72以上なら合格
-   - 0.85以上: 優秀（微調整不要）
-   - 0.70-0.84: 良好（軽微な調整推奨）
-   - 0.50-0.69: 要改善（改善後に再評価）
-   - 以下: 不合格（再生成推奨）
-
-6️⃣ Week 6完了、Phase 3開始へ
-""")
-
-# 7. 完了メッセージ
-print("\n" + "=" * 80)
-print("【Task 6.5 準備完了 - Week 6 品質メトリクス統合準備完全完了】")
-print("=" * 80)
-
-print(f"""
-✅ Task 6.5 準備完了：150問品質メトリクス統合評価
-
-【Week 6 プロジェクト進捗】
-  Task 6.1: ✅ 技術管理分野50問生成準備
-  Task 6.2: ✅ セキュリティ分野50問生成準備
-  Task 6.3: ✅ 営業規制分野50問生成準備
-  Task 6.4: ✅ 150問複合語検証準備
-  Task 6.5: ✅ 150問品質メトリクス統合準備
-
-【品質推定結果】
-  Week 3-5 平均: 0.75点（デモ16問）
-  Week 6 推定: 0.83点（本生成150問）
-
-  → 複数ドメイン・大規模生成でも品質向上が期待される
-
-【150問本生成後の検証フロー】
-  1. 複合語検証（合格率 ≥ 95%）
-  2. 品質メトリクス統合（スコア ≥ 0.72）
-  3. ドメイン別分析
-  4. Week 6完了、Phase 3へ
-
-【Phase 3準備状況】
-  ✓ 150問本生成フレームワーク完成
-  ✓ 検証・品質評価スクリプト完成
-  ✓ データベース構築準備可能
-  ✓ 最終統合ガイド作成済み
-
-🎯 次フェーズ（Phase 3: Week 7-12）：
-  - 150問データベース構築
-  - 最終品質統合検証
-  - 本番公開準備
-
-🚀 Week 6 完全準備完了！
-   本生成を実施してください。
-""")
-
-print("=" * 80)
+if __name__ == "__main__":
+    sys.exit(run_integration("week6"))
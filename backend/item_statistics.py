@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+問題別の項目統計（バッチ集計）
+test_answers 全体から問題ごとに
+- 正答率
+- 識別力（上位27%・下位27%の受験回の正答率の差、受験回の得点 = 正答数 / 出題数）
+- 回答時間のパーセンタイル（p50・p90）
+を一括集計し、item_statistics テーブルに保存する。
+回答数が MIN_RESPONSES 以上の問題には正答率から測定難易度（★〜★★★）を付け、
+API の難易度フィルタは手動設定の難易度の代わりにこれを使う
+
+NumPy があれば問題IDの一意化と bincount・ソートによるグループ集計で計算し、なければ純Pythonで同じ値を計算する
+
+実行: python3 backend/item_statistics.py [DBパス]
+"""
+
+import math
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from database_schema import DatabaseManager
+
+PERCENTILES = (50, 90)
+DISCRIMINATION_GROUP = 0.27
+MIN_RESPONSES = 30
+
+# 正答率の下限 → 測定難易度（上から順に判定）
+MEASURED_DIFFICULTY = [
+    (0.80, '★'),
+    (0.60, '★★'),
+    (0.0, '★★★')
+]
+
+
+def measured_difficulty(correct_rate: float, responses: int) -> Optional[str]:
+    """正答率から測定難易度を判定（回答数が足りなければ None）"""
+    if responses < MIN_RESPONSES:
+        return None
+    for lower, difficulty in MEASURED_DIFFICULTY:
+        if correct_rate >= lower:
+            return difficulty
+    return MEASURED_DIFFICULTY[-1][1]
+
+
+def load_answers(db: DatabaseManager) -> Dict[str, List]:
+    """回答を列ごとのリストで読み込む（問題ID・正誤・回答時間・受験回ID・受験回の得点）"""
+    with db.pool.connection() as conn:
+        rows = conn.execute("""
+            SELECT a.question_id, a.is_correct, a.response_time_seconds, a.test_result_id,
+                   r.correct_count * 1.0 / r.total_questions
+            FROM test_answers a JOIN test_results r ON r.id = a.test_result_id
+            WHERE a.question_id IS NOT NULL AND r.total_questions > 0
+        """).fetchall()
+
+    columns = list(zip(*rows)) if rows else [(), (), (), (), ()]
+    return {
+        'question_ids': list(columns[0]),
+        'is_correct': [bool(value) for value in columns[1]],
+        'response_times': [math.nan if value is None else float(value) for value in columns[2]],
+        'attempt_ids': list(columns[3]),
+        'attempt_scores': list(columns[4])
+    }
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    """線形補間の分位点（numpy.quantile の既定と同じ）"""
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def compute_item_statistics(question_ids, is_correct, response_times, attempt_ids,
+                            attempt_scores) -> List[Dict]:
+    """
+    問題ごとの項目統計を計算
+
+    Returns:
+        [{'question_id', 'responses', 'correct_rate', 'discrimination', 'time_p50', 'time_p90',
+          'measured_difficulty'}, ...]（問題ID順）
+    """
+    if not question_ids:
+        return []
+    if np is not None:
+        columns = _compute_numpy(question_ids, is_correct, response_times, attempt_ids, attempt_scores)
+    else:
+        columns = _compute_python(question_ids, is_correct, response_times, attempt_ids, attempt_scores)
+
+    def clean(value):
+        return None if value is None or math.isnan(value) else round(float(value), 4)
+
+    items = []
+    for question_id, responses, correct_rate, discrimination, *times in zip(*columns):
+        item = {
+            'question_id': int(question_id),
+            'responses': int(responses),
+            'correct_rate': round(float(correct_rate), 4),
+            'discrimination': clean(discrimination),
+            'measured_difficulty': measured_difficulty(correct_rate, responses)
+        }
+        for percentile, value in zip(PERCENTILES, times):
+            item[f'time_p{percentile}'] = clean(value)
+        items.append(item)
+    return items
+
+
+def _compute_numpy(question_ids, is_correct, response_times, attempt_ids, attempt_scores):
+    questions, inverse = np.unique(np.asarray(question_ids), return_inverse=True)
+    is_correct = np.asarray(is_correct, dtype=bool)
+    scores = np.asarray(attempt_scores, dtype=float)
+    groups = len(questions)
+
+    responses = np.bincount(inverse, minlength=groups)
+    correct_rate = np.bincount(inverse, weights=is_correct, minlength=groups) / responses
+
+    # 識別力: 受験回単位の得点分布で上位・下位27%の境界を決める
+    _, first = np.unique(np.asarray(attempt_ids), return_index=True)
+    attempt_level = scores[first]
+    lower_cut = np.quantile(attempt_level, DISCRIMINATION_GROUP)
+    upper_cut = np.quantile(attempt_level, 1 - DISCRIMINATION_GROUP)
+
+    def group_rate(mask):
+        count = np.bincount(inverse, weights=mask, minlength=groups)
+        correct = np.bincount(inverse, weights=mask & is_correct, minlength=groups)
+        return np.where(count > 0, correct / np.maximum(count, 1), np.nan)
+
+    discrimination = group_rate(scores >= upper_cut) - group_rate(scores <= lower_cut)
+
+    # 回答時間のパーセンタイル: (問題, 回答時間) でソートし、各グループの先頭位置から分位点を引く
+    times = np.asarray(response_times, dtype=float)
+    valid = ~np.isnan(times)
+    time_groups = inverse[valid]
+    times = times[valid]
+    order = np.lexsort((times, time_groups))
+    sorted_times = times[order]
+    counts = np.bincount(time_groups, minlength=groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    percentile_columns = []
+    for percentile in PERCENTILES:
+        position = np.maximum(counts - 1, 0) * (percentile / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        if len(sorted_times):
+            low_values = sorted_times[np.minimum(starts + lower, len(sorted_times) - 1)]
+            high_values = sorted_times[np.minimum(starts + upper, len(sorted_times) - 1)]
+            values = low_values + (high_values - low_values) * (position - lower)
+        else:
+            values = np.zeros(groups)
+        percentile_columns.append(np.where(counts > 0, values, np.nan))
+
+    return [questions.tolist(), responses.tolist(), correct_rate.tolist(), discrimination.tolist(),
+            *(column.tolist() for column in percentile_columns)]
+
+
+def _compute_python(question_ids, is_correct, response_times, attempt_ids, attempt_scores):
+    attempt_level = sorted({attempt_id: score for attempt_id, score
+                            in zip(attempt_ids, attempt_scores)}.values())
+    lower_cut = _quantile(attempt_level, DISCRIMINATION_GROUP)
+    upper_cut = _quantile(attempt_level, 1 - DISCRIMINATION_GROUP)
+
+    # 問題ID → [回答数, 正答数, 上位回答数, 上位正答数, 下位回答数, 下位正答数, 回答時間]
+    groups = {}
+    for question_id, correct, seconds, score in zip(question_ids, is_correct, response_times, attempt_scores):
+        group = groups.setdefault(question_id, [0, 0, 0, 0, 0, 0, []])
+        group[0] += 1
+        group[1] += correct
+        if score >= upper_cut:
+            group[2] += 1
+            group[3] += correct
+        if score <= lower_cut:
+            group[4] += 1
+            group[5] += correct
+        if not math.isnan(seconds):
+            group[6].append(seconds)
+
+    columns = [[] for _ in range(4 + len(PERCENTILES))]
+    for question_id in sorted(groups):
+        responses, correct, upper, upper_correct, lower, lower_correct, times = groups[question_id]
+        discrimination = (upper_correct / upper - lower_correct / lower) if upper and lower else math.nan
+        times.sort()
+        row = [question_id, responses, correct / responses, discrimination]
+        row += [_quantile(times, percentile / 100) if times else math.nan for percentile in PERCENTILES]
+        for column, value in zip(columns, row):
+            column.append(value)
+    return columns
+
+
+def run_item_statistics(db: DatabaseManager) -> List[Dict]:
+    """test_answers から項目統計を集計して item_statistics に保存"""
+    answers = load_answers(db)
+    items = compute_item_statistics(**answers)
+    db.replace_item_statistics(items)
+    return items
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else None
+    db = DatabaseManager(db_path) if db_path else DatabaseManager()
+
+    items = run_item_statistics(db)
+    measured = [item for item in items if item['measured_difficulty']]
+
+    print("=" * 60)
+    print("【問題別 項目統計】")
+    print("=" * 60)
+    print(f"  集計対象: {len(items)}問（測定難易度あり: {len(measured)}問、回答数 {MIN_RESPONSES} 以上）")
+    for _, difficulty in MEASURED_DIFFICULTY:
+        print(f"  {difficulty:4} {sum(1 for item in measured if item['measured_difficulty'] == difficulty):5}問")
+
+    low_discrimination = [item for item in measured
+                          if item['discrimination'] is not None and item['discrimination'] < 0.2]
+    if low_discrimination:
+        print(f"\n⚠️  識別力 0.2 未満: {len(low_discrimination)}問")
+        for item in low_discrimination[:10]:
+            print(f"  - 問題 {item['question_id']}: 正答率 {item['correct_rate']:.2f} 識別力 {item['discrimination']:.2f}")
+
+    print(f"\n✅ item_statistics に {len(items)}問の統計を保存しました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@
 マルチエージェント検証システム用の法的参照データ
 """
 
+import re
+
 # ===== 景品規制 =====
 PRIZE_REGULATIONS = {
     "max_amount": 10000,  # 景品の最高額: 10,000円
@@ -80,6 +82,139 @@ PENALTIES = {
     "operation_suspension": "営業停止命令（第11条）"
 }
 
+# ===== 検証ルール（宣言的定義） =====
+# topics: 全て問題文に含まれるときにルールを適用する語
+# check:
+#   "amount"       … pattern で最初に抽出した数値が expected と異なれば誤り、一致すれば確定
+#   "period"       … wrong_values の「N年」が含まれれば（先頭の1つを）誤り、「{expected}年」が含まれれば確定
+#   None（省略）   … topics が揃った時点で誤り
+# field: 問題の detected_<field> / correct_<field> に入れる項目名
+LEGAL_RULES = [
+    {
+        "type": "prize_amount_error",
+        "topics": ["景品", "円"],
+        "check": "amount",
+        "pattern": r'(\d+)円',
+        "field": "amount",
+        "expected": PRIZE_REGULATIONS["max_amount"],
+        "message": "景品の最高額は{expected}円です（{detected}円は不正確）"
+    },
+    {
+        "type": "permit_period_error",
+        "topics": ["営業許可", "有効期限"],
+        "check": "period",
+        "wrong_values": [3, 10],
+        "field": "period",
+        "expected": BUSINESS_PERMIT["valid_period"],
+        "message": "営業許可の有効期限は{expected}年です（{detected}年は不正確）"
+    },
+    {
+        "type": "inspection_period_error",
+        "topics": ["型式検定", "更新"],
+        "check": "period",
+        "wrong_values": [3],
+        "field": "period",
+        "expected": GAME_MACHINE_INSPECTION["valid_period"],
+        "message": "型式検定の有効期限は{expected}年です（{detected}年は不正確）"
+    },
+    {
+        "type": "terminology_error",
+        "topics": ["景品の支給"],
+        "extra": {"detected_term": "景品の支給", "correct_term": "景品交換または景品授与"},
+        "message": "「景品の支給」という用語は不適切です。「景品交換」または「景品授与」を使用してください。"
+    },
+    {
+        "type": "absolute_expression_error",
+        "topics": ["必ず取り消される"],
+        "message": "「必ず取り消される」は不正確です。違反があっても審査があり、条件によって取り消されることがあります。"
+    },
+    {
+        "type": "absolute_expression_error",
+        "topics": ["絶対に変わらない"],
+        "message": "申請に必要な書類は状況によって変わる可能性があります。"
+    },
+    {
+        "type": "absolute_expression_error",
+        "topics": ["延期できない"],
+        "message": "型式検定更新は一度も延期できないわけではありません（特定の条件下では延期可能な場合がある）。"
+    },
+    {
+        "type": "qualification_error",
+        "topics": ["誰でも自由に", "営業許可申請"],
+        "message": "営業許可申請は誰でもできるわけではありません。特定の資格要件や身分要件を満たす必要があります。"
+    },
+]
+
+
+class LegalRuleEngine:
+    """
+    LEGAL_RULES を1回だけコンパイルした検証器
+
+    ルールの番号と topics の組を1回だけ作っておき、問題文ごとに topics が全て含まれるルールを選んでから、
+    該当ルールの数値判定だけを行う
+    """
+
+    def __init__(self, rules=LEGAL_RULES):
+        self.rules = []
+        for rule in rules:
+            compiled = dict(rule)
+            if rule.get("pattern"):
+                compiled["pattern"] = re.compile(rule["pattern"])
+            if rule.get("check") == "period":
+                compiled["wrong_literals"] = [(value, f"{value}年") for value in rule["wrong_values"]]
+                compiled["expected_literal"] = f"{rule['expected']}年"
+            self.rules.append(compiled)
+        self.triggers = [(index, tuple(rule["topics"])) for index, rule in enumerate(self.rules)]
+
+    def match(self, text):
+        """問題文に topics が全て含まれるルールの番号のリスト"""
+        return [index for index, topics in self.triggers if all(topic in text for topic in topics)]
+
+    def _issue(self, rule, detected=None):
+        issue = {"type": rule["type"]}
+        if rule.get("field"):
+            issue[f"detected_{rule['field']}"] = detected
+            issue[f"correct_{rule['field']}"] = rule["expected"]
+        issue.update(rule.get("extra", {}))
+        issue["message"] = rule["message"].format(expected=rule.get("expected"), detected=detected)
+        return issue
+
+    def evaluate(self, problem_text):
+        """
+        Returns:
+            (issues, confirmed_rule_count)
+            confirmed_rule_count: 数値が知識ベースの値と一致して正しいと確定したルールの数
+        """
+        issues = []
+        confirmed = 0
+
+        for index in self.match(problem_text):
+            rule = self.rules[index]
+            check = rule.get("check")
+            if check == "amount":
+                match = rule["pattern"].search(problem_text)
+                if not match:
+                    continue
+                detected = int(match.group(1))
+                if detected != rule["expected"]:
+                    issues.append(self._issue(rule, detected))
+                else:
+                    confirmed += 1
+            elif check == "period":
+                wrong = next((value for value, literal in rule["wrong_literals"] if literal in problem_text), None)
+                if wrong is not None:
+                    issues.append(self._issue(rule, wrong))
+                elif rule["expected_literal"] in problem_text:
+                    confirmed += 1
+            else:
+                issues.append(self._issue(rule))
+
+        return issues, confirmed
+
+
+RULE_ENGINE = LegalRuleEngine()
+
+
 def validate_problem(problem_text: str, claimed_facts: dict) -> dict:
     """
     問題の法令正確性を検証
@@ -93,95 +228,26 @@ def validate_problem(problem_text: str, claimed_facts: dict) -> dict:
             'is_correct': bool,
             'issues': [list of issues],
             'articles': [relevant articles],
-            'recommended_fix': str
+            'issue_count': int,
+            'decided': bool  # ルールだけで判定できたか（誤りを検出、または数値が一致して確定）
         }
     """
 
-    issues = []
-
-    # チェック1: 景品金額
-    if "景品" in problem_text and "円" in problem_text:
-        import re
-        match = re.search(r'(\d+)円', problem_text)
-        if match:
-            amount = int(match.group(1))
-            if amount != PRIZE_REGULATIONS["max_amount"]:
-                issues.append({
-                    "type": "prize_amount_error",
-                    "detected_amount": amount,
-                    "correct_amount": PRIZE_REGULATIONS["max_amount"],
-                    "message": f"景品の最高額は{PRIZE_REGULATIONS['max_amount']}円です（{amount}円は不正確）"
-                })
-
-    # チェック2: 営業許可有効期限
-    if "営業許可" in problem_text and "有効期限" in problem_text:
-        if "3年" in problem_text:
-            issues.append({
-                "type": "permit_period_error",
-                "detected_period": 3,
-                "correct_period": BUSINESS_PERMIT["valid_period"],
-                "message": f"営業許可の有効期限は{BUSINESS_PERMIT['valid_period']}年です（3年は不正確）"
-            })
-        elif "10年" in problem_text:
-            issues.append({
-                "type": "permit_period_error",
-                "detected_period": 10,
-                "correct_period": BUSINESS_PERMIT["valid_period"],
-                "message": f"営業許可の有効期限は{BUSINESS_PERMIT['valid_period']}年です（10年は不正確）"
-            })
-
-    # チェック3: 遊技機検定更新期間
-    if "型式検定" in problem_text and "更新" in problem_text:
-        if "3年" in problem_text:
-            issues.append({
-                "type": "inspection_period_error",
-                "detected_period": 3,
-                "correct_period": GAME_MACHINE_INSPECTION["valid_period"],
-                "message": f"型式検定の有効期限は{GAME_MACHINE_INSPECTION['valid_period']}年です（3年は不正確）"
-            })
-
-    # チェック4: 用語の正確性
-    if "景品の支給" in problem_text:
-        issues.append({
-            "type": "terminology_error",
-            "detected_term": "景品の支給",
-            "correct_term": "景品交換または景品授与",
-            "message": "「景品の支給」という用語は不適切です。「景品交換」または「景品授与」を使用してください。"
-        })
-
-    # チェック5: 絶対的な表現の確認
-    if "必ず取り消される" in problem_text:
-        issues.append({
-            "type": "absolute_expression_error",
-            "message": "「必ず取り消される」は不正確です。違反があっても審査があり、条件によって取り消されることがあります。"
-        })
-
-    if "絶対に変わらない" in problem_text:
-        issues.append({
-            "type": "absolute_expression_error",
-            "message": "申請に必要な書類は状況によって変わる可能性があります。"
-        })
-
-    if "延期できない" in problem_text:
-        issues.append({
-            "type": "absolute_expression_error",
-            "message": "型式検定更新は一度も延期できないわけではありません（特定の条件下では延期可能な場合がある）。"
-        })
-
-    # チェック6: アクセス権限関連
-    if "誰でも自由に" in problem_text and "営業許可申請" in problem_text:
-        issues.append({
-            "type": "qualification_error",
-            "message": "営業許可申請は誰でもできるわけではありません。特定の資格要件や身分要件を満たす必要があります。"
-        })
+    issues, confirmed = RULE_ENGINE.evaluate(problem_text)
 
     return {
         "is_correct": len(issues) == 0,
         "issues": issues,
         "articles": BUSINESS_PERMIT["valid_period_articles"],
-        "issue_count": len(issues)
+        "issue_count": len(issues),
+        "decided": bool(issues) or confirmed > 0
     }
 
+
+def validate_problems(problem_texts) -> list:
+    """複数の問題文をまとめて検証（validate_problem と同じ結果のリスト）"""
+    return [validate_problem(text, {}) for text in problem_texts]
+
 # テスト用
 if __name__ == "__main__":
     test_problems = [
@@ -7,10 +7,14 @@ Task 3.1: 法令分野データ準備スクリプト
 """
 
 import json
-import os
+import sys
 from pathlib import Path
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from domain_chunker import CHUNKING_STRATEGY
+from batch_job_runner import estimate_tokens
+
 print("=" * 80)
 print("【Task 3.1: 法令分野データ準備】")
 print("=" * 80)
@@ -52,11 +56,7 @@ else:
 print("\n✅ ステップ3: チャンキング戦略を定義")
 
 chunking_strategy = {
-    "method": "logical_units",
-    "target_tokens": 500,
-    "delimiter": ["。\n", "。", "\n\n"],
-    "min_chunk_size": 50,
-    "max_chunk_size": 1000,
+    **CHUNKING_STRATEGY,
     "categories": {
         "permitting_system": "営業許可制度",
         "business_hours": "営業時間",
@@ -195,6 +195,10 @@ sample_chunks = [
     }
 ]
 
+# トークン数は共通の推定式で算出
+for chunk in sample_chunks:
+    chunk["token_count"] = estimate_tokens(chunk["text"])
+
 print(f"  生成されたサンプルチャンク: {len(sample_chunks)}個")
 for chunk in sample_chunks[:3]:
     print(f"\n  チャンク: {chunk['chunk_id']}")
@@ -6,10 +6,11 @@ Task 5.3: 営業規制分野データ準備スクリプト
 問題生成用のコンテキストを準備する
 """
 
-import json
-import os
+import sys
 from pathlib import Path
-from collections import defaultdict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from domain_chunker import CHUNKING_STRATEGY, DOMAINS, write_domain_chunks
 
 print("=" * 80)
 print("【Task 5.3: 営業規制分野データ準備】")
@@ -30,24 +31,7 @@ else:
 print("\n✅ ステップ2: 営業規制分野テーマを分類")
 
 # 営業規制分野に該当するテーマを定義（営業許可・営業停止・営業禁止関連）
-regulation_themes = {
-    "business_suspension": [
-        "theme_013_営業停止命令.txt",
-        "theme_014_営業停止命令の内容.txt",
-        "theme_015_営業停止期間の計算.txt",
-    ],
-    "business_prohibition": [
-        "theme_016_営業禁止時間.txt",
-    ],
-    "business_approval": [
-        "theme_017_営業許可と営業実績の関係.txt",
-        "theme_018_営業許可と型式検定の違い.txt",
-        "theme_019_営業許可の取消し要件.txt",
-        "theme_020_営業許可の失効事由.txt",
-        "theme_021_営業許可の行政手続き.txt",
-        "theme_022_営業許可は無期限有効.txt",
-    ]
-}
+regulation_themes = DOMAINS["regulation"]["themes"]
 
 reg_theme_count = sum(len(v) for v in regulation_themes.values())
 print(f"""
@@ -61,72 +45,38 @@ print(f"""
 # 3. チャンキング戦略の定義
 print("\n✅ ステップ3: チャンキング戦略を定義")
 
-chunking_strategy = {
-    "method": "logical_units",
-    "target_tokens": 500,
-    "delimiter": ["。\n", "。", "\n\n"],
-    "min_chunk_size": 50,
-    "max_chunk_size": 1000,
-    "categories": list(regulation_themes.keys())
-}
+chunking_strategy = {**CHUNKING_STRATEGY, "categories": list(regulation_themes.keys())}
 
 print(f"""
   チャンキング方式: {chunking_strategy['method']}
   目標トークン数: {chunking_strategy['target_tokens']}
   最小/最大: {chunking_strategy['min_chunk_size']}/{chunking_strategy['max_chunk_size']}
+  オーバーラップ: {chunking_strategy['overlap_tokens']}トークン（文境界で分割、重複ページは1回のみ）
 """)
 
 # 4. テーマデータを読み込む
-print("\n✅ ステップ4: 営業規制分野テーマデータを読み込む")
+print("\n✅ ステップ4: 営業規制分野テーマデータを読み込み、チャンク化（JSONLへストリーム出力）")
 
-regulation_chunks = []
-category_stats = defaultdict(lambda: {"count": 0, "tokens": 0})
+result = write_domain_chunks("regulation", lecture_dir)
+regulation_chunks = result["sample_chunks"]
+category_stats = result["categories"]
 
 for category, theme_files in regulation_themes.items():
     print(f"\n  【{category}】")
 
     for theme_file in theme_files:
-        theme_path = lecture_dir / theme_file
-
-        if not theme_path.exists():
+        theme_stats = result["themes"][theme_file]
+        if theme_stats.get("missing"):
             print(f"    ⚠️  {theme_file} が見つかりません")
             continue
 
-        # ファイル読み込み
-        try:
-            with open(theme_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-
-            if not content:
-                print(f"    ⚠️  {theme_file} が空です")
-                continue
-
-            # 簡易的なトークン数推定
-            token_count = len(content) // 3
-
-            # チャンク作成
-            chunk = {
-                "chunk_id": f"regulation_{category}_{len(regulation_chunks):03d}",
-                "category": category,
-                "source_file": theme_file,
-                "content": content,
-                "token_count": token_count,
-                "source": "lecture_materials"
-            }
-
-            regulation_chunks.append(chunk)
-            category_stats[category]["count"] += 1
-            category_stats[category]["tokens"] += token_count
-
-            print(f"    ✓ {theme_file:45} ({token_count:5}トークン)")
-
-        except Exception as e:
-            print(f"    ✗ エラー: {theme_file} - {e}")
+        print(f"    ✓ {theme_file:45} ({theme_stats['chunks']:3}チャンク, {theme_stats['tokens']:6}トークン, "
+              f"重複ページ除外 {theme_stats['duplicate_pages']})")
 
 # 5. 統計情報
 print("\n✅ ステップ5: 統計集計")
 
-total_chunks = len(regulation_chunks)
+total_chunks = result["total_chunks"]
 total_tokens = sum(s["tokens"] for s in category_stats.values())
 
 print(f"""
@@ -144,20 +94,6 @@ for category, stats in category_stats.items():
 # 6. 出力スキーマの定義
 print("\n✅ ステップ6: 出力スキーマを定義")
 
-output_schema = {
-    "metadata": {
-        "task": "Task 5.3 - 営業規制分野データ準備",
-        "domain": "regulation",
-        "total_chunks": total_chunks,
-        "total_tokens": total_tokens,
-        "chunking_method": "logical_units",
-        "source": "lecture_materials"
-    },
-    "chunking_strategy": chunking_strategy,
-    "category_distribution": dict(category_stats),
-    "sample_chunks": regulation_chunks[:3]
-}
-
 print(f"""
   出力形式: JSONL (1行1チャンク) + メタデータJSON
 
@@ -168,6 +104,7 @@ print(f"""
     "source_file": "theme_XXX_...txt",
     "content": "...",
     "token_count": 500,
+    "pages": [26, 27],
     "source": "lecture_materials"
   }}
 """)
@@ -175,21 +112,13 @@ print(f"""
 # 7. 営業規制分野チャンクを保存
 print("\n✅ ステップ7: チャンクデータを保存")
 
-output_dir = Path("data")
-output_dir.mkdir(exist_ok=True)
-
-# JSONL形式で保存
-jsonl_path = output_dir / "regulation_domain_chunks_prepared.jsonl"
-with open(jsonl_path, 'w', encoding='utf-8') as f:
-    for chunk in regulation_chunks:
-        f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+# JSONL（1行1チャンク）はステップ4でストリーム出力済み
+jsonl_path = Path(result["jsonl_path"])
 
 print(f"  ✓ JSONL保存: {jsonl_path} ({total_chunks}行)")
 
-# メタデータJSONを保存
-metadata_path = output_dir / "regulation_domain_chunks_metadata.json"
-with open(metadata_path, 'w', encoding='utf-8') as f:
-    json.dump(output_schema, f, indent=2, ensure_ascii=False)
+# メタデータJSON
+metadata_path = Path(result["metadata_path"])
 
 print(f"  ✓ メタデータ保存: {metadata_path}")
 
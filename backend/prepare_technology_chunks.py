@@ -6,10 +6,11 @@ Task 5.1: 技術管理分野データ準備スクリプト
 問題生成用のコンテキストを準備する
 """
 
-import json
-import os
+import sys
 from pathlib import Path
-from collections import defaultdict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from domain_chunker import CHUNKING_STRATEGY, DOMAINS, write_domain_chunks
 
 print("=" * 80)
 print("【Task 5.1: 技術管理分野データ準備】")
@@ -31,20 +32,7 @@ print("\n✅ ステップ2: 技術管理分野テーマを分類")
 
 # 技術管理分野に該当するテーマを定義（実在するテーマのみ）
 # Week 4で未使用の型式検定関連 + 遊技機管理テーマ
-technology_themes = {
-    "type_certification": [
-        "theme_025_型式検定の申請方法.txt",
-        "theme_026_型式検定更新申請のタイミング.txt",
-    ],
-    "gaming_machine_management": [
-        "theme_027_基板ケースのかしめと管理.txt",
-        "theme_028_外部端子板の管理.txt",
-        "theme_029_故障遊技機の対応.txt",
-        "theme_031_旧機械の回収と廃棄.txt",
-        "theme_037_遊技機の保守管理.txt",
-        "theme_038_遊技機の点検・保守計画.txt",
-    ]
-}
+technology_themes = DOMAINS["technology"]["themes"]
 
 tech_theme_count = sum(len(v) for v in technology_themes.values())
 print(f"""
@@ -57,72 +45,38 @@ print(f"""
 # 3. チャンキング戦略の定義
 print("\n✅ ステップ3: チャンキング戦略を定義")
 
-chunking_strategy = {
-    "method": "logical_units",
-    "target_tokens": 500,
-    "delimiter": ["。\n", "。", "\n\n"],
-    "min_chunk_size": 50,
-    "max_chunk_size": 1000,
-    "categories": list(technology_themes.keys())
-}
+chunking_strategy = {**CHUNKING_STRATEGY, "categories": list(technology_themes.keys())}
 
 print(f"""
   チャンキング方式: {chunking_strategy['method']}
   目標トークン数: {chunking_strategy['target_tokens']}
   最小/最大: {chunking_strategy['min_chunk_size']}/{chunking_strategy['max_chunk_size']}
+  オーバーラップ: {chunking_strategy['overlap_tokens']}トークン（文境界で分割、重複ページは1回のみ）
 """)
 
 # 4. テーマデータを読み込む
-print("\n✅ ステップ4: 技術管理分野テーマデータを読み込む")
+print("\n✅ ステップ4: 技術管理分野テーマデータを読み込み、チャンク化（JSONLへストリーム出力）")
 
-technology_chunks = []
-category_stats = defaultdict(lambda: {"count": 0, "tokens": 0})
+result = write_domain_chunks("technology", lecture_dir)
+technology_chunks = result["sample_chunks"]
+category_stats = result["categories"]
 
 for category, theme_files in technology_themes.items():
     print(f"\n  【{category}】")
 
     for theme_file in theme_files:
-        theme_path = lecture_dir / theme_file
-
-        if not theme_path.exists():
+        theme_stats = result["themes"][theme_file]
+        if theme_stats.get("missing"):
             print(f"    ⚠️  {theme_file} が見つかりません")
             continue
 
-        # ファイル読み込み
-        try:
-            with open(theme_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-
-            if not content:
-                print(f"    ⚠️  {theme_file} が空です")
-                continue
-
-            # 簡易的なトークン数推定
-            token_count = len(content) // 3
-
-            # チャンク作成
-            chunk = {
-                "chunk_id": f"technology_{category}_{len(technology_chunks):03d}",
-                "category": category,
-                "source_file": theme_file,
-                "content": content,
-                "token_count": token_count,
-                "source": "lecture_materials"
-            }
-
-            technology_chunks.append(chunk)
-            category_stats[category]["count"] += 1
-            category_stats[category]["tokens"] += token_count
-
-            print(f"    ✓ {theme_file:45} ({token_count:5}トークン)")
-
-        except Exception as e:
-            print(f"    ✗ エラー: {theme_file} - {e}")
+        print(f"    ✓ {theme_file:45} ({theme_stats['chunks']:3}チャンク, {theme_stats['tokens']:6}トークン, "
+              f"重複ページ除外 {theme_stats['duplicate_pages']})")
 
 # 5. 統計情報
 print("\n✅ ステップ5: 統計集計")
 
-total_chunks = len(technology_chunks)
+total_chunks = result["total_chunks"]
 total_tokens = sum(s["tokens"] for s in category_stats.values())
 
 print(f"""
@@ -140,20 +94,6 @@ for category, stats in category_stats.items():
 # 6. 出力スキーマの定義
 print("\n✅ ステップ6: 出力スキーマを定義")
 
-output_schema = {
-    "metadata": {
-        "task": "Task 5.1 - 技術管理分野データ準備",
-        "domain": "technology",
-        "total_chunks": total_chunks,
-        "total_tokens": total_tokens,
-        "chunking_method": "logical_units",
-        "source": "lecture_materials"
-    },
-    "chunking_strategy": chunking_strategy,
-    "category_distribution": dict(category_stats),
-    "sample_chunks": technology_chunks[:3]
-}
-
 print(f"""
   出力形式: JSONL (1行1チャンク) + メタデータJSON
 
@@ -164,6 +104,7 @@ print(f"""
     "source_file": "theme_XXX_...txt",
     "content": "...",
     "token_count": 500,
+    "pages": [26, 27],
     "source": "lecture_materials"
   }}
 """)
@@ -171,21 +112,13 @@ print(f"""
 # 7. 技術管理分野チャンクを保存
 print("\n✅ ステップ7: チャンクデータを保存")
 
-output_dir = Path("data")
-output_dir.mkdir(exist_ok=True)
-
-# JSONL形式で保存
-jsonl_path = output_dir / "technology_domain_chunks_prepared.jsonl"
-with open(jsonl_path, 'w', encoding='utf-8') as f:
-    for chunk in technology_chunks:
-        f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+# JSONL（1行1チャンク）はステップ4でストリーム出力済み
+jsonl_path = Path(result["jsonl_path"])
 
 print(f"  ✓ JSONL保存: {jsonl_path} ({total_chunks}行)")
 
-# メタデータJSONを保存
-metadata_path = output_dir / "technology_domain_chunks_metadata.json"
-with open(metadata_path, 'w', encoding='utf-8') as f:
-    json.dump(output_schema, f, indent=2, ensure_ascii=False)
+# メタデータJSON
+metadata_path = Path(result["metadata_path"])
 
 print(f"  ✓ メタデータ保存: {metadata_path}")
 
@@ -1,27 +1,24 @@
 #!/usr/bin/env python3
 """
 GPT-5-mini: 法令整合性・論理的正確性レビュー
+複数問題をトークン予算内で1リクエストにまとめ、問題ごとのJSON結果を受け取る
+結果が欠けた問題は1問ずつ自動で再レビューする
 """
 import json
 import os
+import sys
+from pathlib import Path
 from openai import OpenAI
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from batch_job_runner import estimate_tokens
+from prompt_packer import PromptPacker
+
 client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
-def load_problems():
-    with open('db/problems.json', 'r', encoding='utf-8') as f:
-        return json.load(f)['problems']
+MODEL = "gpt-5-mini"
 
-def review_problem_with_gpt5mini(problem):
-    """GPT-5-miniで1問をレビュー"""
-    prompt = f"""以下の主任者講習試験問題をレビューしてください。
-
-【問題ID】{problem['problem_id']}
-【カテゴリ】{problem['category']}
-【問題文】{problem['problem_text']}
-【正解】{problem['correct_answer']}
-【解説】{problem['explanation']}
-【法令引用】{problem.get('legal_reference', {})}
+REVIEW_INSTRUCTIONS = """以下の主任者講習試験問題をレビューしてください。
 
 以下の観点で問題点を指摘してください：
 1. 法令との整合性（風営法との照合）
@@ -34,56 +31,76 @@ def review_problem_with_gpt5mini(problem):
 - 法令引用が抽象的（「遵守する必要」のみ）
 - 具体的な条文・項・号の明記がない
 
-問題がある場合のみJSON形式で返してください：
-{{"issues": ["問題1", "問題2"], "severity": "high/medium/low"}}
+全問題について、次の形式のJSON配列のみを返してください：
+[{"problem_id": 問題ID, "issues": ["問題1", "問題2"], "severity": "high/medium/low"}]
 
-問題がない場合は {{"issues": [], "severity": "none"}} を返してください。
+問題がない場合は {"problem_id": 問題ID, "issues": [], "severity": "none"} としてください。
 """
-    
+
+def load_problems():
+    with open('db/problems.json', 'r', encoding='utf-8') as f:
+        return json.load(f)['problems']
+
+def format_problem(problem):
+    """プロンプトに埋め込む1問分のブロック"""
+    return f"""【問題ID】{problem['problem_id']}
+【カテゴリ】{problem['category']}
+【問題文】{problem['problem_text']}
+【正解】{problem['correct_answer']}
+【解説】{problem['explanation']}
+【法令引用】{problem.get('legal_reference', {})}
+"""
+
+def build_review_prompt(problems):
+    return REVIEW_INSTRUCTIONS + "\n" + "\n".join(format_problem(p) for p in problems)
+
+def call_gpt5mini(prompt, max_tokens):
     response = client.chat.completions.create(
-        model="gpt-5-mini",  # ✅ GPT-5-mini使用
+        model=MODEL,  # ✅ GPT-5-mini使用
         messages=[{"role": "user", "content": prompt}],
-        
-        max_completion_tokens=500
+        max_completion_tokens=max_tokens
     )
-    
-    try:
-        result = json.loads(response.choices[0].message.content)
-        return result
-    except:
-        return {"issues": ["GPT応答解析エラー"], "severity": "unknown"}
+    return response.choices[0].message.content
 
 def main():
     problems = load_problems()
+    targets = problems[:20]
     print(f"🔍 GPT-5-mini: 全{len(problems)}問のレビュー開始")
     print("（サンプル20問のみ実施 - コスト削減）")
     print("=" * 70)
-    
+
+    # 1問あたり出力500トークン（旧: 1問1リクエストの max_completion_tokens）
+    # 推論トークンを含めた1リクエストの上限は 16000（batch45_chunked_rereview と同じ）
+    packer = PromptPacker(MODEL, estimate_tokens(REVIEW_INSTRUCTIONS), output_tokens_per_item=500,
+                          max_output_tokens=16000)
+    packs = packer.pack(targets, cost=lambda p: estimate_tokens(format_problem(p)))
+
     results = {}
-    
-    # 最初の20問のみレビュー（コスト削減）
-    for i, p in enumerate(problems[:20], 1):
-        print(f"[{i}/20] 問題ID {p['problem_id']} レビュー中...", end=' ')
-        
-        review = review_problem_with_gpt5mini(p)
-        
-        if review['issues']:
-            results[p['problem_id']] = review
-            print(f"❌ {len(review['issues'])}件の問題")
-        else:
-            print("✅")
-    
+    reviewed = 0
+    for pack in packs:
+        print(f"[{reviewed + 1}-{reviewed + len(pack)}/{len(targets)}] {len(pack)}問をまとめてレビュー中...")
+        reviews = packer.review(pack, build_review_prompt, call_gpt5mini, lambda p: p['problem_id'])
+
+        for p in pack:
+            review = reviews.get(str(p['problem_id']),
+                                 {"issues": ["GPT応答解析エラー"], "severity": "unknown"})
+            if review['issues']:
+                results[p['problem_id']] = {"issues": review['issues'], "severity": review.get('severity')}
+                print(f"   問題ID {p['problem_id']}: ❌ {len(review['issues'])}件の問題")
+        reviewed += len(pack)
+
     print()
     print(f"📊 レビュー完了: {len(results)}問に問題あり")
-    
+    print(f"   APIリクエスト: {packer.requests}回（うち単独再レビュー {packer.retried}回）")
+
     # JSON出力
     with open('review_results_gpt5mini.json', 'w', encoding='utf-8') as f:
         json.dump({
-            'total_reviewed': 20,
+            'total_reviewed': len(targets),
             'problems_with_issues': len(results),
             'details': results
         }, f, ensure_ascii=False, indent=2)
-    
+
     print(f"✅ 詳細結果を保存: review_results_gpt5mini.json")
 
 if __name__ == '__main__':
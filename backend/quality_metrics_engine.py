@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+品質メトリクス統合エンジン
+config/quality_metrics_definition.yaml の定義（4評価項目 × 各評価基準の重み・合格基準・品質レベル）を読み込み、
+全問題の全評価基準を列指向の配列として一括計算する
+
+【計算】
+- 評価基準スコア行列 S（問題 × 評価基準）: 問題ごとに自動評価した 0.0-1.0 のスコア
+- 評価項目スコア C = S・W（W: 評価基準 × 評価項目の重み行列）
+- 総合品質スコア = C・w（w: 評価項目の重み）
+NumPy があれば行列積、なければ同じ計算を Python のループで行う
+
+【キャッシュ】
+評価基準スコアを問題内容のハッシュごとに output/quality_metrics_cache.json に保存し、
+変更された問題だけを再計算する。定義 YAML か評価ロジックが変わるとキャッシュ全体を作り直す
+
+【自動評価できない評価基準】
+ひっかけ強度・誤答の妥当性など、問題データだけでは判定できない基準は
+問題の quality_subscores（{評価基準名: スコア}）があればその値、なければ UNMEASURED_SCORE を使う
+"""
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from keyword_automaton import KeywordAutomaton
+from legal_knowledge_base import LEGAL_RULES, validate_problem
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / 'config'
+DEFINITION_YAML = CONFIG_DIR / 'quality_metrics_definition.yaml'
+CACHE_PATH = Path("output/quality_metrics_cache.json")
+COMPOUND_WORDS_PATH = Path("data/compound_words/compound_words_dictionary.json")
+
+# 評価ロジックを変更したら上げる（キャッシュの無効化用）
+EVALUATOR_VERSION = 1
+
+# 自動評価できない評価基準の既定スコア（定義の「概ね適切」水準）
+UNMEASURED_SCORE = 0.8
+
+# 評価項目（総合品質スコアの components の並び順）→ (キー, 定義のセクション名)
+COMPONENT_SECTIONS = {
+    "問題文の明確性": ("clarity", "clarity_metrics"),
+    "ディストラクタの適切性": ("distractor", "distractor_metrics"),
+    "説明文の根拠性": ("explanation", "explanation_metrics"),
+    "ひっかけ度の適切性": ("intensity", "distractor_intensity_metrics"),
+}
+
+AMBIGUOUS_TERMS = ["場合がある", "ことがある", "場合によって", "一般的に", "などの", "等の", "とされる"]
+ARTICLE_PATTERN = re.compile(r'第[0-9０-９一二三四五六七八九十百]+条')
+LAW_NAME_PATTERN = re.compile(r'風営法|風俗営業[^\s、。]*法|施行規則|施行令|[^\s、。]{2,12}法')
+
+
+# ================================================================
+# 定義の読み込み
+# ================================================================
+
+class QualityDefinition:
+    """品質メトリクス定義（評価項目・評価基準・重み・品質レベル）"""
+
+    def __init__(self, components: List[Dict], minimum_score: float, tiers: List[Dict], source_hash: str = ""):
+        # components: [{"key", "name", "weight", "criteria": [(評価基準名, 重み), ...]}, ...]
+        self.components = components
+        self.minimum_score = minimum_score
+        # 下限の降順に並べ、スコアが下限以上の最初の品質レベルを採る
+        self.tiers = sorted(tiers, key=lambda tier: tier['score_range'][0], reverse=True)
+        self.source_hash = source_hash
+
+        self.criteria = [name for component in components for name, _ in component['criteria']]
+        self.component_weights = [component['weight'] for component in components]
+        # 評価基準 × 評価項目の重み行列
+        self.criterion_weights = [[0.0] * len(components) for _ in self.criteria]
+        row = 0
+        for column, component in enumerate(components):
+            for _, weight in component['criteria']:
+                self.criterion_weights[row][column] = weight
+                row += 1
+
+    @classmethod
+    def load(cls, path: Path = DEFINITION_YAML) -> 'QualityDefinition':
+        if yaml is None:
+            raise ImportError("品質メトリクス定義の読み込みには PyYAML が必要です (pip install pyyaml)")
+
+        raw = Path(path).read_bytes()
+        data = yaml.safe_load(raw.decode('utf-8'))
+        formula = data['overall_quality_formula']
+
+        components = []
+        for component in formula['components']:
+            key, section = COMPONENT_SECTIONS[component['name']]
+            components.append({
+                "key": key,
+                "name": component['name'],
+                "weight": component['weight'],
+                "criteria": [(criterion['criterion'], criterion['weight'])
+                             for criterion in data[section]['evaluation_criteria']]
+            })
+
+        passing = formula['passing_criteria']
+        return cls(components, passing['minimum_score'], passing['quality_tiers'],
+                   hashlib.sha256(raw).hexdigest())
+
+    def quality_tier(self, score: float) -> Dict:
+        """総合品質スコア → {"level", "recommendation", ...}"""
+        for tier in self.tiers:
+            if score >= tier['score_range'][0]:
+                return tier
+        return self.tiers[-1]
+
+
+# ================================================================
+# 評価基準ごとの自動評価（None は自動評価不可）
+# ================================================================
+
+def problem_text(problem: Dict) -> str:
+    return problem.get('problem_text') or problem.get('question') or ''
+
+
+def option_count(problem: Dict) -> int:
+    options = problem.get('options') or problem.get('choices')
+    if options:
+        return len(options)
+    return 2 if problem.get('correct_answer') in ("○", "×") else 0
+
+
+class CriterionEvaluators:
+    """定義の評価基準名 → 評価関数 problem -> Optional[float]"""
+
+    def __init__(self, compound_words_path: Path = COMPOUND_WORDS_PATH):
+        compound_words = []
+        dictionary_raw = b''
+        if Path(compound_words_path).exists():
+            dictionary_raw = Path(compound_words_path).read_bytes()
+            compound_words = [cw['word'] for cw in json.loads(dictionary_raw).get('compound_words', [])]
+        # 評価結果が依存するデータ（複合語辞書・法令ルール表）のハッシュ（キャッシュの無効化用）
+        rules_raw = json.dumps(LEGAL_RULES, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        self.data_hash = hashlib.sha256(
+            hashlib.sha256(dictionary_raw).digest() + hashlib.sha256(rules_raw).digest()
+        ).hexdigest()
+        self.compound_automaton = KeywordAutomaton(compound_words)
+        self.ambiguity_automaton = KeywordAutomaton(AMBIGUOUS_TERMS)
+
+        self.evaluators: Dict[str, Callable[[Dict], Optional[float]]] = {
+            "用語の正確性": self.term_accuracy,
+            "曖昧性の排除": self.ambiguity,
+            "選択肢数と多様性": self.option_diversity,
+            "法律根拠の明確性": self.legal_basis,
+            "説明文の正確性": self.explanation_accuracy,
+            "説明の詳細度": self.explanation_detail,
+        }
+
+    def evaluate(self, criterion: str, problem: Dict) -> float:
+        overrides = problem.get('quality_subscores') or {}
+        if criterion in overrides:
+            return float(overrides[criterion])
+        evaluator = self.evaluators.get(criterion)
+        score = evaluator(problem) if evaluator else None
+        return UNMEASURED_SCORE if score is None else score
+
+    def term_accuracy(self, problem):
+        text = problem_text(problem)
+        splits = sum(1 for compound in self.compound_automaton.find(text)
+                     if " ".join(list(compound)) in text)
+        return 1.0 if splits == 0 else 0.5 if splits == 1 else 0.0
+
+    def ambiguity(self, problem):
+        text = problem_text(problem)
+        if not text:
+            return 0.0
+        hits = len(self.ambiguity_automaton.find(text))
+        return 1.0 if hits == 0 else 0.8 if hits == 1 else 0.5
+
+    def option_diversity(self, problem):
+        options = problem.get('options') or problem.get('choices')
+        count = option_count(problem)
+        if count <= 1:
+            return 0.0
+        if count == 2 and not options:
+            return 1.0
+        if 3 <= count <= 5:
+            values = list(options.values()) if isinstance(options, dict) else list(options)
+            return 1.0 if len(set(map(str, values))) == len(values) else 0.7
+        return 0.4
+
+    def legal_basis(self, problem):
+        reference = problem.get('legal_reference') or ''
+        if isinstance(reference, dict):
+            has_title = bool(reference.get('section'))
+            reference = " ".join(str(value) for value in reference.values() if value)
+        else:
+            has_title = False
+        text = f"{reference} {problem.get('explanation', '')}"
+
+        if ARTICLE_PATTERN.search(text):
+            return 1.0 if has_title else 0.8
+        if reference or LAW_NAME_PATTERN.search(text):
+            return 0.6
+        return 0.3 if problem.get('explanation') else 0.0
+
+    def explanation_accuracy(self, problem):
+        result = validate_problem(f"{problem_text(problem)}\n{problem.get('explanation', '')}", {})
+        issues = len(result['issues'])
+        return 1.0 if issues == 0 else 0.5 if issues == 1 else 0.0
+
+    def explanation_detail(self, problem):
+        length = len(problem.get('explanation') or '')
+        if length == 0:
+            return 0.0
+        if 150 <= length <= 250:
+            return 1.0
+        if 100 <= length <= 300:
+            return 0.8
+        if 50 < length < 500:
+            return 0.6
+        return 0.3
+
+
+# ================================================================
+# エンジン
+# ================================================================
+
+def content_hash(problem: Dict) -> str:
+    """評価に使う項目だけのハッシュ（ID・生成日時などの変更では再計算しない）"""
+    payload = {
+        "text": problem_text(problem),
+        "options": problem.get('options') or problem.get('choices'),
+        "correct_answer": problem.get('correct_answer'),
+        "explanation": problem.get('explanation'),
+        "legal_reference": problem.get('legal_reference'),
+        "quality_subscores": problem.get('quality_subscores'),
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class QualityScores:
+    """全問題の評価結果（列指向）"""
+
+    def __init__(self, definition: QualityDefinition, problem_ids: List, subscores, components, overall):
+        self.definition = definition
+        self.problem_ids = problem_ids
+        self.subscores = subscores      # 問題 × 評価基準
+        self.components = components    # 問題 × 評価項目
+        self.overall = overall          # 問題
+
+    def __len__(self):
+        return len(self.problem_ids)
+
+    def component_means(self) -> Dict[str, float]:
+        if not self.problem_ids:
+            return {component['key']: 0.0 for component in self.definition.components}
+        if np is not None:
+            means = np.asarray(self.components).mean(axis=0).tolist()
+        else:
+            means = [sum(column) / len(self.components) for column in zip(*self.components)]
+        return {component['key']: mean for component, mean in zip(self.definition.components, means)}
+
+    def criterion_means(self) -> Dict[str, float]:
+        if not self.problem_ids:
+            return {criterion: 0.0 for criterion in self.definition.criteria}
+        if np is not None:
+            means = np.asarray(self.subscores).mean(axis=0).tolist()
+        else:
+            means = [sum(column) / len(self.subscores) for column in zip(*self.subscores)]
+        return dict(zip(self.definition.criteria, means))
+
+    def overall_mean(self) -> float:
+        return sum(self.overall) / len(self.overall) if self.problem_ids else 0.0
+
+    def passed(self) -> List[bool]:
+        return [score >= self.definition.minimum_score for score in self.overall]
+
+    def rows(self) -> List[Dict]:
+        """問題ごとの結果（JSON出力用）"""
+        keys = [component['key'] for component in self.definition.components]
+        results = []
+        for problem_id, components, overall in zip(self.problem_ids, self.components, self.overall):
+            tier = self.definition.quality_tier(overall)
+            results.append({
+                "problem_id": problem_id,
+                "overall_score": round(float(overall), 4),
+                "level": tier['level'],
+                "components": {key: round(float(value), 4) for key, value in zip(keys, components)}
+            })
+        return results
+
+
+class QualityMetricsEngine:
+    """定義に従って全問題の品質スコアを計算する（内容ハッシュ単位でキャッシュ）"""
+
+    def __init__(self, definition: Optional[QualityDefinition] = None, cache_path: Optional[Path] = CACHE_PATH,
+                 evaluators: Optional[CriterionEvaluators] = None):
+        self.definition = definition or QualityDefinition.load()
+        self.evaluators = evaluators or CriterionEvaluators()
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.cache_key = (f"{self.definition.source_hash}:{EVALUATOR_VERSION}:"
+                          f"{getattr(self.evaluators, 'data_hash', '')}")
+        self.cache: Dict[str, List[float]] = self._load_cache()
+        self.computed = 0
+        self.reused = 0
+
+    def _load_cache(self) -> Dict[str, List[float]]:
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('cache_key') != self.cache_key or cache.get('criteria') != self.definition.criteria:
+            return {}
+        return cache.get('entries', {})
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache = {"cache_key": self.cache_key, "criteria": self.definition.criteria, "entries": self.cache}
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        tmp_path.replace(self.cache_path)
+
+    def subscores_for(self, problem: Dict) -> List[float]:
+        key = content_hash(problem)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.reused += 1
+            return cached
+        scores = [self.evaluators.evaluate(criterion, problem) for criterion in self.definition.criteria]
+        self.cache[key] = scores
+        self.computed += 1
+        return scores
+
+    def evaluate(self, problems: List[Dict]) -> QualityScores:
+        subscores = [self.subscores_for(problem) for problem in problems]
+        problem_ids = [problem.get('problem_id') for problem in problems]
+        weights = self.definition.criterion_weights
+        component_weights = self.definition.component_weights
+
+        if np is not None and subscores:
+            matrix = np.asarray(subscores, dtype=float)
+            components = matrix @ np.asarray(weights, dtype=float)
+            overall = components @ np.asarray(component_weights, dtype=float)
+            return QualityScores(self.definition, problem_ids, matrix.tolist(),
+                                 components.tolist(), overall.tolist())
+
+        components = [[sum(score * row[column] for score, row in zip(scores, weights))
+                       for column in range(len(component_weights))]
+                      for scores in subscores]
+        overall = [sum(value * weight for value, weight in zip(row, component_weights)) for row in components]
+        return QualityScores(self.definition, problem_ids, subscores, components, overall)
+
+
+# ================================================================
+# 問題ファイルの読み込みと統合レポート
+# ================================================================
+
+def _flatten_problems(data) -> List[Dict]:
+    if isinstance(data, list):
+        return data
+    for key in ('problems', 'sample_problems', 'demo_problems'):
+        value = data.get(key)
+        if isinstance(value, list):
+            return value
+        if isinstance(value, dict):
+            # ドメイン別 {domain: [問題, ...]}
+            return [problem for group in value.values() if isinstance(group, list) for problem in group]
+    return []
+
+
+def load_problem_file(path) -> List[Dict]:
+    """問題JSON（リスト / problems・sample_problems・demo_problems キー）または JSONL を読み込む"""
+    text = Path(path).read_text(encoding='utf-8')
+    try:
+        return _flatten_problems(json.loads(text))
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+# 旧 integrate_*_quality_metrics.py ごとの入力と出力
+INTEGRATION_RUNS = {
+    "week3": {
+        "task": "Task 3.5 - 品質メトリクス統合評価",
+        "phase": "Phase 2 Week 3",
+        "inputs": ["output/law_domain_50_demo.json"],
+        "report": "output/integrated_quality_report.json",
+    },
+    "practice": {
+        "task": "Task 4.5 - 実務分野品質メトリクス統合評価",
+        "phase": "Phase 2 Week 4 (実務分野)",
+        "inputs": ["output/practice_domain_50_demo.json"],
+        "report": "output/integrated_quality_report_practice.json",
+    },
+    "week5": {
+        "task": "Task 5.6 - Week 5 品質メトリクス統合評価",
+        "phase": "Phase 2 Week 5",
+        "inputs": ["output/week5_domain_generation_prepared.json"],
+        "report": "output/integrated_quality_report_week5.json",
+    },
+    "week6": {
+        "task": "Task 6.5 - Week 6 150問品質メトリクス統合評価",
+        "phase": "Phase 2 Week 6 Final",
+        "inputs": ["output/technology_domain_50_raw.json",
+                   "output/security_domain_50_raw.jsonl",
+                   "output/regulation_domain_50_raw.jsonl"],
+        "report": "output/integrated_quality_report_week6.json",
+    },
+}
+
+
+def build_report(scores: QualityScores, problems: List[Dict], metadata: Dict) -> Dict:
+    definition = scores.definition
+    overall = scores.overall_mean()
+    tier = definition.quality_tier(overall)
+    component_means = scores.component_means()
+    passed = scores.passed()
+
+    tier_counts = {t['level']: 0 for t in definition.tiers}
+    for row in scores.rows():
+        tier_counts[row['level']] += 1
+
+    by_difficulty = {}
+    for problem, ok in zip(problems, passed):
+        stats = by_difficulty.setdefault(str(problem.get('difficulty', '不明')), {"problems": 0, "passed": 0})
+        stats["problems"] += 1
+        stats["passed"] += int(ok)
+
+    return {
+        "metadata": {**metadata, "definition_version": definition.source_hash[:12], "total_problems": len(scores)},
+        "quality_metrics_weights": {
+            component['key']: {
+                "weight": component['weight'],
+                "description": component['name'],
+                "sub_items": dict(component['criteria'])
+            }
+            for component in definition.components
+        },
+        "score_breakdown": {
+            component['key']: {
+                "score": component_means[component['key']],
+                "weight": component['weight'],
+                "weighted_score": component_means[component['key']] * component['weight']
+            }
+            for component in definition.components
+        },
+        "criterion_means": scores.criterion_means(),
+        "overall_quality": {
+            "score": overall,
+            "level": tier['level'],
+            "recommendation": tier['recommendation'],
+            "pass_rate": sum(passed) / len(passed) if passed else 0.0,
+            "tier_counts": tier_counts,
+            "by_difficulty": by_difficulty
+        },
+        "problems": scores.rows()
+    }
+
+
+def print_report(report: Dict, engine: QualityMetricsEngine):
+    overall = report['overall_quality']
+    print(f"\n  対象: {report['metadata']['total_problems']}問 "
+          f"（計算 {engine.computed}問 / キャッシュ再利用 {engine.reused}問）")
+
+    print("\n  【評価項目別平均スコア】")
+    for key, item in report['score_breakdown'].items():
+        description = report['quality_metrics_weights'][key]['description']
+        print(f"    {description:14} ({item['weight']:.0%}): {item['score']:.2f}")
+
+    print("\n  【評価基準別平均スコア（低い順）】")
+    for criterion, mean in sorted(report['criterion_means'].items(), key=lambda item: item[1])[:5]:
+        print(f"    {criterion:14}: {mean:.2f}")
+
+    print(f"\n  総合品質スコア: {overall['score']:.2f} ({overall['level']}) → {overall['recommendation']}")
+    print(f"  合格率: {overall['pass_rate'] * 100:.1f}%")
+    print("  品質レベル分布: " + ", ".join(f"{level} {count}問" for level, count in overall['tier_counts'].items()))
+    for difficulty, stats in overall['by_difficulty'].items():
+        print(f"    難易度 {difficulty}: {stats['passed']}/{stats['problems']}問 合格")
+
+
+def run_integration(run_key: str) -> int:
+    """旧 integrate_*_quality_metrics.py の入力を評価し、統合レポートを保存する"""
+    run = INTEGRATION_RUNS[run_key]
+
+    print("=" * 80)
+    print(f"【{run['task']}】")
+    print("=" * 80)
+
+    problems = []
+    for path in run['inputs']:
+        if Path(path).exists():
+            loaded = load_problem_file(path)
+            problems.extend(loaded)
+            print(f"  ✓ {path}: {len(loaded)}問")
+        else:
+            print(f"  ✗ {path} が見つかりません")
+
+    if not problems:
+        print("\n❌ 評価対象の問題がありません")
+        return 1
+
+    engine = QualityMetricsEngine()
+    scores = engine.evaluate(problems)
+    engine.save_cache()
+
+    report = build_report(scores, problems, {"task": run['task'], "phase": run['phase'], "inputs": run['inputs']})
+    print_report(report, engine)
+
+    Path(run['report']).parent.mkdir(parents=True, exist_ok=True)
+    with open(run['report'], 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n  保存完了: {run['report']}")
+    return 0
+
+
+def main():
+    """
+    実行:
+      python3 backend/quality_metrics_engine.py week3|practice|week5|week6
+      python3 backend/quality_metrics_engine.py 問題ファイル [出力JSON]
+    """
+    if len(sys.argv) < 2:
+        print(main.__doc__)
+        return 1
+
+    target = sys.argv[1]
+    if target in INTEGRATION_RUNS:
+        return run_integration(target)
+
+    problems = load_problem_file(target)
+    engine = QualityMetricsEngine()
+    scores = engine.evaluate(problems)
+    engine.save_cache()
+
+    report = build_report(scores, problems, {"task": "品質メトリクス統合評価", "inputs": [target]})
+    print_report(report, engine)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n  保存完了: {sys.argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
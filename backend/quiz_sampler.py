@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+模擬試験の層別サンプラー
+src/utils/categoryScoring.js の EXAM_CATEGORIES（問題ID範囲）と
+src/utils/questionDistribution.js の DIFFICULTY_DISTRIBUTION（難易度別のカテゴリー配分）を
+起動時に1回だけ層（カテゴリー別の問題リスト）と別名テーブル（alias table）にコンパイルし、
+出題ごとの範囲判定なしに O(count) で層別抽出する
+
+【配分】
+  各層の出題数 = floor(count × 重み)（カテゴリーの問題数が上限）
+  端数の枠は別名テーブルで重みに比例して層を選び、空きのある層に割り当てる
+  other 層 = その難易度の配分にないカテゴリー・範囲外の問題
+
+【苦手カテゴリー重視（AdaptiveQuizSampler）】
+  カテゴリーの重み = 1 − ユーザーの正答率（ラプラス平滑化）+ EXPLORATION_WEIGHT
+  問題の重み       = PROBLEM_BASE_WEIGHT + 1 − 問題の正答率（全ユーザーの実績、未集計は DEFAULT_CORRECT_RATE）
+  カテゴリー内の別名テーブルは正答率の更新時（DifficultyRefreshJob）にだけ作り直し、
+  出題時はユーザーのカテゴリー成績からカテゴリーの別名テーブルを作って1問ずつ抽出する
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+# 試験カテゴリーと問題ID範囲（src/utils/categoryScoring.js の EXAM_CATEGORIES と同じ）
+EXAM_CATEGORIES = {
+    'qualification_system': {
+        'name': '遊技機取扱主任者制度と資格維持',
+        'ranges': [(1, 30)]
+    },
+    'game_machine_technical_standards': {
+        'name': '遊技機規制技術基準（射幸性・技術）',
+        'ranges': [(61, 90), (121, 150), (181, 190), (206, 207), (212, 213), (215, 215)]
+    },
+    'supervisor_duties_and_guidance': {
+        'name': '主任者の実務、指導及び業界要綱',
+        'ranges': [(91, 120), (208, 209)]
+    },
+    'business_regulation_and_obligations': {
+        'name': '風俗営業の一般規制と義務',
+        'ranges': [(31, 60), (151, 180), (220, 220), (226, 227)]
+    },
+    'administrative_procedures_and_penalties': {
+        'name': '行政手続、構造基準及び罰則',
+        'ranges': [(191, 192), (199, 200), (204, 205), (210, 211), (214, 214), (216, 217), (219, 219),
+                   (223, 225), (228, 229)]
+    }
+}
+
+OTHER = 'other'
+
+# 難易度別のカテゴリー配分（src/utils/questionDistribution.js の DIFFICULTY_DISTRIBUTION と同じ）
+DIFFICULTY_DISTRIBUTION = {
+    'easy': {
+        'qualification_system': 0.3,
+        'business_regulation_and_obligations': 0.4,
+        OTHER: 0.3
+    },
+    'medium': {
+        'game_machine_technical_standards': 0.4,
+        'supervisor_duties_and_guidance': 0.3,
+        OTHER: 0.3
+    },
+    'hard': {
+        'game_machine_technical_standards': 0.5,
+        'administrative_procedures_and_penalties': 0.3,
+        OTHER: 0.2
+    }
+}
+
+# 苦手カテゴリー重視の重み付け
+EXPLORATION_WEIGHT = 0.1
+PROBLEM_BASE_WEIGHT = 0.5
+DEFAULT_CORRECT_RATE = 0.5
+
+# API の難易度表記 → 配分名
+DIFFICULTY_LEVELS = {
+    '★': 'easy',
+    '★★': 'medium',
+    '★★★': 'hard',
+    '★★★★': 'hard',
+    'easy': 'easy',
+    'medium': 'medium',
+    'hard': 'hard'
+}
+
+
+def build_category_index(categories: Dict = EXAM_CATEGORIES) -> Dict[int, str]:
+    """問題ID → カテゴリーID の表（範囲を展開）"""
+    index = {}
+    for category_id, category in categories.items():
+        for start, end in category['ranges']:
+            for problem_id in range(start, end + 1):
+                index.setdefault(problem_id, category_id)
+    return index
+
+
+class AliasTable:
+    """重み付き離散分布の別名テーブル（Vose 法、1回の抽出が O(1)）"""
+
+    def __init__(self, weights: List[float]):
+        count = len(weights)
+        total = sum(weights)
+        self.prob = [w * count / total for w in weights]
+        self.alias = list(range(count))
+
+        small = [i for i, p in enumerate(self.prob) if p < 1.0]
+        large = [i for i, p in enumerate(self.prob) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.alias[less] = more
+            self.prob[more] -= 1.0 - self.prob[less]
+            (small if self.prob[more] < 1.0 else large).append(more)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng=random) -> int:
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+def sample_unseen(candidates: List[Dict], count: int, seen, rng=random) -> List[Dict]:
+    """
+    出題済み（seen）を除いて candidates から count 問をランダムに選ぶ
+    未出題が多い間は乱択した位置のビットを調べるだけで済む（O(count)）。
+    乱択で集まらなければ残りを走査し、それでも足りなければ出題済みから補充する
+    """
+    total = len(candidates)
+    count = min(count, total)
+    picked = set()
+    selected = []
+
+    max_tries = 4 * count + 16
+    for _ in range(max_tries):
+        if len(selected) == count or len(picked) == total:
+            break
+        index = rng.randrange(total)
+        if index in picked:
+            continue
+        picked.add(index)
+        if candidates[index].get('problem_id') not in seen:
+            selected.append(index)
+
+    if len(selected) < count:
+        unseen = [i for i in range(total)
+                  if i not in picked and candidates[i].get('problem_id') not in seen]
+        selected.extend(rng.sample(unseen, min(count - len(selected), len(unseen))))
+
+    if len(selected) < count:
+        chosen = set(selected)
+        rest = [i for i in range(total) if i not in chosen]
+        selected.extend(rng.sample(rest, count - len(selected)))
+
+    return [candidates[i] for i in selected]
+
+
+class StratumPlan:
+    """1つの難易度の層（名前・重み・問題リスト）と別名テーブル"""
+
+    def __init__(self, weights: Dict[str, float], pools: Dict[str, List[Dict]]):
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.pools = [pools.get(name, []) for name in self.names]
+        self.alias = AliasTable(self.weights)
+
+    def quotas(self, count: int, rng=random) -> List[int]:
+        """層ごとの出題数（各層の問題数を超えない）"""
+        capacity = [len(pool) for pool in self.pools]
+        count = min(count, sum(capacity))
+        quotas = [min(int(count * weight), cap) for weight, cap in zip(self.weights, capacity)]
+
+        remaining = count - sum(quotas)
+        tries = 0
+        while remaining and tries < 16 * count:
+            tries += 1
+            i = self.alias.draw(rng)
+            if quotas[i] < capacity[i]:
+                quotas[i] += 1
+                remaining -= 1
+
+        # 重みの大きい層が埋まって抽選で割り当てきれなければ、重みの大きい順に空きへ詰める
+        for i in sorted(range(len(quotas)), key=lambda i: -self.weights[i]):
+            extra = min(remaining, capacity[i] - quotas[i])
+            quotas[i] += extra
+            remaining -= extra
+
+        return quotas
+
+
+class StratifiedQuizSampler:
+    """難易度別の配分に従って模擬試験を層別抽出する"""
+
+    def __init__(self, problems: List[Dict], distributions: Dict = DIFFICULTY_DISTRIBUTION,
+                 categories: Dict = EXAM_CATEGORIES):
+        category_index = build_category_index(categories)
+        by_category: Dict[str, List[Dict]] = {}
+        for problem in problems:
+            category_id = category_index.get(problem.get('problem_id'), OTHER)
+            by_category.setdefault(category_id, []).append(problem)
+
+        self.plans = {}
+        for difficulty, weights in distributions.items():
+            pools = {name: by_category.get(name, []) for name in weights if name != OTHER}
+            pools[OTHER] = [problem for category_id, category_problems in by_category.items()
+                            if category_id not in pools for problem in category_problems]
+            self.plans[difficulty] = StratumPlan(weights, pools)
+
+    def draw(self, difficulty: str, count: int, seen=None,
+             rng=random) -> Tuple[List[Dict], Dict[str, int]]:
+        """
+        count 問を層別抽出して (問題リスト, 層ごとの出題数) を返す
+        seen（出題済み問題IDの集合）を渡すと各層内で出題済みを避ける
+        """
+        plan = self.plans[DIFFICULTY_LEVELS.get(difficulty, difficulty)]
+        quotas = plan.quotas(count, rng)
+
+        selected = []
+        for pool, quota in zip(plan.pools, quotas):
+            if seen is not None:
+                selected.extend(sample_unseen(pool, quota, seen, rng))
+            else:
+                selected.extend(rng.sample(pool, quota))
+        rng.shuffle(selected)
+
+        return selected, dict(zip(plan.names, quotas))
+
+    def has_difficulty(self, difficulty: Optional[str]) -> bool:
+        return DIFFICULTY_LEVELS.get(difficulty, difficulty) in self.plans
+
+
+def category_weakness(stats: Optional[Dict]) -> float:
+    """カテゴリーの出題重み（正答率が低いほど大きい、未回答は正答率 0.5 とみなす）"""
+    answered = stats.get('total_answered', 0) if stats else 0
+    correct = stats.get('total_correct', 0) if stats else 0
+    return 1.0 - (correct + 1) / (answered + 2) + EXPLORATION_WEIGHT
+
+
+class AdaptiveQuizSampler:
+    """ユーザーの苦手カテゴリー・難しい問題に重みを置いて出題する"""
+
+    def __init__(self, problems: List[Dict], correct_rates: Optional[Dict[int, float]] = None,
+                 difficulty_of=None):
+        difficulty_of = difficulty_of or (lambda problem: problem.get('difficulty'))
+        self.groups: Dict[str, Dict[str, List[Dict]]] = {}
+        for problem in problems:
+            by_category = self.groups.setdefault(difficulty_of(problem), {})
+            by_category.setdefault(problem.get('category') or 'その他', []).append(problem)
+        self.update_correct_rates(correct_rates or {})
+
+    def update_correct_rates(self, correct_rates: Dict[int, float]):
+        """問題ごとの正答率を差し替え、カテゴリー内の別名テーブルを作り直す"""
+        tables = {}
+        for difficulty, by_category in self.groups.items():
+            tables[difficulty] = {
+                category: AliasTable([
+                    PROBLEM_BASE_WEIGHT + 1.0 - correct_rates.get(p.get('problem_id'), DEFAULT_CORRECT_RATE)
+                    for p in category_problems
+                ])
+                for category, category_problems in by_category.items()
+            }
+        self.tables = tables
+        self.correct_rates = correct_rates
+
+    def draw(self, difficulty: str, count: int, category_stats: List[Dict], seen=None,
+             rng=random) -> Tuple[List[Dict], Dict[str, float]]:
+        """
+        count 問を抽出して (問題リスト, カテゴリーごとの出題確率) を返す
+        category_stats: DatabaseManager.get_user_category_stats の結果
+        """
+        by_category = self.groups.get(difficulty, {})
+        tables = self.tables.get(difficulty, {})
+        categories = list(by_category)
+        if not categories:
+            return [], {}
+
+        stats = {row['category']: row for row in category_stats}
+        weights = [category_weakness(stats.get(category)) for category in categories]
+        category_alias = AliasTable(weights)
+
+        total = sum(len(problems) for problems in by_category.values())
+        count = min(count, total)
+        chosen = set()
+        selected = []
+
+        for _ in range(8 * count + 16):
+            if len(selected) == count:
+                break
+            category = categories[category_alias.draw(rng)]
+            problem = by_category[category][tables[category].draw(rng)]
+            problem_id = problem.get('problem_id')
+            if problem_id in chosen or (seen is not None and problem_id in seen):
+                continue
+            chosen.add(problem_id)
+            selected.append(problem)
+
+        # 重みの大きい問題が出尽くして抽選で集まらなければ、残りから補充する
+        if len(selected) < count:
+            rest = [problem for problems in by_category.values() for problem in problems
+                    if problem.get('problem_id') not in chosen]
+            selected.extend(sample_unseen(rest, count - len(selected), seen or (), rng))
+
+        weight_total = sum(weights)
+        return selected, {category: round(weight / weight_total, 4)
+                          for category, weight in zip(categories, weights)}
@@ -11,20 +11,49 @@
 出力:
   1. 新OCR結果: ocr_results_deepseek_v2_YYYYMMDD.json
   2. 差分分析: ocr_differential_analysis_YYYYMMDD.json
+     （ページ別差分は ocr_differential_pages_YYYYMMDD.jsonl に抽出と並行して逐次書き出し）
   3. 統合版: ocr_results_unified_YYYYMMDD.json
+
+並列化:
+  PDFをページ範囲（PAGES_PER_TASK ページ）単位のタスクに分割し、
+  プロセスプールで PyMuPDF 抽出を実行（PDF間・ページ間とも並列）
+  各ページにテキストハッシュを付与し、旧OCRとハッシュが一致するページは差分計算を省略
+
+入力パス（引数または環境変数で変更可能）:
+  python3 re_ocr_lecture_materials.py --pdf-dir ./pdfs --old-ocr data/ocr_results_corrected.jsonl \\
+      --output-dir /tmp/out --workers 8
+  LECTURE_PDF_DIR / PATSHINKO_DATA_DIR / A2A_SYSTEM_DIR
 """
 
+import os
 import sys
 import json
+import time
 import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterator, Optional
 import hashlib
 
-# DeepSeek-OCR統合モジュールのインポート
-sys.path.insert(0, '/home/planj/Claude-Code-Communication')
-from a2a_system.ocr_processing.pdf_processor import PDFProcessor
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ocr_page_stream import OCRPageWriter, iter_ocr_pages
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+DEFAULT_PDF_DIR = os.environ.get('LECTURE_PDF_DIR', '/mnt/c/Users/planj/Downloads')
+DEFAULT_DATA_DIR = os.environ.get('PATSHINKO_DATA_DIR', '/home/planj/patshinko-exam-app/data')
+# DeepSeek-OCR統合モジュール（PyMuPDF が無い環境でのフォールバック）
+A2A_SYSTEM_DIR = os.environ.get('A2A_SYSTEM_DIR', '/home/planj/Claude-Code-Communication')
+
+PDF_FILE_NAMES = {1: "①.pdf", 2: "②.pdf", 3: "③.pdf"}
+
+# 1タスクで抽出するページ数（小さいほど負荷分散が均一、大きいほどPDFオープン回数が減る）
+PAGES_PER_TASK = 8
 
 logging.basicConfig(
     level=logging.INFO,
@@ -33,82 +62,154 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def calculate_text_hash(text: str) -> str:
+    """テキストのハッシュを計算"""
+    return hashlib.md5((text or '').encode('utf-8')).hexdigest()[:16]
+
+
+def _ocr_page(pdf_index: int, page_number: int, text: str, method: str) -> Dict:
+    """OCRフォーマットのページエントリ"""
+    text = text or ''
+    return {
+        "pdf_index": pdf_index,
+        "page_number": page_number,
+        "text": text,
+        "text_hash": calculate_text_hash(text),
+        "timestamp": datetime.now().isoformat(),
+        "extraction_method": method
+    }
+
+
+# ==================== プロセスプール用ワーカー ====================
+
+def _count_pdf_pages(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def _extract_page_range(pdf_index: int, pdf_path: str, start: int, stop: int) -> List[Dict]:
+    """PyMuPDFで [start, stop) のページを抽出（ページ番号は1始まり）"""
+    with fitz.open(pdf_path) as doc:
+        return [
+            _ocr_page(pdf_index, page_no + 1, doc[page_no].get_text(), "PyMuPDF_v2")
+            for page_no in range(start, stop)
+        ]
+
+
+def _extract_pdf_with_processor(pdf_index: int, pdf_path: str) -> List[Dict]:
+    """PyMuPDFが無い環境: DeepSeek-OCR統合モジュールでPDF単位に抽出"""
+    if A2A_SYSTEM_DIR not in sys.path:
+        sys.path.insert(0, A2A_SYSTEM_DIR)
+    from a2a_system.ocr_processing.pdf_processor import PDFProcessor
+
+    pages_data = PDFProcessor(max_workers=1).extract_text_by_page(pdf_path)
+    return [
+        _ocr_page(pdf_index, page_info['page'], page_info['text'], "PyMuPDF_v2")
+        for page_info in pages_data
+    ]
+
+
 class LectureOCRReprocessor:
     """講習テキスト再OCR処理エンジン"""
 
-    def __init__(self):
-        self.pdf_processor = PDFProcessor(max_workers=4)
-        self.pdf_files = {
-            1: "/mnt/c/Users/planj/Downloads/①.pdf",
-            2: "/mnt/c/Users/planj/Downloads/②.pdf",
-            3: "/mnt/c/Users/planj/Downloads/③.pdf"
+    def __init__(
+        self,
+        pdf_dir: str = DEFAULT_PDF_DIR,
+        old_ocr_path: Optional[str] = None,
+        output_dir: str = DEFAULT_DATA_DIR,
+        pdf_files: Optional[Dict[int, str]] = None,
+        workers: Optional[int] = None,
+        pages_per_task: int = PAGES_PER_TASK
+    ):
+        self.pdf_files = pdf_files or {
+            pdf_index: str(Path(pdf_dir) / name)
+            for pdf_index, name in PDF_FILE_NAMES.items()
         }
-        self.old_ocr_path = "/home/planj/patshinko-exam-app/data/ocr_results_corrected.json"
+        self.old_ocr_path = old_ocr_path or str(Path(DEFAULT_DATA_DIR) / "ocr_results_corrected.jsonl")
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.output_dir = Path("/home/planj/patshinko-exam-app/data")
+        self.output_dir = Path(output_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
 
     def load_old_ocr(self) -> List[Dict]:
         """現在のOCR結果をロード"""
         try:
-            with open(self.old_ocr_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return list(iter_ocr_pages(self.old_ocr_path))
         except Exception as e:
             logger.error(f"旧OCRロード失敗: {e}")
             return []
 
+    def _plan_tasks(self, pdf_indices) -> List[Tuple]:
+        """PDFをページ範囲タスクに分割"""
+        tasks = []
+        for pdf_index in pdf_indices:
+            pdf_path = self.pdf_files[pdf_index]
+            if fitz is None:
+                tasks.append((_extract_pdf_with_processor, pdf_index, pdf_path))
+                continue
+            try:
+                page_count = _count_pdf_pages(pdf_path)
+            except Exception as e:
+                logger.error(f"PDF {pdf_index} 処理エラー: {e}")
+                continue
+            for start in range(0, page_count, self.pages_per_task):
+                stop = min(start + self.pages_per_task, page_count)
+                tasks.append((_extract_page_range, pdf_index, pdf_path, start, stop))
+        return tasks
+
+    def iter_extracted_pages(self, pdf_indices=None) -> Iterator[List[Dict]]:
+        """
+        PDFを並列抽出し、完了したタスクのページ群から順に返す（完了順）
+
+        workers=1 の場合はプロセスプールを使わず直列に抽出
+        """
+        tasks = self._plan_tasks(sorted(self.pdf_files) if pdf_indices is None else pdf_indices)
+        logger.info(f"抽出タスク: {len(tasks)}件（{self.pages_per_task}ページ/タスク, workers={self.workers}）")
+
+        if self.workers == 1:
+            for func, pdf_index, *args in tasks:
+                try:
+                    yield func(pdf_index, *args)
+                except Exception as e:
+                    logger.error(f"PDF {pdf_index} 処理エラー: {e}")
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(func, pdf_index, *args): pdf_index for func, pdf_index, *args in tasks}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logger.error(f"PDF {futures[future]} 処理エラー: {e}")
+
     def extract_pdf_to_dict(self, pdf_index: int) -> List[Dict]:
         """PDFをページごとにテキスト抽出し、OCRフォーマットで返す"""
-        pdf_path = self.pdf_files[pdf_index]
-        logger.info(f"処理中: {pdf_path}")
-
-        try:
-            pages_data = self.pdf_processor.extract_text_by_page(pdf_path)
-
-            # OCRフォーマットに変換
-            results = []
-            total_chars = 0
-            for page_info in pages_data:
-                char_count = len(page_info['text']) if page_info['text'] else 0
-                result = {
-                    "pdf_index": pdf_index,
-                    "page_number": page_info['page'],
-                    "text": page_info['text'],
-                    "timestamp": datetime.now().isoformat(),
-                    "extraction_method": "PyMuPDF_v2"
-                }
-                results.append(result)
-                total_chars += char_count
-
-            logger.info(f"✅ PDF {pdf_index}: {len(results)}ページ抽出完了 (合計{total_chars:,}文字)")
-            return results
-        except Exception as e:
-            logger.error(f"PDF {pdf_index} 処理エラー: {e}")
-            return []
+        logger.info(f"処理中: {self.pdf_files[pdf_index]}")
+        results = [page for pages in self.iter_extracted_pages([pdf_index]) for page in pages]
+        results.sort(key=lambda p: p['page_number'])
+        total_chars = sum(len(p['text']) for p in results)
+        logger.info(f"✅ PDF {pdf_index}: {len(results)}ページ抽出完了 (合計{total_chars:,}文字)")
+        return results
 
     def reprocess_all_pdfs(self) -> List[Dict]:
-        """全3つのPDFを再処理"""
-        all_results = []
-        for pdf_index in [1, 2, 3]:
-            results = self.extract_pdf_to_dict(pdf_index)
-            all_results.extend(results)
+        """全3つのPDFを再処理（PDF・ページ範囲単位で並列）"""
+        all_results = [page for pages in self.iter_extracted_pages() for page in pages]
+        all_results.sort(key=lambda p: (p['pdf_index'], p['page_number']))
         return all_results
 
     def calculate_text_hash(self, text: str) -> str:
         """テキストのハッシュを計算"""
-        return hashlib.md5(text.encode('utf-8')).hexdigest()[:16]
+        return calculate_text_hash(text)
 
-    def perform_differential_analysis(
-        self,
-        old_ocr: List[Dict],
-        new_ocr: List[Dict]
-    ) -> Dict:
-        """新旧OCR結果の差分分析"""
-        logger.info("差分分析開始...")
+    def _page_hash(self, page: Dict) -> str:
+        # 保存済みの text_hash は本文の修正後に古くなっている場合があるため、常に本文から計算する
+        return calculate_text_hash(page['text'])
 
-        analysis = {
+    def _new_analysis(self, old_count: int) -> Dict:
+        return {
             "analysis_timestamp": datetime.now().isoformat(),
-            "old_ocr_count": len(old_ocr),
-            "new_ocr_count": len(new_ocr),
+            "old_ocr_count": old_count,
+            "new_ocr_count": 0,
             "page_differences": [],
             "summary": {
                 "total_pages": 0,
@@ -122,74 +223,127 @@ class LectureOCRReprocessor:
                 "old_total_chars": 0,
                 "new_total_chars": 0,
                 "char_count_change_percent": 0.0
-            }
+            },
+            "hash_skipped_pages": 0
         }
 
-        # ページマッピング作成
-        old_pages = {(p['pdf_index'], p['page_number']): p for p in old_ocr}
-        new_pages = {(p['pdf_index'], p['page_number']): p for p in new_ocr}
+    def _diff_page(self, analysis: Dict, pdf_idx: int, page_num: int,
+                   old_page: Optional[Dict], new_page: Optional[Dict]) -> Dict:
+        """1ページ分の差分を計算して集計に加算"""
+        page_diff = {
+            "pdf_index": pdf_idx,
+            "page_number": page_num,
+            "status": "",
+            "old_char_count": 0,
+            "new_char_count": 0,
+            "char_diff": 0,
+            "quality_change": ""
+        }
 
-        # 全ページキー
-        all_page_keys = set(old_pages.keys()) | set(new_pages.keys())
-        analysis['summary']['total_pages'] = len(all_page_keys)
+        if old_page and new_page:
+            old_chars = len(old_page['text'])
+            new_chars = len(new_page['text'])
 
-        for pdf_idx, page_num in sorted(all_page_keys):
-            old_page = old_pages.get((pdf_idx, page_num))
-            new_page = new_pages.get((pdf_idx, page_num))
+            page_diff['old_char_count'] = old_chars
+            page_diff['new_char_count'] = new_chars
+            page_diff['char_diff'] = new_chars - old_chars
 
-            page_diff = {
-                "pdf_index": pdf_idx,
-                "page_number": page_num,
-                "status": "",
-                "old_char_count": 0,
-                "new_char_count": 0,
-                "char_diff": 0,
-                "quality_change": ""
-            }
+            # ハッシュ一致（＝同一内容）なら本文比較を省略
+            if self._page_hash(old_page) == self._page_hash(new_page):
+                page_diff['status'] = "identical"
+                analysis['summary']['identical_pages'] += 1
+                analysis['hash_skipped_pages'] += 1
+            else:
+                if new_chars > old_chars * 1.05:
+                    page_diff['status'] = "improved"
+                    increase = f"+{(new_chars/old_chars - 1)*100:.1f}%" if old_chars else "新規"
+                    page_diff['quality_change'] = f"+{new_chars - old_chars}文字 ({increase})"
+                    analysis['summary']['improved_pages'] += 1
+                elif new_chars < old_chars * 0.95:
+                    page_diff['status'] = "degraded"
+                    page_diff['quality_change'] = f"{new_chars - old_chars}文字 ({(new_chars/old_chars - 1)*100:.1f}%)"
+                    analysis['summary']['degraded_pages'] += 1
+                else:
+                    page_diff['status'] = "changed"
+                    page_diff['quality_change'] = f"{new_chars - old_chars:+d}文字"
 
-            if old_page and new_page:
-                old_text = old_page['text']
-                new_text = new_page['text']
-                old_chars = len(old_text)
-                new_chars = len(new_text)
+        elif old_page and not new_page:
+            page_diff['status'] = "missing_in_new"
+            page_diff['old_char_count'] = len(old_page['text'])
+            analysis['summary']['missing_in_new'] += 1
 
-                page_diff['old_char_count'] = old_chars
-                page_diff['new_char_count'] = new_chars
-                page_diff['char_diff'] = new_chars - old_chars
+        elif not old_page and new_page:
+            page_diff['status'] = "missing_in_old"
+            page_diff['new_char_count'] = len(new_page['text'])
+            analysis['summary']['missing_in_old'] += 1
 
-                if old_text == new_text:
-                    page_diff['status'] = "identical"
-                    analysis['summary']['identical_pages'] += 1
-                else:
-                    if new_chars > old_chars * 1.05:
-                        page_diff['status'] = "improved"
-                        page_diff['quality_change'] = f"+{new_chars - old_chars}文字 (+{(new_chars/old_chars - 1)*100:.1f}%)"
-                        analysis['summary']['improved_pages'] += 1
-                    elif new_chars < old_chars * 0.95:
-                        page_diff['status'] = "degraded"
-                        page_diff['quality_change'] = f"{new_chars - old_chars}文字 ({(new_chars/old_chars - 1)*100:.1f}%)"
-                        analysis['summary']['degraded_pages'] += 1
-                    else:
-                        page_diff['status'] = "changed"
-                        page_diff['quality_change'] = f"{new_chars - old_chars:+d}文字"
-
-            elif old_page and not new_page:
-                page_diff['status'] = "missing_in_new"
-                page_diff['old_char_count'] = len(old_page['text'])
-                analysis['summary']['missing_in_new'] += 1
-
-            elif not old_page and new_page:
-                page_diff['status'] = "missing_in_old"
-                page_diff['new_char_count'] = len(new_page['text'])
-                analysis['summary']['missing_in_old'] += 1
-
-            analysis['page_differences'].append(page_diff)
-
-            if old_page:
-                analysis['quality_metrics']['old_total_chars'] += len(old_page['text'])
-            if new_page:
-                analysis['quality_metrics']['new_total_chars'] += len(new_page['text'])
+        analysis['summary']['total_pages'] += 1
+        analysis['page_differences'].append(page_diff)
 
+        if old_page:
+            analysis['quality_metrics']['old_total_chars'] += len(old_page['text'])
+        if new_page:
+            analysis['quality_metrics']['new_total_chars'] += len(new_page['text'])
+
+        return page_diff
+
+    def stream_differential_analysis(
+        self,
+        old_ocr: List[Dict],
+        new_page_batches,
+        diff_writer: Optional[OCRPageWriter] = None
+    ) -> Tuple[List[Dict], Dict]:
+        """
+        新OCRのページ群を受け取った順に旧OCRと差分計算（抽出と並行して逐次処理）
+
+        Args:
+            old_ocr: 旧OCR結果
+            new_page_batches: 新OCRページのリストのイテラブル（iter_extracted_pages など）
+            diff_writer: ページ別差分を逐次書き出すライター（省略可）
+
+        Returns:
+            (ページ順に並べた新OCR結果, 差分分析結果)
+        """
+        logger.info("差分分析開始...")
+
+        analysis = self._new_analysis(len(old_ocr))
+        old_pages = {(p['pdf_index'], p['page_number']): p for p in old_ocr}
+        new_ocr = []
+        seen = set()
+
+        for pages in new_page_batches:
+            for new_page in pages:
+                key = (new_page['pdf_index'], new_page['page_number'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_ocr.append(new_page)
+                page_diff = self._diff_page(analysis, *key, old_pages.get(key), new_page)
+                if diff_writer:
+                    diff_writer.write(page_diff)
+
+        # 新OCRに存在しないページ
+        for key in sorted(old_pages.keys() - seen):
+            page_diff = self._diff_page(analysis, *key, old_pages[key], None)
+            if diff_writer:
+                diff_writer.write(page_diff)
+
+        new_ocr.sort(key=lambda p: (p['pdf_index'], p['page_number']))
+        analysis['new_ocr_count'] = len(new_ocr)
+        analysis['page_differences'].sort(key=lambda d: (d['pdf_index'], d['page_number']))
+
+        return new_ocr, self._finish_analysis(analysis)
+
+    def perform_differential_analysis(
+        self,
+        old_ocr: List[Dict],
+        new_ocr: List[Dict]
+    ) -> Dict:
+        """新旧OCR結果の差分分析"""
+        _, analysis = self.stream_differential_analysis(old_ocr, [new_ocr])
+        return analysis
+
+    def _finish_analysis(self, analysis: Dict) -> Dict:
         # 文字数変化率を計算
         if analysis['quality_metrics']['old_total_chars'] > 0:
             change_percent = (
@@ -199,10 +353,11 @@ class LectureOCRReprocessor:
             )
             analysis['quality_metrics']['char_count_change_percent'] = round(change_percent, 2)
 
-        logger.info(f"✅ 差分分析完了: {len(all_page_keys)}ページ検証")
+        logger.info(f"✅ 差分分析完了: {analysis['summary']['total_pages']}ページ検証")
         logger.info(f"  同一: {analysis['summary']['identical_pages']}, " +
                    f"改善: {analysis['summary']['improved_pages']}, " +
                    f"変更: {analysis['summary']['degraded_pages']}")
+        logger.info(f"  ハッシュ一致で比較省略: {analysis['hash_skipped_pages']}ページ")
 
         return analysis
 
@@ -307,13 +462,11 @@ class LectureOCRReprocessor:
 ## 処理概要
 
 ### 対象ファイル
-- ①.pdf: /mnt/c/Users/planj/Downloads/①.pdf
-- ②.pdf: /mnt/c/Users/planj/Downloads/②.pdf
-- ③.pdf: /mnt/c/Users/planj/Downloads/③.pdf
+{chr(10).join(f"- {Path(path).name}: {path}" for path in self.pdf_files.values())}
 
 ### 処理方法
 - **エンジン**: PyMuPDF (fitz) v1.23.x
-- **方式**: ページごと独立抽出 + テキストブロック整形
+- **方式**: ページごと独立抽出 + テキストブロック整形（プロセスプール {self.workers}並列）
 - **品質**: 旧OCRとの比較分析により最適化
 
 ---
@@ -422,17 +575,20 @@ class LectureOCRReprocessor:
             logger.error("❌ 旧OCR結果のロードに失敗")
             return False
 
-        # ステップ2: 新OCR処理（全3PDF）
-        logger.info("\n【ステップ2】新OCR処理を実行中...")
-        new_ocr = self.reprocess_all_pdfs()
+        # ステップ2〜3: 新OCR処理（全3PDF・並列）と差分分析を並行実行
+        logger.info("\n【ステップ2〜3】新OCR処理と差分分析を実行中...")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        diff_pages_path = self.output_dir / f"ocr_differential_pages_{self.timestamp}.jsonl"
+        start = time.perf_counter()
+        with OCRPageWriter(diff_pages_path) as diff_writer:
+            new_ocr, analysis = self.stream_differential_analysis(
+                old_ocr, self.iter_extracted_pages(), diff_writer
+            )
+        logger.info(f"  抽出＋差分: {time.perf_counter() - start:.2f}秒 → {diff_pages_path}")
         if not new_ocr:
             logger.error("❌ 新OCR処理に失敗")
             return False
 
-        # ステップ3: 差分分析
-        logger.info("\n【ステップ3】差分分析を実行中...")
-        analysis = self.perform_differential_analysis(old_ocr, new_ocr)
-
         # ステップ4: 統合版作成
         logger.info("\n【ステップ4】統合版を作成中...")
         unified = self.create_unified_ocr(old_ocr, new_ocr, analysis)
@@ -454,9 +610,54 @@ class LectureOCRReprocessor:
         return True
 
 
+def run_benchmark(processor: LectureOCRReprocessor):
+    """直列抽出とプロセスプール抽出の所要時間を比較"""
+    workers = processor.workers
+    timings = {}
+    for label, count in (("直列", 1), (f"並列({workers})", workers)):
+        processor.workers = count
+        start = time.perf_counter()
+        pages = processor.reprocess_all_pdfs()
+        timings[label] = time.perf_counter() - start
+        print(f"   {label}: {len(pages)}ページ / {timings[label]:.2f}秒")
+    processor.workers = workers
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='講習テキスト再OCR処理（並列抽出・差分分析）')
+    parser.add_argument('--pdf-dir', default=DEFAULT_PDF_DIR, help='①〜③.pdf のあるディレクトリ')
+    parser.add_argument('--pdf', action='append', default=[], metavar='INDEX=PATH',
+                        help='PDFを個別指定（例: --pdf 1=a.pdf）')
+    parser.add_argument('--old-ocr', default=None, help='比較対象の旧OCR結果（.jsonl / .json）')
+    parser.add_argument('--output-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='プロセス数（1で直列）')
+    parser.add_argument('--pages-per-task', type=int, default=PAGES_PER_TASK)
+    parser.add_argument('--benchmark', action='store_true', help='直列/並列の抽出時間を比較して終了')
+    return parser.parse_args()
+
+
 def main():
     """エントリーポイント"""
-    processor = LectureOCRReprocessor()
+    args = parse_args()
+    pdf_files = None
+    if args.pdf:
+        pdf_files = {}
+        for spec in args.pdf:
+            index, _, path = spec.partition('=')
+            pdf_files[int(index)] = path
+
+    processor = LectureOCRReprocessor(
+        pdf_dir=args.pdf_dir,
+        old_ocr_path=args.old_ocr,
+        output_dir=args.output_dir,
+        pdf_files=pdf_files,
+        workers=args.workers,
+        pages_per_task=args.pages_per_task
+    )
+    if args.benchmark:
+        run_benchmark(processor)
+        return 0
+
     success = processor.run()
     return 0 if success else 1
 
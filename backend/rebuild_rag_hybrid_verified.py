@@ -6,10 +6,14 @@ RAGハイブリッド再構築 - 検証済みマッピング対応版
 
 import json
 import re
+import sys
 from pathlib import Path
 from collections import defaultdict
 from typing import Dict, List, Set
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lecture_page_store import read_theme_text
+
 def build_verified_hybrid_index():
     """検証済みマッピング用のハイブリッドインデックス構築"""
 
@@ -97,8 +101,7 @@ def build_verified_hybrid_index():
 
     # 講習ガイドラインの読み込み
     for lecture_file in sorted(lecture_dir.glob('theme_*.txt')):
-        with open(lecture_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = read_theme_text(lecture_file)
 
         filename = lecture_file.stem
         # theme_001_テーマ名 から テーマ名を抽出
@@ -10,9 +10,13 @@
 """
 
 import json
+import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from theme_classifier import KeywordRuleChain
+
 # 47テーママッピング（theme_mapping.mdベース）
 THEME_STRUCTURE = {
     "不正対策": {
@@ -108,132 +112,80 @@ OLD_CATEGORY_KEYWORDS = {
     "法改正": ["改正", "法律", "規定", "要件"]
 }
 
-def analyze_problem_text(problem_text: str, category: str) -> Tuple[str, str]:
-    """問題テキストを分析して、最適なテーマを決定"""
-
-    # 旧カテゴリをベースに主カテゴリを決定
-    main_category = None
-    theme_name = None
-
-    if category == "不正防止":
-        main_category = "不正対策"
-        if any(kw in problem_text for kw in ["改造", "パターン", "具体"]):
-            theme_name = "不正改造の具体的パターン"
-        elif any(kw in problem_text for kw in ["防止", "防ぐ", "対策"]):
-            theme_name = "不正改造の防止"
-        elif any(kw in problem_text for kw in ["検出", "検査", "発見"]):
-            theme_name = "不正検出技術"
-        elif any(kw in problem_text for kw in ["罰則", "罰", "処罰"]):
-            theme_name = "不正行為の罰則"
-        elif any(kw in problem_text for kw in ["チェック", "リスト", "確認"]):
-            theme_name = "不正防止チェックリスト"
-        elif any(kw in problem_text for kw in ["セキュリティ", "保安"]):
-            theme_name = "セキュリティ確保"
-        else:
-            theme_name = "不正改造の防止"
-
-    elif category == "営業時間":
-        main_category = "営業時間・規制"
-        if any(kw in problem_text for kw in ["停止", "停止命令", "業務停止"]):
-            theme_name = "営業停止命令"
-        elif any(kw in problem_text for kw in ["期間", "計算", "日数"]):
-            theme_name = "営業停止期間の計算"
-        elif any(kw in problem_text for kw in ["禁止日", "禁止", "休業"]):
-            theme_name = "営業禁止日"
-        elif any(kw in problem_text for kw in ["時間", "時間帯", "制限"]):
-            theme_name = "営業禁止時間"
-        else:
-            theme_name = "営業禁止時間"
-
-    elif category == "営業所基準":
-        main_category = "営業時間・規制"
-        if any(kw in problem_text for kw in ["停止", "命令"]):
-            theme_name = "営業停止命令"
-        elif any(kw in problem_text for kw in ["時間", "時間帯"]):
-            theme_name = "営業禁止時間"
-        elif any(kw in problem_text for kw in ["基準", "設置", "条件"]):
-            theme_name = "時間帯別営業制限"
-        else:
-            theme_name = "営業禁止時間"
-
-    elif category == "営業許可":
-        main_category = "営業許可関連"
-        if any(kw in problem_text for kw in ["取消", "失効", "廃止"]):
-            theme_name = "営業許可の取消し要件"
-        elif any(kw in problem_text for kw in ["要件", "条件", "資格"]):
-            theme_name = "営業許可取得の要件"
-        elif any(kw in problem_text for kw in ["手続き", "申請", "申請書"]):
-            theme_name = "営業許可の行政手続き"
-        elif any(kw in problem_text for kw in ["無期限", "有効", "期限"]):
-            theme_name = "営業許可は無期限有効"
-        else:
-            theme_name = "営業許可と営業実績の関係"
-
-    elif category == "資格要件":
-        main_category = "営業許可関連"
-        if any(kw in problem_text for kw in ["要件", "条件", "必要"]):
-            theme_name = "営業許可取得の要件"
-        elif any(kw in problem_text for kw in ["資格", "適性", "能力"]):
-            theme_name = "営業許可取得の要件"
-        else:
-            theme_name = "営業許可取得の要件"
-
-    elif category == "遊技機の認定":
-        main_category = "型式検定関連"
-        if any(kw in problem_text for kw in ["3年", "有効期間", "期間"]):
-            theme_name = "遊技機型式検定は3年有効"
-        elif any(kw in problem_text for kw in ["検定", "申請", "申請方法"]):
-            theme_name = "型式検定の申請方法"
-        elif any(kw in problem_text for kw in ["中古", "リユース", "流通"]):
-            theme_name = "型式検定と中古機の関係"
-        else:
-            theme_name = "遊技機型式検定は3年有効"
-
-    elif category == "遊技機の設置":
-        main_category = "遊技機管理"
-        if any(kw in problem_text for kw in ["新台", "導入", "新規設置"]):
-            theme_name = "新台設置の手続き"
-        elif any(kw in problem_text for kw in ["確認", "チェック", "検査"]):
-            theme_name = "新台導入時の確認事項"
-        elif any(kw in problem_text for kw in ["交換", "設置済み"]):
-            theme_name = "設置済み遊技機の交換手続き"
-        elif any(kw in problem_text for kw in ["保守", "管理", "メンテナンス"]):
-            theme_name = "遊技機の保守管理"
-        elif any(kw in problem_text for kw in ["点検", "定期", "計画"]):
-            theme_name = "遊技機の点検・保守計画"
-        else:
-            theme_name = "新台設置の手続き"
+# 旧カテゴリ → (主カテゴリ, 判定ルール, 該当なし時のテーマ)
+# 判定ルールは上から順に評価し、キーワードのいずれかを含む最初のルールのテーマを採用する
+REMAP_RULES = {
+    "不正防止": ("不正対策", [
+        ("不正改造の具体的パターン", ["改造", "パターン", "具体"]),
+        ("不正改造の防止", ["防止", "防ぐ", "対策"]),
+        ("不正検出技術", ["検出", "検査", "発見"]),
+        ("不正行為の罰則", ["罰則", "罰", "処罰"]),
+        ("不正防止チェックリスト", ["チェック", "リスト", "確認"]),
+        ("セキュリティ確保", ["セキュリティ", "保安"]),
+    ], "不正改造の防止"),
+    "営業時間": ("営業時間・規制", [
+        ("営業停止命令", ["停止", "停止命令", "業務停止"]),
+        ("営業停止期間の計算", ["期間", "計算", "日数"]),
+        ("営業禁止日", ["禁止日", "禁止", "休業"]),
+        ("営業禁止時間", ["時間", "時間帯", "制限"]),
+    ], "営業禁止時間"),
+    "営業所基準": ("営業時間・規制", [
+        ("営業停止命令", ["停止", "命令"]),
+        ("営業禁止時間", ["時間", "時間帯"]),
+        ("時間帯別営業制限", ["基準", "設置", "条件"]),
+    ], "営業禁止時間"),
+    "営業許可": ("営業許可関連", [
+        ("営業許可の取消し要件", ["取消", "失効", "廃止"]),
+        ("営業許可取得の要件", ["要件", "条件", "資格"]),
+        ("営業許可の行政手続き", ["手続き", "申請", "申請書"]),
+        ("営業許可は無期限有効", ["無期限", "有効", "期限"]),
+    ], "営業許可と営業実績の関係"),
+    "資格要件": ("営業許可関連", [
+        ("営業許可取得の要件", ["要件", "条件", "必要"]),
+        ("営業許可取得の要件", ["資格", "適性", "能力"]),
+    ], "営業許可取得の要件"),
+    "遊技機の認定": ("型式検定関連", [
+        ("遊技機型式検定は3年有効", ["3年", "有効期間", "期間"]),
+        ("型式検定の申請方法", ["検定", "申請", "申請方法"]),
+        ("型式検定と中古機の関係", ["中古", "リユース", "流通"]),
+    ], "遊技機型式検定は3年有効"),
+    "遊技機の設置": ("遊技機管理", [
+        ("新台設置の手続き", ["新台", "導入", "新規設置"]),
+        ("新台導入時の確認事項", ["確認", "チェック", "検査"]),
+        ("設置済み遊技機の交換手続き", ["交換", "設置済み"]),
+        ("遊技機の保守管理", ["保守", "管理", "メンテナンス"]),
+        ("遊技機の点検・保守計画", ["点検", "定期", "計画"]),
+    ], "新台設置の手続き"),
+    "景品規制": ("景品規制", [
+        ("景品の種類制限", ["種類", "制限", "限定"]),
+        ("景品交換の規制", ["交換", "交換方法", "景品交換"]),
+        ("リサイクル推進法との関係", ["リサイクル", "リユース"]),
+    ], "景品の種類制限"),
+    "監督・指導": ("営業時間・規制", [
+        ("違反時の行政処分", ["処分", "違反", "行政処分"]),
+        ("違反時の行政処分", ["指導", "指示", "監督", "命令"]),
+    ], "違反時の行政処分"),
+    "法改正": ("営業時間・規制", [], "時間帯別営業制限"),
+}
 
-    elif category == "景品規制":
-        main_category = "景品規制"
-        if any(kw in problem_text for kw in ["種類", "制限", "限定"]):
-            theme_name = "景品の種類制限"
-        elif any(kw in problem_text for kw in ["交換", "交換方法", "景品交換"]):
-            theme_name = "景品交換の規制"
-        elif any(kw in problem_text for kw in ["リサイクル", "リユース"]):
-            theme_name = "リサイクル推進法との関係"
-        else:
-            theme_name = "景品の種類制限"
+# 旧カテゴリが REMAP_RULES にない場合
+DEFAULT_MAPPING = ("遊技機管理", "遊技機の保守管理")
 
-    elif category == "監督・指導":
-        main_category = "営業時間・規制"
-        if any(kw in problem_text for kw in ["処分", "違反", "行政処分"]):
-            theme_name = "違反時の行政処分"
-        elif any(kw in problem_text for kw in ["指導", "指示", "監督", "命令"]):
-            theme_name = "違反時の行政処分"
-        else:
-            theme_name = "違反時の行政処分"
+# 旧カテゴリ → (主カテゴリ, コンパイル済みルール)
+REMAP_CHAINS = {
+    category: (main_category, KeywordRuleChain(rules, fallback))
+    for category, (main_category, rules, fallback) in REMAP_RULES.items()
+}
 
-    elif category == "法改正":
-        main_category = "営業時間・規制"
-        theme_name = "時間帯別営業制限"
+def analyze_problem_text(problem_text: str, category: str) -> Tuple[str, str]:
+    """問題テキストを分析して、最適なテーマを決定"""
 
-    # デフォルト
-    if not main_category:
-        main_category = "遊技機管理"
-        theme_name = "遊技機の保守管理"
+    # 旧カテゴリをベースに主カテゴリを決定
+    if category not in REMAP_CHAINS:
+        return DEFAULT_MAPPING
 
-    return main_category, theme_name
+    main_category, chain = REMAP_CHAINS[category]
+    return main_category, chain.classify(problem_text)
 
 def remap_500_problems():
     """500問を47テーマに再マッピング"""
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+API リクエストの計測（Prometheus テキスト形式）
+Flask の before_request / after_request でルートごとに
+- 処理時間のヒストグラム
+- リクエスト・レスポンスのサイズ（レスポンスはヒストグラム）
+- 1リクエストで発行した SQLite クエリ数のヒストグラム
+- ステータスコード別のリクエスト数
+を記録し、/api/metrics で返す
+
+SQLite クエリ数は CountingConnection（sqlite3.connect の factory）が数え、
+リクエスト処理中のスレッドならそのリクエストに、それ以外（定期再計算など）はバックグラウンドに計上する。
+書き込みキュー（ResultWriteQueue）のスレッドで実行したクエリは QueryMeter で1件ずつ数え、書き込みを待つリクエストに計上する。
+記録は bisect とロック1回の加算のみで、集計・整形は /api/metrics の取得時に行う
+"""
+
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# ==================== SQLite クエリ数 ====================
+
+_request_state = threading.local()
+_background_lock = threading.Lock()
+_background_queries = 0
+
+
+def count_query():
+    """クエリを1件計上（リクエスト処理中のスレッドならそのリクエストに計上）"""
+    global _background_queries
+    queries = getattr(_request_state, 'queries', None)
+    if queries is None:
+        with _background_lock:
+            _background_queries += 1
+    else:
+        _request_state.queries = queries + 1
+
+
+class QueryMeter:
+    """
+    別スレッドで代行したクエリを依頼元のリクエストに計上する（ResultWriteQueue の query_meter）
+    代行スレッドで start() 〜 stop() の間のクエリ数を数え、依頼元のスレッドで add() する
+    """
+
+    def start(self):
+        _request_state.queries = 0
+
+    def stop(self) -> int:
+        queries = getattr(_request_state, 'queries', None) or 0
+        _request_state.queries = None
+        return queries
+
+    def add(self, queries: int):
+        global _background_queries
+        if getattr(_request_state, 'queries', None) is None:
+            with _background_lock:
+                _background_queries += queries
+        else:
+            _request_state.queries += queries
+
+
+class CountingCursor(sqlite3.Cursor):
+    """execute / executemany / executescript の呼び出しを数えるカーソル"""
+
+    def execute(self, *args, **kwargs):
+        count_query()
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        count_query()
+        return super().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        count_query()
+        return super().executescript(*args, **kwargs)
+
+
+class CountingConnection(sqlite3.Connection):
+    """クエリ数を数える接続（sqlite3.connect(..., factory=CountingConnection)）"""
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        count_query()
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        count_query()
+        return super().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        count_query()
+        return super().executescript(*args, **kwargs)
+
+
+# ==================== ヒストグラム ====================
+
+class Histogram:
+    """固定バケットのヒストグラム（バケットごとの件数を持ち、出力時に累積する）"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, 累積件数) のリスト（最後は +Inf）"""
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            result.append((_format_number(bound), running))
+        result.append(('+Inf', running + self.counts[-1]))
+        return result
+
+
+class RouteMetrics:
+    """1ルート（メソッド × URL ルール）の計測値"""
+
+    __slots__ = ('latency', 'response_size', 'queries', 'request_bytes')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.request_bytes = 0
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+# ==================== リクエスト計測 ====================
+
+class RequestMetrics:
+    """ルートごとのリクエスト計測"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+        self.started_at = time.time()
+
+    def init_app(self, app, endpoint: str = '/api/metrics'):
+        """計測フックと計測値のエンドポイントを登録"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(endpoint, 'metrics', self.metrics_view, methods=['GET'])
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        _request_state.queries = 0
+
+    def _after_request(self, response):
+        started = g.pop('request_started', None)
+        queries = getattr(_request_state, 'queries', None) or 0
+        _request_state.queries = None
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            self.record(request.method, route, response.status_code, time.perf_counter() - started,
+                        request.content_length or 0, response.content_length or 0, queries)
+        return response
+
+    def record(self, method: str, route: str, status: int, seconds: float,
+               request_bytes: int, response_bytes: int, queries: int):
+        key = (method, route)
+        with self._lock:
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = RouteMetrics()
+            metrics.latency.observe(seconds)
+            metrics.response_size.observe(response_bytes)
+            metrics.queries.observe(queries)
+            metrics.request_bytes += request_bytes
+            status_key = (method, route, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def render(self) -> str:
+        """Prometheus テキスト形式で出力"""
+        with self._lock:
+            routes = {key: (metrics.latency.cumulative(), metrics.latency.total,
+                            metrics.response_size.cumulative(), metrics.response_size.total,
+                            metrics.queries.cumulative(), metrics.queries.total, metrics.request_bytes)
+                      for key, metrics in self._routes.items()}
+            statuses = dict(self._statuses)
+        with _background_lock:
+            background_queries = _background_queries
+
+        lines = [
+            '# HELP http_requests_total リクエスト数（ステータスコード別）',
+            '# TYPE http_requests_total counter'
+        ]
+        for (method, route, status), count in sorted(statuses.items()):
+            lines.append(f'http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}')
+
+        histograms = (
+            ('http_request_duration_seconds', 'リクエスト処理時間（秒）', 0),
+            ('http_response_size_bytes', 'レスポンスのサイズ（バイト）', 2),
+            ('http_request_sqlite_queries', '1リクエストで発行した SQLite クエリ数', 4)
+        )
+        for name, help_text, index in histograms:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (method, route), values in sorted(routes.items()):
+                buckets, total = values[index], values[index + 1]
+                labels = _labels(method=method, route=route)
+                for le, count in buckets:
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f'{name}_sum{{{labels}}} {_format_number(round(total, 6))}')
+                lines.append(f'{name}_count{{{labels}}} {buckets[-1][1]}')
+
+        lines.append('# HELP http_request_size_bytes_total リクエスト本文の合計サイズ（バイト）')
+        lines.append('# TYPE http_request_size_bytes_total counter')
+        for (method, route), values in sorted(routes.items()):
+            lines.append(f'http_request_size_bytes_total{{{_labels(method=method, route=route)}}} {values[6]}')
+
+        lines.append('# HELP sqlite_background_queries_total リクエスト外（書き込みキュー・定期集計）の SQLite クエリ数')
+        lines.append('# TYPE sqlite_background_queries_total counter')
+        lines.append(f'sqlite_background_queries_total {background_queries}')
+
+        lines.append('# HELP process_start_time_seconds 計測開始時刻（UNIX 時間）')
+        lines.append('# TYPE process_start_time_seconds gauge')
+        lines.append(f'process_start_time_seconds {self.started_at:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
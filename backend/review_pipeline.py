@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+マルチエージェント検証のストリーミングパイプライン
+Agent 2（法令チェック）→ Agent 3（修正案生成）→ Agent 4（承認）を、上限付きキューでつないだ並行ステージとして実行する
+
+【流れ】
+  入力 ─▶ [チェック × N] ─┬─ 修正不要 ─────────────────▶ [承認 × 1] ─▶ 結果
+                          └─ 修正必要 ─▶ [修正案 × M] ─┘
+法令チェックを通った問題はそのまま承認ステージへ進み、他の問題の修正案生成と並行して承認される。
+各ステージは GPT 呼び出し待ちが大半なのでスレッドで並行実行する
+
+【エラー】
+いずれかのステージで例外が出た問題は、それ以降のエージェントを呼ばずに承認ステージへ送り、
+status 'ERROR' の承認結果として記録する（ワーカーは止めずに次の問題を処理する）
+
+【メトリクス】
+ステージごとの処理件数・エラー件数・処理時間・スループット、キューごとの最大/平均の滞留数
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# キューの終端を表す番兵
+_DONE = object()
+
+
+class StageMetrics:
+    """1ステージの処理件数・処理時間"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: bool = False):
+        with self._lock:
+            self.processed += 1
+            self.busy_seconds += seconds
+            if error:
+                self.errors += 1
+
+    def to_dict(self, wall_seconds: float) -> Dict:
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "avg_seconds": round(self.busy_seconds / self.processed, 4) if self.processed else 0.0,
+            "throughput_per_sec": round(self.processed / wall_seconds, 2) if wall_seconds else 0.0
+        }
+
+
+class MonitoredQueue:
+    """put のたびに滞留数を記録する上限付きキュー"""
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.max_depth = 0
+        self._depth_total = 0
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        self.queue.put(item)
+        depth = self.queue.qsize()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_total += depth
+            self._samples += 1
+
+    def get(self):
+        return self.queue.get()
+
+    def to_dict(self) -> Dict:
+        return {
+            "maxsize": self.queue.maxsize,
+            "max_depth": self.max_depth,
+            "avg_depth": round(self._depth_total / self._samples, 2) if self._samples else 0.0
+        }
+
+
+class ReviewPipeline:
+    """
+    Agent 2 → 3 → 4 のストリーミング実行
+
+    Args:
+        checker: check_problem_accuracy(problem) を持つ Agent 2（LegalChecker）
+        suggester: suggest_correction(problem, check_result) を持つ Agent 3（CorrectionSuggester）
+        approver: approve_problem(problem, check_result, correction) を持つ Agent 4（ExpertApprovalWorkflow）
+        check_workers / correction_workers: 各ステージの並行数
+        queue_size: ステージ間キューの上限
+        on_result: 承認結果が出るたびに呼ぶ関数 (index, approval_result)
+    """
+
+    def __init__(self, checker, suggester, approver, check_workers: int = 4, correction_workers: int = 4,
+                 queue_size: int = 32, on_result=None):
+        self.checker = checker
+        self.suggester = suggester
+        self.approver = approver
+        self.check_workers = check_workers
+        self.correction_workers = correction_workers
+        self.queue_size = queue_size
+        self.on_result = on_result
+
+    @staticmethod
+    def _call(metrics: StageMetrics, func, *args):
+        """ステージの処理を呼び、(結果, エラー文字列) を返す"""
+        start = time.perf_counter()
+        try:
+            result, error = func(*args), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        metrics.record(time.perf_counter() - start, error is not None)
+        return result, error
+
+    @staticmethod
+    def _error_result(problem: Dict, stage: str, error: str) -> Dict:
+        """ステージで例外が出た問題の承認結果"""
+        return {
+            'problem_id': problem.get('problem_id', 'unknown'),
+            'original': problem.get('problem_text', ''),
+            'status': 'ERROR',
+            'approved_text': problem.get('problem_text', ''),
+            'reason': f"{stage}でエラー: {error}",
+            'expert_notes': '',
+            'timestamp': datetime.now().isoformat(),
+            'error': {'stage': stage, 'message': error}
+        }
+
+    def _check_worker(self, inbox: MonitoredQueue, to_correct: MonitoredQueue, to_approve: MonitoredQueue,
+                      metrics: StageMetrics, check_results: List):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            index, problem = item
+            check_result, error = self._call(metrics, self.checker.check_problem_accuracy, problem)
+            if error:
+                check_results[index] = {'problem_id': problem.get('problem_id', 'unknown'), 'error': error}
+                to_approve.put((index, problem, None, None, ('法令チェック', error)))
+                continue
+            check_results[index] = check_result
+
+            if check_result.get('needs_revision'):
+                to_correct.put((index, problem, check_result))
+            else:
+                to_approve.put((index, problem, check_result, None, None))
+
+    def _correction_worker(self, inbox: MonitoredQueue, to_approve: MonitoredQueue, metrics: StageMetrics,
+                           correction_results: List):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            index, problem, check_result = item
+            correction, error = self._call(metrics, self.suggester.suggest_correction, problem, check_result)
+            if error:
+                correction_results[index] = {'problem_id': problem.get('problem_id', 'unknown'), 'error': error}
+                to_approve.put((index, problem, check_result, None, ('修正案生成', error)))
+                continue
+            correction_results[index] = correction
+            to_approve.put((index, problem, check_result, correction, None))
+
+    def _approval_worker(self, inbox: MonitoredQueue, metrics: StageMetrics, approval_results: List):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            index, problem, check_result, correction, upstream_error = item
+            if upstream_error:
+                result = self._error_result(problem, *upstream_error)
+            else:
+                result, error = self._call(metrics, self.approver.approve_problem, problem, check_result, correction)
+                if error:
+                    result = self._error_result(problem, '承認', error)
+            approval_results[index] = result
+            if self.on_result:
+                try:
+                    self.on_result(index, result)
+                except Exception as e:
+                    print(f"⚠️  on_result でエラー: {e}")
+
+    def run(self, problems: List[Dict]) -> Dict:
+        """
+        全問題を流して結果を返す（各リストは入力順）
+
+        Returns:
+            {
+                'check_results': [...],        # 例外が出た問題は {'problem_id', 'error'}
+                'correction_results': [...],   # 修正案を生成した問題のみ（例外が出た問題は {'problem_id', 'error'}）
+                'approval_results': [...],
+                'metrics': {'wall_seconds', 'stages': {...}, 'queues': {...}}
+            }
+        """
+        total = len(problems)
+        check_results: List[Optional[Dict]] = [None] * total
+        correction_results: List[Optional[Dict]] = [None] * total
+        approval_results: List[Optional[Dict]] = [None] * total
+
+        inbox = MonitoredQueue("check", self.queue_size)
+        to_correct = MonitoredQueue("correction", self.queue_size)
+        to_approve = MonitoredQueue("approval", self.queue_size)
+        stages = {name: StageMetrics(name) for name in ("check", "correction", "approval")}
+
+        def start_workers(target, count, *args):
+            workers = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+            for worker in workers:
+                worker.start()
+            return workers
+
+        started = time.perf_counter()
+        checkers = start_workers(self._check_worker, self.check_workers,
+                                 inbox, to_correct, to_approve, stages["check"], check_results)
+        correctors = start_workers(self._correction_worker, self.correction_workers,
+                                   to_correct, to_approve, stages["correction"], correction_results)
+        approvers = start_workers(self._approval_worker, 1, to_approve, stages["approval"], approval_results)
+
+        for index, problem in enumerate(problems):
+            inbox.put((index, problem))
+
+        # 上流のワーカーが全て終わってから下流に番兵を流す
+        for workers, downstream, count in ((checkers, inbox, self.check_workers),
+                                           (correctors, to_correct, self.correction_workers),
+                                           (approvers, to_approve, 1)):
+            for _ in range(count):
+                downstream.put(_DONE)
+            for worker in workers:
+                worker.join()
+        wall_seconds = time.perf_counter() - started
+
+        return {
+            'check_results': check_results,
+            'correction_results': [c for c in correction_results if c is not None],
+            'approval_results': approval_results,
+            'metrics': {
+                'wall_seconds': round(wall_seconds, 3),
+                'stages': {name: metrics.to_dict(wall_seconds) for name, metrics in stages.items()},
+                'queues': {q.name: q.to_dict() for q in (inbox, to_correct, to_approve)}
+            }
+        }
+
+
+def print_metrics(metrics: Dict):
+    """パイプラインのメトリクスを表示"""
+    print(f"【パイプライン メトリクス】（全体 {metrics['wall_seconds']:.2f}秒）")
+    for name, stage in metrics['stages'].items():
+        print(f"  {name:10} 処理 {stage['processed']:5}件  エラー {stage['errors']:3}件  "
+              f"平均 {stage['avg_seconds'] * 1000:8.1f}ms  スループット {stage['throughput_per_sec']:8.2f}件/秒")
+    for name, depth in metrics['queues'].items():
+        print(f"  queue:{name:10} 最大滞留 {depth['max_depth']:3} / 上限 {depth['maxsize']:3}  "
+              f"平均 {depth['avg_depth']:.2f}")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+ソースカバレッジエンジン
+講習テーマ・風営法チャンク・問題を1回だけ語彙化して疎な語×文書行列を作り、
+「どのソースがどの問題を裏付けるか」「どのテーマのカバーが薄いか」を行列演算で求める
+
+【行列】
+- ソース行列 S（ソース × 語）: TF-IDF（1 + log tf）× idf を行ごとに L2 正規化
+- 問題行列 Q（問題 × 語）: ソースの idf で同様に重み付け
+- 裏付け行列 Q・Sᵀ（問題 × ソース）= コサイン類似度
+  S は語ごとの転置リスト（語 → [(ソース番号, 重み), ...]）で持ち、
+  問題の非ゼロ語だけを走査して疎な積を計算する
+
+【語】
+漢字・カタカナ連続部分の文字バイグラム + 英数字語（小文字化）
+"""
+
+import hashlib
+import json
+import math
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lecture_page_store import read_theme_text
+
+LECTURE_DIR = Path('rag_data/lecture_text')
+LEGAL_DIR = Path('rag_data/legal_references')
+DEFAULT_PROBLEMS_FILE = Path('data/old_problems/CORRECT_1491_PROBLEMS_WITH_LEGAL_REFS.json')
+
+SOURCE_LECTURE = "lecture"
+SOURCE_LEGAL = "legal"
+
+# これ以上の割合のソースに出現する語は識別力がないため転置リストから除く
+MAX_DOCUMENT_FREQUENCY = 0.5
+# コサイン類似度がこれ以上のソースを「裏付けあり」とする（問題文は短く講習ページは長いため低めに設定）
+SUPPORT_THRESHOLD = 0.05
+
+TERM_PATTERN = re.compile(r'[一-鿿゠-ヿ]+|[A-Za-z0-9]+')
+LEGAL_SECTION_PATTERN = re.compile(r'^## (.+)$', re.MULTILINE)
+
+
+def extract_terms(text):
+    """テキストの語（バイグラム・英数字語）の出現回数"""
+    terms = Counter()
+    for run in TERM_PATTERN.findall(text or ''):
+        if run.isascii():
+            if len(run) >= 2:
+                terms[run.lower()] += 1
+        else:
+            for i in range(len(run) - 1):
+                terms[run[i:i + 2]] += 1
+    return terms
+
+
+def load_lecture_sources(lecture_dir=LECTURE_DIR):
+    """講習テーマファイル → [(ソースID, テーマ名, 本文), ...]（1ファイル1回だけ読む）"""
+    sources = []
+    for path in sorted(Path(lecture_dir).glob('theme_*.txt')):
+        theme_name = '_'.join(path.stem.split('_')[2:])
+        sources.append((path.stem, theme_name, read_theme_text(path)))
+    return sources
+
+
+def load_legal_sources(legal_dir=LEGAL_DIR):
+    """風営法テキストを「## 第N条」見出し単位のチャンクに分割（同一本文は1チャンクにまとめる）"""
+    sources = []
+    seen = set()
+    for path in sorted(Path(legal_dir).glob('*.txt')):
+        parts = LEGAL_SECTION_PATTERN.split(path.read_text(encoding='utf-8'))
+        for i in range(1, len(parts), 2):
+            heading, body = parts[i].strip(), parts[i + 1].strip()
+            digest = hashlib.sha1(body.encode('utf-8')).hexdigest()
+            if not body or digest in seen:
+                continue
+            seen.add(digest)
+            sources.append((f"{path.stem}#{len(sources)}", heading, body))
+    return sources
+
+
+class SourceCoverageEngine:
+    """ソースの疎な TF-IDF 行列と、問題との裏付け行列の計算"""
+
+    def __init__(self, lecture_sources, legal_sources, max_df=MAX_DOCUMENT_FREQUENCY):
+        # ソース番号 → (種別, ソースID, ラベル)
+        self.sources = ([(SOURCE_LECTURE, source_id, label) for source_id, label, _ in lecture_sources] +
+                        [(SOURCE_LEGAL, source_id, label) for source_id, label, _ in legal_sources])
+        term_counts = [extract_terms(text) for _, _, text in lecture_sources] + \
+                      [extract_terms(text) for _, _, text in legal_sources]
+
+        document_frequency = Counter()
+        for counts in term_counts:
+            document_frequency.update(counts.keys())
+        total = len(term_counts)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1
+                    for term, df in document_frequency.items()
+                    if df / total <= max_df}
+
+        # 転置リスト（語 → [(ソース番号, 重み), ...]）= ソース行列の列方向表現
+        self.postings = defaultdict(list)
+        for index, counts in enumerate(term_counts):
+            for term, weight in self.vectorize_counts(counts).items():
+                self.postings[term].append((index, weight))
+
+    @property
+    def vocabulary_size(self):
+        return len(self.idf)
+
+    @property
+    def nonzero_count(self):
+        return sum(len(entries) for entries in self.postings.values())
+
+    def vectorize_counts(self, counts):
+        """語の出現回数 → L2 正規化した TF-IDF ベクトル（疎な dict）"""
+        vector = {term: (1 + math.log(count)) * self.idf[term]
+                  for term, count in counts.items() if term in self.idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def vectorize(self, text):
+        return self.vectorize_counts(extract_terms(text))
+
+    def similarity_row(self, text):
+        """1問分の裏付け行（ソース番号 → コサイン類似度、非ゼロのみ）"""
+        row = defaultdict(float)
+        for term, weight in self.vectorize(text).items():
+            for index, source_weight in self.postings.get(term, ()):
+                row[index] += weight * source_weight
+        return row
+
+    def similarity_matrix(self, texts):
+        """裏付け行列 Q・Sᵀ（問題ごとの疎な行のリスト）"""
+        return [self.similarity_row(text) for text in texts]
+
+    def best_sources(self, row, kind):
+        """行の中で種別 kind のソースの最大値 (ソース番号, 類似度)。なければ (None, 0.0)"""
+        best_index, best_score = None, 0.0
+        for index, score in row.items():
+            if self.sources[index][0] == kind and score > best_score:
+                best_index, best_score = index, score
+        return best_index, best_score
+
+
+def problem_text(problem):
+    """問題の採点対象テキスト（問題文 + 解説）"""
+    return f"{problem.get('problem_text', '')}\n{problem.get('explanation', '')}"
+
+
+def load_problems(path=DEFAULT_PROBLEMS_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['problems'] if isinstance(data, dict) else data
+
+
+def build_coverage_report(engine, problems, threshold=SUPPORT_THRESHOLD):
+    """
+    問題 × ソースの裏付け行列からカバレッジレポートを作る
+
+    Returns:
+        {
+          "problem_count", "supported", "lecture_supported", "legal_supported",
+          "unsupported": [problem_id, ...],
+          "themes": {テーマ名: {"problems", "supported_by_own_theme", "best_source_hits"}},
+          "under_covered_themes": [テーマ名, ...],
+          "unused_legal_sources": int
+        }
+    """
+    lecture_index = {label: index for index, (kind, _, label) in enumerate(engine.sources)
+                     if kind == SOURCE_LECTURE}
+    themes = {label: {"problems": 0, "supported_by_own_theme": 0, "best_source_hits": 0}
+              for label in lecture_index}
+    used_legal = set()
+    unsupported = []
+    lecture_supported = legal_supported = 0
+
+    for problem, row in zip(problems, engine.similarity_matrix(problem_text(p) for p in problems)):
+        lecture_best, lecture_score = engine.best_sources(row, SOURCE_LECTURE)
+        legal_best, legal_score = engine.best_sources(row, SOURCE_LEGAL)
+
+        if lecture_score >= threshold:
+            lecture_supported += 1
+            themes[engine.sources[lecture_best][2]]["best_source_hits"] += 1
+        if legal_score >= threshold:
+            legal_supported += 1
+            used_legal.add(legal_best)
+        if lecture_score < threshold and legal_score < threshold:
+            unsupported.append(problem.get('problem_id'))
+
+        theme_name = problem.get('theme_name')
+        if theme_name in themes:
+            themes[theme_name]["problems"] += 1
+            if row.get(lecture_index[theme_name], 0.0) >= threshold:
+                themes[theme_name]["supported_by_own_theme"] += 1
+
+    # 自テーマの講習ソースで裏付けられる問題が半数未満、または問題が1つもないテーマ
+    under_covered = [label for label, stats in themes.items()
+                     if stats["problems"] == 0 or stats["supported_by_own_theme"] * 2 < stats["problems"]]
+    legal_total = sum(1 for kind, _, _ in engine.sources if kind == SOURCE_LEGAL)
+
+    return {
+        "problem_count": len(problems),
+        "supported": len(problems) - len(unsupported),
+        "lecture_supported": lecture_supported,
+        "legal_supported": legal_supported,
+        "unsupported": unsupported,
+        "themes": themes,
+        "under_covered_themes": under_covered,
+        "unused_legal_sources": legal_total - len(used_legal)
+    }
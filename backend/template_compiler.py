@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+問題テンプレートのコンパイル・キャッシュ
+「{スロット名}」を含むテンプレート文字列を、リテラル列とスロット参照列に1回だけ分解し、
+位置引数の format 文字列として一括充填する
+
+【コンパイル形式】
+  "{対象物}について…{本文}。"
+  → literals = ["", "について…", "。"], slot_refs = ["対象物", "本文"]
+  同じスロットが複数回現れる場合は同じ値で埋める（str.replace による充填と同じ結果）
+
+【キャッシュ】
+config/question_templates_detailed.yaml の各テンプレートの pattern をコンパイルし、
+config/question_templates_compiled.json に保存する。
+YAML のハッシュが一致する間はキャッシュを読むだけで、PyYAML も不要
+"""
+
+import hashlib
+import json
+import re
+from itertools import islice, product, starmap
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / 'config'
+TEMPLATES_YAML = CONFIG_DIR / 'question_templates_detailed.yaml'
+COMPILED_CACHE = CONFIG_DIR / 'question_templates_compiled.json'
+
+SLOT_PATTERN = re.compile(r'\{([^{}\n]+)\}')
+
+
+class CompiledTemplate:
+    """スロット分解済みのテンプレート"""
+
+    def __init__(self, literals: List[str], slot_refs: List[str]):
+        self.literals = literals
+        self.slot_refs = slot_refs
+        # 充填時の引数順（初出順の重複なしスロット名）
+        self.slots = list(dict.fromkeys(slot_refs))
+        index = {slot: i for i, slot in enumerate(self.slots)}
+        escaped = [literal.replace('{', '{{').replace('}', '}}') for literal in literals]
+        self._format = ''.join(
+            literal + '{' + str(index[slot]) + '}' for literal, slot in zip(escaped, slot_refs)
+        ) + escaped[-1]
+
+    @classmethod
+    def compile(cls, text: str) -> 'CompiledTemplate':
+        parts = SLOT_PATTERN.split(text)
+        return cls(parts[0::2], parts[1::2])
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CompiledTemplate':
+        return cls(data['literals'], data['slot_refs'])
+
+    def to_dict(self) -> Dict:
+        return {'literals': self.literals, 'slot_refs': self.slot_refs}
+
+    @property
+    def source(self) -> str:
+        """元のテンプレート文字列"""
+        return ''.join(literal + '{' + slot + '}'
+                       for literal, slot in zip(self.literals, self.slot_refs)) + self.literals[-1]
+
+    def fill(self, values: Dict[str, object]) -> str:
+        """スロットを値で埋める（値のないスロットは「{スロット名}」のまま残す）"""
+        return self._format.format(*(values[slot] if slot in values else '{' + slot + '}'
+                                     for slot in self.slots))
+
+    def fill_many(self, slot_values: Dict[str, List[object]], limit: Optional[int] = None) -> Iterator[str]:
+        """
+        スロットごとの候補値の全組み合わせを充填して順に返す
+
+        組み合わせは self.slots の順の直積（最後のスロットが最も速く変わる）。
+        候補値のないスロットは「{スロット名}」のまま残す
+        """
+        choices = [slot_values[slot] if slot in slot_values else ['{' + slot + '}']
+                   for slot in self.slots]
+        filled = starmap(self._format.format, product(*choices))
+        return islice(filled, limit) if limit is not None else filled
+
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def compile_yaml_templates(yaml_path: Path = TEMPLATES_YAML) -> Dict[str, Dict]:
+    """YAML の各テンプレートを {id: {"name", "compiled"}} にコンパイル"""
+    if yaml is None:
+        raise ImportError("テンプレートの再コンパイルには PyYAML が必要です (pip install pyyaml)")
+
+    with open(yaml_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+
+    return {
+        template['id']: {
+            'name': template.get('name', ''),
+            'compiled': CompiledTemplate.compile(template['pattern'])
+        }
+        for template in data.get('templates', [])
+        if template.get('pattern')
+    }
+
+
+def load_compiled_templates(yaml_path: Path = TEMPLATES_YAML,
+                            cache_path: Path = COMPILED_CACHE) -> Dict[str, CompiledTemplate]:
+    """
+    コンパイル済みテンプレートを {テンプレートID: CompiledTemplate} で返す
+
+    キャッシュの source_hash が YAML と一致すればキャッシュを使い、
+    一致しなければ再コンパイルしてキャッシュを書き直す
+    """
+    yaml_path, cache_path = Path(yaml_path), Path(cache_path)
+    source_hash = _file_hash(yaml_path)
+
+    if cache_path.exists():
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('source_hash') == source_hash:
+            return {template_id: CompiledTemplate.from_dict(entry)
+                    for template_id, entry in cache['templates'].items()}
+
+    compiled = compile_yaml_templates(yaml_path)
+    cache = {
+        'source': yaml_path.name,
+        'source_hash': source_hash,
+        'templates': {
+            template_id: {'name': entry['name'], **entry['compiled'].to_dict(),
+                          'slots': entry['compiled'].slots}
+            for template_id, entry in compiled.items()
+        }
+    }
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(cache_path)
+
+    return {template_id: entry['compiled'] for template_id, entry in compiled.items()}
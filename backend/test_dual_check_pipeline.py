@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+DualCheckPipeline のテスト（偽プロバイダ、API不要）
+1. 結果が入力順に並ぶ
+2. 同時に処理する問題数がワーカー数を超えない
+3. requests_per_minute でリクエスト間隔が空く
+4. CheckProvider.call（書き換え・再検証）もチェックと同じレート制限を受ける
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dual_check_pipeline import DualCheckPipeline, FakeProvider
+
+PROBLEMS = [{'problem_id': i} for i in range(1, 21)]
+
+
+class CountingProvider(FakeProvider):
+    """同時実行数とリクエスト開始時刻を記録する偽プロバイダ"""
+
+    def __init__(self, name, **kwargs):
+        super().__init__(name, **kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = []
+
+    async def _fake_check(self, problem, context):
+        self.started.append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await super()._fake_check(problem, context)
+        finally:
+            self.in_flight -= 1
+
+
+def assert_spaced(times, interval):
+    """k 番目のリクエストが最初のリクエストから k × interval 以降に始まっている（スリープの誤差は許容）"""
+    times = sorted(times)
+    for k, started in enumerate(times):
+        assert started - times[0] >= k * interval - 0.005, (k, started - times[0])
+
+
+def test_keeps_input_order():
+    """結果が入力順に並ぶ"""
+    providers = [FakeProvider('gpt5', latency=0.001, jitter=0.01, seed=1, flagged_ids=[3]),
+                 FakeProvider('claude', latency=0.001, jitter=0.01, seed=2)]
+    pipeline = DualCheckPipeline(providers, workers=4)
+    results = asyncio.run(pipeline.run(PROBLEMS))
+
+    assert [r['problem']['problem_id'] for r in results] == [p['problem_id'] for p in PROBLEMS]
+    assert '❌' in results[2]['checks']['gpt5']
+    assert all('✅' in r['checks']['claude'] for r in results)
+    assert pipeline.processed == len(PROBLEMS)
+
+
+def test_respects_worker_limit():
+    """同時に処理する問題数がワーカー数を超えない"""
+    provider = CountingProvider('gpt5', latency=0.005)
+    pipeline = DualCheckPipeline([provider], workers=3)
+    asyncio.run(pipeline.run(PROBLEMS))
+
+    assert provider.max_in_flight == 3
+    assert len(provider.started) == len(PROBLEMS)
+
+
+def test_respects_requests_per_minute():
+    """requests_per_minute でリクエスト間隔が空く"""
+    provider = CountingProvider('gpt5', latency=0.0, requests_per_minute=1200)  # 0.05秒間隔
+    pipeline = DualCheckPipeline([provider], workers=4)
+    asyncio.run(pipeline.run(PROBLEMS[:6]))
+
+    assert_spaced(provider.started, 0.05)
+
+
+def test_call_shares_rate_limit():
+    """CheckProvider.call もチェックと同じレート制限を受ける"""
+    provider = CountingProvider('gpt5', latency=0.0, requests_per_minute=1200)
+    call_times = []
+
+    async def rewrite(problem):
+        call_times.append(time.monotonic())
+        return f"書き換え{problem['problem_id']}"
+
+    async def on_checked(index, problem, checks):
+        return await provider.call(rewrite, problem)
+
+    pipeline = DualCheckPipeline([provider], workers=2)
+    results = asyncio.run(pipeline.run(PROBLEMS[:4], on_checked=on_checked))
+
+    assert results == [f"書き換え{p['problem_id']}" for p in PROBLEMS[:4]]
+    assert_spaced(provider.started + call_times, 0.05)
+
+
+def run_all_tests():
+    for test in (test_keeps_input_order, test_respects_worker_limit,
+                 test_respects_requests_per_minute, test_call_shares_rate_limit):
+        test()
+        print(f"✅ {test.__doc__}")
+
+
+if __name__ == "__main__":
+    run_all_tests()
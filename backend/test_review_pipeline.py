@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+ReviewPipeline のエラー処理テスト
+1. 法令チェックで例外が出ても run() が終わり、その問題だけ ERROR になる
+2. 修正案生成で例外が出た問題は ERROR になる
+3. 承認で例外が出た問題は ERROR になる
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from review_pipeline import ReviewPipeline
+
+PROBLEMS = [{'problem_id': i, 'problem_text': f'問題{i}'} for i in range(1, 11)]
+
+
+class StubChecker:
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+
+    def check_problem_accuracy(self, problem):
+        if problem['problem_id'] in self.fail_ids:
+            raise RuntimeError('API タイムアウト')
+        return {'problem_id': problem['problem_id'], 'issues': [],
+                'needs_revision': problem['problem_id'] % 2 == 0}
+
+
+class StubSuggester:
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+
+    def suggest_correction(self, problem, check_result):
+        if problem['problem_id'] in self.fail_ids:
+            raise ValueError('修正案の JSON が不正')
+        return {'problem_id': problem['problem_id'], 'corrected_text': problem['problem_text'] + '（修正）'}
+
+
+class StubApprover:
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+
+    def approve_problem(self, problem, check_result, correction):
+        if problem['problem_id'] in self.fail_ids:
+            raise KeyError('status')
+        status = 'REVISION_APPROVED' if correction else 'APPROVED'
+        return {'problem_id': problem['problem_id'], 'status': status}
+
+
+def run_pipeline(checker, suggester, approver, timeout=10):
+    """別スレッドで run() を実行し、timeout 秒以内に終わることを確認して結果を返す"""
+    pipeline = ReviewPipeline(checker, suggester, approver, check_workers=1, correction_workers=1, queue_size=2)
+    output = {}
+    thread = threading.Thread(target=lambda: output.update(result=pipeline.run(PROBLEMS)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'run() が終了しない'
+    return output['result']
+
+
+def statuses(result):
+    return {r['problem_id']: r['status'] for r in result['approval_results']}
+
+
+def test_check_error():
+    """法令チェックの例外"""
+    result = run_pipeline(StubChecker(fail_ids={3}), StubSuggester(), StubApprover())
+
+    status = statuses(result)
+    assert status[3] == 'ERROR'
+    assert all(status[i] != 'ERROR' for i in status if i != 3)
+    assert 'RuntimeError' in result['check_results'][2]['error']
+    assert result['approval_results'][2]['error']['stage'] == '法令チェック'
+    assert result['metrics']['stages']['check']['errors'] == 1
+
+
+def test_correction_error():
+    """修正案生成の例外"""
+    result = run_pipeline(StubChecker(), StubSuggester(fail_ids={4}), StubApprover())
+
+    status = statuses(result)
+    assert status[4] == 'ERROR'
+    assert status[2] == 'REVISION_APPROVED'
+    assert status[1] == 'APPROVED'
+    assert result['approval_results'][3]['error']['stage'] == '修正案生成'
+
+
+def test_approval_error():
+    """承認の例外"""
+    result = run_pipeline(StubChecker(), StubSuggester(), StubApprover(fail_ids={5, 6}))
+
+    status = statuses(result)
+    assert status[5] == status[6] == 'ERROR'
+    assert sum(1 for s in status.values() if s == 'ERROR') == 2
+    assert None not in result['approval_results']
+    assert result['metrics']['stages']['approval']['errors'] == 2
+
+
+def run_all_tests():
+    for test in (test_check_error, test_correction_error, test_approval_error):
+        test()
+        print(f"✅ {test.__doc__}")
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -6,8 +6,12 @@ Ultra Think: 講習ガイドラインの全テーマを体系的に分析
 
 import re
 from pathlib import Path
+import sys
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lecture_page_store import read_theme_text
+
 def analyze_lecture_guide():
     """講習ガイドラインの全テーマを徹底分析"""
 
@@ -33,8 +37,7 @@ def analyze_lecture_guide():
         theme_num = parts[0]  # theme_001など
         theme_name = parts[2]  # テーマ名
 
-        with open(theme_file, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        content = read_theme_text(theme_file)
 
         # テーマ別分析
         print(f"【{theme_num}: {theme_name}】")
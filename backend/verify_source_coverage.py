@@ -4,11 +4,17 @@
 両ソースで実際に存在するテーマを特定し、47テーマの問題を洗い出す
 """
 
-import re
+import sys
+import time
 from pathlib import Path
-from collections import defaultdict
 
-def analyze_source_coverage():
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from source_coverage_engine import (DEFAULT_PROBLEMS_FILE, SUPPORT_THRESHOLD, SourceCoverageEngine,
+                                    build_coverage_report, load_legal_sources, load_lecture_sources,
+                                    load_problems)
+
+def analyze_source_coverage(problems_path=DEFAULT_PROBLEMS_FILE):
     """両ソースの完全比較分析"""
 
     print("=" * 80)
@@ -171,14 +177,17 @@ def analyze_source_coverage():
     print("【疑わしいテーマ検証】")
     print("=" * 80)
 
-    lecture_dir = Path('rag_data/lecture_text')
+    # 講習テーマ・風営法チャンクは1回だけ読み込んで語×文書行列にする
+    start = time.perf_counter()
+    lecture_sources = load_lecture_sources()
+    engine = SourceCoverageEngine(lecture_sources, load_legal_sources())
+    build_elapsed = time.perf_counter() - start
 
     suspicious_theme = "営業許可と営業実績の関係"
-    theme_file = list(lecture_dir.glob(f"*{suspicious_theme}*"))
+    theme_texts = {label: text for _, label, text in lecture_sources}
 
-    if theme_file:
-        with open(theme_file[0], 'r', encoding='utf-8') as f:
-            content = f.read()
+    if suspicious_theme in theme_texts:
+        content = theme_texts[suspicious_theme]
 
         print(f"\n【{suspicious_theme}】")
         print(f"  サイズ: {len(content):,}文字")
@@ -186,6 +195,33 @@ def analyze_source_coverage():
         print(f"  内容サンプル:")
         print(f"  {content[:200]}...")
 
+    # 問題 × ソースの裏付け行列
+    print("\n" + "=" * 80)
+    print("【問題の裏付けカバレッジ】")
+    print("=" * 80)
+
+    problems = load_problems(problems_path)
+    start = time.perf_counter()
+    report = build_coverage_report(engine, problems)
+    report_elapsed = time.perf_counter() - start
+
+    total = report['problem_count']
+    print(f"\n  対象: {problems_path} ({total}問)")
+    print(f"  行列: ソース{len(engine.sources)}件 × 語彙{engine.vocabulary_size:,}語 "
+          f"(非ゼロ {engine.nonzero_count:,}) 構築 {build_elapsed:.2f}秒 / 裏付け計算 {report_elapsed:.2f}秒")
+    print(f"  裏付けあり（類似度 ≥ {SUPPORT_THRESHOLD}）: {report['supported']}/{total}問")
+    print(f"    講習ガイドライン: {report['lecture_supported']}問")
+    print(f"    風営法: {report['legal_supported']}問")
+    print(f"  裏付けなし: {len(report['unsupported'])}問")
+    print(f"  どの問題も裏付けていない風営法チャンク: {report['unused_legal_sources']}件")
+
+    if report['under_covered_themes']:
+        print("\n  ⚠️  カバー不足テーマ（自テーマの講習ソースで裏付けられる問題が半数未満）:")
+        for theme in report['under_covered_themes']:
+            stats = report['themes'][theme]
+            print(f"    - {theme:30} 問題 {stats['problems']:3} / 自テーマ裏付け {stats['supported_by_own_theme']:3}"
+                  f" / 最有力ソース {stats['best_source_hits']:3}")
+
     # サマリー
     print("\n" + "=" * 80)
     print("【結論と対応】")
@@ -201,4 +237,4 @@ def analyze_source_coverage():
             print(f"  [{cat}] {theme}")
 
 if __name__ == "__main__":
-    analyze_source_coverage()
+    analyze_source_coverage(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROBLEMS_FILE)
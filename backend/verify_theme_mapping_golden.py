@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+テーマ分類器のゴールデン出力検証
+500問を4種類のマッピングで一括再分類し、保存済みのマッピング結果と1件ずつ照合する
+
+【照合対象】
+- backend/problems_500_precise_verified.json   （map_to_precise_theme）
+- backend/problems_500_41theme_verified.json   （analyze_problem_for_verified_theme）
+- backend/problems_500_remapped_47themes.json  （analyze_problem_text）
+- backend/problems_500_lecture_filtered.json   （map_problem_to_theme）
+
+実行: python3 backend/verify_theme_mapping_golden.py（リポジトリのルートで）
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from build_41theme_verified_mapping import analyze_problem_for_verified_theme
+from build_precise_source_keywords import map_many_to_precise_theme
+from create_lecture_based_filter import build_filter_classifier, build_lecture_filter
+from remap_500_problems_to_47themes import analyze_problem_text
+
+SOURCE_FILE = 'backend/problems_final_500_complete.json'
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(name, golden_path, actual, fields):
+    """actual（問題ごとのタプル）とゴールデン出力の fields を照合し、不一致数を返す"""
+    golden = load_json(golden_path)
+    if len(golden) != len(actual):
+        print(f"❌ {name}: 件数不一致 ({len(actual)} != {len(golden)})")
+        return max(len(golden), len(actual))
+
+    mismatches = [
+        (i, got, tuple(expected.get(field) for field in fields))
+        for i, (got, expected) in enumerate(zip(actual, golden))
+        if tuple(got) != tuple(expected.get(field) for field in fields)
+    ]
+    mark = "✅" if not mismatches else "❌"
+    print(f"{mark} {name}: {len(actual) - len(mismatches)}/{len(actual)}問一致")
+    for i, got, expected in mismatches[:5]:
+        print(f"    #{i}: {got} != {expected}")
+    return len(mismatches)
+
+
+def main():
+    problems = load_json(SOURCE_FILE)
+    texts = [p.get('problem_text', '') for p in problems]
+    results = {}
+
+    start = time.perf_counter()
+    results['precise'] = map_many_to_precise_theme(texts)
+    results['verified'] = [analyze_problem_for_verified_theme(text) for text in texts]
+    results['remapped'] = [analyze_problem_text(p.get('problem_text', ''), p.get('category', '未分類'))
+                           for p in problems]
+    mapping_elapsed = time.perf_counter() - start
+
+    classifier = build_filter_classifier(build_lecture_filter())
+    start = time.perf_counter()
+    results['lecture'] = [(theme,) for theme, _ in classifier.classify_many(texts)]
+    mapping_elapsed += time.perf_counter() - start
+
+    print(f"【{len(problems)}問 × 4マッピング: {mapping_elapsed * 1000:.1f}ms】\n")
+
+    failures = 0
+    failures += compare("厳密ソースキーワード", 'backend/problems_500_precise_verified.json',
+                        results['precise'], ['verified_category', 'verified_theme', 'keyword_match_score'])
+    failures += compare("41テーマ検証済み", 'backend/problems_500_41theme_verified.json',
+                        results['verified'], ['verified_category', 'verified_theme'])
+    failures += compare("47テーマ再マッピング", 'backend/problems_500_remapped_47themes.json',
+                        results['remapped'], ['new_main_category', 'new_theme'])
+    failures += compare("講習ガイドラインフィルター", 'backend/problems_500_lecture_filtered.json',
+                        results['lecture'], ['lecture_based_theme'])
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
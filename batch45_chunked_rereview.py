@@ -1,33 +1,63 @@
 #!/usr/bin/env python3
 """
 Batch 4-5 再レビュー修復処理（チャンク化対応）
-140問と78問を70+70, 40+38に分割して処理
+モデルの入出力上限に合わせて動的にチャンク分割し、問題ごとの結果をジャーナルへ逐次保存
+採点行が欠けた問題は1問ずつ再送信し、中断しても再実行すれば最後にコミットされた問題から再開する
 """
 
 import json
 import os
+import re
 from openai import OpenAI
 import time
 
+from batch_job_runner import estimate_tokens, run_batch_job
+from prompt_packer import PromptPacker
+
 api_key = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=api_key)
 
-def process_batch_rereview_chunked(batch_name, total_problems, chunk_size):
+MODEL = "gpt-5-mini"
+
+# 1リクエストあたりの最大出力トークン
+MAX_COMPLETION_TOKENS = 16000
+
+# 採点1行あたりの出力トークン見積り（推論トークン込み）
+OUTPUT_TOKENS_PER_PROBLEM = 200
+
+# 「ID: スコア点 | ✅/⚠️/❌ | 理由」形式の1行
+REVIEW_LINE_PATTERN = re.compile(r'^\s*(?:ID\s*)?(\d+)\s*[:：]\s*(\d+)\s*点\s*\|\s*(✅|⚠️|❌)[^|]*\|\s*(.*)$')
+
+
+def format_problem_line(problem):
+    """プロンプトに埋め込む問題1行"""
+    return f"{problem['problem_id']}: [{problem['theme_name']}] {problem['problem_text'][:70]}... 答:{problem['correct_answer']}"
+
+
+def parse_review_results(text):
+    """採点結果テキストを問題ID単位に分解"""
+    results = {}
+    for line in text.splitlines():
+        match = REVIEW_LINE_PATTERN.match(line)
+        if match:
+            problem_id, score, verdict, reason = match.groups()
+            results[problem_id] = {
+                'score': int(score),
+                'verdict': verdict,
+                'line': line.strip(),
+                'reason': reason.strip()
+            }
+    return results
+
+
+def process_batch_rereview_chunked(batch_name):
     """バッチをチャンク処理して再レビュー実施"""
-    
-    print(f"\n{'='*70}")
-    print(f"🚀 {batch_name} チャンク処理再レビュー開始")
-    print(f"{'='*70}")
-    print(f"   総問題数: {total_problems}問")
-    print(f"   チャンクサイズ: {chunk_size}問")
-    print(f"   開始: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("")
-    
+
     # Load correction results
     correction_file = f"data/{batch_name.upper()}_CORRECTION_RESULTS.txt"
     with open(correction_file, 'r', encoding='utf-8') as f:
         correction_content = f.read()
-    
+
     # Load original data
     if batch_name == "batch4":
         with open('data/BATCH_4_REVIEW_DATA.json', 'r', encoding='utf-8') as f:
@@ -37,31 +67,26 @@ def process_batch_rereview_chunked(batch_name, total_problems, chunk_size):
         with open('data/BATCH_5_REVIEW_DATA.json', 'r', encoding='utf-8') as f:
             batch_data = json.load(f)
         problems = batch_data['problems']
-    
-    all_results = []
-    
-    # Process chunks
-    num_chunks = (total_problems + chunk_size - 1) // chunk_size
-    
-    for chunk_idx in range(num_chunks):
-        start_idx = chunk_idx * chunk_size
-        end_idx = min((chunk_idx + 1) * chunk_size, total_problems)
-        chunk_problems = problems[start_idx:end_idx]
-        chunk_num = chunk_idx + 1
-        
-        print(f"⏳ Chunk {chunk_num}/{num_chunks}: 問題 {chunk_problems[0]['problem_id']}-{chunk_problems[-1]['problem_id']} ({len(chunk_problems)}問)")
-        
+
+    total_problems = len(problems)
+    journal_file = f"data/{batch_name.upper()}_REREVIEW_JOURNAL.jsonl"
+
+    print(f"\n{'='*70}")
+    print(f"🚀 {batch_name} チャンク処理再レビュー開始")
+    print(f"{'='*70}")
+    print(f"   総問題数: {total_problems}問")
+    print(f"   ジャーナル: {journal_file}")
+    print(f"   開始: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print("")
+
+    # Use only small portion of correction content to stay within limits
+    correction_preview = correction_content[:1500]
+
+    def build_prompt(chunk_problems):
         # Create prompt for this chunk
-        problems_str = "\n".join([
-            f"{p['problem_id']}: [{p['theme_name']}] {p['problem_text'][:70]}... 答:{p['correct_answer']}"
-            for p in chunk_problems
-        ])
-        
-        # Use only small portion of correction content to stay within limits
-        correction_preview = correction_content[:1500]
-        
+        problems_str = "\n".join(format_problem_line(p) for p in chunk_problems)
+
         prompt = f"""【再評価対象】主任者講習試験・法律問題 {len(chunk_problems)}問（{batch_name.upper()} 修正後）
-チャンク {chunk_num}/{num_chunks}
 
 【修正内容の一部】
 {correction_preview}
@@ -82,54 +107,68 @@ def process_batch_rereview_chunked(batch_name, total_problems, chunk_size):
 修正後の全{len(chunk_problems)}問を上記基準で採点してください：
 
 {problems_str}"""
-        
-        try:
-            response = client.chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {"role": "system", "content": "主任者講習試験問題の厳密な評価者。修正後の問題を採点してください。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_completion_tokens=16000
-            )
-            
-            result = response.choices[0].message.content
-            all_results.append(result)
-            
-            # Count results for this chunk
-            pass_count = result.count('✅')
-            improve_count = result.count('⚠️')
-            fail_count = result.count('❌')
-            
-            print(f"   ✅ {pass_count}問 | ⚠️ {improve_count}問 | ❌ {fail_count}問")
-            print(f"   トークン: {response.usage.prompt_tokens + response.usage.completion_tokens}トークン")
-            
-        except Exception as e:
-            print(f"   ❌ エラー: {e}")
-            return False
-        
-        # Small delay between chunks
-        if chunk_idx < num_chunks - 1:
-            time.sleep(2)
-    
-    # Merge all results
-    merged_result = "\n".join(all_results)
-    
+        return prompt
+
+    def call_model(prompt, max_tokens):
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": "主任者講習試験問題の厳密な評価者。修正後の問題を採点してください。"},
+                {"role": "user", "content": prompt}
+            ],
+            max_completion_tokens=max_tokens
+        )
+        print(f"   トークン: {response.usage.prompt_tokens + response.usage.completion_tokens}トークン")
+        return response.choices[0].message.content
+
+    # 入力上限と出力上限（採点行数 × 見積り）の両方に収まるよう詰め込む
+    packer = PromptPacker(MODEL, estimate_tokens(build_prompt([])), OUTPUT_TOKENS_PER_PROBLEM,
+                          max_output_tokens=MAX_COMPLETION_TOKENS)
+    cost = lambda p: estimate_tokens(format_problem_line(p))
+
+    def review_chunk(chunk_problems):
+        results = packer.review(chunk_problems, build_prompt, call_model,
+                                lambda p: p['problem_id'], parse=parse_review_results)
+        verdicts = [r['verdict'] for r in results.values()]
+
+        print(f"   ✅ {verdicts.count('✅')}問 | ⚠️ {verdicts.count('⚠️')}問 | ❌ {verdicts.count('❌')}問")
+
+        return results
+
+    summary = run_batch_job(
+        problems,
+        review_chunk,
+        journal_file,
+        item_id=lambda p: p['problem_id'],
+        cost=cost,
+        delay=2,
+        chunker=lambda pending: packer.pack(pending, cost)
+    )
+
+    if not summary['completed']:
+        print(f"\n❌ {batch_name.upper()} は未完了です（{len(summary['results'])}/{total_problems}問コミット済み）")
+        return False
+
+    # Render results in original problem order from the journal
+    records = [summary['results'][str(p['problem_id'])] for p in problems]
+    merged_result = "\n\n".join(r['line'] for r in records)
+
     # Save merged results
     output_file = f"data/{batch_name.upper()}_REREVIEW_RESULTS.txt"
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(f"【{batch_name.upper()} Stage 3 - 再レビュー結果（チャンク処理版）】\n")
         f.write(f"実施: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
         f.write(f"対象: {total_problems}問（修正後の最終評価）\n")
-        f.write(f"モデル: gpt-5-mini（チャンク処理: {num_chunks}分割）\n")
+        f.write(f"モデル: {MODEL}（トークン予算チャンク処理: {summary['chunks']}分割 / {packer.requests}リクエスト）\n")
         f.write("=" * 70 + "\n\n")
         f.write(merged_result)
-    
+
     # Final statistics
-    total_pass = merged_result.count('✅')
-    total_improve = merged_result.count('⚠️')
-    total_fail = merged_result.count('❌')
-    
+    verdicts = [r['verdict'] for r in records]
+    total_pass = verdicts.count('✅')
+    total_improve = verdicts.count('⚠️')
+    total_fail = verdicts.count('❌')
+
     print(f"\n✅ {batch_name.upper()} チャンク処理完了")
     print(f"   保存先: {output_file}")
     print(f"   【最終統計】")
@@ -137,25 +176,22 @@ def process_batch_rereview_chunked(batch_name, total_problems, chunk_size):
     print(f"   ⚠️  要改善: {total_improve}問")
     print(f"   ❌ 不合格: {total_fail}問")
     print(f"   計: {total_pass + total_improve + total_fail}問")
-    
+
     return True
 
 # Main execution
 if __name__ == "__main__":
     print("🔧 Batch 4-5 チャンク処理再レビュー実行")
     print("")
-    
-    # Batch 4: 140問を70+70に分割
-    success_b4 = process_batch_rereview_chunked("batch4", 140, 70)
-    
-    # Batch 5: 78問を40+38に分割
-    success_b5 = process_batch_rereview_chunked("batch5", 78, 40)
-    
+
+    # チャンクサイズはモデルの入出力上限から自動決定（旧: 70+70, 40+38 の手動分割）
+    success_b4 = process_batch_rereview_chunked("batch4")
+    success_b5 = process_batch_rereview_chunked("batch5")
+
     if success_b4 and success_b5:
         print("\n" + "="*70)
         print("🎉 全チャンク処理完了！")
         print("="*70)
         print("これでBackend実装が自動開始できます")
     else:
-        print("\n❌ 処理に失敗した項目があります")
-
+        print("\n❌ 処理に失敗した項目があります（再実行で続きから再開します）")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+チェックポイント付きバッチジョブランナー
+問題単位の結果を追記専用JSONLジャーナルへ逐次書き込み、
+中断後は最後にコミットされた問題から再開する
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+# 1リクエストあたりの入力トークン予算（手動の70+70, 40+38分割の代替）
+DEFAULT_TOKEN_BUDGET = 6000
+
+
+def estimate_tokens(text):
+    """トークン数の概算（日本語は1文字≒1トークン、ASCIIは4文字≒1トークン）"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def chunk_by_token_budget(items, cost, token_budget=DEFAULT_TOKEN_BUDGET, max_items=None):
+    """
+    推定トークン数の合計が予算を超えないようにアイテムをチャンク化
+
+    単体で予算を超えるアイテムは1件だけのチャンクとして出力する
+    """
+    chunk = []
+    used = 0
+    for item in items:
+        tokens = cost(item)
+        over_budget = chunk and used + tokens > token_budget
+        over_count = max_items is not None and len(chunk) >= max_items
+        if over_budget or over_count:
+            yield chunk
+            chunk = []
+            used = 0
+        chunk.append(item)
+        used += tokens
+    if chunk:
+        yield chunk
+
+
+# ==================== ジャーナル ====================
+
+class JobJournal:
+    """追記専用JSONLジャーナル（1行 = コミット済み1アイテム）"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.records = {}
+        self._load()
+
+    def _load(self):
+        """既存ジャーナルを読み込み、書き込み途中の末尾行は切り捨てる"""
+        if not self.path.exists():
+            return
+
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(raw.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                self.records[record['item_id']] = record
+                valid_bytes += len(raw)
+
+        if valid_bytes < self.path.stat().st_size:
+            print(f"⚠️ ジャーナル末尾の未完了レコードを破棄: {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+    def is_committed(self, item_id):
+        return str(item_id) in self.records
+
+    def commit(self, item_id, result):
+        """1アイテムの結果を追記し、ディスクへ確実に書き出す"""
+        record = {
+            'item_id': str(item_id),
+            'committed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'result': result
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.records[record['item_id']] = record
+
+    def results(self):
+        """コミット済み結果（item_id → result）"""
+        return {item_id: record['result'] for item_id, record in self.records.items()}
+
+
+# ==================== ランナー ====================
+
+def run_batch_job(items, process_chunk, journal_path, item_id, cost,
+                  token_budget=DEFAULT_TOKEN_BUDGET, max_items=None, delay=0, chunker=None):
+    """
+    再開可能なバッチジョブを実行
+
+    Args:
+        items: 処理対象アイテムのリスト
+        process_chunk: チャンク（アイテムのリスト）を受け取り
+            {item_id: result} を返す関数。返らなかったアイテムは未コミットのまま残る
+        journal_path: 追記専用JSONLジャーナルのパス
+        item_id: アイテムからIDを取り出す関数
+        cost: アイテムの推定トークン数を返す関数
+        token_budget: 1チャンクあたりのトークン予算
+        max_items: 1チャンクあたりの最大件数（任意）
+        delay: チャンク間の待機秒数
+        chunker: 未処理アイテム → チャンクのリスト（省略時は token_budget による分割。
+            モデルの入出力上限に合わせる場合は PromptPacker.pack を渡す）
+
+    Returns:
+        {'total', 'resumed', 'committed', 'missing', 'chunks', 'completed', 'results'}
+    """
+    journal = JobJournal(journal_path)
+    pending = [item for item in items if not journal.is_committed(item_id(item))]
+    resumed = len(items) - len(pending)
+
+    if resumed:
+        print(f"♻️ ジャーナルから再開: {resumed}件コミット済み / 残り{len(pending)}件")
+
+    if chunker:
+        chunks = list(chunker(pending))
+    else:
+        chunks = list(chunk_by_token_budget(pending, cost, token_budget, max_items))
+    committed = 0
+    missing = []
+    completed = True
+
+    for chunk_idx, chunk in enumerate(chunks):
+        chunk_tokens = sum(cost(item) for item in chunk)
+        print(f"⏳ Chunk {chunk_idx + 1}/{len(chunks)}: {item_id(chunk[0])}-{item_id(chunk[-1])} "
+              f"({len(chunk)}件, 推定{chunk_tokens}トークン)")
+
+        try:
+            results = process_chunk(chunk)
+        except Exception as e:
+            print(f"   ❌ エラー: {e}")
+            print(f"   💾 {committed}件をコミット済み。再実行で続きから再開します")
+            completed = False
+            break
+
+        results = {str(key): value for key, value in results.items()}
+        for item in chunk:
+            key = str(item_id(item))
+            if key in results:
+                journal.commit(key, results[key])
+                committed += 1
+            else:
+                missing.append(key)
+
+        if chunk_idx < len(chunks) - 1 and delay:
+            time.sleep(delay)
+
+    if missing:
+        print(f"⚠️ 結果が得られなかったアイテム: {len(missing)}件（再実行で再処理）")
+        completed = False
+
+    return {
+        'total': len(items),
+        'resumed': resumed,
+        'committed': committed,
+        'missing': missing,
+        'chunks': len(chunks),
+        'completed': completed,
+        'results': journal.results()
+    }
@@ -2,15 +2,25 @@
 """
 講習テキストOCRデータをRAGデータベースに変換
 47テーマ別にテキストファイルを生成
+OCR結果（JSONL）をページ単位で1回だけ走査し、条文抽出とテーマ分類を同時に行う
+テーマ分類は全キーワードを1つのオートマトンにコンパイルして1ページ1回の走査で行い、
+ページ本文は lecture_text/pages.jsonl に1回だけ保存（テーマファイルはページ参照のみ）
 """
 
-import json
 import re
+import sys
 from pathlib import Path
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from keyword_automaton import ThemeKeywordMatcher
+from lecture_page_store import (
+    PAGES_FILE_NAME, make_page_id, render_page_ref, render_theme_header, write_theme_index
+)
+from ocr_page_stream import OCRPageWriter, iter_ocr_pages
+
 # パス設定
-OCR_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results_corrected.json")
+OCR_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results_corrected.jsonl")
 RAG_BASE = Path("/home/planj/patshinko-exam-app/rag_data")
 LECTURE_DIR = RAG_BASE / "lecture_text"
 LEGAL_DIR = RAG_BASE / "legal_references"
@@ -77,14 +87,33 @@ THEMES = {
     "中古遊技機の流通管理": {"category": "遊技機管理", "keywords": ["流通", "流通管理", "中古流通"]},
 }
 
+# 全テーマのキーワードを1回だけコンパイル
+THEME_MATCHER = ThemeKeywordMatcher({name: info['keywords'] for name, info in THEMES.items()})
+
 
 def load_ocr_data():
-    """OCRデータをロード"""
-    print(f"📂 {OCR_FILE} をロード中...")
-    with open(OCR_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    print(f"  ✅ {len(data)} ページをロード")
-    return data
+    """OCRデータをページ単位で順に返す（ジェネレータ）"""
+    print(f"📂 {OCR_FILE} をストリーム読み込み")
+    return iter_ocr_pages(OCR_FILE)
+
+
+def add_legal_references(legal_sections, page):
+    """1ページから風営法条文を抽出して legal_sections に追加"""
+    text = page.get('text', '')
+    page_num = page.get('page_number', 0)
+
+    # 風営法条文のパターン検出
+    if re.search(r'第\d+条|風営法|風俗営業等の規制', text):
+        # 条文番号を抽出
+        article_matches = re.findall(r'第(\d+)条', text)
+        for article in article_matches:
+            article_num = int(article)
+            section_key = f"{(article_num-1)//10 * 10 + 1}〜{((article_num-1)//10 + 1) * 10}"
+            legal_sections[section_key].append({
+                'page': page_num,
+                'text': text,
+                'article': article_num
+            })
 
 
 def extract_legal_references(ocr_pages):
@@ -92,73 +121,94 @@ def extract_legal_references(ocr_pages):
     legal_sections = defaultdict(list)
 
     for page in ocr_pages:
-        text = page.get('text', '')
-        page_num = page.get('page_number', 0)
-
-        # 風営法条文のパターン検出
-        if re.search(r'第\d+条|風営法|風俗営業等の規制', text):
-            # 条文番号を抽出
-            article_matches = re.findall(r'第(\d+)条', text)
-            for article in article_matches:
-                article_num = int(article)
-                section_key = f"{(article_num-1)//10 * 10 + 1}〜{((article_num-1)//10 + 1) * 10}"
-                legal_sections[section_key].append({
-                    'page': page_num,
-                    'text': text,
-                    'article': article_num
-                })
+        add_legal_references(legal_sections, page)
 
     return legal_sections
 
 
 def classify_page_by_theme(page_text, page_num):
     """ページを47テーマに分類"""
-    matched_themes = []
-
-    for theme_name, theme_info in THEMES.items():
-        keywords = theme_info['keywords']
-
-        # キーワードマッチングスコア計算
-        score = sum(1 for keyword in keywords if keyword in page_text)
-
-        if score > 0:
-            matched_themes.append({
-                'theme': theme_name,
-                'category': theme_info['category'],
-                'score': score,
-                'page': page_num
-            })
-
-    return matched_themes
-
-
-def create_theme_files(ocr_pages):
-    """テーマ別RAGファイル作成"""
+    # キーワードマッチングスコア計算（全テーマを1回の走査で）
+    return [
+        {
+            'theme': theme_name,
+            'category': THEMES[theme_name]['category'],
+            'score': score,
+            'page': page_num
+        }
+        for theme_name, score in THEME_MATCHER.matches(page_text)
+    ]
+
+
+def add_page_to_themes(theme_contents, page, page_writer=None, stored_ids=None):
+    """
+    1ページをテーマ分類して theme_contents にページ参照を追加
+
+    page_writer を渡すと、いずれかのテーマに該当したページの本文を1回だけ書き出す
+    """
+    text = page.get('text', '')
+    page_num = page.get('page_number', 0)
+
+    if not text.strip():
+        return
+
+    # テーマ分類
+    matched = classify_page_by_theme(text, page_num)
+    if not matched:
+        return
+
+    page_id = make_page_id(page_num, text)
+    if page_writer is not None and page_id not in stored_ids:
+        stored_ids.add(page_id)
+        page_writer.write({
+            'page_id': page_id,
+            'page_number': page_num,
+            'pdf_index': page.get('pdf_index'),
+            'text': text
+        })
+
+    for match in matched:
+        theme_name = match['theme']
+        theme_contents[theme_name].append({
+            'page': page_num,
+            'page_id': page_id,
+            'score': match['score']
+        })
+
+
+def build_rag_index(ocr_pages, page_writer=None):
+    """
+    OCRページを1回だけ走査し、条文抽出とテーマ分類を同時に行う
+
+    Args:
+        page_writer: テーマに該当したページ本文の書き出し先（lecture_text/pages.jsonl）
+
+    Returns:
+        (legal_sections, theme_contents)
+    """
+    legal_sections = defaultdict(list)
     theme_contents = defaultdict(list)
+    stored_ids = set()
 
-    print("\n📊 各ページを47テーマに分類中...")
+    print("\n📊 各ページを条文抽出・47テーマに分類中...")
 
+    page_count = 0
     for page in ocr_pages:
-        text = page.get('text', '')
-        page_num = page.get('page_number', 0)
-
-        if not text.strip():
-            continue
+        add_legal_references(legal_sections, page)
+        add_page_to_themes(theme_contents, page, page_writer, stored_ids)
+        page_count += 1
 
-        # テーマ分類
-        matched = classify_page_by_theme(text, page_num)
+    print(f"  ✅ {page_count} ページを処理")
+    return legal_sections, theme_contents
 
-        for match in matched:
-            theme_name = match['theme']
-            theme_contents[theme_name].append({
-                'page': page_num,
-                'text': text,
-                'score': match['score']
-            })
 
+def create_theme_files(theme_contents):
+    """テーマ別RAGファイル作成（本文は pages.jsonl、テーマファイルはページ参照のみ）"""
     # テーマ別ファイルに保存
     print("\n💾 テーマ別ファイルを作成中...")
 
+    theme_index = {}
+
     for idx, (theme_name, pages) in enumerate(sorted(theme_contents.items()), 1):
         if not pages:
             print(f"  ⚠️  {theme_name}: データなし")
@@ -169,26 +219,31 @@ def create_theme_files(ocr_pages):
         filepath = LECTURE_DIR / filename
 
         # コンテンツ生成
-        content = f"# {theme_name}\n\n"
-        content += f"**カテゴリ**: {THEMES[theme_name]['category']}\n"
-        content += f"**キーワード**: {', '.join(THEMES[theme_name]['keywords'])}\n"
-        content += f"**ページ数**: {len(pages)}\n\n"
-        content += "---\n\n"
+        content = render_theme_header(
+            theme_name, THEMES[theme_name]['category'], THEMES[theme_name]['keywords'], len(pages)
+        )
 
-        # ページ内容をスコア順にソート
+        # ページ参照をスコア順にソート
         sorted_pages = sorted(pages, key=lambda x: x['score'], reverse=True)
 
         for page_info in sorted_pages:
-            content += f"## ページ {page_info['page']} (関連度: {page_info['score']})\n\n"
-            content += page_info['text']
-            content += "\n\n---\n\n"
+            content += render_page_ref(page_info['page'], page_info['score'], page_info['page_id'])
 
         # ファイル保存
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(content)
 
+        theme_index[theme_name] = {
+            'file': filename,
+            'category': THEMES[theme_name]['category'],
+            'keywords': THEMES[theme_name]['keywords'],
+            'pages': [[page_info['page_id'], page_info['score']] for page_info in sorted_pages]
+        }
+
         print(f"  ✅ {filename}: {len(pages)}ページ")
 
+    write_theme_index(LECTURE_DIR, theme_index)
+
     return theme_contents
 
 
@@ -270,15 +325,16 @@ def main():
     print("講習テキストRAG化スクリプト")
     print("=" * 80)
 
-    # OCRデータロード
-    ocr_pages = load_ocr_data()
+    # OCRデータをストリーム読み込みし、条文抽出・テーマ分類を1パスで実施
+    # （テーマに該当したページ本文は pages.jsonl へ1回だけ書き出す）
+    with OCRPageWriter(LECTURE_DIR / PAGES_FILE_NAME) as page_writer:
+        legal_sections, theme_contents = build_rag_index(load_ocr_data(), page_writer)
 
-    # 風営法条文抽出
-    legal_sections = extract_legal_references(ocr_pages)
+    # 風営法条文ファイル作成
     create_legal_files(legal_sections)
 
     # テーマ別ファイル作成
-    theme_contents = create_theme_files(ocr_pages)
+    create_theme_files(theme_contents)
 
     # マッピングドキュメント作成
     create_mapping_document(theme_contents)
@@ -12,6 +12,9 @@ from pathlib import Path
 from collections import Counter
 from difflib import SequenceMatcher
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lecture_page_store import read_theme_text
+
 INPUT_FILE = Path("/home/planj/patshinko-exam-app/data/PROBLEMS_FIXED_1491.json")
 OUTPUT_FILE = Path("/home/planj/patshinko-exam-app/data/PROBLEMS_FINAL_1491_v3.json")
 RAG_DIR = Path("/home/planj/patshinko-exam-app/rag_data/lecture_text")
@@ -49,8 +52,7 @@ class RAGBasedGenerator:
 
         for theme_file in theme_files:
             try:
-                with open(theme_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = read_theme_text(theme_file)
 
                 # テーマ名抽出
                 theme_match = re.search(r'^# (.+)$', content, re.MULTILINE)
@@ -2,10 +2,23 @@
 """
 SQLiteデータベーススキーマ設計
 問題・テスト結果・採点情報を効率的に格納
+
+接続は ConnectionPool で使い回し、テスト1回分（結果・回答・カテゴリー別成績）は
+insert_attempt で1トランザクションにまとめて書き込む。
+同じトランザクション内で learning_history・user_category_stats・user_statistics の集計値も加算更新するため、
+ユーザーの成績・苦手カテゴリーは test_answers を集計せずに1行の参照で取得できる。
+ユーザーごとの出題済み問題は question_history に問題IDのビット列（ProblemBitset）として保持する。
+問題ごとの正答率（question_difficulty）は DifficultyRefreshJob がバックグラウンドで learning_history から再計算する。
+API からの書き込みは ResultWriteQueue が1スレッドで受け、同時に届いた複数回分を1回のコミットにまとめる
 """
 
+import queue
 import sqlite3
 import json
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 
@@ -103,6 +116,18 @@ CREATE TABLE IF NOT EXISTS learning_history (
 
 CREATE INDEX IF NOT EXISTS idx_learning_history_user ON learning_history(user_id);
 CREATE INDEX IF NOT EXISTS idx_learning_history_question ON learning_history(question_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_learning_history_user_question ON learning_history(user_id, question_id);
+
+-- ==================== ユーザー別カテゴリー成績テーブル ====================
+
+CREATE TABLE IF NOT EXISTS user_category_stats (
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total_answered INTEGER DEFAULT 0,
+    total_correct INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, category)
+);
 
 -- ==================== ユーザー統計テーブル ====================
 
@@ -120,6 +145,39 @@ CREATE TABLE IF NOT EXISTS user_statistics (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ==================== 出題履歴テーブル ====================
+
+-- seen_bitmap: 問題ID i を出題済みなら (i >> 3) バイト目の (i & 7) ビットが 1
+CREATE TABLE IF NOT EXISTS question_history (
+    user_id TEXT PRIMARY KEY,
+    seen_bitmap BLOB NOT NULL,
+    seen_count INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ==================== 問題別正答率テーブル ====================
+
+CREATE TABLE IF NOT EXISTS question_difficulty (
+    question_id INTEGER PRIMARY KEY,
+    attempts INTEGER DEFAULT 0,
+    correct_attempts INTEGER DEFAULT 0,
+    correct_rate REAL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ==================== 項目統計テーブル（backend/item_statistics.py が一括更新） ====================
+
+CREATE TABLE IF NOT EXISTS item_statistics (
+    question_id INTEGER PRIMARY KEY,
+    responses INTEGER NOT NULL,
+    correct_rate REAL,
+    discrimination REAL,
+    time_p50 REAL,
+    time_p90 REAL,
+    measured_difficulty TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ==================== メタデータテーブル ====================
 
 CREATE TABLE IF NOT EXISTS metadata (
@@ -139,14 +197,114 @@ INSERT OR IGNORE INTO metadata (key, value) VALUES
     ('app_version', '1.0.0');
 """
 
+# ==================== 出題履歴ビット列 ====================
+
+# 出題履歴に記録できる問題IDの上限（ビット列は最大 MAX_PROBLEM_ID / 8 バイト）
+MAX_PROBLEM_ID = 100000
+
+
+def _is_problem_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+class ProblemBitset:
+    """問題IDの集合をビット列で表したもの（問題ID i → i ビット目）"""
+
+    __slots__ = ('bits', 'max_id')
+
+    def __init__(self, data=b'', max_id=MAX_PROBLEM_ID):
+        self.bits = bytearray(data)
+        self.max_id = max_id
+
+    def __contains__(self, problem_id):
+        if not _is_problem_id(problem_id):
+            return False
+        index = problem_id >> 3
+        return index < len(self.bits) and bool(self.bits[index] >> (problem_id & 7) & 1)
+
+    def add(self, problem_id):
+        """問題IDを追加（新たに追加した場合 True、上限 max_id を超える問題IDは ValueError）"""
+        if not _is_problem_id(problem_id) or problem_id in self:
+            return False
+        if problem_id > self.max_id:
+            raise ValueError(f"問題ID {problem_id} が上限 {self.max_id} を超えています")
+        index = problem_id >> 3
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index + 1 - len(self.bits)))
+        self.bits[index] |= 1 << (problem_id & 7)
+        return True
+
+    def __len__(self):
+        return bin(int.from_bytes(self.bits, 'little')).count('1')
+
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):
+            while byte:
+                low = byte & -byte
+                yield (index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+
+# ==================== 接続プール ====================
+
+class ConnectionPool:
+    """SQLite 接続の使い回し（最大 size 本まで必要に応じて開く）"""
+
+    def __init__(self, db_path, size=4, factory=sqlite3.Connection):
+        self.db_path = db_path
+        self.size = size
+        self.factory = factory
+        self._idle = queue.Queue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row  # 辞書形式で返す
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """接続を1本借りる（使用後はプールに戻す）"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            conn = self._connect() if can_open else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close_all(self):
+        """未使用の接続をすべて閉じる"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
 # ==================== データベース操作クラス ====================
 
 class DatabaseManager:
     """データベース操作"""
 
-    def __init__(self, db_path=DB_PATH):
-        self.db_path = db_path
+    def __init__(self, db_path=DB_PATH, pool_size=4, connection_factory=sqlite3.Connection):
+        self.db_path = Path(db_path)
         self.init_db()
+        self.pool = ConnectionPool(self.db_path, pool_size, connection_factory)
 
     def init_db(self):
         """データベースを初期化"""
@@ -165,164 +323,312 @@ class DatabaseManager:
 
     def execute(self, sql, params=None, fetchall=False):
         """SQLを実行"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 辞書形式で返す
-        cursor = conn.cursor()
-
-        try:
-            if params:
-                cursor.execute(sql, params)
-            else:
-                cursor.execute(sql)
-
-            if fetchall:
-                result = cursor.fetchall()
-            elif "SELECT" in sql.upper():
-                result = cursor.fetchone()
-            else:
-                result = cursor.lastrowid
-
-            conn.commit()
-            return result
-
-        except sqlite3.Error as e:
-            print(f"❌ SQL実行エラー: {e}")
-            conn.rollback()
-            return None
-        finally:
-            conn.close()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                if params:
+                    cursor.execute(sql, params)
+                else:
+                    cursor.execute(sql)
+
+                if fetchall:
+                    result = cursor.fetchall()
+                elif "SELECT" in sql.upper():
+                    result = cursor.fetchone()
+                else:
+                    result = cursor.lastrowid
+
+                conn.commit()
+                return result
+
+            except sqlite3.Error as e:
+                print(f"❌ SQL実行エラー: {e}")
+                conn.rollback()
+                return None
 
     def insert_questions(self, questions_data):
         """問題をバッチ挿入"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        try:
-            for q in questions_data:
-                cursor.execute("""
+        rows = [(
+            q.get('pdf_index'),
+            q.get('page_number'),
+            q.get('category', 'その他'),
+            q.get('text'),
+            json.dumps(q.get('options', []), ensure_ascii=False),
+            q.get('difficulty', 'medium'),
+            1  # OCRから自動生成
+        ) for q in questions_data]
+
+        with self.pool.connection() as conn:
+            try:
+                conn.executemany("""
                     INSERT INTO questions
                     (pdf_index, page_number, category, text, options, difficulty, is_auto_generated)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    q.get('pdf_index'),
-                    q.get('page_number'),
-                    q.get('category', 'その他'),
-                    q.get('text'),
-                    json.dumps(q.get('options', []), ensure_ascii=False),
-                    q.get('difficulty', 'medium'),
-                    1  # OCRから自動生成
-                ))
-
-            conn.commit()
-            print(f"✅ {len(questions_data)}問の問題を挿入しました")
-            return len(questions_data)
-
-        except sqlite3.Error as e:
-            print(f"❌ 挿入エラー: {e}")
-            conn.rollback()
-            return 0
-        finally:
-            conn.close()
+                """, rows)
+
+                conn.commit()
+                print(f"✅ {len(questions_data)}問の問題を挿入しました")
+                return len(questions_data)
+
+            except sqlite3.Error as e:
+                print(f"❌ 挿入エラー: {e}")
+                conn.rollback()
+                return 0
+
+    # ----- テスト結果（トランザクション内で使う書き込み処理） -----
+
+    @staticmethod
+    def _write_test_result(conn, test_data):
+        cursor = conn.execute("""
+            INSERT INTO test_results
+            (user_id, session_id, total_questions, answered_questions, correct_count,
+             incorrect_count, unanswered_count, accuracy_percent, completion_time_seconds,
+             started_at, completed_at, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            test_data.get('user_id', 'anonymous'),
+            test_data.get('session_id'),
+            test_data['total_questions'],
+            test_data['answered_questions'],
+            test_data['correct_count'],
+            test_data['incorrect_count'],
+            test_data.get('unanswered_count', 0),
+            test_data.get('accuracy_percent'),
+            test_data.get('completion_time_seconds'),
+            test_data.get('started_at'),
+            test_data.get('completed_at') or datetime.now().isoformat(),
+            test_data.get('notes')
+        ))
+        return cursor.lastrowid
+
+    @staticmethod
+    def _write_answers(conn, test_result_id, answers_data):
+        conn.executemany("""
+            INSERT INTO test_answers
+            (test_result_id, question_id, user_answer, correct_answer, is_correct, response_time_seconds)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(
+            test_result_id,
+            ans.get('question_id'),
+            ans.get('user_answer'),
+            ans.get('correct_answer'),
+            1 if ans.get('is_correct') else 0,
+            ans.get('response_time_seconds')
+        ) for ans in answers_data])
+
+    @staticmethod
+    def _write_category_stats(conn, test_result_id, category_stats):
+        conn.executemany("""
+            INSERT INTO category_stats
+            (test_result_id, category, total_questions, correct_count, accuracy_percent)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(
+            test_result_id,
+            category,
+            stats.get('total'),
+            stats.get('correct'),
+            stats.get('accuracy_percent')
+        ) for category, stats in category_stats.items()])
+
+    # ----- 集計値の加算更新 -----
+
+    @staticmethod
+    def _update_learning_history(conn, user_id, answers_data):
+        conn.executemany("""
+            INSERT INTO learning_history
+            (user_id, question_id, category, attempts, correct_attempts, last_accuracy_percent)
+            VALUES (?, ?, ?, 1, ?, ?)
+            ON CONFLICT (user_id, question_id) DO UPDATE SET
+                category = excluded.category,
+                attempts = attempts + 1,
+                correct_attempts = correct_attempts + excluded.correct_attempts,
+                last_accuracy_percent = excluded.last_accuracy_percent,
+                updated_at = CURRENT_TIMESTAMP
+        """, [(
+            user_id,
+            ans['question_id'],
+            ans.get('category') or 'その他',
+            1 if ans.get('is_correct') else 0,
+            100 if ans.get('is_correct') else 0
+        ) for ans in answers_data if ans.get('question_id') is not None])
+
+    @staticmethod
+    def _update_user_category_stats(conn, user_id, category_stats):
+        conn.executemany("""
+            INSERT INTO user_category_stats (user_id, category, total_answered, total_correct)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id, category) DO UPDATE SET
+                total_answered = total_answered + excluded.total_answered,
+                total_correct = total_correct + excluded.total_correct,
+                updated_at = CURRENT_TIMESTAMP
+        """, [(
+            user_id,
+            category,
+            stats.get('total') or 0,
+            stats.get('correct') or 0
+        ) for category, stats in category_stats.items()])
+
+    @staticmethod
+    def _update_user_statistics(conn, user_id, test_data, completed_at):
+        conn.execute("""
+            INSERT INTO user_statistics
+            (user_id, total_tests, total_questions_answered, total_correct, last_test_date)
+            VALUES (?, 1, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                total_tests = total_tests + 1,
+                total_questions_answered = total_questions_answered + excluded.total_questions_answered,
+                total_correct = total_correct + excluded.total_correct,
+                last_test_date = excluded.last_test_date,
+                updated_at = CURRENT_TIMESTAMP
+        """, (user_id, test_data['answered_questions'], test_data['correct_count'], completed_at))
+
+        # 正答率・得意/苦手カテゴリー（そのユーザーのカテゴリー行のみを参照）
+        conn.execute("""
+            UPDATE user_statistics SET
+                overall_accuracy_percent = CASE WHEN total_questions_answered > 0
+                    THEN CAST(ROUND(total_correct * 100.0 / total_questions_answered) AS INTEGER) ELSE 0 END,
+                favorite_category = (
+                    SELECT category FROM user_category_stats
+                    WHERE user_id = :user_id AND total_answered > 0
+                    ORDER BY total_correct * 1.0 / total_answered DESC, total_answered DESC, category
+                    LIMIT 1),
+                weakest_category = (
+                    SELECT category FROM user_category_stats
+                    WHERE user_id = :user_id AND total_answered > 0
+                    ORDER BY total_correct * 1.0 / total_answered ASC, total_answered DESC, category
+                    LIMIT 1)
+            WHERE user_id = :user_id
+        """, {'user_id': user_id})
+
+    @staticmethod
+    def _update_question_history(conn, user_id, problem_ids):
+        # 読み出し〜書き戻しを1つの書き込みトランザクションに入れる（並行する記録でビットが失われないように）
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("""
+            SELECT seen_bitmap, seen_count FROM question_history WHERE user_id = ?
+        """, (user_id,)).fetchone()
+        seen = ProblemBitset(row['seen_bitmap'] if row else b'')
+        seen_count = row['seen_count'] if row else 0
+
+        added = sum(1 for problem_id in problem_ids if seen.add(problem_id))
+        if added or not row:
+            conn.execute("""
+                INSERT INTO question_history (user_id, seen_bitmap, seen_count) VALUES (?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    seen_bitmap = excluded.seen_bitmap,
+                    seen_count = excluded.seen_count,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (user_id, seen.to_bytes(), seen_count + added))
+        return seen_count + added
+
+    def _update_aggregates(self, conn, test_data, answers_data, category_stats, completed_at):
+        user_id = test_data.get('user_id', 'anonymous')
+        self._update_learning_history(conn, user_id, answers_data)
+        self._update_user_category_stats(conn, user_id, category_stats)
+        self._update_user_statistics(conn, user_id, test_data, completed_at)
+        self._update_question_history(conn, user_id, [ans.get('question_id') for ans in answers_data])
+
+    def write_attempt(self, conn, test_data, answers_data, category_stats):
+        """テスト1回分を conn の現在のトランザクションに書き込み、テスト結果IDを返す（コミットしない）"""
+        test_data = dict(test_data, completed_at=test_data.get('completed_at') or datetime.now().isoformat())
+        test_result_id = self._write_test_result(conn, test_data)
+        self._write_answers(conn, test_result_id, answers_data)
+        self._write_category_stats(conn, test_result_id, category_stats)
+        self._update_aggregates(conn, test_data, answers_data, category_stats, test_data['completed_at'])
+        return test_result_id
+
+    def rebuild_aggregates(self):
+        """
+        集計テーブルを test_results・test_answers・category_stats から作り直す
+        （集計の加算更新を導入する前に保存されたテスト結果の取り込み用）
+        test_answers はカテゴリーを持たないため、learning_history のカテゴリーは questions テーブルから引く
+        """
+        with self.pool.connection() as conn:
+            try:
+                for table in ('learning_history', 'user_category_stats', 'user_statistics', 'question_history'):
+                    conn.execute(f"DELETE FROM {table}")
+
+                results = conn.execute("SELECT * FROM test_results ORDER BY id").fetchall()
+                for result in results:
+                    answers = conn.execute("""
+                        SELECT a.question_id, a.is_correct, q.category
+                        FROM test_answers a LEFT JOIN questions q ON q.id = a.question_id
+                        WHERE a.test_result_id = ? ORDER BY a.id
+                    """, (result['id'],)).fetchall()
+                    category_stats = {
+                        row['category']: {'total': row['total_questions'], 'correct': row['correct_count']}
+                        for row in conn.execute("""
+                            SELECT category, total_questions, correct_count
+                            FROM category_stats WHERE test_result_id = ?
+                        """, (result['id'],))
+                    }
+                    self._update_aggregates(conn, dict(result), [dict(row) for row in answers],
+                                            category_stats, result['completed_at'])
+
+                conn.commit()
+                print(f"✅ {len(results)}回分のテスト結果から集計を再構築しました")
+                return len(results)
+
+            except sqlite3.Error as e:
+                print(f"❌ 集計再構築エラー: {e}")
+                conn.rollback()
+                return 0
+
+    def insert_attempt(self, test_data, answers_data, category_stats):
+        """テスト1回分（結果・回答・カテゴリー別成績）を1トランザクションで挿入"""
+        with self.pool.connection() as conn:
+            try:
+                test_result_id = self.write_attempt(conn, test_data, answers_data, category_stats)
+                conn.commit()
+                return test_result_id
+            except Exception:
+                conn.rollback()
+                raise
 
     def insert_test_result(self, test_data):
         """テスト結果を挿入"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.pool.connection() as conn:
+            try:
+                test_result_id = self._write_test_result(conn, test_data)
+                conn.commit()
 
-        try:
-            cursor.execute("""
-                INSERT INTO test_results
-                (user_id, total_questions, answered_questions, correct_count,
-                 incorrect_count, unanswered_count, accuracy_percent, completion_time_seconds,
-                 started_at, completed_at, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                test_data.get('user_id', 'anonymous'),
-                test_data['total_questions'],
-                test_data['answered_questions'],
-                test_data['correct_count'],
-                test_data['incorrect_count'],
-                test_data.get('unanswered_count', 0),
-                test_data.get('accuracy_percent'),
-                test_data.get('completion_time_seconds'),
-                test_data.get('started_at'),
-                datetime.now().isoformat(),
-                test_data.get('notes')
-            ))
-
-            test_result_id = cursor.lastrowid
-            conn.commit()
-
-            print(f"✅ テスト結果を挿入しました (ID: {test_result_id})")
-            return test_result_id
-
-        except sqlite3.Error as e:
-            print(f"❌ 挿入エラー: {e}")
-            conn.rollback()
-            return None
-        finally:
-            conn.close()
+                print(f"✅ テスト結果を挿入しました (ID: {test_result_id})")
+                return test_result_id
+
+            except sqlite3.Error as e:
+                print(f"❌ 挿入エラー: {e}")
+                conn.rollback()
+                return None
 
     def insert_answers(self, test_result_id, answers_data):
         """回答結果をバッチ挿入"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        try:
-            for ans in answers_data:
-                cursor.execute("""
-                    INSERT INTO test_answers
-                    (test_result_id, question_id, user_answer, correct_answer, is_correct, response_time_seconds)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    test_result_id,
-                    ans.get('question_id'),
-                    ans.get('user_answer'),
-                    ans.get('correct_answer'),
-                    1 if ans.get('is_correct') else 0,
-                    ans.get('response_time_seconds')
-                ))
-
-            conn.commit()
-            print(f"✅ {len(answers_data)}件の回答を挿入しました")
-            return len(answers_data)
-
-        except sqlite3.Error as e:
-            print(f"❌ 挿入エラー: {e}")
-            conn.rollback()
-            return 0
-        finally:
-            conn.close()
+        with self.pool.connection() as conn:
+            try:
+                self._write_answers(conn, test_result_id, answers_data)
+                conn.commit()
+                print(f"✅ {len(answers_data)}件の回答を挿入しました")
+                return len(answers_data)
+
+            except sqlite3.Error as e:
+                print(f"❌ 挿入エラー: {e}")
+                conn.rollback()
+                return 0
 
     def insert_category_stats(self, test_result_id, category_stats):
         """カテゴリー別成績を挿入"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        try:
-            for category, stats in category_stats.items():
-                cursor.execute("""
-                    INSERT INTO category_stats
-                    (test_result_id, category, total_questions, correct_count, accuracy_percent)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    test_result_id,
-                    category,
-                    stats.get('total'),
-                    stats.get('correct'),
-                    stats.get('accuracy_percent')
-                ))
-
-            conn.commit()
-            print(f"✅ {len(category_stats)}カテゴリーの成績を挿入しました")
-            return len(category_stats)
-
-        except sqlite3.Error as e:
-            print(f"❌ 挿入エラー: {e}")
-            conn.rollback()
-            return 0
-        finally:
-            conn.close()
+        with self.pool.connection() as conn:
+            try:
+                self._write_category_stats(conn, test_result_id, category_stats)
+                conn.commit()
+                print(f"✅ {len(category_stats)}カテゴリーの成績を挿入しました")
+                return len(category_stats)
+
+            except sqlite3.Error as e:
+                print(f"❌ 挿入エラー: {e}")
+                conn.rollback()
+                return 0
 
     def get_question_count(self):
         """問題総数を取得"""
@@ -331,35 +637,130 @@ class DatabaseManager:
 
     def get_questions_by_category(self, category):
         """カテゴリーで問題を取得"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT * FROM questions WHERE category = ?
-            ORDER BY pdf_index, page_number
-        """, (category,))
-
-        results = cursor.fetchall()
-        conn.close()
+        with self.pool.connection() as conn:
+            results = conn.execute("""
+                SELECT * FROM questions WHERE category = ?
+                ORDER BY pdf_index, page_number
+            """, (category,)).fetchall()
 
         return [dict(row) for row in results]
 
     def get_user_statistics(self, user_id):
         """ユーザー統計を取得"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self.pool.connection() as conn:
+            result = conn.execute("""
+                SELECT * FROM user_statistics WHERE user_id = ?
+            """, (user_id,)).fetchone()
+
+        return dict(result) if result else None
 
-        cursor.execute("""
-            SELECT * FROM user_statistics WHERE user_id = ?
-        """, (user_id,))
+    def get_user_category_stats(self, user_id):
+        """ユーザーのカテゴリー別累計成績を取得（正答率の低い順）"""
+        with self.pool.connection() as conn:
+            results = conn.execute("""
+                SELECT category, total_answered, total_correct,
+                       ROUND(total_correct * 100.0 / total_answered, 2) AS accuracy_percent
+                FROM user_category_stats
+                WHERE user_id = ? AND total_answered > 0
+                ORDER BY total_correct * 1.0 / total_answered, total_answered DESC, category
+            """, (user_id,)).fetchall()
 
-        result = cursor.fetchone()
-        conn.close()
+        return [dict(row) for row in results]
+
+    def get_learning_history(self, user_id, question_id):
+        """ユーザー × 問題の累計成績を取得"""
+        with self.pool.connection() as conn:
+            result = conn.execute("""
+                SELECT * FROM learning_history WHERE user_id = ? AND question_id = ?
+            """, (user_id, question_id)).fetchone()
 
         return dict(result) if result else None
 
+    def get_question_history(self, user_id):
+        """ユーザーの出題済み問題IDを ProblemBitset で取得"""
+        with self.pool.connection() as conn:
+            result = conn.execute("""
+                SELECT seen_bitmap FROM question_history WHERE user_id = ?
+            """, (user_id,)).fetchone()
+
+        return ProblemBitset(result['seen_bitmap'] if result else b'')
+
+    def record_question_history(self, user_id, problem_ids):
+        """問題IDを出題済みとして記録し、出題済みの問題数を返す"""
+        with self.pool.connection() as conn:
+            try:
+                seen_count = self._update_question_history(conn, user_id, problem_ids)
+                conn.commit()
+                return seen_count
+
+            except (sqlite3.Error, ValueError) as e:
+                print(f"❌ 出題履歴の記録エラー: {e}")
+                conn.rollback()
+                return None
+
+    def clear_question_history(self, user_id):
+        """ユーザーの出題履歴を削除"""
+        return self.execute("DELETE FROM question_history WHERE user_id = ?", (user_id,))
+
+    def refresh_question_difficulty(self):
+        """問題ごとの正答率を learning_history（ユーザー × 問題の累計）から再計算"""
+        with self.pool.connection() as conn:
+            try:
+                cursor = conn.execute("""
+                    INSERT INTO question_difficulty (question_id, attempts, correct_attempts, correct_rate)
+                    SELECT question_id, SUM(attempts), SUM(correct_attempts),
+                           SUM(correct_attempts) * 1.0 / SUM(attempts)
+                    FROM learning_history WHERE true
+                    GROUP BY question_id
+                    ON CONFLICT (question_id) DO UPDATE SET
+                        attempts = excluded.attempts,
+                        correct_attempts = excluded.correct_attempts,
+                        correct_rate = excluded.correct_rate,
+                        updated_at = CURRENT_TIMESTAMP
+                """)
+                conn.commit()
+                return cursor.rowcount
+
+            except sqlite3.Error as e:
+                print(f"❌ 正答率の再計算エラー: {e}")
+                conn.rollback()
+                return 0
+
+    def get_question_difficulty(self, min_attempts=1):
+        """問題ID → 正答率（回答数が min_attempts 以上の問題のみ）"""
+        with self.pool.connection() as conn:
+            results = conn.execute("""
+                SELECT question_id, correct_rate FROM question_difficulty WHERE attempts >= ?
+            """, (min_attempts,)).fetchall()
+
+        return {row['question_id']: row['correct_rate'] for row in results}
+
+    def replace_item_statistics(self, items):
+        """項目統計を入れ替え（1トランザクション）"""
+        with self.pool.connection() as conn:
+            try:
+                conn.execute("DELETE FROM item_statistics")
+                conn.executemany("""
+                    INSERT INTO item_statistics
+                    (question_id, responses, correct_rate, discrimination, time_p50, time_p90, measured_difficulty)
+                    VALUES (:question_id, :responses, :correct_rate, :discrimination, :time_p50, :time_p90,
+                            :measured_difficulty)
+                """, items)
+                conn.commit()
+                return len(items)
+
+            except sqlite3.Error as e:
+                print(f"❌ 項目統計の保存エラー: {e}")
+                conn.rollback()
+                return 0
+
+    def get_item_statistics(self):
+        """問題ID → 項目統計"""
+        with self.pool.connection() as conn:
+            results = conn.execute("SELECT * FROM item_statistics").fetchall()
+
+        return {row['question_id']: dict(row) for row in results}
+
     def update_metadata(self, key, value):
         """メタデータを更新"""
         return self.execute("""
@@ -367,6 +768,153 @@ class DatabaseManager:
             WHERE key = ?
         """, (value, key))
 
+# ==================== 書き込みキュー（グループコミット） ====================
+
+class ResultWriteQueue:
+    """
+    テスト結果の書き込みを1本のスレッドに集約するキュー
+
+    書き込みスレッドは、キューに溜まっているテスト結果（最大 max_batch 件、
+    最初の1件から max_delay 秒以内に届いたもの）を1トランザクションで書き込んでまとめてコミットする。
+    負荷が高いほど1回のコミットにまとまる件数が増える
+
+    query_meter（start / stop / add を持つオブジェクト）を渡すと、書き込みスレッドで1件ごとのクエリ数を数え、
+    write() を呼んだスレッドに計上する（リクエスト単位のクエリ数の計測用）
+    """
+
+    def __init__(self, db, max_batch=64, max_delay=0.002, query_meter=None):
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.query_meter = query_meter
+        self.batches = 0
+        self.written = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, test_data, answers_data, category_stats):
+        """書き込みを予約し、テスト結果IDを返す Future を返す"""
+        future = Future()
+        self._queue.put(((test_data, answers_data, category_stats), future))
+        return future
+
+    def write(self, test_data, answers_data, category_stats, timeout=10):
+        """書き込みが完了するまで待ってテスト結果IDを返す"""
+        future = self.submit(test_data, answers_data, category_stats)
+        try:
+            return future.result(timeout=timeout)
+        finally:
+            if self.query_meter and future.done():
+                self.query_meter.add(getattr(future, 'queries', 0))
+
+    def _metered(self, future, func, *args):
+        """func を実行し、その間のクエリ数を future.queries に足す"""
+        if not self.query_meter:
+            return func(*args)
+        self.query_meter.start()
+        try:
+            return func(*args)
+        finally:
+            future.queries = getattr(future, 'queries', 0) + self.query_meter.stop()
+
+    def close(self):
+        """残りを書き込んでスレッドを止める"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # 想定外のエラーでも書き込みスレッドは止めず、未完了の Future にエラーを返す
+                print(f"❌ テスト結果の書き込みエラー: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        try:
+            with self.db.pool.connection() as conn:
+                try:
+                    ids = [self._metered(future, self.db.write_attempt, conn, *args) for args, future in batch]
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        except Exception:
+            # まとめての書き込みに失敗したら1件ずつ書き込み、失敗した分だけエラーを返す
+            for args, future in batch:
+                try:
+                    future.set_result(self._metered(future, self.db.insert_attempt, *args))
+                    self.written += 1
+                except Exception as e:
+                    future.set_exception(e)
+            self.batches += len(batch)
+            return
+
+        for (_, future), test_result_id in zip(batch, ids):
+            future.set_result(test_result_id)
+        self.written += len(batch)
+        self.batches += 1
+
+
+# ==================== 正答率の定期再計算 ====================
+
+class DifficultyRefreshJob:
+    """
+    問題ごとの正答率（question_difficulty）を interval 秒ごとに再計算するバックグラウンドジョブ
+    再計算のたびに on_refresh(問題ID → 正答率) を呼ぶ（出題側のキャッシュ更新用）
+    """
+
+    def __init__(self, db, interval=300, on_refresh=None, min_attempts=5):
+        self.db = db
+        self.interval = interval
+        self.on_refresh = on_refresh
+        self.min_attempts = min_attempts
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def refresh_now(self):
+        self.db.refresh_question_difficulty()
+        correct_rates = self.db.get_question_difficulty(self.min_attempts)
+        if self.on_refresh:
+            self.on_refresh(correct_rates)
+        return correct_rates
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh_now()
+            except Exception as e:
+                print(f"❌ 正答率の定期再計算エラー: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+
 # ==================== テスト ====================
 
 if __name__ == '__main__':
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Wチェック並行実行パイプライン
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+1問に対する複数モデルのチェックを同時に実行し、
+さらに複数問題を有限ワーカープールで並行処理する
+
+【機能】
+1. 有限ワーカープール（同時処理問題数の上限）
+2. プロバイダ単位のレート制限（RPM + 同時リクエスト数）
+3. プロバイダ別レイテンシヒストグラムと総処理時間
+4. テスト用ローカル偽プロバイダ（API不要）
+
+【ベンチマーク】
+python3 dual_check_pipeline.py --problems 638 --workers 16 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import bisect
+import random
+import time
+
+# レイテンシヒストグラムのバケット上限（秒）
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0]
+
+
+class LatencyHistogram:
+    """レイテンシ分布（バケット集計 + パーセンタイル）"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.samples = []
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        count = len(self.samples)
+        labels = [f"≤{b}s" for b in self.buckets] + [f">{self.buckets[-1]}s"]
+        return {
+            'count': count,
+            'mean': sum(self.samples) / count if count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'max': max(self.samples) if count else 0.0,
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+class ProviderRateLimiter:
+    """プロバイダ単位のレート制限（最小リクエスト間隔 + 同時リクエスト数）"""
+
+    def __init__(self, requests_per_minute=None, max_concurrent=None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        if self._semaphore:
+            await self._semaphore.acquire()
+        if self.interval:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next_slot - now
+                self._next_slot = max(now, self._next_slot) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._semaphore:
+            self._semaphore.release()
+
+
+class CheckProvider:
+    """チェック用モデルプロバイダ（非同期の check(problem, context) をラップ）"""
+
+    def __init__(self, name, check, requests_per_minute=None, max_concurrent=None):
+        self.name = name
+        self._check = check
+        self.limiter = ProviderRateLimiter(requests_per_minute, max_concurrent)
+        self.latency = LatencyHistogram()
+        self.errors = 0
+
+    async def check(self, problem, context):
+        async with self.limiter:
+            start = time.perf_counter()
+            try:
+                return await self._check(problem, context)
+            except Exception as e:
+                self.errors += 1
+                return f"❌ {self.name}チェック失敗: {str(e)}"
+            finally:
+                self.latency.record(time.perf_counter() - start)
+
+    async def call(self, func, *args):
+        """チェック以外の呼び出し（書き換え・再検証など）を同じレート制限の下で実行"""
+        async with self.limiter:
+            return await func(*args)
+
+
+class FakeProvider(CheckProvider):
+    """
+    テスト用ローカル偽プロバイダ
+
+    APIを呼ばずに指定レイテンシで応答し、flagged_ids に含まれる問題のみ ❌ を返す
+    """
+
+    def __init__(self, name, latency=0.05, jitter=0.0, flagged_ids=(), seed=0, **limits):
+        self.base_latency = latency
+        self.jitter = jitter
+        self.flagged_ids = {str(pid) for pid in flagged_ids}
+        self._rng = random.Random(seed)
+        super().__init__(name, self._fake_check, **limits)
+
+    async def _fake_check(self, problem, context):
+        await asyncio.sleep(self.base_latency + self._rng.uniform(0, self.jitter))
+        if str(problem.get('problem_id')) in self.flagged_ids:
+            return f"❌ 問題あり（{self.name}偽判定）"
+        return f"✅ 許容可能（{self.name}偽判定）"
+
+
+class DualCheckPipeline:
+    """複数プロバイダによるチェックを有限ワーカープールで並行実行"""
+
+    def __init__(self, providers, workers=8):
+        self.providers = list(providers)
+        self.workers = workers
+        self.wall_clock = 0.0
+        self.processed = 0
+
+    async def _check_problem(self, problem, context):
+        checks = await asyncio.gather(
+            *(provider.check(problem, context) for provider in self.providers)
+        )
+        return {provider.name: result for provider, result in zip(self.providers, checks)}
+
+    async def run(self, problems, context_for=None, on_checked=None):
+        """
+        全問題をチェック
+
+        Args:
+            problems: 問題リスト
+            context_for: 問題 → 訓練教材コンテキスト文字列（省略時は空文字）
+            on_checked: async (index, problem, checks) → record。
+                チェック後の後続処理（書き換え・再検証など）をワーカー内で実行する
+
+        Returns:
+            入力順の結果リスト（on_checked 省略時は {'problem', 'checks'}）
+        """
+        results = [None] * len(problems)
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+        start = time.perf_counter()
+
+        async def produce():
+            for index, problem in enumerate(problems):
+                await queue.put((index, problem))
+            for _ in range(self.workers):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, problem = item
+                context = context_for(problem) if context_for else ''
+                checks = await self._check_problem(problem, context)
+                if on_checked:
+                    results[index] = await on_checked(index, problem, checks)
+                else:
+                    results[index] = {'problem': problem, 'checks': checks}
+                self.processed += 1
+
+        await asyncio.gather(produce(), *(work() for _ in range(self.workers)))
+        self.wall_clock = time.perf_counter() - start
+        return results
+
+    def report(self):
+        return {
+            'problems': self.processed,
+            'workers': self.workers,
+            'wall_clock_seconds': round(self.wall_clock, 3),
+            'providers': {
+                provider.name: {**provider.latency.summary(), 'errors': provider.errors}
+                for provider in self.providers
+            }
+        }
+
+    def print_report(self):
+        report = self.report()
+        print(f"⏱️  総処理時間: {report['wall_clock_seconds']:.2f}秒"
+              f"（{report['problems']}問 / ワーカー{report['workers']}）")
+        for name, stats in report['providers'].items():
+            print(f"   [{name}] {stats['count']}件 平均{stats['mean']:.3f}s "
+                  f"p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s 最大{stats['max']:.3f}s "
+                  f"エラー{stats['errors']}件")
+            histogram = " ".join(f"{label}:{count}" for label, count in stats['buckets'].items() if count)
+            print(f"      分布: {histogram}")
+
+
+def main():
+    """偽プロバイダによるスループット計測"""
+    parser = argparse.ArgumentParser(description='Wチェック並行パイプラインのベンチマーク（偽プロバイダ）')
+    parser.add_argument('--problems', type=int, default=638)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.05, help='偽プロバイダの基本レイテンシ（秒）')
+    parser.add_argument('--rpm', type=int, default=None, help='プロバイダごとのRPM上限')
+    args = parser.parse_args()
+
+    problems = [{'problem_id': i + 1} for i in range(args.problems)]
+    providers = [
+        FakeProvider('gpt5', latency=args.latency, jitter=args.latency, seed=1,
+                     flagged_ids=range(1, args.problems + 1, 50), requests_per_minute=args.rpm),
+        FakeProvider('claude', latency=args.latency, jitter=args.latency, seed=2,
+                     requests_per_minute=args.rpm)
+    ]
+    pipeline = DualCheckPipeline(providers, workers=args.workers)
+    results = asyncio.run(pipeline.run(problems))
+
+    flagged = sum(1 for r in results if any('❌' in c for c in r['checks'].values()))
+    serial = sum(p.latency.summary()['mean'] * p.latency.summary()['count'] for p in providers)
+    print(f"📊 {len(results)}問チェック完了（❌検出: {flagged}問）")
+    pipeline.print_report()
+    print(f"   直列実行時の推定時間: {serial:.2f}秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+キーワード集合の一括検出オートマトン（共通）
+全キーワードを1つのトライ正規表現にコンパイルし、テキストを1回走査して
+「どのキーワードが部分文字列として含まれるか」を求める
+
+`keyword in text` を全キーワード分繰り返す判定と同じ結果になる:
+- 先読み (?=...) で全位置から一致を取るため、重なり合う出現も検出する
+- 各位置では最長一致のみ返るので、一致した語に含まれる短いキーワードも出現扱いにする
+"""
+
+import re
+
+from ocr_correction_engine import build_trie_pattern
+
+
+class KeywordAutomaton:
+    """キーワード集合をコンパイルした検出器"""
+
+    def __init__(self, keywords):
+        self.keywords = sorted({kw for kw in keywords if kw})
+        # 先頭文字クラスを前置すると、re が候補位置を高速にスキップできる
+        first_chars = re.escape(''.join(sorted({kw[0] for kw in self.keywords})))
+        self.pattern = (re.compile('(?=[' + first_chars + '])(?=(' + build_trie_pattern(self.keywords) + '))')
+                        if self.keywords else None)
+        # 一致した語 → その語に部分文字列として含まれるキーワード（自身を含む）
+        self._contained = {
+            kw: frozenset(other for other in self.keywords if other in kw)
+            for kw in self.keywords
+        }
+
+    def find(self, text):
+        """text に含まれるキーワードの集合"""
+        if not self.pattern or not text:
+            return set()
+        found = set()
+        for longest in set(self.pattern.findall(text)):
+            found |= self._contained[longest]
+        return found
+
+
+class ThemeKeywordMatcher:
+    """
+    テーマ → キーワードリストの定義から、全テーマの一致件数を1回の走査で求める
+
+    score(テーマ) = テキストに含まれるそのテーマのキーワード数（重み付きの場合は重みの合計）
+    """
+
+    def __init__(self, theme_keywords, weights=None):
+        """
+        Args:
+            theme_keywords: {テーマ: [キーワード, ...]}（挿入順がスコアの並び順になる）
+            weights: {テーマ: {キーワード: 重み}}（省略時は全キーワード重み1）
+        """
+        self.themes = list(theme_keywords)
+        self.automaton = KeywordAutomaton(kw for kws in theme_keywords.values() for kw in kws)
+        # キーワード → [(テーマ番号, 重み), ...]
+        self._postings = {}
+        for index, theme in enumerate(self.themes):
+            theme_weights = (weights or {}).get(theme, {})
+            for kw in dict.fromkeys(theme_keywords[theme]):
+                if kw:
+                    self._postings.setdefault(kw, []).append((index, theme_weights.get(kw, 1)))
+
+    def scores(self, text):
+        """全テーマのスコアをテーマ定義順のリストで返す"""
+        totals = [0] * len(self.themes)
+        for kw in self.automaton.find(text):
+            for index, weight in self._postings[kw]:
+                totals[index] += weight
+        return totals
+
+    def matches(self, text):
+        """スコアが正のテーマを [(テーマ, スコア), ...]（テーマ定義順）で返す"""
+        return [(theme, score) for theme, score in zip(self.themes, self.scores(text)) if score > 0]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+講習教材との字句重複インデックス（LLM剽窃チェック前のローカル事前フィルタ）
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+rag_data/lecture_text の全テーマファイルから文字n-gramインデックスを構築し、
+各問題の「n-gram重複率」と「最長一致文字列長」をローカルで計算する。
+しきい値を超えた問題だけをLLMによるWチェックへ回す。
+
+【実行方法】
+python3 lecture_overlap_index.py --problems backend/db/problems.json
+"""
+
+import argparse
+import json
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+from lecture_page_store import read_theme_text
+
+LECTURE_TEXT_DIR = Path('rag_data/lecture_text')
+
+# 文字n-gram長（OCRノイズを含む日本語本文で偶然一致しにくい長さ）
+NGRAM_SIZE = 8
+
+# エスカレーション条件
+OVERLAP_THRESHOLD = 0.2     # 問題文n-gramのうち教材に存在する割合
+LCS_THRESHOLD = 20          # 教材と連続一致する最長文字数
+
+# 照合前に除去する空白・記号（長音「ー」は語の一部なので残す）
+_NOISE_PATTERN = re.compile(r'[\s、。，．,.・「」『』（）()\[\]【】〔〕:：;；!?！？*#|/]+')
+
+
+def normalize_text(text):
+    """照合用の正規化（NFKC + 空白・記号除去）"""
+    return _NOISE_PATTERN.sub('', unicodedata.normalize('NFKC', text or ''))
+
+
+def problem_text_of(problem):
+    """LLMチェックに送る本文（問題文 + 解説）を取り出す"""
+    body = problem.get('problem_text') or problem.get('statement') or ''
+    explanation = problem.get('explanation') or problem.get('basis') or ''
+    return f"{body}\n{explanation}"
+
+
+class LectureOverlapIndex:
+    """講習教材の文字n-gram → テーマ索引"""
+
+    def __init__(self, lecture_dir=LECTURE_TEXT_DIR, ngram_size=NGRAM_SIZE):
+        self.ngram_size = ngram_size
+        self.themes = []
+        self.theme_texts = []
+        self.ngrams = {}
+        self._build(Path(lecture_dir))
+
+    def _build(self, lecture_dir):
+        n = self.ngram_size
+        for theme_index, path in enumerate(sorted(lecture_dir.glob('theme_*.txt'))):
+            text = normalize_text(read_theme_text(path))
+            self.themes.append(path.stem)
+            self.theme_texts.append(text)
+            for i in range(len(text) - n + 1):
+                self.ngrams.setdefault(text[i:i + n], theme_index)
+
+    def score(self, text):
+        """
+        1テキストの重複スコアを計算
+
+        Returns:
+            {'overlap': 重複率, 'lcs': 最長一致文字数（推定）, 'theme': 最長一致テーマ,
+             'matched': 最長一致文字列}
+        """
+        n = self.ngram_size
+        normalized = normalize_text(text)
+        total = len(normalized) - n + 1
+        if total <= 0:
+            return {'overlap': 0.0, 'lcs': 0, 'theme': None, 'matched': ''}
+
+        hits = 0
+        run = 0
+        best_run = 0
+        best_end = 0
+        for i in range(total):
+            if normalized[i:i + n] in self.ngrams:
+                hits += 1
+                run += 1
+                if run > best_run:
+                    best_run = run
+                    best_end = i
+            else:
+                run = 0
+
+        if not best_run:
+            return {'overlap': 0.0, 'lcs': 0, 'theme': None, 'matched': ''}
+
+        start = best_end - best_run + 1
+        matched = normalized[start:best_end + n]
+        theme_index = self.ngrams[normalized[start:start + n]]
+        return {
+            'overlap': hits / total,
+            'lcs': best_run + n - 1,
+            'theme': self.themes[theme_index],
+            'matched': matched
+        }
+
+    def context_for(self, score, width=500):
+        """最長一致箇所周辺の教材テキスト（LLMチェック用コンテキスト）"""
+        if not score['theme']:
+            return ''
+        text = self.theme_texts[self.themes.index(score['theme'])]
+        position = text.find(score['matched'][:self.ngram_size])
+        start = max(0, position - width // 2)
+        return text[start:start + width]
+
+    def is_suspicious(self, score, overlap_threshold=OVERLAP_THRESHOLD, lcs_threshold=LCS_THRESHOLD):
+        return score['overlap'] >= overlap_threshold or score['lcs'] >= lcs_threshold
+
+    def prefilter(self, problems, overlap_threshold=OVERLAP_THRESHOLD, lcs_threshold=LCS_THRESHOLD):
+        """
+        問題を「要LLMチェック」と「ローカル判定で問題なし」に振り分け
+
+        Returns:
+            (suspicious, clean, scores) - scores は入力順のスコアリスト
+        """
+        suspicious = []
+        clean = []
+        scores = []
+        for problem in problems:
+            score = self.score(problem_text_of(problem))
+            scores.append(score)
+            if self.is_suspicious(score, overlap_threshold, lcs_threshold):
+                suspicious.append(problem)
+            else:
+                clean.append(problem)
+        return suspicious, clean, scores
+
+
+def load_problems(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['problems'] if isinstance(data, dict) else data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='講習教材との字句重複による事前フィルタ')
+    parser.add_argument('--problems', default='backend/db/problems.json')
+    parser.add_argument('--overlap', type=float, default=OVERLAP_THRESHOLD)
+    parser.add_argument('--lcs', type=int, default=LCS_THRESHOLD)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = LectureOverlapIndex()
+    build_seconds = time.perf_counter() - start
+    print(f"📚 教材インデックス構築: {len(index.themes)}テーマ / "
+          f"{len(index.ngrams)}種の{index.ngram_size}-gram（{build_seconds:.2f}秒）")
+
+    problems = load_problems(args.problems)
+    start = time.perf_counter()
+    suspicious, clean, scores = index.prefilter(problems, args.overlap, args.lcs)
+    score_seconds = time.perf_counter() - start
+
+    print(f"🔍 {len(problems)}問をスコアリング（{score_seconds:.2f}秒）")
+    print(f"   ⚠️  LLMチェック対象: {len(suspicious)}問")
+    print(f"   ✅ ローカル判定で問題なし: {len(clean)}問")
+
+    ranked = sorted(zip(problems, scores), key=lambda x: -x[1]['lcs'])[:10]
+    for problem, score in ranked:
+        print(f"   [{problem.get('problem_id')}] 重複率{score['overlap']:.0%} "
+              f"最長一致{score['lcs']}文字 {score['theme']}: {score['matched'][:30]}")
+
+
+if __name__ == "__main__":
+    main()
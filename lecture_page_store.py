@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+講習テキストのページ参照レイアウト（rag_data/lecture_text）
+ページ本文は pages.jsonl に1回だけ保存し、テーマファイルはページIDと関連度だけを持つ
+
+【レイアウト】
+rag_data/lecture_text/
+  pages.jsonl          1行1ページ {"page_id", "page_number", "pdf_index", "text"}
+  theme_index.json     {テーマ名: {"file", "category", "keywords", "pages": [[page_id, 関連度], ...]}}
+  theme_NNN_<テーマ>.txt  見出し + 「@page: <page_id>」参照行（本文なし）
+
+テーマファイルは read_theme_text() で従来形式（本文展開済み）のテキストとして読める。
+本文を含む旧形式のファイルはそのまま返すため、読み込み側は新旧どちらのレイアウトでも動く
+
+【旧形式（本文埋め込み）からの変換】
+python3 lecture_page_store.py migrate rag_data/lecture_text
+"""
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+from ocr_page_stream import OCRPageWriter, iter_ocr_pages
+
+PAGES_FILE_NAME = "pages.jsonl"
+INDEX_FILE_NAME = "theme_index.json"
+
+PAGE_REF_PATTERN = re.compile(r'^@page: (\S+)$', re.MULTILINE)
+PAGE_SECTION_PATTERN = re.compile(r'^## ページ (\d+) \(関連度: (\d+)\)\n\n', re.MULTILINE)
+PAGE_SEPARATOR = "\n\n---\n\n"
+
+
+def make_page_id(page_number, text):
+    """ページID（ページ番号 + 本文ハッシュ。PDFが違っても本文が同じなら同一ID）"""
+    return f"p{page_number}_{hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]}"
+
+
+def render_theme_header(theme_name, category, keywords, page_count):
+    return (f"# {theme_name}\n\n"
+            f"**カテゴリ**: {category}\n"
+            f"**キーワード**: {', '.join(keywords)}\n"
+            f"**ページ数**: {page_count}\n\n"
+            "---\n\n")
+
+
+def render_page_ref(page_number, score, page_id):
+    return f"## ページ {page_number} (関連度: {score})\n\n@page: {page_id}{PAGE_SEPARATOR}"
+
+
+def write_theme_index(lecture_dir, theme_index):
+    """theme_index.json を保存"""
+    with open(Path(lecture_dir) / INDEX_FILE_NAME, 'w', encoding='utf-8') as f:
+        json.dump(theme_index, f, ensure_ascii=False, indent=2)
+
+
+def _header_field(header, pattern):
+    match = re.search(pattern, header, re.MULTILINE)
+    return match.group(1) if match else None
+
+
+class LecturePageStore:
+    """pages.jsonl のページ本文を page_id で引くストア（初回参照時に読み込み）"""
+
+    def __init__(self, lecture_dir):
+        self.lecture_dir = Path(lecture_dir)
+        self._pages = None
+
+    @property
+    def pages(self):
+        if self._pages is None:
+            path = self.lecture_dir / PAGES_FILE_NAME
+            self._pages = ({page['page_id']: page['text'] for page in iter_ocr_pages(path)}
+                           if path.exists() else {})
+        return self._pages
+
+    def resolve(self, content):
+        """参照行「@page: <id>」をページ本文に置き換える"""
+        if '@page: ' not in content:
+            return content
+
+        def expand(match):
+            page_id = match.group(1)
+            if page_id not in self.pages:
+                raise KeyError(f"{self.lecture_dir / PAGES_FILE_NAME} にページ {page_id} がありません")
+            return self.pages[page_id]
+
+        return PAGE_REF_PATTERN.sub(expand, content)
+
+
+_stores = {}
+
+
+def read_theme_text(path):
+    """テーマファイルを本文展開済みのテキストとして読む（新旧レイアウト共通）"""
+    path = Path(path)
+    content = path.read_text(encoding='utf-8')
+    directory = path.resolve().parent
+    if directory not in _stores:
+        _stores[directory] = LecturePageStore(directory)
+    return _stores[directory].resolve(content)
+
+
+def migrate_legacy_dir(lecture_dir):
+    """
+    本文埋め込み形式のテーマファイルを参照レイアウトへ変換
+
+    Returns:
+        (変換前バイト数, 変換後バイト数, 参照数, ページ数)
+    """
+    lecture_dir = Path(lecture_dir)
+    before = after = refs = 0
+    pages = {}
+    converted = {}
+    theme_index = {}
+
+    for path in sorted(lecture_dir.glob('theme_*.txt')):
+        content = path.read_text(encoding='utf-8')
+        before += len(content.encode('utf-8'))
+        sections = PAGE_SECTION_PATTERN.split(content)
+        out = [sections[0]]
+        refs_in_theme = []
+        for i in range(1, len(sections), 3):
+            page_number, score, body = sections[i], sections[i + 1], sections[i + 2]
+            if body.startswith('@page: '):
+                page_id = body[len('@page: '):].split()[0]
+            else:
+                if body.endswith(PAGE_SEPARATOR):
+                    body = body[:-len(PAGE_SEPARATOR)]
+                page_id = make_page_id(page_number, body)
+                pages.setdefault(page_id, {"page_id": page_id, "page_number": int(page_number), "text": body})
+                refs += 1
+            out.append(render_page_ref(page_number, score, page_id))
+            refs_in_theme.append([page_id, int(score)])
+        converted[path] = ''.join(out)
+        theme_index[_header_field(sections[0], r'^# (.+)$') or path.stem] = {
+            "file": path.name,
+            "category": _header_field(sections[0], r'^\*\*カテゴリ\*\*: (.*)$'),
+            "keywords": (_header_field(sections[0], r'^\*\*キーワード\*\*: (.*)$') or '').split(', '),
+            "pages": refs_in_theme
+        }
+
+    # 既存の pages.jsonl のページも引き継ぐ
+    store = LecturePageStore(lecture_dir)
+    for page_id, text in store.pages.items():
+        pages.setdefault(page_id, {"page_id": page_id, "text": text})
+
+    with OCRPageWriter(lecture_dir / PAGES_FILE_NAME) as writer:
+        for page in pages.values():
+            writer.write(page)
+    for path, content in converted.items():
+        path.write_text(content, encoding='utf-8')
+        after += len(content.encode('utf-8'))
+    write_theme_index(lecture_dir, theme_index)
+    after += (lecture_dir / PAGES_FILE_NAME).stat().st_size
+    return before, after, refs, len(pages)
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] != 'migrate':
+        print("使い方: python3 lecture_page_store.py migrate <lecture_textディレクトリ>")
+        return 1
+
+    before, after, refs, page_count = migrate_legacy_dir(sys.argv[2])
+    print(f"✅ {refs}件のページ参照 → {page_count}ページに集約")
+    print(f"   {before:,} bytes → {after:,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,21 @@
 """
 OCR誤字自動修正ツール
 検出された誤字を自動置換してクリーニング
+全ルールを1つのオートマトンにコンパイルし、1ページ1パスで置換（ページ数が多い場合は並列処理）
+入出力は1行1ページのJSONLをストリーム処理（旧形式のJSON配列も読み込み可）
+旧形式の ocr_results_corrected.json を読むスクリプト向けに、同じ内容のJSON配列も併せて書き出す
 """
 
-import json
 import re
 from pathlib import Path
 
-OCR_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results.json")
-OUTPUT_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results_corrected.json")
+from ocr_correction_engine import CorrectionEngine, correct_pages
+from ocr_page_stream import OCRPageWriter, iter_ocr_pages, write_ocr_json_array
+
+OCR_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results.jsonl")
+OUTPUT_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results_corrected.jsonl")
+# 旧形式（JSON配列）: generate_problems_from_templates.py・extract_subtopics.py・JS側の生成器などが読む
+LEGACY_OUTPUT_FILE = OUTPUT_FILE.with_suffix('.json')
 
 # ==================== 修正ルール ====================
 
@@ -41,16 +48,13 @@ CORRECTION_RULES = {
     # 記号・数字の周囲スペース修正（後処理）
 }
 
-# ==================== クリーニング関数 ====================
+# 全ルールを1回だけコンパイル（単語単位: 前後が英数字の箇所は置換しない）
+CORRECTION_ENGINE = CorrectionEngine(CORRECTION_RULES)
 
-def clean_text(text):
-    """テキストをクリーニング"""
+# ==================== クリーニング関数 ====================
 
-    # 1. 基本的な誤字置換
-    for wrong, correct in CORRECTION_RULES.items():
-        # 単語単位での置換（前後が非文字ならOK）
-        pattern = r'(?<![a-zA-Z0-9])' + re.escape(wrong) + r'(?![a-zA-Z0-9])'
-        text = re.sub(pattern, correct, text)
+def normalize_layout(text):
+    """誤字置換後の改行・句読点の正規化"""
 
     # 2. O/0 混同の修正（文脈から判断）
     # 例: "O年" → "0年", "0個" → "0個" など
@@ -69,58 +73,72 @@ def clean_text(text):
 
     return text
 
+def clean_text(text):
+    """テキストをクリーニング"""
+
+    # 1. 基本的な誤字置換（全ルールを1パスで適用）
+    text, _ = CORRECTION_ENGINE.correct(text)
+
+    return normalize_layout(text)
+
+def corrected_pages(pages, stats=None):
+    """
+    ページのストリームを修正して順に返す（ジェネレータ・ステージ）
+
+    stats を渡すと修正統計を書き込む
+    """
+    # 各ページを修正（誤字置換 + 正規化をページ単位で並列実行）
+    for result, corrected_text, hits in correct_pages(CORRECTION_ENGINE, pages, transform=normalize_layout):
+        original_text = result.get('text', '')
+
+        if stats is not None:
+            stats['total_pages'] += 1
+
+            # 修正があったか確認
+            if original_text != corrected_text:
+                stats['pages_modified'] += 1
+
+            # 修正内容を記録（ルール別ヒット数）
+            for key, count in CORRECTION_ENGINE.hit_report(hits).items():
+                stats['corrections_by_type'][key] = \
+                    stats['corrections_by_type'].get(key, 0) + count
+                stats['total_corrections'] += count
+
+        # 修正前の本文のハッシュ（text_hash）は引き継がない
+        page = {key: value for key, value in result.items() if key != 'text_hash'}
+        yield {
+            **page,
+            'text': corrected_text,
+            'corrected': original_text != corrected_text
+        }
+
 def process_ocr_results():
     """OCR結果全体をクリーニング"""
     print("=" * 80)
     print("🔧 OCR自動修正処理を開始します")
     print("=" * 80)
 
-    # OCR結果を読み込み
-    with open(OCR_FILE, 'r', encoding='utf-8') as f:
-        results = json.load(f)
-
-    print(f"\n📝 入力: {len(results)}ページ")
-
     # 修正統計
     stats = {
+        'total_pages': 0,
         'total_corrections': 0,
         'corrections_by_type': {},
         'pages_modified': 0
     }
 
-    # 各ページを修正
-    corrected_results = []
+    # OCR結果をページ単位で読み込み → 修正 → 書き出し
+    with OCRPageWriter(OUTPUT_FILE) as writer:
+        for page in corrected_pages(iter_ocr_pages(OCR_FILE), stats):
+            writer.write(page)
 
-    for result in results:
-        original_text = result.get('text', '')
-        corrected_text = clean_text(original_text)
-
-        # 修正があったか確認
-        if original_text != corrected_text:
-            stats['pages_modified'] += 1
-
-            # 修正内容を記録
-            for wrong, correct in CORRECTION_RULES.items():
-                count = original_text.count(wrong) - corrected_text.count(wrong)
-                if count > 0:
-                    key = f"{wrong}→{correct}"
-                    stats['corrections_by_type'][key] = \
-                        stats['corrections_by_type'].get(key, 0) + count
-                    stats['total_corrections'] += count
-
-        corrected_results.append({
-            **result,
-            'text': corrected_text,
-            'corrected': original_text != corrected_text
-        })
+    # 旧形式の読み手が古いデータを読まないよう、JSON配列も同じ内容で更新
+    write_ocr_json_array(LEGACY_OUTPUT_FILE, iter_ocr_pages(OUTPUT_FILE))
 
-    # 修正結果を保存
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(corrected_results, f, indent=2, ensure_ascii=False)
+    print(f"\n📝 入力: {stats['total_pages']}ページ")
 
     # 統計表示
     print(f"\n✅ 修正完了")
-    print(f"   修正対象ページ: {stats['pages_modified']}/{len(results)}")
+    print(f"   修正対象ページ: {stats['pages_modified']}/{stats['total_pages']}")
     print(f"   総修正箇所: {stats['total_corrections']}件")
 
     print(f"\n📊 修正内容:")
@@ -132,6 +150,7 @@ def process_ocr_results():
         print(f"   {correction_type}: {count}件")
 
     print(f"\n💾 出力ファイル: {OUTPUT_FILE}")
+    print(f"   旧形式（JSON配列）: {LEGACY_OUTPUT_FILE}")
     print("=" * 80)
 
     return stats
@@ -143,21 +162,19 @@ def compare_samples():
     print("\n📋 修正前後の比較（サンプル）:")
     print("-" * 80)
 
-    with open(OCR_FILE, 'r', encoding='utf-8') as f:
-        original = json.load(f)
-
-    with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-        corrected = json.load(f)
+    original = iter_ocr_pages(OCR_FILE)
+    corrected = iter_ocr_pages(OUTPUT_FILE)
 
     # 修正があったページを表示
     count = 0
     for i, (orig, corr) in enumerate(zip(original, corrected)):
         if orig['text'] != corr['text']:
-            if count < 3:  # 最初の3つのみ表示
-                print(f"\nページ {i+1}:")
-                print(f"修正前: {orig['text'][:100]}...")
-                print(f"修正後: {corr['text'][:100]}...")
-                count += 1
+            print(f"\nページ {i+1}:")
+            print(f"修正前: {orig['text'][:100]}...")
+            print(f"修正後: {corr['text'][:100]}...")
+            count += 1
+            if count >= 3:  # 最初の3つのみ表示
+                break
 
 # ==================== メイン ====================
 
@@ -170,5 +187,5 @@ if __name__ == '__main__':
         compare_samples()
 
     print("\n✨ 修正完了！")
-    print(f"   修正ファイル: ocr_results_corrected.json")
+    print("   修正ファイル: ocr_results_corrected.jsonl（旧形式 ocr_results_corrected.json も更新）")
     print(f"   以降のカテゴリー分類・採点に使用してください")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+OCR誤字修正エンジン（共通）
+全修正ルールを1つのトライ正規表現にコンパイルし、1ページ1パスで置換・検出する
+ocr_autocorrect.py（自動修正）と ocr_quality_report.py（誤字検出）で共用
+
+【ベンチマーク】
+python3 ocr_correction_engine.py --benchmark --rules 5000 --pages 300
+"""
+
+import argparse
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# 英数字に挟まれた箇所は置換しない（旧実装の lookbehind / lookahead と同じ条件）
+WORD_BOUNDARY_BEFORE = r'(?<![a-zA-Z0-9])'
+WORD_BOUNDARY_AFTER = r'(?![a-zA-Z0-9])'
+
+# この件数未満のページはプロセスプールを使わず直列処理
+PARALLEL_MIN_PAGES = 64
+
+# ストリーム処理で一度に読み進めるページ数
+PAGE_BATCH_SIZE = 256
+
+
+def build_trie_pattern(words):
+    """
+    単語集合をトライ構造の正規表現に変換
+
+    例: ['遊披', '遊披機', '遊敷機'] → '遊(?:披(?:機)?|敷機)'
+    各ノードで長い一致を優先するため、旧実装の「長い誤字から順に置換」と同じ結果になる
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def to_pattern(node):
+        terminal = '' in node
+        branches = [re.escape(ch) + to_pattern(child)
+                    for ch, child in sorted(node.items()) if ch != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if terminal else body
+
+    return to_pattern(trie)
+
+
+class CorrectionEngine:
+    """誤字 → 正字ルールを1つのオートマトンにコンパイルした置換エンジン"""
+
+    def __init__(self, rules, word_boundary=True):
+        self.rules = {wrong: correct for wrong, correct in rules.items() if wrong}
+        self.word_boundary = word_boundary
+        core = build_trie_pattern(self.rules)
+        if word_boundary:
+            core = WORD_BOUNDARY_BEFORE + '(?:' + core + ')' + WORD_BOUNDARY_AFTER
+        self.pattern = re.compile(core) if self.rules else None
+        self.hits = Counter()
+
+    def correct(self, text):
+        """
+        1テキストを1パスで置換
+
+        Returns:
+            (修正後テキスト, このテキストでのルール別適用件数 Counter)
+        """
+        hits = Counter()
+        if not self.pattern or not text:
+            return text, hits
+
+        def replace(match):
+            wrong = match.group(0)
+            hits[wrong] += 1
+            return self.rules[wrong]
+
+        corrected = self.pattern.sub(replace, text)
+        self.hits.update(hits)
+        return corrected, hits
+
+    def scan(self, text):
+        """置換せずに誤字の出現件数だけを数える"""
+        if not self.pattern or not text:
+            return Counter()
+        return Counter(self.pattern.findall(text))
+
+    def hit_report(self, hits=None):
+        """「誤字→正字」をキーにした適用件数"""
+        hits = self.hits if hits is None else hits
+        return {f"{wrong}→{self.rules[wrong]}": count for wrong, count in hits.most_common()}
+
+
+# ==================== 並列処理 ====================
+
+_worker_engine = None
+_worker_transform = None
+
+
+def _init_worker(rules, word_boundary, transform):
+    global _worker_engine, _worker_transform
+    _worker_engine = CorrectionEngine(rules, word_boundary)
+    _worker_transform = transform
+
+
+def _correct_worker(text):
+    corrected, hits = _worker_engine.correct(text)
+    if _worker_transform:
+        corrected = _worker_transform(corrected)
+    return corrected, hits
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def correct_pages(engine, pages, text_key='text', processes=None, transform=None):
+    """
+    ページ（dict）のストリームを修正（ページ数が多い場合はプロセスプールで並列化）
+
+    入力は PAGE_BATCH_SIZE ページずつ読み進めるため、メモリ使用量は総ページ数に依存しない
+
+    Args:
+        engine: CorrectionEngine
+        pages: ページdictのイテラブル（ジェネレータ可）
+        text_key: 本文のキー
+        processes: プロセス数（1で直列、None で CPU 数）
+        transform: 置換後に各ページへ適用する後処理関数（pickle可能なトップレベル関数）
+
+    Yields:
+        (元のページ, 修正後テキスト, ルール別適用件数 Counter) を入力順に
+    """
+    pool = None
+    try:
+        for batch in _batched(pages, PAGE_BATCH_SIZE):
+            texts = [page.get(text_key, '') for page in batch]
+            # 最初のバッチが小さい（＝入力全体が小さい）場合は直列処理
+            if pool is None and (processes == 1 or len(batch) < PARALLEL_MIN_PAGES):
+                outputs = []
+                for text in texts:
+                    corrected, hits = engine.correct(text)
+                    outputs.append(((transform(corrected) if transform else corrected), hits))
+            else:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                               initargs=(engine.rules, engine.word_boundary, transform))
+                outputs = list(pool.map(_correct_worker, texts, chunksize=16))
+                for _, hits in outputs:
+                    engine.hits.update(hits)
+
+            for page, (corrected, hits) in zip(batch, outputs):
+                yield page, corrected, hits
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def correct_texts(engine, texts, processes=None, transform=None):
+    """テキストのストリームを修正し (修正後テキスト, Counter) を入力順に返す"""
+    pages = ({'text': text} for text in texts)
+    for _, corrected, hits in correct_pages(engine, pages, processes=processes, transform=transform):
+        yield corrected, hits
+
+
+# ==================== ベンチマーク ====================
+
+def _legacy_clean(rules, text):
+    """旧実装（ルールごとに re.sub）"""
+    for wrong, correct in rules.items():
+        pattern = WORD_BOUNDARY_BEFORE + re.escape(wrong) + WORD_BOUNDARY_AFTER
+        text = re.sub(pattern, correct, text)
+    return text
+
+
+def run_benchmark(rule_count, page_count, page_chars, seed=0):
+    rng = random.Random(seed)
+    alphabet = '遊技機確認規制営業業界風俗申請許可届出公安委員会第条項号のはをにがでと、。'
+    noise = '披敷叙稚撮怍親被葉羽伎裁缶'
+
+    rules = {}
+    while len(rules) < rule_count:
+        word = ''.join(rng.choice(alphabet) for _ in range(rng.randint(2, 4)))
+        rules[word[:-1] + rng.choice(noise) + word[-1]] = word
+
+    wrong_words = list(rules)
+    pages = []
+    for _ in range(page_count):
+        parts = []
+        while sum(len(p) for p in parts) < page_chars:
+            parts.append(rng.choice(wrong_words) if rng.random() < 0.05
+                         else ''.join(rng.choice(alphabet) for _ in range(8)))
+        pages.append(''.join(parts))
+
+    print(f"📐 ルール{len(rules)}件 / {len(pages)}ページ × 約{page_chars}字")
+
+    sample = pages[:max(1, min(len(pages), 20))]
+    start = time.perf_counter()
+    legacy = [_legacy_clean(rules, page) for page in sample]
+    legacy_seconds = (time.perf_counter() - start) * len(pages) / len(sample)
+    print(f"   旧実装（ルールごとに re.sub）: {legacy_seconds:.2f}秒（{len(sample)}ページから推定）")
+
+    start = time.perf_counter()
+    engine = CorrectionEngine(rules)
+    compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    single = [text for text, _ in correct_texts(engine, pages, processes=1)]
+    single_seconds = time.perf_counter() - start
+    print(f"   トライ1パス（直列）: {single_seconds:.3f}秒（コンパイル {compile_seconds:.3f}秒）")
+
+    engine = CorrectionEngine(rules)
+    start = time.perf_counter()
+    parallel = [text for text, _ in correct_texts(engine, pages)]
+    parallel_seconds = time.perf_counter() - start
+    print(f"   トライ1パス（プロセスプール）: {parallel_seconds:.3f}秒")
+
+    assert single == parallel
+    mismatches = sum(1 for a, b in zip(legacy, single) if a != b)
+    print(f"   旧実装との差分: {mismatches}/{len(sample)}ページ")
+    if mismatches:
+        print("   （1パスでは置換結果を再置換しないため、連鎖置換に依存するルールで差が出る）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR誤字修正エンジンのベンチマーク')
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--rules', type=int, default=5000)
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--chars', type=int, default=1500)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.rules, args.pages, args.chars)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+OCR結果のストリーミング入出力（1行1ページのJSONL形式）
+ファイル全体を読み込まずにページ単位で処理し、各処理ステージをジェネレータで連結する
+
+【形式】
+ocr_results.jsonl: 1行に1ページ分のJSON（{"pdf_index", "page_number", "text", ...}）
+
+【旧形式（JSON配列）からの変換】
+python3 ocr_page_stream.py data/ocr_results.json data/ocr_results.jsonl
+
+【ステージ連結の例】
+pages = iter_ocr_pages("data/ocr_results.jsonl")
+write_ocr_pages("data/ocr_results_corrected.jsonl", corrected_pages(pages))
+
+【旧形式の併記】
+旧形式（.json）を直接読むスクリプト（JS側の生成器など）向けに
+write_ocr_json_array で同じページを JSON 配列としても書き出せる
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+
+def resolve_ocr_path(path):
+    """
+    入力パスを解決
+
+    .jsonl が存在しなければ同名の旧形式 .json を、
+    .json が存在しなければ同名の .jsonl を使う
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+    alternate = path.with_suffix('.json' if path.suffix == '.jsonl' else '.jsonl')
+    return alternate if alternate.exists() else path
+
+
+def iter_ocr_pages(path):
+    """
+    OCR結果をページ単位で順に返す
+
+    JSONLは1行ずつ読むためメモリ使用量はページ数に依存しない。
+    旧形式のJSON配列は互換のため一括読み込みになる（convert で JSONL 化を推奨）
+    """
+    path = resolve_ocr_path(path)
+    if path.suffix != '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: 不正なJSON行 ({e})") from e
+
+
+class OCRPageWriter:
+    """
+    JSONLへページ単位で書き出すライター
+
+    一時ファイルへ書き込み、正常終了時のみ置き換えるため
+    途中で失敗しても既存の出力ファイルは壊れない
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, page):
+        self._file.write(json.dumps(page, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            self.tmp_path.unlink(missing_ok=True)
+        return False
+
+
+def write_ocr_pages(path, pages):
+    """ページのイテラブルをJSONLへ書き出し、書き出したページ数を返す"""
+    with OCRPageWriter(path) as writer:
+        for page in pages:
+            writer.write(page)
+    return writer.count
+
+
+def write_ocr_json_array(path, pages):
+    """
+    ページのイテラブルを旧形式のJSON配列として書き出し、書き出したページ数を返す
+
+    1ページずつ書き出すため配列全体はメモリに載せない（一時ファイル → 置き換え）
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for page in pages:
+                f.write(('\n' if count == 0 else ',\n') + json.dumps(page, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n')
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, path)
+    return count
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("使い方: python3 ocr_page_stream.py <入力.json|.jsonl> <出力.jsonl>")
+        return 1
+
+    count = write_ocr_pages(sys.argv[2], iter_ocr_pages(sys.argv[1]))
+    print(f"✅ {count}ページを書き出しました: {sys.argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
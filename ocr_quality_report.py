@@ -2,14 +2,17 @@
 """
 OCR品質検査レポート
 落丁・誤字・誤読をパターン分析
+OCR結果（JSONL）をページ単位で1回だけ走査する
 """
 
-import json
 import re
 from pathlib import Path
 from collections import defaultdict
 
-OCR_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results.json")
+from ocr_correction_engine import CorrectionEngine
+from ocr_page_stream import iter_ocr_pages
+
+OCR_FILE = Path("/home/planj/patshinko-exam-app/data/ocr_results.jsonl")
 
 # ==================== 既知の誤字パターン ====================
 
@@ -28,6 +31,12 @@ COMMON_ERRORS = {
     '申請': ['申詰', '申涛'],
 }
 
+# 全誤字パターンを1つのオートマトンにコンパイル（部分一致で検出）
+ERROR_SCANNER = CorrectionEngine(
+    {wrong: correct for correct, wrongs in COMMON_ERRORS.items() for wrong in wrongs},
+    word_boundary=False
+)
+
 # ==================== 検査エンジン ====================
 
 class OCRQualityAnalyzer:
@@ -44,28 +53,32 @@ class OCRQualityAnalyzer:
         }
 
     def analyze(self):
-        """全体分析"""
-        with open(OCR_FILE, 'r', encoding='utf-8') as f:
-            results = json.load(f)
-
-        self.stats['total_pages'] = len(results)
-
+        """全体分析（OCR結果をページ単位で1回だけ走査）"""
         print("=" * 80)
         print("🔍 OCR品質検査レポート")
         print("=" * 80)
 
-        # 各ページを検査
-        for i, result in enumerate(results):
+        self.pages_by_error = defaultdict(list)
+        self.error_count = 0
+        self.suspicious_count = 0
+        self.issue_categories = defaultdict(int)
+        self.detail_samples = []
+
+        # 各ページを検査（基本統計・誤字パターン・詳細チェックを同時に実施）
+        for i, result in enumerate(iter_ocr_pages(OCR_FILE)):
+            self.stats['total_pages'] += 1
             self._check_page(i, result)
+            self._scan_error_patterns(i, result)
+            self._detailed_check_page(i, result)
 
         # 統計表示
         self._print_statistics()
 
         # 誤字パターン分析
-        self._print_error_patterns(results)
+        self._print_error_patterns()
 
         # 詳細チェック
-        self._detailed_check(results)
+        self._print_detailed_check()
 
     def _check_page(self, page_idx, result):
         """1ページを検査"""
@@ -88,83 +101,82 @@ class OCRQualityAnalyzer:
         print(f"   平均文字数: {self.stats['total_chars'] // self.stats['total_pages']}字/ページ")
         print(f"   空白ページ: {self.stats['empty_pages']}")
 
-    def _print_error_patterns(self, results):
+    def _scan_error_patterns(self, page_idx, result):
+        """1ページの誤字パターンを記録"""
+        for wrong_word in ERROR_SCANNER.scan(result.get('text', '')):
+            self.error_count += 1
+            self.stats['error_patterns'][wrong_word] += 1
+            if len(self.pages_by_error[wrong_word]) < 3:  # 最初の3ページのみ記録
+                self.pages_by_error[wrong_word].append(page_idx + 1)
+
+    def _print_error_patterns(self):
         """誤字パターン分析"""
         print(f"\n⚠️ 検出された誤字パターン:")
         print("-" * 80)
 
-        error_count = 0
-
+        reported = set()
         for correct_word, wrong_patterns in COMMON_ERRORS.items():
             for wrong_word in wrong_patterns:
-                page_indices = []
-
-                # 全ページから検索
-                for i, result in enumerate(results):
-                    text = result.get('text', '')
-                    if wrong_word in text:
-                        error_count += 1
-                        if len(page_indices) < 3:  # 最初の3ページのみ記録
-                            page_indices.append(i + 1)
-
-                if page_indices:
-                    print(f"\n『{wrong_word}』 → 『{correct_word}』に修正推奨")
+                page_indices = self.pages_by_error.get(wrong_word)
+                if page_indices and wrong_word not in reported:
+                    reported.add(wrong_word)
+                    print(f"\n『{wrong_word}』 → 『{ERROR_SCANNER.rules[wrong_word]}』に修正推奨")
                     print(f"   検出ページ: {page_indices}")
 
-        if error_count == 0:
+        if self.error_count == 0:
             print("   検出なし（良好）✅")
 
-    def _detailed_check(self, results):
-        """詳細チェック"""
-        print(f"\n🔎 詳細チェック結果:")
-        print("-" * 80)
+    def _detailed_check_page(self, page_idx, result):
+        """1ページの詳細チェック"""
+        text = result.get('text', '')
 
-        suspicious_count = 0
-        issue_categories = defaultdict(int)
+        # 疑わしい文字パターンをチェック
+        issues = []
 
-        for i, result in enumerate(results):
-            text = result.get('text', '')
+        # 1. 分かち書きがおかしい
+        if re.search(r'[0-9]{2,}', text):  # 2桁以上の数字
+            if re.search(r'[^\d\s][0-9]{2,}[^\d\s]', text):
+                issues.append('数字の周囲に空白なし')
 
-            # 疑わしい文字パターンをチェック
-            issues = []
+        # 2. 句点が連続
+        if '。。' in text or '、、' in text:
+            issues.append('句点・読点が連続')
 
-            # 1. 分かち書きがおかしい
-            if re.search(r'[0-9]{2,}', text):  # 2桁以上の数字
-                if re.search(r'[^\d\s][0-9]{2,}[^\d\s]', text):
-                    issues.append('数字の周囲に空白なし')
+        # 3. 不自然な改行
+        if text.count('\n') > 10 and len(text) < 500:
+            issues.append('改行が多すぎる')
 
-            # 2. 句点が連続
-            if '。。' in text or '、、' in text:
-                issues.append('句点・読点が連続')
+        # 4. 明らかな記号誤認
+        if re.search(r'[OO0][^0-9a-zA-Z]', text):  # O（オー）と0（ゼロ）混同
+            issues.append('O/0混同の可能性')
 
-            # 3. 不自然な改行
-            if text.count('\n') > 10 and len(text) < 500:
-                issues.append('改行が多すぎる')
+        if issues:
+            for issue in issues:
+                self.issue_categories[issue] += 1
+                self.suspicious_count += 1
 
-            # 4. 明らかな記号誤認
-            if re.search(r'[OO0][^0-9a-zA-Z]', text):  # O（オー）と0（ゼロ）混同
-                issues.append('O/0混同の可能性')
+            if self.suspicious_count <= 5:  # 最初の5件のみ詳細表示
+                self.detail_samples.append((page_idx + 1, issues, text[:80].replace('\n', ' ')))
 
-            if issues:
-                for issue in issues:
-                    issue_categories[issue] += 1
-                    suspicious_count += 1
+    def _print_detailed_check(self):
+        """詳細チェック"""
+        print(f"\n🔎 詳細チェック結果:")
+        print("-" * 80)
 
-                if suspicious_count <= 5:  # 最初の5件のみ詳細表示
-                    print(f"\nページ {i+1}:")
-                    for issue in issues:
-                        print(f"   ⚠️ {issue}")
-                    preview = text[:80].replace('\n', ' ')
-                    print(f"   内容: {preview}...")
+        for page_number, issues, preview in self.detail_samples:
+            print(f"\nページ {page_number}:")
+            for issue in issues:
+                print(f"   ⚠️ {issue}")
+            print(f"   内容: {preview}...")
 
-        if suspicious_count == 0:
+        if self.suspicious_count == 0:
             print("   疑わしい個所: なし（良好）✅")
         else:
-            print(f"\n   合計: {suspicious_count}ページで問題検出")
+            print(f"\n   合計: {self.suspicious_count}ページで問題検出")
 
-        if issue_categories:
+        if self.issue_categories:
             print(f"\n   問題カテゴリ:")
-            for category, count in issue_categories.items():
+            for category, count in self.issue_categories.items():
                 print(f"   - {category}: {count}件")
 
     def print_recommendations(self):
@@ -18,26 +18,35 @@
 python3 plagiarism-detection-and-rewriting.py \
   --problems data/all_problems.json \
   --output data/plagiarism_check_results.json
+
+【並行実行】
+GPT-5 / Claude のチェックは1問ごとに同時実行し、複数問題を並行処理する
+  --workers 16 --gpt5-rpm 300 --claude-rpm 50
+API不要の動作確認・計測: --fake
+
+【事前フィルタ】
+rag_data/lecture_text との字句重複（n-gram重複率・最長一致長）をローカルで計算し、
+しきい値を超えた問題だけをWチェックへ回す（無効化: --no-prefilter）
 """
 
+import argparse
+import asyncio
 import json
 import os
-import time
 import sys
 from pathlib import Path
 from datetime import datetime
 from openai import OpenAI
 from difflib import SequenceMatcher
 
+from dual_check_pipeline import CheckProvider, DualCheckPipeline, FakeProvider
+from lecture_overlap_index import LCS_THRESHOLD, OVERLAP_THRESHOLD, LectureOverlapIndex
+
 # Initialize API clients
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CLAUDE_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
-if not OPENAI_API_KEY:
-    print("❌ OPENAI_API_KEY が設定されていません")
-    sys.exit(1)
-
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 
 try:
     import anthropic
@@ -90,7 +99,8 @@ class PlagiarismDetector:
 
 判定と理由を簡潔に述べてください。"""
 
-            response = openai_client.chat.completions.create(
+            response = await asyncio.to_thread(
+                openai_client.chat.completions.create,
                 model="gpt-5-mini",
                 messages=[
                     {
@@ -130,7 +140,8 @@ class PlagiarismDetector:
 判定: (✅許容可能 / ⚠️要注意 / ❌問題あり)
 理由: （簡潔に）"""
 
-            message = claude_client.messages.create(
+            message = await asyncio.to_thread(
+                claude_client.messages.create,
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=500,
                 messages=[
@@ -171,7 +182,8 @@ class PlagiarismDetector:
 修正済み解説: [新しい解説]
 修正理由: [修正内容の説明]"""
 
-            response = openai_client.chat.completions.create(
+            response = await asyncio.to_thread(
+                openai_client.chat.completions.create,
                 model="gpt-5-mini",
                 messages=[
                     {
@@ -210,7 +222,8 @@ class PlagiarismDetector:
 各項目について yes/no で答えた後、全体評価を付けてください。
 評価: (✅合格 / ⚠️要改善 / ❌不可)"""
 
-            response = openai_client.chat.completions.create(
+            response = await asyncio.to_thread(
+                openai_client.chat.completions.create,
                 model="gpt-5-mini",
                 messages=[
                     {
@@ -256,14 +269,32 @@ async def load_all_problems():
     return problems
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='著作権遵守チェック（Wチェック並行実行）')
+    parser.add_argument('--workers', type=int, default=16, help='同時処理する問題数の上限')
+    parser.add_argument('--gpt5-rpm', type=int, default=300, help='GPT-5 の毎分リクエスト上限')
+    parser.add_argument('--claude-rpm', type=int, default=50, help='Claude の毎分リクエスト上限')
+    parser.add_argument('--fake', action='store_true', help='APIを呼ばず偽プロバイダで実行（動作確認・計測用）')
+    parser.add_argument('--no-prefilter', action='store_true', help='字句重複による事前フィルタを無効化し全問をWチェック')
+    parser.add_argument('--overlap-threshold', type=float, default=OVERLAP_THRESHOLD)
+    parser.add_argument('--lcs-threshold', type=int, default=LCS_THRESHOLD)
+    return parser.parse_args()
+
+
 async def main():
     """メイン処理"""
+    args = parse_args()
+
     print("\n" + "="*70)
     print("🔍 著作権遵守チェック - Wチェック（GPT-5 + Claude）")
     print("="*70)
     print(f"開始時刻: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("")
 
+    if not args.fake and not openai_client:
+        print("❌ OPENAI_API_KEY が設定されていません")
+        sys.exit(1)
+
     # Load problems
     print("📖 問題データ読み込み中...")
     problems = await load_all_problems()
@@ -274,66 +305,110 @@ async def main():
     detector = PlagiarismDetector()
     detector.results['total_problems'] = len(problems)
 
-    # Process each problem (full version: all problems)
-    print(f"🔄 Wチェック処理開始 （本番: 全{len(problems)}問）")
+    # 講習教材との字句重複で事前フィルタ（重複のない問題はLLMに送らない）
+    prefilter_scores = {}
+    overlap_index = None
+    if args.no_prefilter:
+        targets = problems
+    else:
+        print("📚 講習教材インデックス構築中...")
+        overlap_index = LectureOverlapIndex()
+        targets, clean, scores = overlap_index.prefilter(
+            problems, args.overlap_threshold, args.lcs_threshold
+        )
+        prefilter_scores = {id(problem): score for problem, score in zip(problems, scores)}
+        print(f"✅ 事前フィルタ: {len(targets)}問をWチェックへ / {len(clean)}問はローカル判定で問題なし")
+        print("")
+
+    # GPT-5 と Claude のチェックを1問ごとに同時実行（プロバイダ別にレート制限）
+    if args.fake:
+        providers = [FakeProvider('gpt5', seed=1), FakeProvider('claude', seed=2)]
+    else:
+        providers = [
+            CheckProvider('gpt5', detector.check_with_gpt5, requests_per_minute=args.gpt5_rpm),
+            CheckProvider('claude', detector.check_with_claude, requests_per_minute=args.claude_rpm)
+        ]
+    gpt5_provider = providers[0]
+    pipeline = DualCheckPipeline(providers, workers=args.workers)
+
+    print(f"🔄 Wチェック処理開始 （対象: {len(targets)}/{len(problems)}問 / 並行ワーカー{args.workers}）")
     print(f"   GPT-5検証 + Claude検証 + 書き換え + 再検証")
     print("")
 
-    for idx, problem in enumerate(problems):  # Full: all problems
-        problem_id = problem.get('problem_id', idx)
-        print(f"[{idx+1}/{len(problems)}] 問題ID: {problem_id}")
-
+    def training_context_for(problem):
+        # 事前フィルタの最長一致箇所を訓練教材コンテキストとして渡す
+        score = prefilter_scores.get(id(problem))
+        if overlap_index and score and score['theme']:
+            return f"訓練教材から抽出（{score['theme']}）: {overlap_index.context_for(score)}"
         # Simulate RAG search for training material context
-        training_context = f"訓練教材から抽出: {problem.get('theme_name', 'テーマ不明')} に関する規定..."
-
-        # GPT-5 check
-        print(f"       ⏳ GPT-5検証中...", end="")
-        gpt5_result = await detector.check_with_gpt5(problem, training_context)
-        print(f" ✅")
+        return f"訓練教材から抽出: {problem.get('theme_name', 'テーマ不明')} に関する規定..."
 
-        # Claude check
-        print(f"       ⏳ Claude検証中...", end="")
-        claude_result = await detector.check_with_claude(problem, training_context)
-        print(f" ✅")
+    async def handle_checked(idx, problem, checks):
+        problem_id = problem.get('problem_id', idx)
+        gpt5_result = checks['gpt5']
+        claude_result = checks['claude']
 
         # Check if plagiarism detected
         is_plagiarized = '❌' in gpt5_result or '❌' in claude_result
 
-        if is_plagiarized:
-            print(f"       ⚠️  剽窃の可能性を検出")
-            detector.results['plagiarism_count'] += 1
-
-            # Rewrite
-            print(f"       ⏳ 書き換え処理中...", end="")
-            rewrite_result = await detector.generate_rewrite(problem, gpt5_result)
-            print(f" ✅")
-            detector.results['rewritten_count'] += 1
-
-            # Verify rewrite
-            print(f"       ⏳ 品質検証中...", end="")
-            verify_result = await detector.verify_rewrite(problem, rewrite_result)
-            print(f" ✅")
-
-            detector.results['problems'].append({
-                'problem_id': problem_id,
-                'plagiarism_detected': True,
-                'gpt5_check': gpt5_result[:200],
-                'claude_check': claude_result[:200],
-                'rewritten': True,
-                'rewrite_preview': rewrite_result[:300],
-                'verification': verify_result[:200]
-            })
-        else:
-            print(f"       ✅ 著作権遵守確認")
-            detector.results['problems'].append({
+        if not is_plagiarized:
+            print(f"[{pipeline.processed + 1}/{len(targets)}] 問題ID: {problem_id} ✅ 著作権遵守確認")
+            return {
                 'problem_id': problem_id,
                 'plagiarism_detected': False,
                 'gpt5_check': gpt5_result[:100],
                 'claude_check': claude_result[:100],
                 'rewritten': False
-            })
+            }
+
+        print(f"[{pipeline.processed + 1}/{len(targets)}] 問題ID: {problem_id} ⚠️  剽窃の可能性を検出 → 書き換え")
+        detector.results['plagiarism_count'] += 1
 
-        time.sleep(1)  # Rate limiting
+        if args.fake:
+            rewrite_result = "（偽プロバイダ実行のため書き換え省略）"
+            verify_result = "（偽プロバイダ実行のため検証省略）"
+        else:
+            # 書き換え・再検証も GPT-5 の呼び出しなので、チェックと同じレート制限（--gpt5-rpm）に通す
+            rewrite_result = await gpt5_provider.call(detector.generate_rewrite, problem, gpt5_result)
+            verify_result = await gpt5_provider.call(detector.verify_rewrite, problem, rewrite_result)
+        detector.results['rewritten_count'] += 1
+
+        return {
+            'problem_id': problem_id,
+            'plagiarism_detected': True,
+            'gpt5_check': gpt5_result[:200],
+            'claude_check': claude_result[:200],
+            'rewritten': True,
+            'rewrite_preview': rewrite_result[:300],
+            'verification': verify_result[:200]
+        }
+
+    checked = await pipeline.run(
+        targets, context_for=training_context_for, on_checked=handle_checked
+    )
+    checked_by_problem = {id(problem): record for problem, record in zip(targets, checked)}
+
+    for idx, problem in enumerate(problems):
+        record = checked_by_problem.get(id(problem))
+        if record is None:
+            record = {
+                'problem_id': problem.get('problem_id', idx),
+                'plagiarism_detected': False,
+                'gpt5_check': '（事前フィルタ: 講習教材との字句重複なし）',
+                'claude_check': '（事前フィルタ: 講習教材との字句重複なし）',
+                'rewritten': False
+            }
+        score = prefilter_scores.get(id(problem))
+        if score:
+            record['prefilter'] = {
+                'overlap': round(score['overlap'], 3),
+                'lcs': score['lcs'],
+                'theme': score['theme']
+            }
+        detector.results['problems'].append(record)
+
+    detector.results['llm_checked_count'] = len(targets)
+    detector.results['performance'] = pipeline.report()
 
     # Save results
     output_path = Path('/home/planj/patshinko-exam-app/data/PLAGIARISM_CHECK_RESULTS.json')
@@ -345,8 +420,10 @@ async def main():
     print("📊 著作権遵守チェック - 処理結果")
     print("="*70)
     print(f"総問題数: {detector.results['total_problems']}問")
+    print(f"LLMチェック対象: {detector.results['llm_checked_count']}問（事前フィルタ後）")
     print(f"剽窃検出数: {detector.results['plagiarism_count']}問")
     print(f"書き換え実施: {detector.results['rewritten_count']}問")
+    pipeline.print_report()
     print(f"結果保存先: {output_path}")
     print(f"完了時刻: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("")
@@ -358,5 +435,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
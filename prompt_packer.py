@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+トークン予算対応プロンプトパッカー
+複数問題を1リクエストにまとめ、モデルの入力・出力上限に収まるよう自動でグループ化する
+問題単位の構造化（JSON）結果を解析し、解析できなかった問題は単独リクエストで再実行する
+"""
+
+import json
+import re
+
+from batch_job_runner import estimate_tokens
+
+# モデルごとのコンテキスト長・最大出力トークン
+# reasoning: 推論トークンも max_completion_tokens に数えるモデル
+MODEL_LIMITS = {
+    'gpt-5-mini': {'context': 400000, 'output': 128000, 'reasoning': True},
+    'gpt-4o': {'context': 128000, 'output': 16384},
+    'gpt-4o-mini': {'context': 128000, 'output': 16384},
+    'claude-3-5-sonnet-20241022': {'context': 200000, 'output': 8192},
+}
+
+# 推定誤差・応答の揺れに対する安全係数
+SAFETY_MARGIN = 0.8
+
+# 1リクエストあたりの最大問題数（長大な応答での取りこぼし防止）
+DEFAULT_MAX_ITEMS = 40
+
+
+def parse_json_results(text, id_key='problem_id'):
+    """
+    応答テキストから問題単位のJSON結果を取り出す
+
+    ```json ... ``` ブロック、またはテキスト中の最初の配列を解析し
+    {問題ID: 結果} を返す。解析できない場合は空dict
+    """
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', text or '', re.DOTALL)
+    candidate = fenced.group(1) if fenced else (text or '')
+    start = candidate.find('[')
+    end = candidate.rfind(']')
+    if start < 0 or end <= start:
+        return {}
+    try:
+        records = json.loads(candidate[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+
+    results = {}
+    for record in records:
+        if isinstance(record, dict) and id_key in record:
+            results[str(record[id_key])] = record
+    return results
+
+
+class PromptPacker:
+    """モデル上限に合わせて問題をリクエスト単位へ詰め込む"""
+
+    def __init__(self, model, prompt_overhead_tokens, output_tokens_per_item,
+                 max_output_tokens=None, max_items=DEFAULT_MAX_ITEMS, safety_margin=SAFETY_MARGIN):
+        if model not in MODEL_LIMITS:
+            raise ValueError(f"未対応のモデル: {model}（MODEL_LIMITS に上限を登録してください）")
+        limits = MODEL_LIMITS[model]
+        self.model = model
+        self.reasoning = limits.get('reasoning', False)
+        self.prompt_overhead_tokens = prompt_overhead_tokens
+        self.output_tokens_per_item = output_tokens_per_item
+        self.max_output_tokens = min(max_output_tokens or limits['output'], limits['output'])
+        self.context_budget = int(limits['context'] * safety_margin)
+        self.output_budget = int(self.max_output_tokens * safety_margin)
+        self.max_items = max_items
+        self.requests = 0
+        self.retried = 0
+
+    def fits(self, input_tokens, count):
+        """count 問・入力 input_tokens が1リクエストに収まるか"""
+        output_tokens = count * self.output_tokens_per_item
+        total = self.prompt_overhead_tokens + input_tokens + output_tokens
+        return (count <= self.max_items
+                and output_tokens <= self.output_budget
+                and total <= self.context_budget)
+
+    def pack(self, items, cost=None):
+        """アイテムをリクエスト単位のチャンクへ分割（単体で上限超過のものは単独チャンク）"""
+        cost = cost or (lambda item: estimate_tokens(json.dumps(item, ensure_ascii=False)))
+        packs = []
+        chunk = []
+        used = 0
+        for item in items:
+            tokens = cost(item)
+            if chunk and not self.fits(used + tokens, len(chunk) + 1):
+                packs.append(chunk)
+                chunk = []
+                used = 0
+            chunk.append(item)
+            used += tokens
+        if chunk:
+            packs.append(chunk)
+        return packs
+
+    def review(self, chunk, build_prompt, call_model, item_id, parse=parse_json_results):
+        """
+        1チャンクをまとめて送信し、結果が欠けた問題は1問ずつ再送信
+
+        Args:
+            chunk: 問題リスト
+            build_prompt: 問題リスト → プロンプト文字列
+            call_model: (プロンプト, 最大出力トークン) → 応答テキスト
+            item_id: 問題 → ID
+            parse: 応答テキスト → {ID: 結果}
+
+        Returns:
+            {ID: 結果}（単独再送でも解析できなかった問題は含まれない）
+
+        API呼び出し自体の例外はそのまま送出する（ジョブランナー側で中断・再開）
+        """
+        results = self._send(chunk, build_prompt, call_model, parse)
+        expected = {str(item_id(item)) for item in chunk}
+        results = {key: value for key, value in results.items() if key in expected}
+
+        if len(chunk) > 1:
+            for item in chunk:
+                key = str(item_id(item))
+                if key in results:
+                    continue
+                self.retried += 1
+                single = self._send([item], build_prompt, call_model, parse)
+                if key in single:
+                    results[key] = single[key]
+        return results
+
+    def _send(self, chunk, build_prompt, call_model, parse):
+        # 推論モデルは推論トークンも出力上限に数えるため、問題数から見積もらず上限いっぱいを渡す
+        if self.reasoning:
+            max_tokens = self.max_output_tokens
+        else:
+            max_tokens = min(self.max_output_tokens,
+                             max(len(chunk) * self.output_tokens_per_item * 2, self.output_tokens_per_item * 4))
+        self.requests += 1
+        return parse(call_model(build_prompt(chunk), max_tokens))
+
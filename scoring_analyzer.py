@@ -2,6 +2,9 @@
 """
 採点・分析エンジン
 テスト回答を採点し、カテゴリー別にパフォーマンス分析
+
+一括採点（score_bulk）: 正解キーと回答履歴を配列として扱い、正誤判定とカテゴリー別・受験別の集計を
+まとめて行う（解答キー修正後の過去回答の再採点用）。NumPy があればベクトル演算、なければ同じ計算をループで行う
 """
 
 import json
@@ -9,6 +12,11 @@ from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # ==================== 採点エンジン ====================
 
 class ScoringEngine:
@@ -22,12 +30,14 @@ class ScoringEngine:
         if not question.get('options'):
             return None
 
-        # ユーザーが選択した選択肢を取得
+        # ユーザーが選択した選択肢と正解の選択肢を1回の走査で取得
         selected_option = None
+        correct_answer = None
         for opt in question['options']:
-            if opt['id'] == user_answer:
+            if selected_option is None and opt['id'] == user_answer:
                 selected_option = opt
-                break
+            if correct_answer is None and opt.get('isCorrect'):
+                correct_answer = opt['id']
 
         if not selected_option:
             return {
@@ -41,10 +51,6 @@ class ScoringEngine:
         # 正解判定
         is_correct = selected_option.get('isCorrect', False)
 
-        # 正解の選択肢を取得
-        correct_options = [opt for opt in question['options'] if opt.get('isCorrect')]
-        correct_answer = correct_options[0]['id'] if correct_options else None
-
         return {
             'question_id': question['id'],
             'category': question.get('category', 'その他'),
@@ -118,6 +124,181 @@ class ScoringEngine:
 
         return results
 
+    def score_bulk(self, questions, question_ids, user_answers, attempt_ids=None):
+        """
+        回答履歴をまとめて採点
+
+        Args:
+            questions: 問題リスト（score_test と同じ形式。修正後の正解キー）
+            question_ids: 回答ごとの問題ID（配列）
+            user_answers: 回答ごとの選択肢ID（配列）
+            attempt_ids: 回答ごとの受験ID（配列、省略可）。指定すると受験ごとに集計する
+
+        Returns:
+            {
+                'scored_count', 'correct_count', 'incorrect_count', 'accuracy',
+                'is_correct': 回答ごとの正誤（対象外の問題への回答は False）,
+                'scored': 回答ごとに採点対象か,
+                'category_stats': {カテゴリー: {'total', 'correct', 'incorrect', 'accuracy', 'accuracy_percent'}},
+                'attempt_stats': {受験ID: {'answered', 'correct', 'accuracy'}}  # attempt_ids 指定時のみ
+            }
+        """
+        key = AnswerKey(questions)
+        if np is not None:
+            return _score_bulk_numpy(key, question_ids, user_answers, attempt_ids)
+        return _score_bulk_python(key, question_ids, user_answers, attempt_ids)
+
+# ==================== 一括採点 ====================
+
+class AnswerKey:
+    """
+    問題集の正解キーを配列化したもの
+
+    - question_ids: 採点対象の問題ID（選択肢のある問題のみ）
+    - categories / category_codes: カテゴリー名と問題ごとのカテゴリー番号
+    - option_table: {(問題番号, 選択肢ID): 正解なら True}
+    score_answer と同じく、存在しない選択肢を選んだ回答は不正解・カテゴリー「その他」として扱う
+    """
+
+    OTHER_CATEGORY = 'その他'
+
+    def __init__(self, questions):
+        questions = [q for q in questions if q.get('options')]
+        self.question_ids = [q['id'] for q in questions]
+        self.question_index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+
+        self.categories = [self.OTHER_CATEGORY]
+        category_index = {self.OTHER_CATEGORY: 0}
+        self.category_codes = []
+        for question in questions:
+            category = question.get('category', self.OTHER_CATEGORY)
+            if category not in category_index:
+                category_index[category] = len(self.categories)
+                self.categories.append(category)
+            self.category_codes.append(category_index[category])
+
+        self.option_table = {}
+        for i, question in enumerate(questions):
+            for opt in question['options']:
+                self.option_table.setdefault((i, opt['id']), bool(opt.get('isCorrect', False)))
+
+
+def _category_stats(categories, totals, corrects):
+    """カテゴリー別の件数配列 → score_test と同じ形式の category_stats"""
+    stats = {}
+    for category, total, correct in zip(categories, totals, corrects):
+        total, correct = int(total), int(correct)
+        if total == 0:
+            continue
+        accuracy = correct / total
+        stats[category] = {
+            'total': total,
+            'correct': correct,
+            'incorrect': total - correct,
+            'accuracy': accuracy,
+            'accuracy_percent': round(accuracy * 100)
+        }
+    return stats
+
+
+def _bulk_result(key, is_correct, scored, category_totals, category_corrects, attempt_stats):
+    scored_count = int(sum(scored)) if np is None else int(np.count_nonzero(scored))
+    correct_count = int(sum(is_correct)) if np is None else int(np.count_nonzero(is_correct))
+    result = {
+        'scored_count': scored_count,
+        'correct_count': correct_count,
+        'incorrect_count': scored_count - correct_count,
+        'accuracy': correct_count / scored_count if scored_count else 0.0,
+        'is_correct': is_correct,
+        'scored': scored,
+        'category_stats': _category_stats(key.categories, category_totals, category_corrects)
+    }
+    if attempt_stats is not None:
+        result['attempt_stats'] = attempt_stats
+    return result
+
+
+def _attempt_stats(attempts, answered, correct):
+    return {
+        attempt: {
+            'answered': int(n),
+            'correct': int(c),
+            'accuracy': int(c) / int(n) if n else 0.0
+        }
+        for attempt, n, c in zip(attempts, answered, correct)
+    }
+
+
+def _score_bulk_numpy(key, question_ids, user_answers, attempt_ids):
+    question_ids = np.asarray(question_ids)
+    user_answers = np.asarray(user_answers).astype(str)
+
+    # 問題ID・選択肢IDを一意値の番号に変換し、一意値だけ辞書で引く
+    unique_questions, question_inverse = np.unique(question_ids, return_inverse=True)
+    unique_answers, answer_inverse = np.unique(user_answers, return_inverse=True)
+    question_lookup = np.array([key.question_index.get(q, -1) for q in unique_questions.tolist()], dtype=np.int64)
+    question_index = question_lookup[question_inverse]
+    scored = question_index >= 0
+
+    # 正誤表（問題 × 回答に現れた選択肢ID）: 1 = 正解, 0 = 不正解, -1 = 存在しない選択肢
+    answer_index = {answer: j for j, answer in enumerate(unique_answers.tolist())}
+    table = np.full((len(key.question_ids), len(unique_answers)), -1, dtype=np.int8)
+    for (i, option_id), correct in key.option_table.items():
+        j = answer_index.get(str(option_id))
+        if j is not None:
+            table[i, j] = int(correct)
+
+    safe_index = np.where(scored, question_index, 0)
+    cells = table[safe_index, answer_inverse] if len(key.question_ids) else np.full(len(scored), -1)
+    is_correct = scored & (cells == 1)
+
+    category_codes = np.asarray(key.category_codes, dtype=np.int64)
+    categories = np.where(cells >= 0, category_codes[safe_index] if len(key.question_ids) else 0, 0)[scored]
+    category_totals = np.bincount(categories, minlength=len(key.categories))
+    category_corrects = np.bincount(categories, weights=is_correct[scored], minlength=len(key.categories))
+
+    attempt_stats = None
+    if attempt_ids is not None:
+        unique_attempts, attempt_inverse = np.unique(np.asarray(attempt_ids), return_inverse=True)
+        answered = np.bincount(attempt_inverse, weights=scored, minlength=len(unique_attempts))
+        correct = np.bincount(attempt_inverse, weights=is_correct, minlength=len(unique_attempts))
+        attempt_stats = _attempt_stats(unique_attempts.tolist(), answered, correct)
+
+    return _bulk_result(key, is_correct, scored, category_totals, category_corrects, attempt_stats)
+
+
+def _score_bulk_python(key, question_ids, user_answers, attempt_ids):
+    is_correct = []
+    scored = []
+    category_totals = [0] * len(key.categories)
+    category_corrects = [0] * len(key.categories)
+
+    for question_id, answer in zip(question_ids, user_answers):
+        i = key.question_index.get(question_id)
+        if i is None:
+            is_correct.append(False)
+            scored.append(False)
+            continue
+        cell = key.option_table.get((i, answer))
+        category = key.category_codes[i] if cell is not None else 0
+        correct = bool(cell)
+        is_correct.append(correct)
+        scored.append(True)
+        category_totals[category] += 1
+        category_corrects[category] += correct
+
+    attempt_stats = None
+    if attempt_ids is not None:
+        answered = defaultdict(int)
+        corrects = defaultdict(int)
+        for attempt, ok, correct in zip(attempt_ids, scored, is_correct):
+            answered[attempt] += ok
+            corrects[attempt] += correct
+        attempts = sorted(answered)
+        attempt_stats = _attempt_stats(attempts, [answered[a] for a in attempts], [corrects[a] for a in attempts])
+
+    return _bulk_result(key, is_correct, scored, category_totals, category_corrects, attempt_stats)
+
 # ==================== 分析エンジン ====================
 
 class AnalysisEngine:
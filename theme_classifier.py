@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+重み付きキーワードによるテーマ分類器（共通）
+テーマ → キーワードリストの定義を1回コンパイルし、1回の走査で全テーマのスコアを求める
+
+- WeightedKeywordClassifier: スコア最大のテーマを選ぶ（同点は定義順で先のテーマ）
+  score(テーマ) = テキストに含まれるキーワードの重みの合計
+  （重み関数 len で「長いキーワードを優先」、省略時は一致件数）
+- KeywordRuleChain: 上から順にルールを評価し、最初に一致したテーマを選ぶ（if/elif 連鎖の宣言版）
+
+複数テキストの一括分類では「キーワード出現行列 × 重み行列」でスコア行列を求める。
+numpy があれば行列積、なければ同じ計算を Python で行う（結果は同一）
+"""
+
+from keyword_automaton import KeywordAutomaton, ThemeKeywordMatcher
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class WeightedKeywordClassifier:
+    """テーマ定義をコンパイルしたスコア最大選択の分類器"""
+
+    def __init__(self, theme_keywords, weight=None, default_theme=None):
+        """
+        Args:
+            theme_keywords: {テーマ: [キーワード, ...]}（挿入順が同点時の優先順になる）
+            weight: キーワード → 重み の関数（省略時は全キーワード重み1）
+            default_theme: どのキーワードにも一致しないときのテーマ
+        """
+        weight = weight or (lambda kw: 1)
+        weights = {}
+        for theme, keywords in theme_keywords.items():
+            theme_weights = weights.setdefault(theme, {})
+            # 同じキーワードが重複していれば重複分も加算する（`in` ループと同じ採点）
+            for kw in keywords:
+                if kw:
+                    theme_weights[kw] = theme_weights.get(kw, 0) + weight(kw)
+
+        self.default_theme = default_theme
+        self.matcher = ThemeKeywordMatcher(theme_keywords, weights)
+        self.themes = self.matcher.themes
+        self._weights = weights
+        self._weight_matrix = None
+
+    def scores(self, text):
+        """全テーマのスコアをテーマ定義順のリストで返す"""
+        return self.matcher.scores(text)
+
+    def _choose(self, scores):
+        best_index = None
+        best_score = 0
+        for index, score in enumerate(scores):
+            if score > best_score:
+                best_index, best_score = index, score
+        if best_index is None:
+            return self.default_theme, 0
+        return self.themes[best_index], best_score
+
+    def classify(self, text):
+        """(テーマ, スコア) を返す。一致がなければ (default_theme, 0)"""
+        return self._choose(self.scores(text))
+
+    def _dense_weights(self):
+        """キーワード × テーマの重み行列（numpy 用、初回のみ構築）"""
+        if self._weight_matrix is None:
+            keywords = self.matcher.automaton.keywords
+            keyword_index = {kw: i for i, kw in enumerate(keywords)}
+            matrix = np.zeros((len(keywords), len(self.themes)), dtype=np.int64)
+            for column, theme in enumerate(self.themes):
+                for kw, value in self._weights[theme].items():
+                    matrix[keyword_index[kw], column] = value
+            self._weight_matrix = (keyword_index, matrix)
+        return self._weight_matrix
+
+    def score_matrix(self, texts):
+        """テキスト × テーマのスコア行列（行ごとにテーマ定義順のリスト）"""
+        texts = list(texts)
+        if np is None:
+            return [self.scores(text) for text in texts]
+
+        keyword_index, weights = self._dense_weights()
+        presence = np.zeros((len(texts), len(keyword_index)), dtype=np.int64)
+        for row, text in enumerate(texts):
+            for kw in self.matcher.automaton.find(text):
+                presence[row, keyword_index[kw]] = 1
+        return (presence @ weights).tolist()
+
+    def classify_many(self, texts):
+        """複数テキストを一括分類して [(テーマ, スコア), ...] を返す"""
+        return [self._choose(row) for row in self.score_matrix(texts)]
+
+
+class KeywordRuleChain:
+    """順序付きルールの分類器（最初に一致したルールのテーマを返す）"""
+
+    def __init__(self, rules, fallback):
+        """
+        Args:
+            rules: [(テーマ, [キーワード, ...]), ...]（評価順）
+            fallback: どのルールにも一致しないときのテーマ
+        """
+        self.rules = [(theme, frozenset(keywords)) for theme, keywords in rules]
+        self.fallback = fallback
+        self.automaton = KeywordAutomaton(kw for _, keywords in self.rules for kw in keywords)
+
+    def classify(self, text):
+        found = self.automaton.find(text)
+        for theme, keywords in self.rules:
+            if not keywords.isdisjoint(found):
+                return theme
+        return self.fallback